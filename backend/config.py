@@ -84,6 +84,11 @@ class Settings(BaseSettings):
     grainchain_workspace_dir: str = Field(default="/tmp/grainchain_workspaces", env="GRAINCHAIN_WORKSPACE_DIR")
     grainchain_max_instances: int = Field(default=10, env="GRAINCHAIN_MAX_INSTANCES")
     grainchain_instance_timeout: int = Field(default=3600, env="GRAINCHAIN_INSTANCE_TIMEOUT")
+    git_clone_strategy: str = Field(default="auto", env="GIT_CLONE_STRATEGY")  # auto, worktree, partial, shallow, full
+    git_mirror_dir: str = Field(default="/tmp/git_mirrors", env="GIT_MIRROR_DIR")
+    git_mirror_fetch_interval: int = Field(default=60, env="GIT_MIRROR_FETCH_INTERVAL")
+    resource_sample_interval: int = Field(default=15, env="RESOURCE_SAMPLE_INTERVAL")
+    resource_sample_history: int = Field(default=240, env="RESOURCE_SAMPLE_HISTORY")  # samples per resource
     
     # Web-eval-agent (UI testing)
     web_eval_enabled: bool = Field(default=True, env="WEB_EVAL_ENABLED")
@@ -92,12 +97,21 @@ class Settings(BaseSettings):
     web_eval_timeout: int = Field(default=30000, env="WEB_EVAL_TIMEOUT")
     web_eval_viewport_width: int = Field(default=1920, env="WEB_EVAL_VIEWPORT_WIDTH")
     web_eval_viewport_height: int = Field(default=1080, env="WEB_EVAL_VIEWPORT_HEIGHT")
+    web_eval_shard_parallelism: int = Field(default=0, env="WEB_EVAL_SHARD_PARALLELISM")  # 0 = agent workers
+    web_eval_scenarios_per_shard: int = Field(default=5, env="WEB_EVAL_SCENARIOS_PER_SHARD")
+    web_eval_session_ttl: int = Field(default=3600, env="WEB_EVAL_SESSION_TTL")
+    web_eval_max_sessions: int = Field(default=500, env="WEB_EVAL_MAX_SESSIONS")
+    web_eval_cleanup_concurrency: int = Field(default=8, env="WEB_EVAL_CLEANUP_CONCURRENCY")
+    visual_baseline_dir: str = Field(default="/tmp/visual_baselines", env="VISUAL_BASELINE_DIR")
+    visual_baseline_max_commits: int = Field(default=20, env="VISUAL_BASELINE_MAX_COMMITS")
     
     # Graph-sitter (code quality)
     graph_sitter_enabled: bool = Field(default=True, env="GRAPH_SITTER_ENABLED")
+    graph_sitter_url: Optional[str] = Field(default=None, env="GRAPH_SITTER_URL")
     graph_sitter_languages: str = Field(default="typescript,javascript,python,rust,go", env="GRAPH_SITTER_LANGUAGES")
     graph_sitter_max_file_size: int = Field(default=1048576, env="GRAPH_SITTER_MAX_FILE_SIZE")
     graph_sitter_analysis_timeout: int = Field(default=60, env="GRAPH_SITTER_ANALYSIS_TIMEOUT")
+    graph_sitter_file_concurrency: int = Field(default=8, env="GRAPH_SITTER_FILE_CONCURRENCY")  # per-file analyses in flight
     
     # =============================================================================
     # ADVANCED CONFIGURATION (Tier: INTERMEDIATE+)
@@ -110,6 +124,10 @@ class Settings(BaseSettings):
     rate_limit_requests_per_minute: int = Field(default=60, env="RATE_LIMIT_REQUESTS_PER_MINUTE")
     rate_limit_burst: int = Field(default=10, env="RATE_LIMIT_BURST")
     
+    # Circuit Breakers
+    circuit_breaker_max_breakers: int = Field(default=256, env="CIRCUIT_BREAKER_MAX_BREAKERS")
+    circuit_breaker_state_dir: Optional[str] = Field(default=None, env="CIRCUIT_BREAKER_STATE_DIR")
+    
     # Background Tasks
     celery_broker_url: Optional[str] = Field(default=None, env="CELERY_BROKER_URL")
     celery_result_backend: Optional[str] = Field(default=None, env="CELERY_RESULT_BACKEND")
@@ -121,12 +139,22 @@ class Settings(BaseSettings):
     prometheus_enabled: bool = Field(default=False, env="PROMETHEUS_ENABLED")
     prometheus_port: int = Field(default=9090, env="PROMETHEUS_PORT")
     grafana_password: Optional[str] = Field(default=None, env="GRAFANA_PASSWORD")
+    system_metrics_interval: int = Field(default=5, env="SYSTEM_METRICS_INTERVAL")
+    system_metrics_window: int = Field(default=120, env="SYSTEM_METRICS_WINDOW")  # samples kept
+    health_check_interval: int = Field(default=30, env="HEALTH_CHECK_INTERVAL")
+    health_check_stale_after: int = Field(default=90, env="HEALTH_CHECK_STALE_AFTER")
+    health_check_timeout: int = Field(default=10, env="HEALTH_CHECK_TIMEOUT")
+    health_check_jitter: float = Field(default=0.1, env="HEALTH_CHECK_JITTER")  # fraction of interval
+    # Third-party API probes spend request quota, so they run far less often
+    health_check_external_interval: int = Field(default=900, env="HEALTH_CHECK_EXTERNAL_INTERVAL")
     
     # Validation Pipeline
     max_concurrent_validations: int = Field(default=5, env="MAX_CONCURRENT_VALIDATIONS")
     validation_timeout: int = Field(default=1800, env="VALIDATION_TIMEOUT")
     max_validation_retries: int = Field(default=3, env="MAX_VALIDATION_RETRIES")
     retry_delay_seconds: int = Field(default=30, env="RETRY_DELAY_SECONDS")
+    setup_playground_idle_ttl: int = Field(default=600, env="SETUP_PLAYGROUND_IDLE_TTL")  # seconds
+    setup_playground_max_sessions: int = Field(default=20, env="SETUP_PLAYGROUND_MAX_SESSIONS")
     
     # SSL Configuration
     ssl_cert_path: Optional[str] = Field(default=None, env="SSL_CERT_PATH")
@@ -2,12 +2,23 @@
 Base client for external service integrations
 """
 import asyncio
+import time
 import aiohttp
 import structlog
 from typing import Dict, Any, Optional, Union
 from abc import ABC, abstractmethod
 from datetime import datetime, timedelta
 
+from backend.utils.rate_limiter import RequestPriority, rate_limiter_registry
+from backend.utils.retry_strategies import full_jitter_delay, in_retry_scope, retry_budgets
+from backend.utils.http_cache import CachedResponse, conditional_caches
+from backend.utils.metrics import (
+    observe_duration,
+    upstream_request_duration,
+    upstream_retries,
+    upstream_retries_abandoned
+)
+
 logger = structlog.get_logger(__name__)
 
 
@@ -41,18 +52,30 @@ class BaseClient(ABC):
                  api_key: Optional[str] = None,
                  timeout: int = 30,
                  max_retries: int = 3,
-                 retry_delay: float = 1.0):
+                 retry_delay: float = 1.0,
+                 max_retry_delay: float = 30.0,
+                 request_deadline: Optional[float] = None,
+                 conditional_cache: bool = False):
         self.service_name = service_name
         self.base_url = base_url.rstrip('/')
         self.api_key = api_key
         self.timeout = timeout
         self.max_retries = max_retries
         self.retry_delay = retry_delay
+        self.max_retry_delay = max_retry_delay
+        # Total time allowed for a request including all retries
+        self.request_deadline = request_deadline or timeout * 2
         
         self.logger = logger.bind(service=service_name)
         self._session: Optional[aiohttp.ClientSession] = None
         self._rate_limit_reset: Optional[datetime] = None
         self._rate_limit_remaining: int = 1000  # Default high value
+        
+        # Token bucket and retry budget shared by every client of this upstream (and token) in the process
+        self.rate_limiter = rate_limiter_registry.get(service_name, api_key)
+        self.retry_budget = retry_budgets.get(service_name)
+        # Validators and bodies for conditional GETs (ETag / Last-Modified)
+        self.http_cache = conditional_caches.get(service_name) if conditional_cache else None
     
     async def __aenter__(self):
         """Async context manager entry"""
@@ -89,40 +112,149 @@ class BaseClient(ABC):
                            data: Optional[Dict[str, Any]] = None,
                            params: Optional[Dict[str, Any]] = None,
                            headers: Optional[Dict[str, str]] = None,
-                           retry_count: int = 0) -> Dict[str, Any]:
-        """Make HTTP request with retry logic and rate limiting"""
+                           priority: RequestPriority = RequestPriority.INTERACTIVE,
+                           deadline: Optional[float] = None,
+                           response_headers: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
+        """Make HTTP request with budgeted retries, a total deadline and rate limiting.
+        
+        If ``response_headers`` is given it is filled with the final response's headers.
+        """
         await self._ensure_session()
         
-        # Check rate limiting
-        if self._rate_limit_reset and datetime.utcnow() < self._rate_limit_reset:
+        url = f"{self.base_url}/{endpoint.lstrip('/')}"
+        request_headers = self._get_default_headers()
+        if headers:
+            request_headers.update(headers)
+        
+        cache_key = None
+        cache_entry = None
+        if self.http_cache is not None and method.upper() == 'GET':
+            cache_key = self.http_cache.make_key(url, params, request_headers.get("Authorization"))
+            cache_entry = self.http_cache.get(cache_key)
+            if cache_entry is not None:
+                request_headers.update(self.http_cache.conditional_headers(cache_entry))
+        
+        deadline_at = time.monotonic() + (deadline or self.request_deadline)
+        # An outer retry handler already owns retries for this call
+        max_retries = 0 if in_retry_scope() else self.max_retries
+        self.retry_budget.record_request()
+        
+        attempt = 0
+        started = time.perf_counter()
+        outcome = "error"
+        try:
+            while True:
+                await self._wait_for_rate_limit(priority, deadline_at)
+                
+                remaining = deadline_at - time.monotonic()
+                if remaining <= 0:
+                    self._record_deadline_exceeded()
+                    raise APIError(f"Request deadline exceeded for {self.service_name}")
+                
+                try:
+                    result = await self._send_request(method, url, data, params, request_headers,
+                                                      min(self.timeout, remaining), attempt,
+                                                      cache_key, cache_entry, response_headers)
+                    outcome = "success"
+                    return result
+                except APIError as e:
+                    if attempt >= max_retries or not self._is_retryable(e):
+                        raise
+                
+                    if isinstance(e, RateLimitError) and e.retry_after:
+                        delay = float(e.retry_after)
+                    else:
+                        delay = full_jitter_delay(attempt, self.retry_delay, self.max_retry_delay)
+                
+                    if time.monotonic() + delay >= deadline_at:
+                        self._record_deadline_exceeded()
+                        self.logger.warning("Retry would exceed request deadline, giving up",
+                                          error=str(e),
+                                          retry_count=attempt)
+                        raise
+                
+                    if not self.retry_budget.try_acquire_retry():
+                        upstream_retries_abandoned.labels(self.service_name, "budget_exhausted").inc()
+                        self.logger.warning("Retry budget exhausted, giving up",
+                                          error=str(e),
+                                          retry_count=attempt)
+                        raise
+                
+                    self.logger.warning("Request failed, retrying",
+                                      status_code=e.status_code,
+                                      error=str(e),
+                                      delay=round(delay, 3),
+                                      retry_count=attempt)
+                    upstream_retries.labels(self.service_name).inc()
+                    attempt += 1
+                    await asyncio.sleep(delay)
+        finally:
+            observe_duration(upstream_request_duration, started, self.service_name, method.upper(), outcome)
+    
+    def _record_deadline_exceeded(self) -> None:
+        self.retry_budget.record_deadline_exceeded()
+        upstream_retries_abandoned.labels(self.service_name, "deadline_exceeded").inc()
+    
+    async def _wait_for_rate_limit(self, priority: RequestPriority, deadline_at: float) -> None:
+        """Wait for the shared token bucket, or the last reported reset without one.
+        
+        Fails at once with ``APIError`` if the wait would run past ``deadline_at``.
+        """
+        remaining = deadline_at - time.monotonic()
+        if self.rate_limiter is not None:
+            try:
+                waited = await self.rate_limiter.acquire(priority, timeout=max(remaining, 0.0))
+            except asyncio.TimeoutError:
+                self._record_deadline_exceeded()
+                raise APIError(f"Request deadline exceeded for {self.service_name} "
+                               f"while waiting for the rate limiter")
+            if waited:
+                self.logger.debug("Request throttled by rate limiter",
+                                wait_time=round(waited, 3),
+                                priority=priority.value)
+        elif self._rate_limit_reset and datetime.utcnow() < self._rate_limit_reset:
             if self._rate_limit_remaining <= 0:
                 wait_time = (self._rate_limit_reset - datetime.utcnow()).total_seconds()
+                if wait_time >= remaining:
+                    self._record_deadline_exceeded()
+                    raise APIError(f"Request deadline exceeded for {self.service_name} "
+                                   f"while waiting for the rate limit to reset")
                 self.logger.warning("Rate limit exceeded, waiting",
                                   wait_time=wait_time,
                                   service=self.service_name)
                 await asyncio.sleep(wait_time)
-        
-        url = f"{self.base_url}/{endpoint.lstrip('/')}"
-        request_headers = self._get_default_headers()
-        if headers:
-            request_headers.update(headers)
-        
+    
+    async def _send_request(self,
+                            method: str,
+                            url: str,
+                            data: Optional[Dict[str, Any]],
+                            params: Optional[Dict[str, Any]],
+                            headers: Dict[str, str],
+                            timeout: float,
+                            attempt: int,
+                            cache_key: Optional[str] = None,
+                            cache_entry: Optional[CachedResponse] = None,
+                            response_headers: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
+        """Send a single HTTP request and map error responses to exceptions"""
         try:
             self.logger.debug("Making API request",
                             method=method,
                             url=url,
-                            retry_count=retry_count)
+                            retry_count=attempt)
             
             async with self._session.request(
                 method=method,
                 url=url,
                 json=data,
                 params=params,
-                headers=request_headers
+                headers=headers,
+                timeout=aiohttp.ClientTimeout(total=timeout)
             ) as response:
                 
                 # Update rate limit info from headers
                 self._update_rate_limit_info(response.headers)
+                if response_headers is not None:
+                    response_headers.update(response.headers)
                 
                 response_text = await response.text()
                 
@@ -130,6 +262,17 @@ class BaseClient(ABC):
                 if response.status == 204:  # No content
                     return {}
                 
+                # Not modified: serve the cached body
+                if response.status == 304 and cache_entry is not None:
+                    self.http_cache.record_revalidated(cache_entry)
+                    if response_headers is not None and cache_entry.link and "Link" not in response_headers:
+                        response_headers["Link"] = cache_entry.link
+                    if self.rate_limiter is not None:
+                        # GitHub does not charge 304s against the quota
+                        self.rate_limiter.refund()
+                    self.logger.debug("API response not modified, served from cache", url=url)
+                    return cache_entry.data()
+                
                 try:
                     response_data = await response.json() if response_text else {}
                 except Exception:
@@ -137,6 +280,8 @@ class BaseClient(ABC):
                 
                 # Handle successful responses
                 if 200 <= response.status < 300:
+                    if cache_key is not None:
+                        self.http_cache.store(cache_key, response_text, response.headers)
                     self.logger.debug("API request successful",
                                     status_code=response.status,
                                     response_size=len(response_text))
@@ -145,54 +290,43 @@ class BaseClient(ABC):
                 # Handle rate limiting
                 if response.status == 429:
                     retry_after = self._get_retry_after(response.headers)
-                    if retry_count < self.max_retries:
-                        self.logger.warning("Rate limited, retrying",
-                                          retry_after=retry_after,
-                                          retry_count=retry_count)
-                        await asyncio.sleep(retry_after or self.retry_delay)
-                        return await self._make_request(method, endpoint, data, params, headers, retry_count + 1)
-                    else:
-                        raise RateLimitError(
-                            f"Rate limit exceeded for {self.service_name}",
-                            retry_after=retry_after
-                        )
+                    if self.rate_limiter is not None:
+                        self.rate_limiter.penalize(retry_after or self.retry_delay)
+                    raise RateLimitError(
+                        f"Rate limit exceeded for {self.service_name}",
+                        retry_after=retry_after
+                    )
                 
                 # Handle authentication errors
                 if response.status == 401:
                     raise AuthenticationError(f"Authentication failed for {self.service_name}")
                 
-                # Handle other client/server errors
                 error_message = self._extract_error_message(response_data)
-                if response.status >= 500 and retry_count < self.max_retries:
-                    # Retry server errors
-                    self.logger.warning("Server error, retrying",
-                                      status_code=response.status,
-                                      error=error_message,
-                                      retry_count=retry_count)
-                    await asyncio.sleep(self.retry_delay * (2 ** retry_count))  # Exponential backoff
-                    return await self._make_request(method, endpoint, data, params, headers, retry_count + 1)
-                
                 raise APIError(
                     f"{self.service_name} API error: {error_message}",
                     status_code=response.status,
                     response_data=response_data
                 )
         
-        except aiohttp.ClientError as e:
-            if retry_count < self.max_retries:
-                self.logger.warning("Network error, retrying",
-                                  error=str(e),
-                                  retry_count=retry_count)
-                await asyncio.sleep(self.retry_delay * (2 ** retry_count))
-                return await self._make_request(method, endpoint, data, params, headers, retry_count + 1)
-            
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
             raise APIError(f"Network error for {self.service_name}: {str(e)}")
     
+    def _is_retryable(self, error: APIError) -> bool:
+        """Retry rate limits, server errors and network errors (no status code)"""
+        if isinstance(error, AuthenticationError):
+            return False
+        if isinstance(error, RateLimitError):
+            return True
+        return error.status_code is None or error.status_code >= 500
+    
     def _update_rate_limit_info(self, headers: Dict[str, str]) -> None:
         """Update rate limit information from response headers"""
+        remaining_seen = False
+        
         # GitHub-style rate limiting
         if 'x-ratelimit-remaining' in headers:
             self._rate_limit_remaining = int(headers['x-ratelimit-remaining'])
+            remaining_seen = True
         if 'x-ratelimit-reset' in headers:
             reset_timestamp = int(headers['x-ratelimit-reset'])
             self._rate_limit_reset = datetime.utcfromtimestamp(reset_timestamp)
@@ -200,9 +334,17 @@ class BaseClient(ABC):
         # Generic rate limiting
         elif 'ratelimit-remaining' in headers:
             self._rate_limit_remaining = int(headers['ratelimit-remaining'])
+            remaining_seen = True
         if 'ratelimit-reset' in headers:
             reset_timestamp = int(headers['ratelimit-reset'])
             self._rate_limit_reset = datetime.utcfromtimestamp(reset_timestamp)
+        
+        # Seed the shared token bucket with the upstream's view of the quota
+        if remaining_seen and self.rate_limiter is not None:
+            reset_at = None
+            if self._rate_limit_reset:
+                reset_at = (self._rate_limit_reset - datetime(1970, 1, 1)).total_seconds()
+            self.rate_limiter.update_from_headers(self._rate_limit_remaining, reset_at)
     
     def _get_retry_after(self, headers: Dict[str, str]) -> Optional[int]:
         """Extract retry-after value from headers"""
@@ -257,7 +399,10 @@ class BaseClient(ABC):
                 "status": "healthy",
                 "response_time_ms": round(response_time, 2),
                 "rate_limit_remaining": self._rate_limit_remaining,
-                "rate_limit_reset": self._rate_limit_reset.isoformat() if self._rate_limit_reset else None
+                "rate_limit_reset": self._rate_limit_reset.isoformat() if self._rate_limit_reset else None,
+                "rate_limiter": self.rate_limiter.get_stats() if self.rate_limiter else None,
+                "retry_budget": self.retry_budget.get_stats(),
+                "http_cache": self.http_cache.get_stats() if self.http_cache else None
             }
         except Exception as e:
             return {
@@ -6,6 +6,7 @@ import structlog
 from typing import Optional, Dict, Any
 
 from backend.config import get_settings
+from backend.utils.rate_limiter import rate_limiter_registry
 
 logger = structlog.get_logger(__name__)
 settings = get_settings()
@@ -18,6 +19,7 @@ class CloudflareClient:
         self.api_key = settings.cloudflare_api_key
         self.account_id = settings.cloudflare_account_id
         self.base_url = "https://api.cloudflare.com/client/v4"
+        self.rate_limiter = rate_limiter_registry.get("cloudflare")
         
         self.headers = {
             "Authorization": f"Bearer {self.api_key}",
@@ -36,6 +38,7 @@ class CloudflareClient:
             }
             
             async with httpx.AsyncClient() as client:
+                await self.rate_limiter.acquire()
                 response = await client.put(
                     url,
                     headers={"Authorization": f"Bearer {self.api_key}"},
@@ -60,6 +63,7 @@ class CloudflareClient:
             url = f"{self.base_url}/accounts/{self.account_id}/workers/scripts/{worker_name}"
             
             async with httpx.AsyncClient() as client:
+                await self.rate_limiter.acquire()
                 response = await client.get(url, headers=self.headers, timeout=30.0)
                 
                 if response.status_code == 200:
@@ -78,6 +82,7 @@ class CloudflareClient:
             url = f"{self.base_url}/accounts/{self.account_id}/workers/scripts/{worker_name}"
             
             async with httpx.AsyncClient() as client:
+                await self.rate_limiter.acquire()
                 response = await client.delete(url, headers=self.headers, timeout=30.0)
                 
                 if response.status_code == 200:
@@ -97,6 +102,7 @@ class CloudflareClient:
             url = f"{self.base_url}/accounts/{self.account_id}/workers/scripts"
             
             async with httpx.AsyncClient() as client:
+                await self.rate_limiter.acquire()
                 response = await client.get(url, headers=self.headers, timeout=30.0)
                 
                 if response.status_code == 200:
@@ -8,6 +8,7 @@ import structlog
 
 from .base_client import BaseClient, APIError
 from backend.config import get_settings
+from backend.utils.rate_limiter import RequestPriority
 
 logger = structlog.get_logger(__name__)
 settings = get_settings()
@@ -83,10 +84,13 @@ class CodegenClient(BaseClient):
                             target=target[:100])
             raise
     
-    async def get_agent_run(self, run_id: str) -> Dict[str, Any]:
+    async def get_agent_run(self,
+                            run_id: str,
+                            priority: RequestPriority = RequestPriority.INTERACTIVE) -> Dict[str, Any]:
         """Get agent run details"""
         try:
-            response = await self.get(f"/organizations/{self.org_id}/agent-runs/{run_id}")
+            response = await self.get(f"/organizations/{self.org_id}/agent-runs/{run_id}",
+                                      priority=priority)
             return response
         except Exception as e:
             self.logger.error("Failed to get agent run",
@@ -205,7 +209,7 @@ class CodegenClient(BaseClient):
         
         while True:
             try:
-                run_data = await self.get_agent_run(run_id)
+                run_data = await self.get_agent_run(run_id, priority=RequestPriority.BACKGROUND)
                 status = run_data.get("status")
                 
                 # Check if completed
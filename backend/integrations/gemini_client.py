@@ -1,21 +1,175 @@
 """
 Gemini API client for AI validation and error analysis
 """
+import asyncio
 import os
+import time
 import httpx
 import logging
-from typing import Dict, Any, Optional
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import AsyncIterator, Dict, Any, Optional
+
+from backend.utils.metrics import llm_queue_wait, llm_request_duration, register_queue
+from backend.utils.rate_limiter import rate_limiter_registry
+from backend.utils.response_cache import ResponseCache
 
 logger = logging.getLogger(__name__)
 
+# Bump when a prompt template changes so cached responses to the old prompt are not reused
+PROMPT_VERSIONS = {
+    "analyze_error": "1"
+}
+
+
+@dataclass
+class RequestSlot:
+    """A granted concurrency slot: the shared client and the request's deadline"""
+    client: httpx.AsyncClient
+    operation: str
+    deadline: float  # time.monotonic() by which the request must finish
+    queued_at: float = field(default_factory=time.perf_counter)
+
+    def remaining(self) -> float:
+        return self.deadline - time.monotonic()
+
+    def timeout(self, limit: float) -> float:
+        """HTTP timeout for the call: ``limit`` cut short by the deadline"""
+        return max(min(limit, self.remaining()), 0.001)
+
+
+class GeminiConnection:
+    """Long-lived HTTP client and concurrency limit shared by all GeminiClient instances"""
+
+    def __init__(self, max_concurrency: int = 4):
+        self.max_concurrency = max_concurrency
+        self._client: Optional[httpx.AsyncClient] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self.waiting = 0
+        self.in_flight = 0
+        self.stats = {"granted": 0, "queue_timeouts": 0}
+
+    def _bind(self) -> None:
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            # Clients and semaphores belong to the event loop that created them
+            self._loop = loop
+            self._client = None
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                limits=httpx.Limits(max_connections=self.max_concurrency,
+                                    max_keepalive_connections=self.max_concurrency)
+            )
+
+    def client(self) -> httpx.AsyncClient:
+        self._bind()
+        return self._client
+
+    @asynccontextmanager
+    async def slot(self, operation: str, deadline: float) -> AsyncIterator[RequestSlot]:
+        """Wait for a free slot, giving up once ``deadline`` seconds have passed"""
+        self._bind()
+        slot = RequestSlot(self._client, operation, time.monotonic() + deadline)
+        semaphore = self._semaphore
+        self.waiting += 1
+        try:
+            await asyncio.wait_for(semaphore.acquire(), max(slot.remaining(), 0.001))
+        except asyncio.TimeoutError:
+            self.stats["queue_timeouts"] += 1
+            raise httpx.PoolTimeout(f"Timed out after {deadline}s waiting for a Gemini request slot")
+        finally:
+            self.waiting -= 1
+        self.stats["granted"] += 1
+        self.in_flight += 1
+        try:
+            yield slot
+        finally:
+            self.in_flight -= 1
+            semaphore.release()
+
+    async def close(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {"max_concurrency": self.max_concurrency, "waiting": self.waiting,
+                "in_flight": self.in_flight, **self.stats}
+
+
 class GeminiClient:
     def __init__(self):
         self.api_key = os.getenv("GEMINI_API_KEY")
         self.base_url = "https://generativelanguage.googleapis.com/v1beta"
+        self.rate_limiter = rate_limiter_registry.get("gemini")
+        # Upper bound on tokens of log/context text embedded in a single prompt
+        self.prompt_token_budget = int(os.getenv("GEMINI_PROMPT_TOKEN_BUDGET", "8000"))
+        self.response_cache = gemini_response_cache
+        self.connection = gemini_connection
+        # Deadline covers queueing for a slot and the model call itself
+        self.request_deadline = float(os.getenv("GEMINI_REQUEST_DEADLINE", "60"))
+        self.request_timeout = float(os.getenv("GEMINI_REQUEST_TIMEOUT", "30"))
         
         if not self.api_key:
             logger.warning("GEMINI_API_KEY not found, using mock responses")
     
+    async def __aenter__(self):
+        return self
+    
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        # The connection is shared; it is closed once at shutdown
+        pass
+    
+    async def _throttled_post(self, slot: RequestSlot, url: str, **kwargs) -> httpx.Response:
+        """POST through the shared Gemini rate limiter within the slot's deadline"""
+        try:
+            await asyncio.wait_for(self.rate_limiter.acquire(), max(slot.remaining(), 0.001))
+        except asyncio.TimeoutError:
+            raise httpx.PoolTimeout(f"Timed out waiting for the Gemini rate limiter ({slot.operation})")
+        llm_queue_wait.labels("gemini", slot.operation).observe(time.perf_counter() - slot.queued_at)
+        
+        started = time.perf_counter()
+        outcome = "error"
+        try:
+            response = await slot.client.post(url, **kwargs)
+            outcome = str(response.status_code)
+        except httpx.TimeoutException:
+            outcome = "timeout"
+            raise
+        finally:
+            llm_request_duration.labels("gemini", slot.operation, outcome).observe(time.perf_counter() - started)
+        
+        if response.status_code == 429:
+            retry_after = response.headers.get("retry-after")
+            self.rate_limiter.penalize(float(retry_after) if retry_after and retry_after.isdigit() else None)
+        return response
+    
+    async def health_check(self) -> Dict[str, Any]:
+        """Check the API key and reachability with a model metadata request"""
+        try:
+            started = time.perf_counter()
+            response = await self.connection.client().get(
+                f"{self.base_url}/models/gemini-pro",
+                params={"key": self.api_key},
+                timeout=min(self.request_timeout, 10.0)
+            )
+            response.raise_for_status()
+            return {
+                "service": "gemini",
+                "status": "healthy",
+                "response_time_ms": round((time.perf_counter() - started) * 1000, 2),
+                "connection": self.connection.get_stats(),
+                "rate_limiter": self.rate_limiter.get_stats() if self.rate_limiter else None
+            }
+        except Exception as e:
+            return {
+                "service": "gemini",
+                "status": "unhealthy",
+                "error": str(e)
+            }
+    
     async def analyze_deployment(self, prompt: str) -> Dict[str, Any]:
         """Analyze deployment logs and determine success/failure"""
         try:
@@ -32,7 +186,7 @@ class GeminiClient:
                     ]
                 }
             
-            async with httpx.AsyncClient() as client:
+            async with self.connection.slot("analyze_deployment", self.request_deadline) as slot:
                 headers = {
                     "Content-Type": "application/json",
                 }
@@ -72,12 +226,13 @@ class GeminiClient:
                     }
                 }
                 
-                response = await client.post(
+                response = await self._throttled_post(
+                    slot,
                     f"{self.base_url}/models/gemini-pro:generateContent",
                     headers=headers,
                     json=payload,
                     params={"key": self.api_key},
-                    timeout=30.0
+                    timeout=slot.timeout(self.request_timeout)
                 )
                 
                 response.raise_for_status()
@@ -123,8 +278,13 @@ class GeminiClient:
                 "recommendations": ["Manual review required"]
             }
     
-    async def analyze_error(self, error_context: str) -> Dict[str, Any]:
-        """Analyze error and provide fix recommendations"""
+    async def analyze_error(self, error_context: str, signature: Optional[str] = None) -> Dict[str, Any]:
+        """Analyze error and provide fix recommendations.
+
+        Responses are cached by the normalized fingerprint of ``signature``
+        (default: the error context), so a recurring failure is diagnosed once.
+        """
+        cache_key = None
         try:
             if not self.api_key:
                 # Return mock error analysis
@@ -140,7 +300,16 @@ class GeminiClient:
                     "estimated_fix_time": "15-30 minutes"
                 }
             
-            async with httpx.AsyncClient() as client:
+            if self.response_cache is not None:
+                cache_key = ResponseCache.make_key(
+                    "analyze_error", PROMPT_VERSIONS["analyze_error"], signature or error_context
+                )
+                cached = self.response_cache.get(cache_key)
+                if cached is not None:
+                    logger.info("Reused cached Gemini error analysis")
+                    return cached
+            
+            async with self.connection.slot("analyze_error", self.request_deadline) as slot:
                 headers = {
                     "Content-Type": "application/json",
                 }
@@ -184,12 +353,13 @@ class GeminiClient:
                     }
                 }
                 
-                response = await client.post(
+                response = await self._throttled_post(
+                    slot,
                     f"{self.base_url}/models/gemini-pro:generateContent",
                     headers=headers,
                     json=payload,
                     params={"key": self.api_key},
-                    timeout=30.0
+                    timeout=slot.timeout(self.request_timeout)
                 )
                 
                 response.raise_for_status()
@@ -204,6 +374,8 @@ class GeminiClient:
                     import json
                     analysis = json.loads(text.strip())
                     logger.info("Completed error analysis with Gemini")
+                    if cache_key and isinstance(analysis, dict):
+                        self.response_cache.put(cache_key, analysis)
                     return analysis
                 except json.JSONDecodeError:
                     # Fallback if JSON parsing fails
@@ -248,7 +420,7 @@ class GeminiClient:
                     ]
                 }
             
-            async with httpx.AsyncClient() as client:
+            async with self.connection.slot("validate_code_quality", self.request_deadline) as slot:
                 headers = {
                     "Content-Type": "application/json",
                 }
@@ -294,12 +466,13 @@ class GeminiClient:
                     }
                 }
                 
-                response = await client.post(
+                response = await self._throttled_post(
+                    slot,
                     f"{self.base_url}/models/gemini-pro:generateContent",
                     headers=headers,
                     json=payload,
                     params={"key": self.api_key},
-                    timeout=30.0
+                    timeout=slot.timeout(self.request_timeout)
                 )
                 
                 response.raise_for_status()
@@ -350,7 +523,7 @@ class GeminiClient:
                     ]
                 }
             
-            async with httpx.AsyncClient() as client:
+            async with self.connection.slot("generate_test_suggestions", self.request_deadline) as slot:
                 headers = {
                     "Content-Type": "application/json",
                 }
@@ -386,12 +559,13 @@ class GeminiClient:
                     }
                 }
                 
-                response = await client.post(
+                response = await self._throttled_post(
+                    slot,
                     f"{self.base_url}/models/gemini-pro:generateContent",
                     headers=headers,
                     json=payload,
                     params={"key": self.api_key},
-                    timeout=30.0
+                    timeout=slot.timeout(self.request_timeout)
                 )
                 
                 response.raise_for_status()
@@ -421,3 +595,21 @@ class GeminiClient:
                 "testing_strategy": []
             }
 
+
+def _create_response_cache() -> Optional[ResponseCache]:
+    if os.getenv("GEMINI_CACHE_ENABLED", "true").lower() not in ("true", "1", "yes"):
+        return None
+    return ResponseCache(
+        "gemini",
+        path=os.getenv("GEMINI_CACHE_PATH", "/tmp/codegencicd/gemini_response_cache.json") or None,
+        ttl=float(os.getenv("GEMINI_CACHE_TTL", str(7 * 24 * 3600))),
+        max_entries=int(os.getenv("GEMINI_CACHE_MAX_ENTRIES", "2000"))
+    )
+
+
+# Global Gemini response cache instance, shared by all clients
+gemini_response_cache = _create_response_cache()
+
+# Global Gemini connection instance; caps concurrent model calls across the process
+gemini_connection = GeminiConnection(max_concurrency=int(os.getenv("GEMINI_MAX_CONCURRENCY", "4")))
+register_queue("gemini_requests", lambda: gemini_connection.waiting)
@@ -1,7 +1,12 @@
 """
 GitHub API client for CodegenCICD Dashboard
 """
-from typing import Dict, Any, Optional, List
+import asyncio
+import hashlib
+import re
+import time
+from collections import OrderedDict
+from typing import Dict, Any, Optional, List, AsyncIterator, Callable, Awaitable, Tuple
 import structlog
 
 from .base_client import BaseClient, APIError
@@ -10,6 +15,71 @@ from backend.config import get_settings
 logger = structlog.get_logger(__name__)
 settings = get_settings()
 
+_LAST_PAGE_PATTERN = re.compile(r'<[^>]*[?&]page=(\d+)[^>]*>;\s*rel="last"')
+
+
+def parse_last_page(link_header: Optional[str]) -> int:
+    """Get the last page number from a GitHub ``Link`` header, or 1 if there is none"""
+    if not link_header:
+        return 1
+    match = _LAST_PAGE_PATTERN.search(link_header)
+    return int(match.group(1)) if match else 1
+
+
+class RepositoryListCache:
+    """Per-token repository lists served stale-while-revalidate"""
+    
+    def __init__(self, ttl: float = 60.0, max_stale: float = 900.0, max_entries: int = 256):
+        self.ttl = ttl
+        self.max_stale = max_stale
+        self.max_entries = max_entries
+        self.entries: "OrderedDict[str, Tuple[float, List[Dict[str, Any]]]]" = OrderedDict()
+        self._refreshing: Dict[str, asyncio.Task] = {}
+        self.logger = logger.bind(component="repository_list_cache")
+    
+    @staticmethod
+    def make_key(token: str, org: Optional[str]) -> str:
+        return f"{hashlib.sha256(token.encode()).hexdigest()[:16]}:{org or ''}"
+    
+    def get(self, key: str) -> Optional[Tuple[float, List[Dict[str, Any]]]]:
+        """Get (age in seconds, repositories) if an entry is young enough to serve"""
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+        age = time.monotonic() - entry[0]
+        if age > self.max_stale:
+            del self.entries[key]
+            return None
+        self.entries.move_to_end(key)
+        return age, entry[1]
+    
+    def put(self, key: str, repositories: List[Dict[str, Any]]) -> None:
+        self.entries[key] = (time.monotonic(), repositories)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+    
+    def refresh_in_background(self,
+                              key: str,
+                              loader: Callable[[], Awaitable[List[Dict[str, Any]]]]) -> None:
+        """Reload an entry without blocking the caller; one refresh per key at a time"""
+        if key in self._refreshing:
+            return
+        
+        async def refresh():
+            try:
+                self.put(key, await loader())
+            except Exception as e:
+                self.logger.warning("Background repository refresh failed", error=str(e))
+            finally:
+                self._refreshing.pop(key, None)
+        
+        self._refreshing[key] = asyncio.create_task(refresh())
+
+
+# Shared across client instances, which routers create per request
+repository_list_cache = RepositoryListCache()
+
 
 class GitHubClient(BaseClient):
     """Client for interacting with GitHub API"""
@@ -25,7 +95,8 @@ class GitHubClient(BaseClient):
             base_url="https://api.github.com",
             api_key=self.token,
             timeout=30,
-            max_retries=3
+            max_retries=3,
+            conditional_cache=True
         )
     
     def _get_default_headers(self) -> Dict[str, str]:
@@ -80,6 +151,101 @@ class GitHubClient(BaseClient):
                             error=str(e))
             raise
     
+    async def paginate(self,
+                       endpoint: str,
+                       params: Optional[Dict[str, Any]] = None,
+                       per_page: int = 100,
+                       max_concurrency: int = 4) -> AsyncIterator[List[Dict[str, Any]]]:
+        """Yield pages of a list endpoint as they arrive.
+        
+        The first page's ``Link`` header gives the last page number; the remaining
+        pages are then fetched concurrently (still subject to the shared rate limiter).
+        """
+        page_params = {**(params or {}), "per_page": per_page, "page": 1}
+        headers: Dict[str, str] = {}
+        first_page = await self.get(endpoint, params=page_params, response_headers=headers)
+        yield first_page if isinstance(first_page, list) else []
+        
+        last_page = parse_last_page(headers.get("Link") or headers.get("link"))
+        if last_page <= 1:
+            return
+        
+        semaphore = asyncio.Semaphore(max_concurrency)
+        
+        async def fetch_page(page: int) -> Any:
+            async with semaphore:
+                return await self.get(endpoint, params={**page_params, "page": page})
+        
+        tasks = [asyncio.create_task(fetch_page(page)) for page in range(2, last_page + 1)]
+        try:
+            for next_page in asyncio.as_completed(tasks):
+                page_items = await next_page
+                yield page_items if isinstance(page_items, list) else []
+        finally:
+            for task in tasks:
+                task.cancel()
+    
+    async def iter_repositories(self,
+                                org: Optional[str] = None,
+                                per_page: int = 100,
+                                max_concurrency: int = 4) -> AsyncIterator[Dict[str, Any]]:
+        """Stream every repository for the user or organization, fetching pages in parallel"""
+        endpoint = f"/orgs/{org}/repos" if org else "/user/repos"
+        params = {"sort": "updated", "direction": "desc"}
+        async for page in self.paginate(endpoint, params, per_page, max_concurrency):
+            for repository in page:
+                yield repository
+    
+    async def _collect_repositories(self, org: Optional[str] = None) -> List[Dict[str, Any]]:
+        repositories = [repository async for repository in self.iter_repositories(org)]
+        # Pages complete out of order, so restore the most-recently-updated ordering
+        repositories.sort(key=lambda r: r.get("updated_at") or "", reverse=True)
+        return repositories
+    
+    async def list_all_repositories(self,
+                                    org: Optional[str] = None,
+                                    use_cache: bool = True) -> List[Dict[str, Any]]:
+        """List every repository, served from a per-token cache refreshed in the background"""
+        cache_key = repository_list_cache.make_key(self.token, org)
+        cached = repository_list_cache.get(cache_key) if use_cache else None
+        if cached is not None:
+            age, repositories = cached
+            if age > repository_list_cache.ttl:
+                token = self.token
+                
+                async def reload() -> List[Dict[str, Any]]:
+                    async with GitHubClient(token) as client:
+                        return await client._collect_repositories(org)
+                
+                repository_list_cache.refresh_in_background(cache_key, reload)
+            # Shallow copies so callers can annotate entries without touching the cache
+            return [dict(repository) for repository in repositories]
+        
+        try:
+            repositories = await self._collect_repositories(org)
+        except Exception as e:
+            self.logger.error("Failed to list all repositories",
+                            org=org,
+                            error=str(e))
+            raise
+        repository_list_cache.put(cache_key, repositories)
+        return [dict(repository) for repository in repositories]
+    
+    async def stream_repositories(self, org: Optional[str] = None) -> AsyncIterator[Dict[str, Any]]:
+        """Stream repositories from the cache when warm, otherwise live while filling it"""
+        cache_key = repository_list_cache.make_key(self.token, org)
+        if repository_list_cache.get(cache_key) is not None:
+            for repository in await self.list_all_repositories(org):
+                yield repository
+            return
+        
+        collected: List[Dict[str, Any]] = []
+        async for repository in self.iter_repositories(org):
+            collected.append(repository)
+            yield dict(repository)
+        collected.sort(key=lambda r: r.get("updated_at") or "", reverse=True)
+        repository_list_cache.put(cache_key, collected)
+    
     async def get_repository_branches(self, owner: str, repo: str) -> List[Dict[str, Any]]:
         """Get repository branches"""
         try:
@@ -6,6 +6,8 @@ import httpx
 import logging
 from typing import Dict, Any, List, Optional
 
+from backend.services.clone_strategy import clone_options, resolve_strategy
+
 logger = logging.getLogger(__name__)
 
 class GrainchainClient:
@@ -16,6 +18,8 @@ class GrainchainClient:
         # For now, we'll simulate grainchain functionality
         # In production, this would connect to the actual grainchain service
         self.enabled = os.getenv("GRAINCHAIN_ENABLED", "true").lower() == "true"
+        # Snapshots cannot see host mirrors, so "auto" means a partial clone here
+        self.clone_strategy = resolve_strategy(os.getenv("GIT_CLONE_STRATEGY", "auto"), local_checkout=False)
     
     async def create_snapshot(self, config: Dict[str, Any]) -> str:
         """Create a new sandbox snapshot with specified tools and environment"""
@@ -83,7 +87,8 @@ class GrainchainClient:
                 payload = {
                     "repository_url": repo_url,
                     "branch": branch,
-                    "destination": "/workspace"
+                    "destination": "/workspace",
+                    **clone_options(self.clone_strategy)
                 }
                 
                 response = await client.post(
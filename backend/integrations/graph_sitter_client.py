@@ -1,11 +1,29 @@
 """
 Graph-sitter client for static code analysis and quality metrics
 """
+import asyncio
 import os
 import httpx
 import logging
 from typing import Dict, Any, List, Optional
 
+from backend.utils.analysis_cache import (
+    SourceFile,
+    aggregate_file_results,
+    analysis_cache,
+    analyze_uncached,
+    analyze_with_cache,
+    select_source_files
+)
+from backend.utils.diff_analysis import (
+    ChangedFile,
+    TreeEntry,
+    base_versions,
+    build_diff_report,
+    dependents_from_graph,
+    scope_files
+)
+
 logger = logging.getLogger(__name__)
 
 class GraphSitterClient:
@@ -104,8 +122,9 @@ class GraphSitterClient:
                 "recommendations": []
             }
     
-    async def analyze_file(self, snapshot_id: str, file_path: str, language: str = None) -> Dict[str, Any]:
-        """Analyze a specific file for quality metrics"""
+    async def analyze_file(self, snapshot_id: str, file_path: str, language: str = None,
+                           ref: Optional[str] = None) -> Dict[str, Any]:
+        """Analyze a specific file for quality metrics, optionally as of a git ref"""
         try:
             if not self.enabled:
                 return {
@@ -141,6 +160,8 @@ class GraphSitterClient:
                     "include_functions": True,
                     "include_classes": True
                 }
+                if ref:
+                    payload["ref"] = ref
                 
                 response = await client.post(
                     f"{self.base_url}/analyze/file",
@@ -168,6 +189,90 @@ class GraphSitterClient:
                 "error": str(e)
             }
     
+    async def analyze_files_incremental(self, snapshot_id: str, files: List[SourceFile],
+                                        concurrency: int = 8) -> Dict[str, Any]:
+        """Analyze a codebase file by file, reusing results for content seen before
+        
+        Files are keyed by blob SHA and language, so only new or changed files
+        are analyzed in the snapshot; codebase metrics and issues are
+        aggregated from the per-file results.
+        """
+        namespace = self.base_url if self.enabled else "disabled"
+        results, analyzed = await analyze_with_cache(
+            analysis_cache,
+            namespace,
+            files,
+            lambda source: self.analyze_file(snapshot_id, source.path, source.language),
+            concurrency=concurrency
+        )
+        
+        analysis = aggregate_file_results(files, results)
+        analysis["cache"] = {"files_reanalyzed": len(analyzed), "files_reused": len(files) - len(analyzed)}
+        logger.info(f"Analyzed {len(analyzed)} of {len(files)} files in snapshot {snapshot_id}, "
+                    f"{len(files) - len(analyzed)} reused from cache")
+        return analysis
+    
+    async def analyze_diff(self,
+                           snapshot_id: str,
+                           base_sha: str,
+                           head_sha: str,
+                           changes: List[ChangedFile],
+                           head_entries: List[TreeEntry],
+                           base_entries: List[TreeEntry],
+                           languages: List[str] = None,
+                           include_dependents: bool = True,
+                           concurrency: int = 8) -> Dict[str, Any]:
+        """Analyze only the files a change touches plus their direct dependents
+        
+        The snapshot holds the head checkout; base versions of changed files
+        are analyzed at ``base_sha``. Entries are ``(path, blob_sha, size)``
+        for each side, so content analyzed before is reused from the cache.
+        The result lists the issues introduced and resolved relative to base.
+        """
+        namespace = self.base_url if self.enabled else "disabled"
+        head_files, base_files = scope_files(changes, head_entries, base_entries, languages)
+        
+        dependent_files: List[SourceFile] = []
+        if include_dependents:
+            try:
+                graph = await self.get_dependency_graph(snapshot_id)
+            except Exception as e:
+                logger.warning(f"Dependency graph unavailable, analyzing changed files only: {e}")
+                graph = {}
+            targets = {path for change in changes for path in (change.head_path, change.base_path) if path}
+            dependents = dependents_from_graph(graph, targets)
+            dependent_files = [source for source in select_source_files(head_entries, languages)
+                               if source.path in dependents]
+        dependent_base_files = base_versions(dependent_files, base_entries)
+        
+        def analyze_head(source: SourceFile):
+            return self.analyze_file(snapshot_id, source.path, source.language)
+        
+        def analyze_base(source: SourceFile):
+            return self.analyze_file(snapshot_id, source.path, source.language, ref=base_sha)
+        
+        # Dependents' results depend on the changed files next to them, so they are never cached
+        (head_results, head_analyzed), (base_results, base_analyzed), dependent_results, dependent_base_results = \
+            await asyncio.gather(
+                analyze_with_cache(analysis_cache, namespace, head_files, analyze_head, concurrency),
+                analyze_with_cache(analysis_cache, namespace, base_files, analyze_base, concurrency),
+                analyze_uncached(dependent_files, analyze_head, concurrency),
+                analyze_uncached(dependent_base_files, analyze_base, concurrency)
+            )
+        
+        report = build_diff_report(
+            changes, head_files, base_files, dependent_files, dependent_base_files,
+            head_results, base_results, dependent_results, dependent_base_results
+        )
+        report["base_sha"] = base_sha
+        report["head_sha"] = head_sha
+        report["cache"] = {"files_reanalyzed": len(head_analyzed) + len(base_analyzed)
+                           + len(dependent_files) + len(dependent_base_files)}
+        logger.info(f"Diff analysis of snapshot {snapshot_id}: {len(changes)} changed files, "
+                    f"{len(dependent_files)} dependents, {report['summary']['introduced_issues']} issues "
+                    f"introduced, {report['summary']['resolved_issues']} resolved")
+        return report
+    
     async def get_dependency_graph(self, snapshot_id: str) -> Dict[str, Any]:
         """Get dependency graph for the codebase"""
         try:
@@ -2,8 +2,9 @@
 Enhanced Web-eval-agent client for comprehensive UI element testing
 """
 import asyncio
+import time
 import uuid
-from typing import Dict, Any, Optional, List, Union, Callable
+from typing import Dict, Any, Optional, List, Union, Callable, AsyncIterator, Tuple
 from datetime import datetime, timedelta
 from enum import Enum
 import structlog
@@ -12,23 +13,37 @@ from .base_client import BaseClient, APIError
 from backend.config import get_settings
 from backend.utils.circuit_breaker import (
     circuit_breaker_manager, 
-    CircuitBreakerConfig
+    CircuitBreakerConfig,
+    endpoint_template
 )
 from backend.utils.retry_strategies import (
     RetryHandler, 
     RetryConfig, 
     RetryStrategy, 
-    AdaptiveRetryHandler
+    AdaptiveRetryHandler,
+    retry_budgets
+)
+from backend.utils.shard_scheduler import (
+    ShardConfig,
+    ShardResult,
+    ShardScheduler,
+    merge_shard_responses,
+    plan_shards
 )
 from backend.services.resource_manager import (
     resource_manager, 
     ResourceType, 
     ResourceMetrics
 )
+from backend.services.session_registry import SessionRegistry
+from backend.services.visual_baselines import visual_baseline_store
 
 logger = structlog.get_logger(__name__)
 settings = get_settings()
 
+# Shard parallelism when neither settings nor the agent say otherwise
+DEFAULT_SHARD_PARALLELISM = 4
+
 
 class TestType(Enum):
     """Types of UI tests available"""
@@ -97,17 +112,26 @@ class EnhancedWebEvalClient(BaseClient):
             max_attempts=3,
             base_delay=2.0,
             max_delay=60.0,
-            strategy=RetryStrategy.EXPONENTIAL_BACKOFF,
+            strategy=RetryStrategy.FULL_JITTER,
             jitter=True,
             backoff_multiplier=2.0,
-            retryable_exceptions=[ConnectionError, TimeoutError, APIError]
+            retryable_exceptions=[ConnectionError, TimeoutError, APIError],
+            deadline=self.timeout * 2
         )
         
-        # Initialize adaptive retry handler
-        self.adaptive_retry = AdaptiveRetryHandler(self.retry_config)
+        # Initialize adaptive retry handler; it owns retries for wrapped calls, so the
+        # underlying requests make a single attempt, and it draws on the upstream's budget
+        self.adaptive_retry = AdaptiveRetryHandler(self.retry_config,
+                                                   budget=retry_budgets.get(self.service_name))
         
-        # Test session tracking
-        self.active_sessions = {}
+        # Test session tracking, bounded and expired by TTL
+        self.active_sessions = SessionRegistry("web_eval_sessions",
+                                               ttl_seconds=settings.web_eval_session_ttl,
+                                               max_sessions=settings.web_eval_max_sessions)
+        self._reaper_tasks: set = set()
+        
+        # (checked_at, available workers) as last reported by the agent
+        self._agent_workers: Optional[tuple] = None
         
         # Performance metrics
         self.test_metrics = {
@@ -118,6 +142,42 @@ class EnhancedWebEvalClient(BaseClient):
             "last_test": None
         }
     
+    @property
+    def active_sessions(self) -> SessionRegistry:
+        return self._active_sessions
+    
+    @active_sessions.setter
+    def active_sessions(self, sessions: Dict[str, Dict[str, Any]]) -> None:
+        if not isinstance(sessions, SessionRegistry):
+            sessions = SessionRegistry.from_mapping(sessions,
+                                                    name="web_eval_sessions",
+                                                    ttl_seconds=settings.web_eval_session_ttl,
+                                                    max_sessions=settings.web_eval_max_sessions)
+        self._active_sessions = sessions
+    
+    def _track_session(self, registry: SessionRegistry, session_id: str, info: Dict[str, Any]) -> None:
+        """Register a session and hand expired or evicted ones to background cleanup"""
+        registry[session_id] = info
+        expired = registry.pop_expired()
+        if not expired:
+            return
+        
+        self.logger.info("Reaping expired web-eval sessions",
+                       registry=registry.name,
+                       sessions=len(expired),
+                       correlation_id=self.correlation_id)
+        task = asyncio.create_task(registry.cleanup(
+            lambda sid: resource_manager.cleanup_resource(sid, force=True),
+            session_ids=[expired_id for expired_id, _ in expired],
+            max_concurrency=settings.web_eval_cleanup_concurrency
+        ))
+        self._reaper_tasks.add(task)
+        task.add_done_callback(self._reaper_tasks.discard)
+    
+    def get_project_sessions(self, project_name: str) -> Dict[str, Dict[str, Any]]:
+        """Get the tracked test sessions for a project"""
+        return self.active_sessions.by_project(project_name)
+    
     def _get_default_headers(self) -> Dict[str, str]:
         """Get default headers for web-eval-agent requests"""
         return {
@@ -140,9 +200,10 @@ class EnhancedWebEvalClient(BaseClient):
         operation_start = datetime.utcnow()
         operation_name = f"{operation.__name__}_{args[0] if args else 'unknown'}"
         
-        # Get circuit breaker
+        # Get circuit breaker, one per endpoint template rather than per session
+        breaker_key = f"{operation.__name__}_{endpoint_template(str(args[0])) if args else 'unknown'}"
         circuit_breaker = circuit_breaker_manager.get_breaker(
-            f"web_eval_{operation_name}",
+            f"web_eval_{breaker_key}",
             self.circuit_breaker_config
         )
         
@@ -286,12 +347,14 @@ class EnhancedWebEvalClient(BaseClient):
             )
             
             # Track active session
-            self.active_sessions[session_id] = {
+            self._track_session(self.active_sessions, session_id, {
                 "project_name": project_name,
                 "base_url": base_url,
                 "created_at": datetime.utcnow(),
-                "status": "active"
-            }
+                "status": "active",
+                "browsers": payload["browsers"],
+                "devices": payload["devices"]
+            })
         
         self.logger.info("Comprehensive web-eval test session created",
                        session_id=session_id,
@@ -343,6 +406,7 @@ class EnhancedWebEvalClient(BaseClient):
         # Update session tracking
         if session_id in self.active_sessions:
             self.active_sessions[session_id]["last_accessed"] = datetime.utcnow()
+            self.active_sessions.touch(session_id)
         
         return response
     
@@ -484,8 +548,14 @@ class EnhancedWebEvalClient(BaseClient):
                                            session_id: str,
                                            pages: List[str],
                                            baseline_session_id: Optional[str] = None,
-                                           visual_config: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
-        """Run advanced visual regression testing with AI-powered analysis"""
+                                           visual_config: Optional[Dict[str, Any]] = None,
+                                           base_commit: Optional[str] = None,
+                                           browser: str = "chromium") -> Dict[str, Any]:
+        """Run advanced visual regression testing with AI-powered analysis.
+        
+        With a ``base_commit`` that has stored baselines, the agent first returns only
+        perceptual hashes; pages whose captures all match skip the full diff.
+        """
         
         default_visual_config = {
             "comparison_algorithm": "ai_enhanced",
@@ -513,6 +583,23 @@ class EnhancedWebEvalClient(BaseClient):
         
         merged_config = {**default_visual_config, **(visual_config or {})}
         
+        unchanged: List[Dict[str, Any]] = []
+        if base_commit and await asyncio.to_thread(visual_baseline_store.has_commit, base_commit):
+            pages, unchanged = await self._filter_unchanged_pages(
+                session_id, pages, merged_config, base_commit, browser
+            )
+            if not pages:
+                self.logger.info("All captures match baselines, skipping visual diff",
+                               session_id=session_id,
+                               skipped_unchanged=len(unchanged),
+                               correlation_id=self.correlation_id)
+                return {
+                    "differences_found": 0,
+                    "pages_compared": 0,
+                    "skipped_unchanged": len(unchanged),
+                    "ai_insights": []
+                }
+        
         payload = {
             "pages": pages,
             "baseline_session_id": baseline_session_id,
@@ -520,6 +607,9 @@ class EnhancedWebEvalClient(BaseClient):
             "test_type": "advanced_visual_regression",
             "correlation_id": self.correlation_id
         }
+        if unchanged:
+            # Compare against the captures just taken instead of capturing again
+            payload["reuse_captures"] = True
         
         self.logger.info("Running advanced visual regression testing",
                        session_id=session_id,
@@ -532,6 +622,8 @@ class EnhancedWebEvalClient(BaseClient):
             f"/sessions/{session_id}/visual/advanced",
             data=payload
         )
+        if unchanged:
+            response["skipped_unchanged"] = len(unchanged)
         
         self.logger.info("Advanced visual regression testing completed",
                        session_id=session_id,
@@ -541,6 +633,36 @@ class EnhancedWebEvalClient(BaseClient):
         
         return response
     
+    async def _filter_unchanged_pages(self,
+                                      session_id: str,
+                                      pages: List[str],
+                                      visual_config: Dict[str, Any],
+                                      base_commit: str,
+                                      browser: str) -> Tuple[List[str], List[Dict[str, Any]]]:
+        """Capture hashes only and drop pages whose every capture matches its baseline"""
+        response = await self._execute_with_enhancements(
+            self.post,
+            f"/sessions/{session_id}/visual/capture",
+            data={
+                "pages": pages,
+                "browser": browser,
+                "capture_settings": visual_config["capture_settings"],
+                "return": "perceptual_hashes",
+                "correlation_id": self.correlation_id
+            }
+        )
+        captures = response.get("captures", [])
+        unchanged, changed = await asyncio.to_thread(
+            visual_baseline_store.partition,
+            captures, base_commit, browser, visual_config.get("phash_max_distance", 0)
+        )
+        
+        captured_pages = {capture.get("page") for capture in captures}
+        changed_pages = {capture.get("page") for capture in changed}
+        # Pages the agent returned no capture for still get the full comparison
+        remaining = [page for page in pages if page in changed_pages or page not in captured_pages]
+        return remaining, unchanged
+    
     async def run_comprehensive_accessibility_audit(self,
                                                   session_id: str,
                                                   pages: List[str],
@@ -842,29 +964,107 @@ class EnhancedWebEvalClient(BaseClient):
                             error=str(e))
             raise
     
+    # Sharded Matrix Execution
+    async def _shard_parallelism(self) -> int:
+        """Shards to run at once: the configured value, else the agent's available workers"""
+        if settings.web_eval_shard_parallelism > 0:
+            return settings.web_eval_shard_parallelism
+        
+        now = time.monotonic()
+        if self._agent_workers is None or now - self._agent_workers[0] > 60:
+            workers = 0
+            try:
+                health = await self.get("/health")
+                workers = int(health.get("available_workers") or health.get("workers") or 0)
+            except Exception as e:
+                self.logger.debug("Could not read agent worker count", error=str(e))
+            self._agent_workers = (now, workers)
+        
+        return self._agent_workers[1] or DEFAULT_SHARD_PARALLELISM
+    
+    async def _stream_matrix(self,
+                             session_id: str,
+                             endpoint: str,
+                             target_key: str,
+                             targets: List[str],
+                             test_scenarios: List[Dict[str, Any]],
+                             test_type: str) -> AsyncIterator[ShardResult]:
+        """Run one request per (target, scenario chunk); each shard retries on its own"""
+        config = ShardConfig(max_parallel_shards=await self._shard_parallelism(),
+                             scenarios_per_shard=settings.web_eval_scenarios_per_shard)
+        shards = plan_shards(targets, test_scenarios, config.scenarios_per_shard)
+        
+        async def run_shard(shard) -> Dict[str, Any]:
+            payload = {
+                target_key: [shard.target],
+                "test_scenarios": shard.scenarios,
+                "test_type": test_type,
+                "shard": {"index": shard.index, "total": shard.total}
+            }
+            return await self._execute_with_enhancements(
+                self.post,
+                f"/sessions/{session_id}/{endpoint}",
+                data=payload
+            )
+        
+        self.logger.info("Running sharded test matrix",
+                       session_id=session_id,
+                       test_type=test_type,
+                       shards=len(shards),
+                       parallelism=config.max_parallel_shards,
+                       correlation_id=self.correlation_id)
+        
+        async for result in ShardScheduler(config).run(shards, run_shard):
+            yield result
+    
+    async def _run_matrix(self,
+                          session_id: str,
+                          endpoint: str,
+                          target_key: str,
+                          targets: List[str],
+                          test_scenarios: List[Dict[str, Any]],
+                          test_type: str) -> Dict[str, Any]:
+        """Run a sharded matrix and merge the shard responses into one result"""
+        results = [result async for result in self._stream_matrix(
+            session_id, endpoint, target_key, targets, test_scenarios, test_type)]
+        results.sort(key=lambda result: result.shard.index)
+        
+        succeeded = [result for result in results if result.success]
+        failed = [result for result in results if not result.success]
+        if not succeeded:
+            raise APIError(f"All {len(results)} {test_type} shards failed: {failed[0].error}")
+        
+        response = merge_shard_responses([result.response for result in succeeded])
+        response["shard_summary"] = {
+            "total": len(results),
+            "succeeded": len(succeeded),
+            "failed": len(failed),
+            "failed_shards": [
+                {"shard": r.shard.index, "target": r.shard.target, "error": r.error}
+                for r in failed
+            ]
+        }
+        return response
+    
     # Cross-browser Testing
     async def run_cross_browser_tests(self,
                                     session_id: str,
                                     browsers: List[str],
                                     test_scenarios: List[Dict[str, Any]]) -> Dict[str, Any]:
-        """Run tests across multiple browsers"""
+        """Run tests across multiple browsers, one shard per browser and scenario chunk"""
         try:
-            payload = {
-                "browsers": browsers,
-                "test_scenarios": test_scenarios,
-                "test_type": "cross_browser"
-            }
-            
             self.logger.info("Running cross-browser tests",
                            session_id=session_id,
                            browser_count=len(browsers),
                            scenario_count=len(test_scenarios))
             
-            response = await self.post(f"/sessions/{session_id}/cross-browser", data=payload)
+            response = await self._run_matrix(session_id, "cross-browser", "browsers",
+                                              browsers, test_scenarios, "cross_browser")
             
             self.logger.info("Cross-browser tests completed",
                            session_id=session_id,
-                           browser_results=response.get("browser_results", {}))
+                           browser_results=response.get("browser_results", {}),
+                           failed_shards=response["shard_summary"]["failed"])
             
             return response
             
@@ -874,29 +1074,34 @@ class EnhancedWebEvalClient(BaseClient):
                             error=str(e))
             raise
     
+    async def stream_cross_browser_tests(self,
+                                         session_id: str,
+                                         browsers: List[str],
+                                         test_scenarios: List[Dict[str, Any]]) -> AsyncIterator[Dict[str, Any]]:
+        """Yield cross-browser results shard by shard as they complete"""
+        async for result in self._stream_matrix(session_id, "cross-browser", "browsers",
+                                                browsers, test_scenarios, "cross_browser"):
+            yield result.to_dict()
+    
     # Mobile Testing
     async def run_mobile_tests(self,
                              session_id: str,
                              devices: List[str],
                              test_scenarios: List[Dict[str, Any]]) -> Dict[str, Any]:
-        """Run tests on mobile devices"""
+        """Run tests on mobile devices, one shard per device and scenario chunk"""
         try:
-            payload = {
-                "devices": devices,
-                "test_scenarios": test_scenarios,
-                "test_type": "mobile"
-            }
-            
             self.logger.info("Running mobile tests",
                            session_id=session_id,
                            device_count=len(devices),
                            scenario_count=len(test_scenarios))
             
-            response = await self.post(f"/sessions/{session_id}/mobile", data=payload)
+            response = await self._run_matrix(session_id, "mobile", "devices",
+                                              devices, test_scenarios, "mobile")
             
             self.logger.info("Mobile tests completed",
                            session_id=session_id,
-                           device_results=response.get("device_results", {}))
+                           device_results=response.get("device_results", {}),
+                           failed_shards=response["shard_summary"]["failed"])
             
             return response
             
@@ -906,6 +1111,50 @@ class EnhancedWebEvalClient(BaseClient):
                             error=str(e))
             raise
     
+    async def stream_mobile_tests(self,
+                                  session_id: str,
+                                  devices: List[str],
+                                  test_scenarios: List[Dict[str, Any]]) -> AsyncIterator[Dict[str, Any]]:
+        """Yield mobile results shard by shard as they complete"""
+        async for result in self._stream_matrix(session_id, "mobile", "devices",
+                                                devices, test_scenarios, "mobile"):
+            yield result.to_dict()
+    
+    async def stream_session_matrix(self,
+                                    session_id: str,
+                                    test_scenarios: List[Dict[str, Any]]) -> AsyncIterator[Dict[str, Any]]:
+        """Run the browser and device matrix of a comprehensive session as interleaved shards"""
+        session_info = self.active_sessions.get(session_id, {})
+        browsers = session_info.get("browsers") or [BrowserType.CHROMIUM.value]
+        devices = session_info.get("devices") or []
+        
+        streams = [self.stream_cross_browser_tests(session_id, browsers, test_scenarios)]
+        if devices:
+            streams.append(self.stream_mobile_tests(session_id, devices, test_scenarios))
+        
+        queue: asyncio.Queue = asyncio.Queue()
+        done = object()
+        
+        async def pump(stream) -> None:
+            try:
+                async for item in stream:
+                    await queue.put(item)
+            finally:
+                await queue.put(done)
+        
+        pumps = [asyncio.create_task(pump(stream)) for stream in streams]
+        try:
+            remaining = len(pumps)
+            while remaining:
+                item = await queue.get()
+                if item is done:
+                    remaining -= 1
+                else:
+                    yield item
+        finally:
+            for task in pumps:
+                task.cancel()
+    
     # Results and Reporting
     async def get_test_results(self, session_id: str) -> Dict[str, Any]:
         """Get comprehensive test results"""
@@ -1046,7 +1295,8 @@ class EnhancedWebEvalClient(BaseClient):
             "test_metrics": self.test_metrics.copy(),
             "active_sessions": {
                 "count": len(self.active_sessions),
-                "sessions": list(self.active_sessions.keys())
+                "sessions": list(self.active_sessions.keys()),
+                "registry": self.active_sessions.get_stats()
             },
             "circuit_breakers": circuit_breaker_states,
             "retry_statistics": retry_stats,
@@ -1146,23 +1396,10 @@ class EnhancedWebEvalClient(BaseClient):
         cleanup_start = datetime.utcnow()
         
         try:
-            cleanup_results = {
-                "total_sessions": len(self.active_sessions),
-                "cleaned_up": 0,
-                "failed": 0,
-                "errors": []
-            }
-            
-            for session_id in list(self.active_sessions.keys()):
-                try:
-                    await resource_manager.cleanup_resource(session_id, force=force)
-                    cleanup_results["cleaned_up"] += 1
-                except Exception as e:
-                    cleanup_results["failed"] += 1
-                    cleanup_results["errors"].append({
-                        "session_id": session_id,
-                        "error": str(e)
-                    })
+            cleanup_results = await self.active_sessions.cleanup(
+                lambda session_id: resource_manager.cleanup_resource(session_id, force=force),
+                max_concurrency=settings.web_eval_cleanup_concurrency
+            )
             
             cleanup_duration = (datetime.utcnow() - cleanup_start).total_seconds()
             
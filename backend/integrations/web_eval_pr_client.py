@@ -11,6 +11,9 @@ import structlog
 
 from .web_eval_client import EnhancedWebEvalClient, TestType, BrowserType, DeviceType
 from backend.services.resource_manager import resource_manager, ResourceType
+from backend.services.session_registry import SessionRegistry
+from backend.services.ui_impact import FrontendDependencyIndex, dependency_index_cache
+from backend.services.visual_baselines import visual_baseline_store
 from backend.config import get_settings
 
 logger = structlog.get_logger(__name__)
@@ -38,8 +41,10 @@ class WebEvalPRClient(EnhancedWebEvalClient):
     def __init__(self, base_url: Optional[str] = None):
         super().__init__(base_url)
         
-        # PR-specific tracking
-        self.pr_sessions = {}
+        # PR-specific tracking, indexed by PR number
+        self.pr_sessions = SessionRegistry("web_eval_pr_sessions",
+                                           ttl_seconds=settings.web_eval_session_ttl,
+                                           max_sessions=settings.web_eval_max_sessions)
         self.baseline_cache = {}
         
         self.logger = logger.bind(
@@ -53,11 +58,34 @@ class WebEvalPRClient(EnhancedWebEvalClient):
                                    head_branch: str,
                                    repository_url: str,
                                    changed_files: List[str],
-                                   test_config: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
-        """Create a specialized test session for PR validation"""
+                                   test_config: Optional[Dict[str, Any]] = None,
+                                   source_root: Optional[str] = None,
+                                   base_commit: Optional[str] = None,
+                                   head_commit: Optional[str] = None) -> Dict[str, Any]:
+        """Create a specialized test session for PR validation.
+        
+        When ``source_root`` points at a checkout of the head commit, changed files
+        are mapped to the routes they can affect through a cached dependency index.
+        """
         
         # Analyze changed files to determine test scope
-        ui_changes = self._analyze_ui_changes(changed_files)
+        dependency_index = None
+        if source_root and (head_commit or base_commit):
+            try:
+                dependency_index = await asyncio.to_thread(
+                    dependency_index_cache.get_index,
+                    repository_url,
+                    head_commit or base_commit,
+                    source_root,
+                    base_commit,
+                    changed_files
+                )
+            except Exception as e:
+                self.logger.warning("Dependency index unavailable, using path heuristics",
+                                  pr_number=pr_number,
+                                  error=str(e))
+        ui_changes = self._analyze_ui_changes(changed_files, dependency_index)
+        impact = ui_changes.get("impact")
         
         # Default PR test configuration
         default_config = {
@@ -90,7 +118,8 @@ class WebEvalPRClient(EnhancedWebEvalClient):
                 "focus_on_critical_paths": True
             },
             "cross_browser_testing": {
-                "enabled": len(ui_changes["components"]) > 0,
+                "enabled": (len(impact["affected_routes"]) > 0 and ui_changes["risk_level"] != "low"
+                            if impact else len(ui_changes["components"]) > 0),
                 "browsers": ["chromium", "firefox", "webkit"],
                 "focus_on_compatibility_risks": True
             },
@@ -152,7 +181,7 @@ class WebEvalPRClient(EnhancedWebEvalClient):
             )
             
             # Track PR session
-            self.pr_sessions[session_id] = {
+            self._track_session(self.pr_sessions, session_id, {
                 "session_type": "pr_validation",
                 "pr_number": pr_number,
                 "base_branch": base_branch,
@@ -160,7 +189,7 @@ class WebEvalPRClient(EnhancedWebEvalClient):
                 "created_at": datetime.utcnow(),
                 "status": "active",
                 "ui_changes": ui_changes
-            }
+            })
         
         self.logger.info("PR test session created",
                        session_id=session_id,
@@ -169,7 +198,13 @@ class WebEvalPRClient(EnhancedWebEvalClient):
         
         return response
     
-    def _analyze_ui_changes(self, changed_files: List[str]) -> Dict[str, Any]:
+    def get_pr_sessions(self, pr_number: int) -> Dict[str, Dict[str, Any]]:
+        """Get the tracked test sessions for a PR"""
+        return self.pr_sessions.by_pr(pr_number)
+    
+    def _analyze_ui_changes(self,
+                            changed_files: List[str],
+                            dependency_index: Optional[FrontendDependencyIndex] = None) -> Dict[str, Any]:
         """Analyze changed files to identify UI-related modifications"""
         
         ui_file_patterns = [
@@ -223,7 +258,24 @@ class WebEvalPRClient(EnhancedWebEvalClient):
                          len(ui_changes["styles"]) + 
                          len(ui_changes["templates"]))
         
-        if total_ui_files > 10 or len(ui_changes["dependency_changes"]) > 0:
+        if dependency_index is not None:
+            # Risk follows what the change can reach, not how many files it touches
+            impact = dependency_index.impact(changed_files)
+            ui_changes["impact"] = impact.to_dict()
+            affected_routes = len(impact.affected_routes)
+            
+            if affected_routes > 10 or (total_ui_files > 10 and affected_routes > 3):
+                ui_changes["risk_level"] = "high"
+            elif (affected_routes > 3 or
+                  (impact.global_changes and not impact.lockfile_only) or
+                  len(ui_changes["responsive_changes"]) > 0):
+                ui_changes["risk_level"] = "medium"
+            else:
+                ui_changes["risk_level"] = "low"
+            if impact.broad_change and ui_changes["risk_level"] == "high":
+                # Reaching every page is not a reason for a comprehensive run; a route sample covers it
+                ui_changes["risk_level"] = "medium"
+        elif total_ui_files > 10 or len(ui_changes["dependency_changes"]) > 0:
             ui_changes["risk_level"] = "high"
         elif total_ui_files > 5 or len(ui_changes["responsive_changes"]) > 0:
             ui_changes["risk_level"] = "medium"
@@ -307,7 +359,7 @@ class WebEvalPRClient(EnhancedWebEvalClient):
         risk_level = ui_changes.get("risk_level", "low")
         
         if risk_level == "high":
-            return {
+            test_scope = {
                 "coverage": "comprehensive",
                 "visual_regression": "full_page_and_components",
                 "accessibility": "complete_audit",
@@ -316,7 +368,7 @@ class WebEvalPRClient(EnhancedWebEvalClient):
                 "mobile": "all_devices"
             }
         elif risk_level == "medium":
-            return {
+            test_scope = {
                 "coverage": "focused",
                 "visual_regression": "affected_components",
                 "accessibility": "changed_areas",
@@ -325,7 +377,7 @@ class WebEvalPRClient(EnhancedWebEvalClient):
                 "mobile": "key_devices"
             }
         else:
-            return {
+            test_scope = {
                 "coverage": "minimal",
                 "visual_regression": "component_level",
                 "accessibility": "basic_checks",
@@ -333,6 +385,38 @@ class WebEvalPRClient(EnhancedWebEvalClient):
                 "cross_browser": "chromium_only",
                 "mobile": "single_device"
             }
+        
+        impact = ui_changes.get("impact")
+        if impact is not None:
+            test_scope["routes"] = impact["affected_routes"]
+            test_scope["scenarios"] = self._select_scenarios(ui_changes, test_scope["coverage"])
+        
+        return test_scope
+    
+    def _select_scenarios(self, ui_changes: Dict[str, Any], coverage: str) -> List[Dict[str, Any]]:
+        """Emit one scenario per affected route with only the checks the change calls for"""
+        impact = ui_changes["impact"]
+        browsers = {
+            "comprehensive": ["chromium", "firefox", "webkit"],
+            "focused": ["chromium", "firefox"],
+            "minimal": ["chromium"]
+        }[coverage]
+        
+        checks = ["visual_regression"]
+        if ui_changes.get("accessibility_changes") or impact["affected_components"]:
+            checks.append("accessibility")
+        if ui_changes.get("performance_changes") or impact["global_changes"]:
+            checks.append("performance")
+        
+        devices: List[str] = []
+        if ui_changes.get("responsive_changes") or ui_changes.get("styles"):
+            checks.append("responsive")
+            devices = ["iPhone 12", "Pixel 5", "iPad Pro"] if coverage == "comprehensive" else ["iPhone 12"]
+        
+        return [
+            {"route": route, "checks": checks, "browsers": browsers, "devices": devices}
+            for route in impact["affected_routes"]
+        ]
     
     async def generate_pr_test_report(self,
                                     session_id: str,
@@ -489,8 +573,14 @@ class WebEvalPRClient(EnhancedWebEvalClient):
     async def run_automated_baseline_update(self,
                                           session_id: str,
                                           branch_name: str,
-                                          update_strategy: str = "smart") -> Dict[str, Any]:
-        """Automatically update visual baselines for approved changes"""
+                                          update_strategy: str = "smart",
+                                          base_commit: Optional[str] = None,
+                                          browser: str = "chromium") -> Dict[str, Any]:
+        """Automatically update visual baselines for approved changes.
+        
+        With a ``base_commit`` the accepted captures are also kept in the local
+        baseline store so later runs against that commit can skip unchanged pages.
+        """
         
         payload = {
             "branch_name": branch_name,
@@ -516,6 +606,20 @@ class WebEvalPRClient(EnhancedWebEvalClient):
             data=payload
         )
         
+        if base_commit:
+            captures = response.get("baselines")
+            if captures is None:
+                captures = await self.get_test_screenshots(session_id)
+            stored = await asyncio.to_thread(
+                visual_baseline_store.store_captures, captures, base_commit, browser
+            )
+            await asyncio.to_thread(self._collect_baseline_garbage)
+            self.baseline_cache[branch_name] = {
+                "commit": base_commit,
+                "baselines": stored,
+                "updated_at": datetime.utcnow().isoformat()
+            }
+        
         self.logger.info("Automated baseline update completed",
                        session_id=session_id,
                        baselines_updated=response.get("baselines_updated", 0),
@@ -524,6 +628,10 @@ class WebEvalPRClient(EnhancedWebEvalClient):
         
         return response
     
+    def _collect_baseline_garbage(self) -> None:
+        visual_baseline_store.prune(settings.visual_baseline_max_commits)
+        visual_baseline_store.gc()
+    
     async def run_component_isolation_tests(self,
                                           session_id: str,
                                           components: List[str],
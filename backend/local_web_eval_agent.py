@@ -5,14 +5,19 @@ A simplified version of Web-Eval-Agent for testing the CodegenCICD dashboard
 """
 import asyncio
 import json
+import math
+import re
 import time
-from typing import Dict, Any, List
+from dataclasses import dataclass
+from typing import Dict, Any, List, Optional, Tuple, Callable, Awaitable, AsyncIterator
 from fastapi import FastAPI, HTTPException
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 import uvicorn
 import httpx
 import structlog
 from datetime import datetime
+from urllib.parse import urljoin
 import subprocess
 import os
 
@@ -44,6 +49,7 @@ class TestRequest(BaseModel):
     gemini_api_key: str
     scenarios: List[Dict[str, Any]] = []
     browser_config: Dict[str, Any] = {}
+    check_timeout: float = 20.0  # Seconds allowed for each check
 
 class ComponentTestRequest(BaseModel):
     url: str
@@ -52,41 +58,108 @@ class ComponentTestRequest(BaseModel):
     component: str
     checks: List[str]
 
+class PerformanceRequest(BaseModel):
+    base_url: str
+    project: str = "default"
+    iterations: int = 10  # Measured page fetches
+    warmup: int = 2  # Fetches discarded before measuring
+    concurrency: int = 4
+    max_assets: int = 50
+    save_baseline: bool = False
+    regression_threshold: float = 0.2  # Relative increase that counts as a regression
+
+# Where per-project performance baselines are kept between runs
+PERF_BASELINE_DIR = os.environ.get("WEB_EVAL_PERF_BASELINE_DIR", "/tmp/web_eval_perf_baselines")
+
+ASSET_TAG_PATTERN = re.compile(r'<(script|link|img)\b([^>]*)>', re.IGNORECASE)
+ASSET_REFERENCE_PATTERN = re.compile(r'\b(?:src|href)=["\']([^"\']+)["\']', re.IGNORECASE)
+LINK_REL_PATTERN = re.compile(r'\brel=["\']?([^"\'>]+)', re.IGNORECASE)
+ASSET_LINK_RELS = {"stylesheet", "preload", "modulepreload", "icon", "manifest"}
+COMPRESSIBLE_TYPES = ("text/", "javascript", "json", "xml", "svg")
+
+# Metrics compared against the stored baseline; higher is worse for all of them
+BASELINE_METRICS = ("ttfb_p50", "ttfb_p95", "total_p95", "total_transfer_bytes", "asset_count")
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+@dataclass
+class PageSnapshot:
+    """One fetch of a page, shared by every check that inspects it"""
+    status_code: int = 0
+    text: str = ""
+    size: int = 0
+    load_time: float = 0.0
+    response_time: float = 0.0
+    error: Optional[str] = None
+
 class WebEvalAgent:
     """Local Web-Eval-Agent implementation"""
     
     def __init__(self):
         self.gemini_api_key = None
         self.test_results = []
+        self._client: Optional[httpx.AsyncClient] = None
     
-    async def test_dashboard_connectivity(self, base_url: str) -> Dict[str, Any]:
-        """Test basic connectivity to the dashboard"""
+    def _get_client(self) -> httpx.AsyncClient:
+        """Shared keep-alive client, so checks reuse connections instead of reconnecting"""
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                timeout=30,
+                limits=httpx.Limits(max_connections=20, max_keepalive_connections=10)
+            )
+        return self._client
+    
+    async def close(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+    
+    async def fetch_page(self, base_url: str) -> PageSnapshot:
+        """Fetch a page once for all HTML-based checks"""
+        start_time = time.time()
         try:
-            logger.info("Testing dashboard connectivity", url=base_url)
-            
-            async with httpx.AsyncClient(timeout=30) as client:
-                response = await client.get(base_url)
-                
-                if response.status_code == 200:
-                    return {
-                        "status": "passed",
-                        "message": "Dashboard is accessible",
-                        "response_time": response.elapsed.total_seconds(),
-                        "status_code": response.status_code
-                    }
-                else:
-                    return {
-                        "status": "failed",
-                        "message": f"Dashboard returned status {response.status_code}",
-                        "status_code": response.status_code
-                    }
-                    
+            response = await self._get_client().get(base_url)
         except Exception as e:
-            logger.error("Dashboard connectivity test failed", error=str(e))
+            return PageSnapshot(load_time=time.time() - start_time, error=str(e))
+        return PageSnapshot(
+            status_code=response.status_code,
+            text=response.text,
+            size=len(response.content),
+            load_time=time.time() - start_time,
+            response_time=response.elapsed.total_seconds()
+        )
+    
+    async def test_dashboard_connectivity(self, base_url: str, page: Optional[PageSnapshot] = None) -> Dict[str, Any]:
+        """Test basic connectivity to the dashboard"""
+        logger.info("Testing dashboard connectivity", url=base_url)
+        page = page or await self.fetch_page(base_url)
+        
+        if page.error:
+            logger.error("Dashboard connectivity test failed", error=page.error)
             return {
                 "status": "failed",
-                "message": f"Connection failed: {str(e)}",
-                "error": str(e)
+                "message": f"Connection failed: {page.error}",
+                "error": page.error
+            }
+        
+        if page.status_code == 200:
+            return {
+                "status": "passed",
+                "message": "Dashboard is accessible",
+                "response_time": page.response_time,
+                "status_code": page.status_code
+            }
+        else:
+            return {
+                "status": "failed",
+                "message": f"Dashboard returned status {page.status_code}",
+                "status_code": page.status_code
             }
     
     async def test_backend_api(self, backend_url: str) -> Dict[str, Any]:
@@ -100,34 +173,35 @@ class WebEvalAgent:
                 "/api/projects/github-repos"
             ]
             
-            results = []
+            client = self._get_client()
+            
+            async def check_endpoint(endpoint: str) -> Dict[str, Any]:
+                try:
+                    url = f"{backend_url}{endpoint}"
+                    response = await client.get(url)
+                    
+                    return {
+                        "endpoint": endpoint,
+                        "status": "passed" if response.status_code < 400 else "failed",
+                        "status_code": response.status_code,
+                        "response_time": response.elapsed.total_seconds()
+                    }
+                    
+                except Exception as e:
+                    return {
+                        "endpoint": endpoint,
+                        "status": "failed",
+                        "error": str(e)
+                    }
             
-            async with httpx.AsyncClient(timeout=30) as client:
-                for endpoint in endpoints_to_test:
-                    try:
-                        url = f"{backend_url}{endpoint}"
-                        response = await client.get(url)
-                        
-                        results.append({
-                            "endpoint": endpoint,
-                            "status": "passed" if response.status_code < 400 else "failed",
-                            "status_code": response.status_code,
-                            "response_time": response.elapsed.total_seconds()
-                        })
-                        
-                    except Exception as e:
-                        results.append({
-                            "endpoint": endpoint,
-                            "status": "failed",
-                            "error": str(e)
-                        })
+            results = await asyncio.gather(*(check_endpoint(endpoint) for endpoint in endpoints_to_test))
             
             passed_count = sum(1 for r in results if r["status"] == "passed")
             
             return {
                 "status": "passed" if passed_count == len(endpoints_to_test) else "partial",
                 "message": f"{passed_count}/{len(endpoints_to_test)} endpoints accessible",
-                "endpoints": results
+                "endpoints": list(results)
             }
             
         except Exception as e:
@@ -138,223 +212,231 @@ class WebEvalAgent:
                 "error": str(e)
             }
     
-    async def test_html_structure(self, base_url: str) -> Dict[str, Any]:
+    async def test_html_structure(self, base_url: str, page: Optional[PageSnapshot] = None) -> Dict[str, Any]:
         """Test HTML structure and key elements"""
-        try:
-            logger.info("Testing HTML structure", url=base_url)
-            
-            async with httpx.AsyncClient(timeout=30) as client:
-                response = await client.get(base_url)
-                
-                if response.status_code != 200:
-                    return {
-                        "status": "failed",
-                        "message": f"Failed to load page: {response.status_code}"
-                    }
-                
-                html_content = response.text
-                
-                # Check for key elements
-                checks = [
-                    ("title", "CodegenCICD" in html_content),
-                    ("react_root", 'id="root"' in html_content),
-                    ("material_ui", "MuiThemeProvider" in html_content or "mui" in html_content.lower()),
-                    ("dashboard_elements", "dashboard" in html_content.lower()),
-                    ("project_elements", "project" in html_content.lower())
-                ]
-                
-                passed_checks = [check for check, result in checks if result]
-                
-                return {
-                    "status": "passed" if len(passed_checks) >= 3 else "partial",
-                    "message": f"{len(passed_checks)}/{len(checks)} structure checks passed",
-                    "checks": {check: result for check, result in checks},
-                    "html_size": len(html_content)
-                }
-                
-        except Exception as e:
-            logger.error("HTML structure test failed", error=str(e))
+        logger.info("Testing HTML structure", url=base_url)
+        page = page or await self.fetch_page(base_url)
+        
+        if page.error:
+            logger.error("HTML structure test failed", error=page.error)
             return {
                 "status": "failed",
-                "message": f"Structure test failed: {str(e)}",
-                "error": str(e)
+                "message": f"Structure test failed: {page.error}",
+                "error": page.error
+            }
+        
+        if page.status_code != 200:
+            return {
+                "status": "failed",
+                "message": f"Failed to load page: {page.status_code}"
             }
+        
+        html_content = page.text
+        
+        # Check for key elements
+        checks = [
+            ("title", "CodegenCICD" in html_content),
+            ("react_root", 'id="root"' in html_content),
+            ("material_ui", "MuiThemeProvider" in html_content or "mui" in html_content.lower()),
+            ("dashboard_elements", "dashboard" in html_content.lower()),
+            ("project_elements", "project" in html_content.lower())
+        ]
+        
+        passed_checks = [check for check, result in checks if result]
+        
+        return {
+            "status": "passed" if len(passed_checks) >= 3 else "partial",
+            "message": f"{len(passed_checks)}/{len(checks)} structure checks passed",
+            "checks": {check: result for check, result in checks},
+            "html_size": len(html_content)
+        }
     
-    async def test_responsive_design(self, base_url: str) -> Dict[str, Any]:
+    async def test_responsive_design(self, base_url: str, page: Optional[PageSnapshot] = None) -> Dict[str, Any]:
         """Test responsive design by checking CSS and viewport meta tags"""
-        try:
-            logger.info("Testing responsive design", url=base_url)
-            
-            async with httpx.AsyncClient(timeout=30) as client:
-                response = await client.get(base_url)
-                
-                if response.status_code != 200:
-                    return {
-                        "status": "failed",
-                        "message": f"Failed to load page: {response.status_code}"
-                    }
-                
-                html_content = response.text
-                
-                # Check for responsive design indicators
-                responsive_checks = [
-                    ("viewport_meta", 'name="viewport"' in html_content),
-                    ("responsive_css", any(keyword in html_content.lower() for keyword in ["@media", "responsive", "mobile"])),
-                    ("material_ui_responsive", "breakpoint" in html_content.lower() or "grid" in html_content.lower()),
-                    ("flexible_layout", "flex" in html_content.lower() or "grid" in html_content.lower())
-                ]
-                
-                passed_checks = [check for check, result in responsive_checks if result]
-                
-                return {
-                    "status": "passed" if len(passed_checks) >= 2 else "partial",
-                    "message": f"{len(passed_checks)}/{len(responsive_checks)} responsive checks passed",
-                    "checks": {check: result for check, result in responsive_checks}
-                }
-                
-        except Exception as e:
-            logger.error("Responsive design test failed", error=str(e))
+        logger.info("Testing responsive design", url=base_url)
+        page = page or await self.fetch_page(base_url)
+        
+        if page.error:
+            logger.error("Responsive design test failed", error=page.error)
             return {
                 "status": "failed",
-                "message": f"Responsive test failed: {str(e)}",
-                "error": str(e)
+                "message": f"Responsive test failed: {page.error}",
+                "error": page.error
             }
+        
+        if page.status_code != 200:
+            return {
+                "status": "failed",
+                "message": f"Failed to load page: {page.status_code}"
+            }
+        
+        html_content = page.text
+        
+        # Check for responsive design indicators
+        responsive_checks = [
+            ("viewport_meta", 'name="viewport"' in html_content),
+            ("responsive_css", any(keyword in html_content.lower() for keyword in ["@media", "responsive", "mobile"])),
+            ("material_ui_responsive", "breakpoint" in html_content.lower() or "grid" in html_content.lower()),
+            ("flexible_layout", "flex" in html_content.lower() or "grid" in html_content.lower())
+        ]
+        
+        passed_checks = [check for check, result in responsive_checks if result]
+        
+        return {
+            "status": "passed" if len(passed_checks) >= 2 else "partial",
+            "message": f"{len(passed_checks)}/{len(responsive_checks)} responsive checks passed",
+            "checks": {check: result for check, result in responsive_checks}
+        }
     
-    async def test_performance_basics(self, base_url: str) -> Dict[str, Any]:
+    async def test_performance_basics(self, base_url: str, page: Optional[PageSnapshot] = None) -> Dict[str, Any]:
         """Test basic performance metrics"""
-        try:
-            logger.info("Testing basic performance", url=base_url)
-            
-            start_time = time.time()
-            
-            async with httpx.AsyncClient(timeout=30) as client:
-                response = await client.get(base_url)
-                
-                load_time = time.time() - start_time
-                
-                if response.status_code != 200:
-                    return {
-                        "status": "failed",
-                        "message": f"Failed to load page: {response.status_code}"
-                    }
-                
-                html_size = len(response.content)
-                
-                # Performance thresholds
-                performance_score = 100
-                if load_time > 3:
-                    performance_score -= 30
-                elif load_time > 2:
-                    performance_score -= 15
-                elif load_time > 1:
-                    performance_score -= 5
-                
-                if html_size > 1000000:  # 1MB
-                    performance_score -= 20
-                elif html_size > 500000:  # 500KB
-                    performance_score -= 10
-                
-                return {
-                    "status": "passed" if performance_score >= 70 else "partial",
-                    "message": f"Performance score: {performance_score}/100",
-                    "metrics": {
-                        "load_time": load_time,
-                        "html_size": html_size,
-                        "performance_score": performance_score
-                    }
-                }
-                
-        except Exception as e:
-            logger.error("Performance test failed", error=str(e))
+        logger.info("Testing basic performance", url=base_url)
+        page = page or await self.fetch_page(base_url)
+        
+        if page.error:
+            logger.error("Performance test failed", error=page.error)
             return {
                 "status": "failed",
-                "message": f"Performance test failed: {str(e)}",
-                "error": str(e)
+                "message": f"Performance test failed: {page.error}",
+                "error": page.error
             }
+        
+        if page.status_code != 200:
+            return {
+                "status": "failed",
+                "message": f"Failed to load page: {page.status_code}"
+            }
+        
+        load_time = page.load_time
+        html_size = page.size
+        
+        # Performance thresholds
+        performance_score = 100
+        if load_time > 3:
+            performance_score -= 30
+        elif load_time > 2:
+            performance_score -= 15
+        elif load_time > 1:
+            performance_score -= 5
+        
+        if html_size > 1000000:  # 1MB
+            performance_score -= 20
+        elif html_size > 500000:  # 500KB
+            performance_score -= 10
+        
+        return {
+            "status": "passed" if performance_score >= 70 else "partial",
+            "message": f"Performance score: {performance_score}/100",
+            "metrics": {
+                "load_time": load_time,
+                "html_size": html_size,
+                "performance_score": performance_score
+            }
+        }
+    
+    def _suite_checks(self, request: TestRequest) -> List[Tuple[str, str, str, Callable[[], Awaitable[Dict[str, Any]]]]]:
+        """(key, name, description, run) for each check; page checks share one fetch"""
+        page_task: Optional[asyncio.Task] = None
+        
+        async def shared_page() -> PageSnapshot:
+            nonlocal page_task
+            if page_task is None:
+                page_task = asyncio.ensure_future(self.fetch_page(request.base_url))
+            # Shielded so one check timing out does not cancel the fetch for the others
+            return await asyncio.shield(page_task)
+        
+        def on_page(check: Callable[..., Awaitable[Dict[str, Any]]]) -> Callable[[], Awaitable[Dict[str, Any]]]:
+            async def run() -> Dict[str, Any]:
+                return await check(request.base_url, page=await shared_page())
+            return run
+        
+        backend_url = request.base_url.replace(":3000", ":8000")  # Assume backend on 8000
+        return [
+            ("dashboard_accessible", "Dashboard Connectivity",
+             "Test basic connectivity to the dashboard", on_page(self.test_dashboard_connectivity)),
+            ("backend_functional", "Backend API Connectivity",
+             "Test backend API endpoints", lambda: self.test_backend_api(backend_url)),
+            ("html_structure_valid", "HTML Structure",
+             "Test HTML structure and key elements", on_page(self.test_html_structure)),
+            ("responsive_design", "Responsive Design",
+             "Test responsive design indicators", on_page(self.test_responsive_design)),
+            ("performance_acceptable", "Basic Performance",
+             "Test basic performance metrics", on_page(self.test_performance_basics)),
+        ]
+    
+    async def iter_test_suite(self, request: TestRequest) -> AsyncIterator[Tuple[int, str, Dict[str, Any]]]:
+        """Run every check concurrently and yield (position, key, result) as each finishes"""
+        self.gemini_api_key = request.gemini_api_key
+        checks = self._suite_checks(request)
+        
+        async def run_check(position: int, key: str, name: str, description: str,
+                            check: Callable[[], Awaitable[Dict[str, Any]]]) -> Tuple[int, str, Dict[str, Any]]:
+            try:
+                result = await asyncio.wait_for(check(), timeout=request.check_timeout)
+            except asyncio.TimeoutError:
+                result = {
+                    "status": "failed",
+                    "message": f"Check timed out after {request.check_timeout}s",
+                    "error": "timeout"
+                }
+            except Exception as e:
+                logger.error("Check failed", check=name, error=str(e))
+                result = {"status": "failed", "message": f"{name} failed: {str(e)}", "error": str(e)}
+            return position, key, {
+                "name": name,
+                "description": description,
+                **result,
+                "timestamp": datetime.now().isoformat()
+            }
+        
+        tasks = [asyncio.ensure_future(run_check(position, *check)) for position, check in enumerate(checks)]
+        try:
+            for next_result in asyncio.as_completed(tasks):
+                yield await next_result
+        finally:
+            for task in tasks:
+                task.cancel()
+    
+    def _summarize(self, test_results: List[Dict[str, Any]], statuses: Dict[str, str]) -> Dict[str, Any]:
+        passed_tests = [r for r in test_results if r.get("status") == "passed"]
+        partial_tests = [r for r in test_results if r.get("status") == "partial"]
+        failed_tests = [r for r in test_results if r.get("status") == "failed"]
+        
+        overall_status = "passed"
+        if len(failed_tests) > 0:
+            overall_status = "failed"
+        elif len(partial_tests) > 0:
+            overall_status = "partial"
+        
+        return {
+            "overall_status": overall_status,
+            "total_scenarios": len(test_results),
+            "passed_scenarios": len(passed_tests),
+            "partial_scenarios": len(partial_tests),
+            "failed_scenarios": len(failed_tests),
+            "results": test_results,
+            "summary": {
+                "dashboard_accessible": statuses.get("dashboard_accessible") == "passed",
+                **{key: statuses.get(key) in ["passed", "partial"]
+                   for key in ("backend_functional", "html_structure_valid",
+                               "responsive_design", "performance_acceptable")}
+            },
+            "timestamp": datetime.now().isoformat()
+        }
     
     async def run_comprehensive_test_suite(self, request: TestRequest) -> Dict[str, Any]:
-        """Run comprehensive test suite"""
+        """Run comprehensive test suite; checks run concurrently, results keep suite order"""
         try:
             logger.info("Starting comprehensive test suite", base_url=request.base_url)
             
-            self.gemini_api_key = request.gemini_api_key
-            
-            # Run all tests
-            test_results = []
-            
-            # 1. Connectivity Test
-            connectivity_result = await self.test_dashboard_connectivity(request.base_url)
-            test_results.append({
-                "name": "Dashboard Connectivity",
-                "description": "Test basic connectivity to the dashboard",
-                **connectivity_result,
-                "timestamp": datetime.now().isoformat()
-            })
-            
-            # 2. Backend API Test
-            backend_url = request.base_url.replace(":3000", ":8000")  # Assume backend on 8000
-            api_result = await self.test_backend_api(backend_url)
-            test_results.append({
-                "name": "Backend API Connectivity",
-                "description": "Test backend API endpoints",
-                **api_result,
-                "timestamp": datetime.now().isoformat()
-            })
-            
-            # 3. HTML Structure Test
-            structure_result = await self.test_html_structure(request.base_url)
-            test_results.append({
-                "name": "HTML Structure",
-                "description": "Test HTML structure and key elements",
-                **structure_result,
-                "timestamp": datetime.now().isoformat()
-            })
-            
-            # 4. Responsive Design Test
-            responsive_result = await self.test_responsive_design(request.base_url)
-            test_results.append({
-                "name": "Responsive Design",
-                "description": "Test responsive design indicators",
-                **responsive_result,
-                "timestamp": datetime.now().isoformat()
-            })
-            
-            # 5. Performance Test
-            performance_result = await self.test_performance_basics(request.base_url)
-            test_results.append({
-                "name": "Basic Performance",
-                "description": "Test basic performance metrics",
-                **performance_result,
-                "timestamp": datetime.now().isoformat()
-            })
-            
-            # Calculate overall results
-            passed_tests = [r for r in test_results if r.get("status") == "passed"]
-            partial_tests = [r for r in test_results if r.get("status") == "partial"]
-            failed_tests = [r for r in test_results if r.get("status") == "failed"]
+            ordered: Dict[int, Dict[str, Any]] = {}
+            statuses: Dict[str, str] = {}
+            async for position, key, result in self.iter_test_suite(request):
+                ordered[position] = result
+                statuses[key] = result.get("status")
             
-            overall_status = "passed"
-            if len(failed_tests) > 0:
-                overall_status = "failed"
-            elif len(partial_tests) > 0:
-                overall_status = "partial"
-            
-            return {
-                "overall_status": overall_status,
-                "total_scenarios": len(test_results),
-                "passed_scenarios": len(passed_tests),
-                "partial_scenarios": len(partial_tests),
-                "failed_scenarios": len(failed_tests),
-                "results": test_results,
-                "summary": {
-                    "dashboard_accessible": connectivity_result.get("status") == "passed",
-                    "backend_functional": api_result.get("status") in ["passed", "partial"],
-                    "html_structure_valid": structure_result.get("status") in ["passed", "partial"],
-                    "responsive_design": responsive_result.get("status") in ["passed", "partial"],
-                    "performance_acceptable": performance_result.get("status") in ["passed", "partial"]
-                },
-                "timestamp": datetime.now().isoformat()
-            }
+            test_results = [ordered[position] for position in sorted(ordered)]
+            return self._summarize(test_results, statuses)
             
         except Exception as e:
             logger.error("Comprehensive test suite failed", error=str(e))
@@ -364,9 +446,194 @@ class WebEvalAgent:
                 "timestamp": datetime.now().isoformat()
             }
 
+    async def _timed_fetch(self, url: str, headers: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
+        """Fetch a URL recording time to first byte, total time and bytes on the wire"""
+        client = self._get_client()
+        request_headers = {"Accept-Encoding": "gzip, deflate, br", **(headers or {})}
+        start_time = time.perf_counter()
+        async with client.stream("GET", url, headers=request_headers) as response:
+            ttfb = time.perf_counter() - start_time
+            body = await response.aread()
+            return {
+                "status_code": response.status_code,
+                "ttfb": ttfb,
+                "total": time.perf_counter() - start_time,
+                "transfer_bytes": response.num_bytes_downloaded,
+                "decoded_bytes": len(body),
+                "body": body,
+                "headers": response.headers
+            }
+    
+    async def _measure_asset(self, url: str, kind: str) -> Dict[str, Any]:
+        try:
+            fetch = await self._timed_fetch(url)
+        except Exception as e:
+            return {"url": url, "kind": kind, "error": str(e)}
+        
+        headers = fetch["headers"]
+        cache_control = headers.get("cache-control", "")
+        max_age = re.search(r"max-age=(\d+)", cache_control)
+        validators = {}
+        if headers.get("etag"):
+            validators["If-None-Match"] = headers["etag"]
+        if headers.get("last-modified"):
+            validators["If-Modified-Since"] = headers["last-modified"]
+        
+        revalidates = False
+        if validators:
+            try:
+                revalidation = await self._timed_fetch(url, headers=validators)
+                revalidates = revalidation["status_code"] == 304
+            except Exception:
+                pass
+        
+        content_type = headers.get("content-type", "")
+        return {
+            "url": url,
+            "kind": kind,
+            "status_code": fetch["status_code"],
+            "content_type": content_type,
+            "transfer_bytes": fetch["transfer_bytes"],
+            "decoded_bytes": fetch["decoded_bytes"],
+            "content_encoding": headers.get("content-encoding"),
+            "compressible": any(marker in content_type for marker in COMPRESSIBLE_TYPES),
+            "cache_control": cache_control or None,
+            "cacheable": ("immutable" in cache_control or bool(max_age and int(max_age.group(1)) > 0))
+                         and "no-store" not in cache_control,
+            "revalidates_with_304": revalidates
+        }
+    
+    def _baseline_path(self, project: str) -> str:
+        safe_project = re.sub(r"[^A-Za-z0-9_.-]", "_", project)
+        return os.path.join(PERF_BASELINE_DIR, f"{safe_project}.json")
+    
+    def _load_baseline(self, project: str) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self._baseline_path(project), "r") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+    
+    def _save_baseline(self, project: str, metrics: Dict[str, Any]) -> None:
+        os.makedirs(PERF_BASELINE_DIR, exist_ok=True)
+        path = self._baseline_path(project)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"metrics": metrics, "saved_at": datetime.now().isoformat()}, f)
+        os.replace(tmp_path, path)
+    
+    def _compare_with_baseline(self,
+                               metrics: Dict[str, Any],
+                               baseline: Dict[str, Any],
+                               threshold: float) -> Dict[str, Any]:
+        comparison = {}
+        regressions = []
+        for name in BASELINE_METRICS:
+            current, previous = metrics.get(name), baseline["metrics"].get(name)
+            if current is None or not previous:
+                continue
+            change = (current - previous) / previous
+            comparison[name] = {"baseline": previous, "current": current, "change": round(change, 4)}
+            if change > threshold:
+                regressions.append(name)
+        return {"saved_at": baseline.get("saved_at"), "metrics": comparison, "regressions": regressions}
+    
+    async def measure_page_performance(self, request: PerformanceRequest) -> Dict[str, Any]:
+        """Warmed, repeated fetches of a page and its assets with TTFB percentiles and a baseline diff"""
+        logger.info("Measuring page performance",
+                   url=request.base_url,
+                   project=request.project,
+                   iterations=request.iterations)
+        
+        for _ in range(max(0, request.warmup)):
+            await self._timed_fetch(request.base_url)
+        
+        semaphore = asyncio.Semaphore(max(1, request.concurrency))
+        
+        async def measured_fetch() -> Dict[str, Any]:
+            async with semaphore:
+                return await self._timed_fetch(request.base_url)
+        
+        samples = await asyncio.gather(*(measured_fetch() for _ in range(max(1, request.iterations))))
+        page = samples[-1]
+        if page["status_code"] != 200:
+            return {
+                "status": "failed",
+                "message": f"Failed to load page: {page['status_code']}",
+                "timestamp": datetime.now().isoformat()
+            }
+        
+        # Referenced assets, each fetched once warm plus a conditional revalidation probe
+        html = page["body"].decode("utf-8", errors="replace")
+        assets: Dict[str, str] = {}
+        for tag, attributes in ASSET_TAG_PATTERN.findall(html):
+            reference = ASSET_REFERENCE_PATTERN.search(attributes)
+            if not reference or reference.group(1).startswith(("data:", "#", "mailto:")):
+                continue
+            rel = LINK_REL_PATTERN.search(attributes)
+            if tag.lower() == "link" and not (rel and ASSET_LINK_RELS & set(rel.group(1).lower().split())):
+                continue
+            assets.setdefault(urljoin(request.base_url, reference.group(1)), tag.lower())
+        asset_items = list(assets.items())[:request.max_assets]
+        
+        async def bounded_asset(url: str, kind: str) -> Dict[str, Any]:
+            async with semaphore:
+                return await self._measure_asset(url, kind)
+        
+        asset_results = await asyncio.gather(*(bounded_asset(url, kind) for url, kind in asset_items))
+        loaded = [asset for asset in asset_results if "error" not in asset]
+        compressible = [asset for asset in loaded if asset["compressible"]]
+        
+        ttfbs = [sample["ttfb"] for sample in samples]
+        totals = [sample["total"] for sample in samples]
+        metrics = {
+            "ttfb_p50": round(percentile(ttfbs, 50), 4),
+            "ttfb_p95": round(percentile(ttfbs, 95), 4),
+            "ttfb_p99": round(percentile(ttfbs, 99), 4),
+            "total_p50": round(percentile(totals, 50), 4),
+            "total_p95": round(percentile(totals, 95), 4),
+            "html_transfer_bytes": page["transfer_bytes"],
+            "html_decoded_bytes": page["decoded_bytes"],
+            "html_content_encoding": page["headers"].get("content-encoding"),
+            "total_transfer_bytes": page["transfer_bytes"] + sum(a["transfer_bytes"] for a in loaded),
+            "asset_count": len(asset_items),
+            "asset_counts": {kind: sum(1 for _, k in asset_items if k == kind) for kind in ("script", "link", "img")},
+            "failed_assets": len(asset_results) - len(loaded),
+            "compression_ratio": round(
+                sum(a["transfer_bytes"] for a in compressible) / max(1, sum(a["decoded_bytes"] for a in compressible)), 4),
+            "compressed_share": round(
+                sum(1 for a in compressible if a["content_encoding"]) / max(1, len(compressible)), 4),
+            "cacheable_share": round(sum(1 for a in loaded if a["cacheable"]) / max(1, len(loaded)), 4),
+            "revalidation_share": round(sum(1 for a in loaded if a["revalidates_with_304"]) / max(1, len(loaded)), 4)
+        }
+        
+        baseline = self._load_baseline(request.project)
+        comparison = (self._compare_with_baseline(metrics, baseline, request.regression_threshold)
+                      if baseline else None)
+        if request.save_baseline:
+            self._save_baseline(request.project, metrics)
+        
+        regressions = comparison["regressions"] if comparison else []
+        return {
+            "status": "failed" if regressions else "passed",
+            "message": (f"Regressions against baseline: {', '.join(regressions)}" if regressions
+                        else "No regressions against baseline" if comparison else "No baseline stored yet"),
+            "project": request.project,
+            "iterations": len(samples),
+            "metrics": metrics,
+            "assets": asset_results,
+            "baseline": comparison,
+            "baseline_saved": request.save_baseline,
+            "timestamp": datetime.now().isoformat()
+        }
+
 # Initialize the agent
 web_eval_agent = WebEvalAgent()
 
+@app.on_event("shutdown")
+async def close_http_client():
+    await web_eval_agent.close()
+
 @app.get("/health")
 async def health_check():
     """Health check endpoint"""
@@ -394,6 +661,36 @@ async def run_comprehensive_tests(request: TestRequest):
         logger.error("Comprehensive test failed", error=str(e))
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/api/test/comprehensive/stream")
+async def stream_comprehensive_tests(request: TestRequest):
+    """Stream each check result as NDJSON as soon as it completes, then the summary"""
+    logger.info("Received streaming comprehensive test request", base_url=request.base_url)
+    
+    async def generate():
+        ordered: Dict[int, Dict[str, Any]] = {}
+        statuses: Dict[str, str] = {}
+        try:
+            async for position, key, result in web_eval_agent.iter_test_suite(request):
+                ordered[position] = result
+                statuses[key] = result.get("status")
+                yield json.dumps({"type": "result", **result}) + "\n"
+            summary = web_eval_agent._summarize([ordered[p] for p in sorted(ordered)], statuses)
+            yield json.dumps({"type": "summary", **summary}) + "\n"
+        except Exception as e:
+            logger.error("Streaming comprehensive test failed", error=str(e))
+            yield json.dumps({"type": "error", "error": str(e)}) + "\n"
+    
+    return StreamingResponse(generate(), media_type="application/x-ndjson")
+
+@app.post("/api/test/performance")
+async def run_performance_measurement(request: PerformanceRequest):
+    """Measure page performance and compare with the project's stored baseline"""
+    try:
+        return await web_eval_agent.measure_page_performance(request)
+    except Exception as e:
+        logger.error("Performance measurement failed", error=str(e))
+        raise HTTPException(status_code=500, detail=str(e))
+
 @app.post("/api/test/component")
 async def run_component_test(request: ComponentTestRequest):
     """Run component-specific tests"""
@@ -424,16 +721,15 @@ async def run_api_test(request: ComponentTestRequest):
         logger.info("Received API test request", url=request.url)
         
         # Test the API endpoint
-        async with httpx.AsyncClient(timeout=30) as client:
-            response = await client.get(request.url)
-            
-            return {
-                "status": "passed" if response.status_code < 400 else "failed",
-                "status_code": response.status_code,
-                "response_time": response.elapsed.total_seconds(),
-                "details": f"API endpoint {request.url} responded with {response.status_code}",
-                "timestamp": datetime.now().isoformat()
-            }
+        response = await web_eval_agent._get_client().get(request.url)
+        
+        return {
+            "status": "passed" if response.status_code < 400 else "failed",
+            "status_code": response.status_code,
+            "response_time": response.elapsed.total_seconds(),
+            "details": f"API endpoint {request.url} responded with {response.status_code}",
+            "timestamp": datetime.now().isoformat()
+        }
         
     except Exception as e:
         logger.error("API test failed", error=str(e))
@@ -22,6 +22,16 @@ from routers.health import router as health_router
 from routers.webhooks import router as webhooks_router
 from routers.monitoring import router as monitoring_router
 
+from backend.config import get_settings
+from backend.integrations.gemini_client import gemini_connection, gemini_response_cache
+from backend.utils.circuit_breaker import circuit_breaker_manager, FileBreakerStateStore
+from backend.services.health_monitor import health_monitor
+from backend.services.resource_manager import resource_manager
+from backend.services.resource_sampler import resource_sampler
+from backend.services.setup_playground import setup_playground
+from backend.services.system_metrics import system_metrics
+from backend.utils.metrics import RequestMetricsMiddleware, mark_process_dead, start_metrics_server
+
 # Create FastAPI app
 app = FastAPI(
     title="CodegenCICD Dashboard",
@@ -36,6 +46,51 @@ app.include_router(health_router)
 app.include_router(webhooks_router)
 app.include_router(monitoring_router)
 
+
+@app.on_event("startup")
+async def configure_circuit_breakers():
+    """Bound breaker cardinality and share breaker state across workers"""
+    settings = get_settings()
+    circuit_breaker_manager.max_breakers = settings.circuit_breaker_max_breakers
+    if settings.circuit_breaker_state_dir:
+        circuit_breaker_manager.set_state_store(
+            FileBreakerStateStore(settings.circuit_breaker_state_dir)
+        )
+
+
+@app.on_event("startup")
+async def start_prometheus_exporter():
+    """Serve the metrics registry on PROMETHEUS_PORT for scrapers"""
+    settings = get_settings()
+    if settings.prometheus_enabled:
+        start_metrics_server(settings.prometheus_port)
+
+
+@app.on_event("startup")
+async def start_background_monitors():
+    """Start resource expiry, the metric samplers, dependency health probes and playground reaping"""
+    await resource_manager.start()
+    await resource_sampler.start()
+    await system_metrics.start()
+    await health_monitor.start()
+    await setup_playground.start()
+
+
+@app.on_event("shutdown")
+async def stop_background_monitors():
+    await setup_playground.stop()
+    await health_monitor.stop()
+    await system_metrics.stop()
+    await resource_sampler.stop()
+    await resource_manager.stop()
+    await gemini_connection.close()
+    if gemini_response_cache is not None:
+        await gemini_response_cache.close()
+    mark_process_dead()
+
+# Per-route latency histograms
+app.add_middleware(RequestMetricsMiddleware)
+
 # Add CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -2,16 +2,18 @@
 Configurations router for managing project settings and secrets
 """
 from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
-from typing import List, Optional
+from typing import Dict, List, Optional
+import json
 import logging
 
-from backend.database import get_db
+from backend.database import AsyncSessionLocal, get_db
 from backend.models.configuration import ProjectConfiguration, ProjectSecret
 from backend.models.project import Project
 from backend.utils.encryption import encrypt_value, decrypt_value
-from backend.integrations.grainchain_client import GrainchainClient
+from backend.services.setup_playground import setup_playground
 
 logger = logging.getLogger(__name__)
 
@@ -56,6 +58,7 @@ class ProjectSecretResponse(BaseModel):
 class TestSetupCommandsRequest(BaseModel):
     commands: str
     branch: Optional[str] = "main"
+    fresh: bool = False  # Reset the playground worktree instead of resuming
 
 @router.get("/{project_id}", response_model=ProjectConfigurationResponse)
 async def get_project_configuration(
@@ -209,6 +212,13 @@ async def get_project_secrets(
             detail="Failed to retrieve project secrets"
         )
 
+async def _release_setup_playgrounds(project_id: int) -> None:
+    """Drop playgrounds created with the project's old secrets"""
+    try:
+        await setup_playground.release_project(project_id)
+    except Exception as e:
+        logger.warning(f"Failed to release setup playgrounds for project {project_id}: {e}")
+
 @router.post("/{project_id}/secrets", response_model=ProjectSecretResponse)
 async def create_project_secret(
     project_id: int,
@@ -257,6 +267,7 @@ async def create_project_secret(
         await db.refresh(secret)
         
         logger.info(f"Created secret {secret_data.key} for project {project_id}")
+        await _release_setup_playgrounds(project_id)
         
         # Return with decrypted value
         return ProjectSecretResponse(
@@ -311,6 +322,7 @@ async def update_project_secret(
         await db.refresh(secret)
         
         logger.info(f"Updated secret {secret_data.key} for project {project_id}")
+        await _release_setup_playgrounds(project_id)
         
         # Return with decrypted value
         return ProjectSecretResponse(
@@ -357,6 +369,7 @@ async def delete_project_secret(
         await db.commit()
         
         logger.info(f"Deleted secret {secret.key} for project {project_id}")
+        await _release_setup_playgrounds(project_id)
         return {"message": "Secret deleted successfully"}
         
     except HTTPException:
@@ -368,72 +381,71 @@ async def delete_project_secret(
             detail="Failed to delete project secret"
         )
 
+async def _get_project(db: AsyncSession, project_id: int) -> Project:
+    result = await db.execute(select(Project).where(Project.id == project_id))
+    project = result.scalar_one_or_none()
+    
+    if not project:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Project not found"
+        )
+    return project
+
+async def _load_project_environment(project_id: int) -> Dict[str, str]:
+    """Decrypt a project's secrets into sandbox environment variables"""
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(
+            select(ProjectSecret).where(ProjectSecret.project_id == project_id)
+        )
+        secrets = result.scalars().all()
+    
+    environment_vars = {}
+    for secret in secrets:
+        try:
+            environment_vars[secret.key] = decrypt_value(secret.value)
+        except Exception as e:
+            logger.warning(f"Failed to decrypt secret {secret.key}: {e}")
+    return environment_vars
+
+def _run_setup_playground(project: Project, test_data: TestSetupCommandsRequest):
+    commands = [cmd.strip() for cmd in test_data.commands.split('\n') if cmd.strip()]
+    return setup_playground.run(
+        project.id,
+        test_data.branch or "main",
+        f"https://github.com/{project.github_owner}/{project.github_repo}.git",
+        commands,
+        lambda: _load_project_environment(project.id),
+        fresh=test_data.fresh
+    )
+
 @router.post("/{project_id}/test-setup")
 async def test_setup_commands(
     project_id: int,
     test_data: TestSetupCommandsRequest,
     db: AsyncSession = Depends(get_db)
 ):
-    """Test setup commands in a sandbox environment"""
+    """Test setup commands in a reusable sandbox playground"""
     try:
-        # Verify project exists
-        result = await db.execute(select(Project).where(Project.id == project_id))
-        project = result.scalar_one_or_none()
-        
-        if not project:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Project not found"
-            )
-        
-        # Create temporary snapshot for testing
-        grainchain = GrainchainClient()
-        
-        # Get project secrets for environment
-        result = await db.execute(
-            select(ProjectSecret).where(ProjectSecret.project_id == project_id)
-        )
-        secrets = result.scalars().all()
-        
-        environment_vars = {}
-        for secret in secrets:
-            try:
-                decrypted_value = decrypt_value(secret.value)
-                environment_vars[secret.key] = decrypted_value
-            except Exception as e:
-                logger.warning(f"Failed to decrypt secret {secret.key}: {e}")
-        
-        # Create snapshot
-        snapshot_config = {
-            "tools": ["git", "node", "python"],
-            "environment_variables": environment_vars
-        }
-        
-        snapshot_id = await grainchain.create_snapshot(snapshot_config)
-        
-        try:
-            # Clone repository
-            repo_url = f"https://github.com/{project.github_owner}/{project.github_repo}.git"
-            await grainchain.clone_repository(snapshot_id, repo_url, test_data.branch)
-            
-            # Execute setup commands
-            commands = [cmd.strip() for cmd in test_data.commands.split('\n') if cmd.strip()]
-            result = await grainchain.execute_commands(snapshot_id, commands)
-            
-            # Clean up snapshot
-            await grainchain.delete_snapshot(snapshot_id)
-            
-            return {
-                "success": result.get("exit_code", 1) == 0,
-                "output": result.get("output", ""),
-                "error": result.get("error", ""),
-                "duration": result.get("duration", 0)
+        project = await _get_project(db, project_id)
+        
+        events = [event async for event in _run_setup_playground(project, test_data)]
+        session, summary = events[0], events[-1]
+        ran = [event for event in events if event["event"] == "command" and not event["skipped"]]
+        
+        return {
+            "success": summary["success"],
+            "output": "\n".join(event["output"] for event in ran if event["output"]),
+            "error": "\n".join(event["error"] for event in ran if event["error"]),
+            "duration": sum(event["duration"] for event in ran),
+            "session": {
+                "snapshot_id": session["snapshot_id"],
+                "reused": session["reused"],
+                "idle_ttl": session["idle_ttl"],
+                "commands_run": summary["commands_run"],
+                "commands_skipped": summary["commands_skipped"]
             }
-            
-        except Exception as e:
-            # Clean up snapshot on error
-            await grainchain.delete_snapshot(snapshot_id)
-            raise e
+        }
         
     except HTTPException:
         raise
@@ -444,3 +456,26 @@ async def test_setup_commands(
             detail=f"Failed to test setup commands: {str(e)}"
         )
 
+@router.post("/{project_id}/test-setup/stream")
+async def stream_test_setup_commands(
+    project_id: int,
+    test_data: TestSetupCommandsRequest,
+    db: AsyncSession = Depends(get_db)
+):
+    """Test setup commands, streaming each step's output as NDJSON"""
+    project = await _get_project(db, project_id)
+    
+    async def generate():
+        try:
+            async for event in _run_setup_playground(project, test_data):
+                yield json.dumps(event) + "\n"
+        except Exception as e:
+            logger.error(f"Failed to test setup commands: {e}")
+            yield json.dumps({"event": "error", "error": str(e)}) + "\n"
+    
+    return StreamingResponse(generate(), media_type="application/x-ndjson")
+
+@router.delete("/{project_id}/test-setup/session")
+async def release_setup_playground(project_id: int, branch: str = "main"):
+    """Tear down a project's setup playground before its idle TTL"""
+    return {"released": await setup_playground.release(project_id, branch)}
@@ -16,6 +16,7 @@ import structlog
 
 from backend.config import get_settings
 from backend.database import get_db_session
+from backend.services.health_monitor import health_monitor
 
 logger = structlog.get_logger(__name__)
 router = APIRouter(prefix="/health", tags=["health"])
@@ -168,6 +169,17 @@ async def check_graph_sitter() -> ServiceCheck:
     return ServiceCheck(status="disabled", message="Graph-Sitter service removed")
 
 
+# Probes are refreshed in the background; endpoints answer from the cached results
+health_monitor.register("database", check_database, critical=True)
+health_monitor.register("redis", check_redis, critical=True)
+health_monitor.register("grainchain", check_grainchain)
+health_monitor.register("web_eval", check_web_eval)
+health_monitor.register("graph_sitter", check_graph_sitter)
+
+HEALTH_PROBES = ["database", "redis", "grainchain", "web_eval", "graph_sitter"]
+CRITICAL_PROBES = ["database", "redis"]
+
+
 @router.get("/", response_model=HealthStatus)
 async def health_check():
     """
@@ -178,43 +190,15 @@ async def health_check():
     current_time = datetime.now(timezone.utc)
     uptime = time.time() - _start_time
     
-    # Run all health checks concurrently
-    checks = await asyncio.gather(
-        check_database(),
-        check_redis(),
-        check_grainchain(),
-        check_web_eval(),
-        check_graph_sitter(),
-        return_exceptions=True
-    )
-    
-    # Process results
-    health_checks = {
-        "database": checks[0] if not isinstance(checks[0], Exception) else ServiceCheck(status="unhealthy", error=str(checks[0])),
-        "redis": checks[1] if not isinstance(checks[1], Exception) else ServiceCheck(status="unhealthy", error=str(checks[1])),
-        "grainchain": checks[2] if not isinstance(checks[2], Exception) else ServiceCheck(status="unhealthy", error=str(checks[2])),
-        "web_eval": checks[3] if not isinstance(checks[3], Exception) else ServiceCheck(status="unhealthy", error=str(checks[3])),
-        "graph_sitter": checks[4] if not isinstance(checks[4], Exception) else ServiceCheck(status="unhealthy", error=str(checks[4])),
-    }
-    
-    # Determine overall status
-    critical_services = ["database", "redis"]
-    overall_status = "healthy"
-    
-    for service_name, check in health_checks.items():
-        if service_name in critical_services and check.status == "unhealthy":
-            overall_status = "unhealthy"
-            break
-        elif check.status == "unhealthy":
-            overall_status = "degraded"
+    health_checks = await health_monitor.results(HEALTH_PROBES)
     
     return HealthStatus(
-        status=overall_status,
+        status=health_monitor.overall_status(health_checks),
         timestamp=current_time,
         version=getattr(settings, 'version', '1.0.0'),
         environment=settings.environment,
         uptime_seconds=uptime,
-        checks={name: check.dict() for name, check in health_checks.items()}
+        checks=health_checks
     )
 
 
@@ -233,32 +217,21 @@ async def readiness_check():
     Readiness check for monitoring systems
     Returns 200 only if critical services are available
     """
-    try:
-        # Check critical services only
-        db_check = await check_database()
-        redis_check = await check_redis()
-        
-        if db_check.status == "healthy" and redis_check.status == "healthy":
-            return {
-                "status": "ready",
-                "timestamp": datetime.now(timezone.utc),
-                "checks": {
-                    "database": db_check.dict(),
-                    "redis": redis_check.dict()
-                }
-            }
-        else:
-            raise HTTPException(
-                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
-                detail="Critical services not ready"
-            )
-            
-    except Exception as e:
-        logger.error("Readiness check failed", error=str(e))
-        raise HTTPException(
-            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
-            detail=f"Readiness check failed: {str(e)}"
-        )
+    checks = await health_monitor.results(CRITICAL_PROBES)
+    
+    if all(check["status"] == "healthy" for check in checks.values()):
+        return {
+            "status": "ready",
+            "timestamp": datetime.now(timezone.utc),
+            "checks": checks
+        }
+    
+    logger.warning("Readiness check failed",
+                   checks={name: check["status"] for name, check in checks.items()})
+    raise HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Critical services not ready"
+    )
 
 
 @router.get("/metrics")
@@ -1,30 +1,84 @@
 """
 Monitoring router for CodegenCICD Dashboard
 """
-from fastapi import APIRouter, HTTPException, Depends
-from typing import Dict, Any, List
+from fastapi import APIRouter, HTTPException, Depends, Response
+from typing import Dict, Any, List, Optional
 import structlog
 import psutil
 import time
 from datetime import datetime, timedelta
 
 from backend.config import get_settings
-from backend.database import check_db_health
+from backend.database import check_db_health, engine
+from backend.services.health_monitor import health_monitor
+from backend.services.resource_manager import resource_manager
+from backend.services.resource_sampler import resource_sampler
+from backend.services.system_metrics import system_metrics
+from backend.utils.circuit_breaker import CircuitState, circuit_breaker_manager
+from backend.utils.metrics import NAMESPACE, callback_gauges, get_sample_value, render_metrics
+from backend.utils.rate_limiter import rate_limiter_registry
 
 logger = structlog.get_logger(__name__)
 settings = get_settings()
 
 router = APIRouter()
 
+_BREAKER_STATE_VALUES = {CircuitState.CLOSED: 0, CircuitState.HALF_OPEN: 1, CircuitState.OPEN: 2}
+
+
+def _db_pool_samples():
+    pool = engine.pool
+    if not hasattr(pool, "checkedout"):
+        return []  # NullPool keeps no connections
+    return [(("size",), pool.size()), (("checked_in",), pool.checkedin()),
+            (("checked_out",), pool.checkedout()), (("overflow",), pool.overflow())]
+
+
+def _resource_samples():
+    breakdown = resource_manager.get_resource_stats()["type_breakdown"]
+    for resource_type, counts in breakdown.items():
+        yield (resource_type, "active"), counts["active"]
+        yield (resource_type, "total"), counts["total"]
+
+
+callback_gauges.add_source(
+    f"{NAMESPACE}_circuit_breaker_state",
+    "Circuit breaker state (0 closed, 1 half-open, 2 open)",
+    ["breaker"], "circuit_breakers",
+    lambda: [((name,), _BREAKER_STATE_VALUES[breaker.state])
+             for name, breaker in list(circuit_breaker_manager.breakers.items())]
+)
+callback_gauges.add_source(
+    f"{NAMESPACE}_circuit_breaker_failures",
+    "Failures inside the breaker's sliding window",
+    ["breaker"], "circuit_breakers",
+    lambda: [((name,), breaker.failure_count)
+             for name, breaker in list(circuit_breaker_manager.breakers.items())]
+)
+callback_gauges.add_source(
+    f"{NAMESPACE}_db_pool_connections",
+    "Database connection pool usage",
+    ["state"], "database", _db_pool_samples
+)
+callback_gauges.add_source(
+    f"{NAMESPACE}_rate_limiter_tokens",
+    "Tokens available in each upstream's rate limiter",
+    ["upstream"], "rate_limiters",
+    lambda: [((name,), stats["tokens"]) for name, stats in rate_limiter_registry.get_all_stats().items()]
+)
+callback_gauges.add_source(
+    f"{NAMESPACE}_managed_resources",
+    "Resources tracked by the resource manager",
+    ["type", "state"], "resource_manager", _resource_samples
+)
+
 
 @router.get("/metrics")
 async def get_metrics() -> Dict[str, Any]:
     """Get system metrics for monitoring"""
     try:
-        # System metrics
-        cpu_percent = psutil.cpu_percent(interval=1)
-        memory = psutil.virtual_memory()
-        disk = psutil.disk_usage('/')
+        # System metrics from the background sampler
+        sample = await system_metrics.latest()
         
         # Database health
         db_health = await check_db_health()
@@ -35,21 +89,23 @@ async def get_metrics() -> Dict[str, Any]:
         metrics = {
             "timestamp": datetime.utcnow().isoformat() + "Z",
             "system": {
-                "cpu_percent": cpu_percent,
+                "cpu_percent": sample.cpu_percent,
                 "memory": {
-                    "total": memory.total,
-                    "available": memory.available,
-                    "percent": memory.percent,
-                    "used": memory.used,
-                    "free": memory.free
+                    "total": sample.memory_total,
+                    "available": sample.memory_available,
+                    "percent": sample.memory_percent,
+                    "used": sample.memory_used,
+                    "free": sample.memory_free
                 },
                 "disk": {
-                    "total": disk.total,
-                    "used": disk.used,
-                    "free": disk.free,
-                    "percent": (disk.used / disk.total) * 100
+                    "total": sample.disk_total,
+                    "used": sample.disk_used,
+                    "free": sample.disk_free,
+                    "percent": sample.disk_percent
                 },
-                "uptime_seconds": uptime
+                "uptime_seconds": uptime,
+                "sampled_at": datetime.utcfromtimestamp(sample.timestamp).isoformat() + "Z",
+                "window": system_metrics.aggregates()
             },
             "database": db_health,
             "application": {
@@ -62,11 +118,12 @@ async def get_metrics() -> Dict[str, Any]:
         
         # Add service-specific metrics if enabled
         if settings.is_feature_enabled("websocket_updates"):
-            # TODO: Add WebSocket metrics
             metrics["websocket"] = {
-                "active_connections": 0,
-                "messages_sent": 0,
-                "messages_received": 0
+                "active_connections": int(get_sample_value(f"{NAMESPACE}_websocket_active_connections")),
+                "messages_sent": int(get_sample_value(f"{NAMESPACE}_websocket_messages_total",
+                                                      {"direction": "sent"})),
+                "messages_received": int(get_sample_value(f"{NAMESPACE}_websocket_messages_total",
+                                                          {"direction": "received"}))
             }
         
         if settings.is_feature_enabled("background_tasks"):
@@ -78,6 +135,13 @@ async def get_metrics() -> Dict[str, Any]:
                 "failed_tasks": 0
             }
         
+        from backend.integrations.gemini_client import gemini_response_cache
+        if gemini_response_cache is not None:
+            metrics["response_caches"] = {"gemini": gemini_response_cache.get_stats()}
+        
+        from backend.services.clone_strategy import repository_mirrors
+        metrics["repository_mirrors"] = repository_mirrors.get_stats()
+        
         return metrics
         
     except Exception as e:
@@ -85,100 +149,67 @@ async def get_metrics() -> Dict[str, Any]:
         raise HTTPException(status_code=500, detail="Failed to retrieve metrics")
 
 
+async def _check_codegen_api() -> Dict[str, Any]:
+    from backend.integrations import CodegenClient
+    async with CodegenClient() as client:
+        return await client.health_check()
+
+
+async def _check_github_api() -> Dict[str, Any]:
+    from backend.integrations import GitHubClient
+    async with GitHubClient() as client:
+        return await client.health_check()
+
+
+async def _check_gemini_api() -> Dict[str, Any]:
+    from backend.integrations import GeminiClient
+    async with GeminiClient() as client:
+        return await client.health_check()
+
+
+# External APIs are probed in the background rather than per request
+EXTERNAL_PROBES = {"codegen_api": _check_codegen_api, "github_api": _check_github_api}
+if settings.gemini_api_key:
+    EXTERNAL_PROBES["gemini_api"] = _check_gemini_api
+for _name, _check in EXTERNAL_PROBES.items():
+    health_monitor.register(_name, _check, interval=settings.health_check_external_interval)
+
+
 @router.get("/health/detailed")
 async def detailed_health_check() -> Dict[str, Any]:
-    """Detailed health check for all components"""
+    """Detailed health check for all components, served from the health monitor"""
     try:
         health_checks = {}
         overall_status = "healthy"
         
+        # The database probe is registered with the health router
+        results = await health_monitor.results(["database", *EXTERNAL_PROBES])
+        
         # Database health
-        db_health = await check_db_health()
-        health_checks["database"] = db_health
-        if db_health["status"] != "healthy":
-            overall_status = "degraded"
+        health_checks["database"] = results.get("database", {"status": "unknown", "error": "Not monitored"})
         
         # External services health
-        health_checks["external_services"] = {}
+        health_checks["external_services"] = {name: results[name] for name in EXTERNAL_PROBES}
         
-        # Codegen API
-        try:
-            from backend.integrations import CodegenClient
-            async with CodegenClient() as client:
-                codegen_health = await client.health_check()
-                health_checks["external_services"]["codegen_api"] = codegen_health
-                if codegen_health["status"] != "healthy":
-                    overall_status = "degraded"
-        except Exception as e:
-            health_checks["external_services"]["codegen_api"] = {
-                "status": "unhealthy",
-                "error": str(e)
-            }
+        if any(check["status"] != "healthy" for check in results.values()):
             overall_status = "degraded"
         
-        # GitHub API
-        try:
-            from backend.integrations import GitHubClient
-            async with GitHubClient() as client:
-                github_health = await client.health_check()
-                health_checks["external_services"]["github_api"] = github_health
-                if github_health["status"] != "healthy":
-                    overall_status = "degraded"
-        except Exception as e:
-            health_checks["external_services"]["github_api"] = {
-                "status": "unhealthy",
-                "error": str(e)
-            }
-            overall_status = "degraded"
-        
-        # Gemini API
-        if settings.gemini_api_key:
-            try:
-                from backend.integrations import GeminiClient
-                async with GeminiClient() as client:
-                    gemini_health = await client.health_check()
-                    health_checks["external_services"]["gemini_api"] = gemini_health
-                    if gemini_health["status"] != "healthy":
-                        overall_status = "degraded"
-            except Exception as e:
-                health_checks["external_services"]["gemini_api"] = {
-                    "status": "unhealthy",
-                    "error": str(e)
-                }
-                overall_status = "degraded"
-        
         # Internal services health
         health_checks["internal_services"] = {}
         
         # WebSocket service
         if settings.is_feature_enabled("websocket_updates"):
-            try:
-                # TODO: Add actual WebSocket service health check
-                health_checks["internal_services"]["websocket"] = {
-                    "status": "healthy",
-                    "active_connections": 0
-                }
-            except Exception as e:
-                health_checks["internal_services"]["websocket"] = {
-                    "status": "unhealthy",
-                    "error": str(e)
-                }
-                overall_status = "degraded"
+            health_checks["internal_services"]["websocket"] = {
+                "status": "healthy",
+                "active_connections": int(get_sample_value(f"{NAMESPACE}_websocket_active_connections"))
+            }
         
         # Notification service
         if settings.is_feature_enabled("email_notifications"):
-            try:
-                # TODO: Add actual notification service health check
-                health_checks["internal_services"]["notifications"] = {
-                    "status": "healthy",
-                    "queue_size": 0
-                }
-            except Exception as e:
-                health_checks["internal_services"]["notifications"] = {
-                    "status": "unhealthy",
-                    "error": str(e)
-                }
-                overall_status = "degraded"
+            health_checks["internal_services"]["notifications"] = {
+                "status": "healthy",
+                "queue_size": int(get_sample_value(f"{NAMESPACE}_queue_depth", {"queue": "notifications"}))
+            }
         
         return {
             "status": overall_status,
@@ -243,6 +274,48 @@ async def get_application_stats() -> Dict[str, Any]:
         raise HTTPException(status_code=500, detail="Failed to retrieve application statistics")
 
 
+@router.get("/metrics/prometheus")
+async def get_prometheus_metrics() -> Response:
+    """Expose all metrics in the Prometheus text format"""
+    body, content_type = render_metrics()
+    return Response(content=body, media_type=content_type)
+
+
+@router.get("/metrics/history")
+async def get_metrics_history(since: Optional[float] = None) -> Dict[str, Any]:
+    """Get buffered system metric samples with window aggregates"""
+    return {
+        "interval_seconds": system_metrics.interval,
+        "window": system_metrics.aggregates(),
+        "samples": system_metrics.history(since)
+    }
+
+
+@router.get("/resources")
+async def get_resource_overview() -> Dict[str, Any]:
+    """Get managed resource counts, aggregate usage and sampler status"""
+    return {
+        "timestamp": datetime.utcnow().isoformat() + "Z",
+        "resources": resource_manager.get_resource_stats(),
+        "sampler": resource_sampler.get_stats()
+    }
+
+
+@router.get("/resources/series")
+async def get_resource_series(since: Optional[float] = None) -> Dict[str, Any]:
+    """Get sampled metric time series for all managed resources"""
+    return {"series": resource_sampler.export_series(since)}
+
+
+@router.get("/resources/{resource_id}")
+async def get_resource(resource_id: str, since: Optional[float] = None) -> Dict[str, Any]:
+    """Get one managed resource with its sampled metric history"""
+    details = resource_manager.get_resource_details(resource_id)
+    if details is None:
+        raise HTTPException(status_code=404, detail="Resource not found")
+    return {**details, "series": resource_sampler.get_series(resource_id, since)}
+
+
 @router.get("/logs")
 async def get_recent_logs(
     level: str = "INFO",
@@ -280,46 +353,47 @@ async def get_active_alerts() -> List[Dict[str, Any]]:
     try:
         alerts = []
         
-        # Check system resources
-        memory = psutil.virtual_memory()
-        if memory.percent > 90:
+        # Check system resources against the sampled window
+        sample = await system_metrics.latest()
+        window = system_metrics.aggregates()
+        if sample.memory_percent > 90:
             alerts.append({
                 "id": "high_memory_usage",
                 "severity": "warning",
                 "title": "High Memory Usage",
-                "message": f"Memory usage is at {memory.percent:.1f}%",
+                "message": f"Memory usage is at {sample.memory_percent:.1f}%",
                 "timestamp": datetime.utcnow().isoformat() + "Z",
                 "metadata": {
-                    "memory_percent": memory.percent,
-                    "memory_available": memory.available
+                    "memory_percent": sample.memory_percent,
+                    "memory_available": sample.memory_available,
+                    "window_avg_percent": window["memory_percent"]["avg"]
                 }
             })
         
-        cpu_percent = psutil.cpu_percent(interval=1)
-        if cpu_percent > 90:
+        if sample.cpu_percent > 90:
             alerts.append({
                 "id": "high_cpu_usage",
                 "severity": "warning",
                 "title": "High CPU Usage",
-                "message": f"CPU usage is at {cpu_percent:.1f}%",
+                "message": f"CPU usage is at {sample.cpu_percent:.1f}%",
                 "timestamp": datetime.utcnow().isoformat() + "Z",
                 "metadata": {
-                    "cpu_percent": cpu_percent
+                    "cpu_percent": sample.cpu_percent,
+                    "window_avg_percent": window["cpu_percent"]["avg"],
+                    "window_max_percent": window["cpu_percent"]["max"]
                 }
             })
         
-        disk = psutil.disk_usage('/')
-        disk_percent = (disk.used / disk.total) * 100
-        if disk_percent > 90:
+        if sample.disk_percent > 90:
             alerts.append({
                 "id": "high_disk_usage",
                 "severity": "critical",
                 "title": "High Disk Usage",
-                "message": f"Disk usage is at {disk_percent:.1f}%",
+                "message": f"Disk usage is at {sample.disk_percent:.1f}%",
                 "timestamp": datetime.utcnow().isoformat() + "Z",
                 "metadata": {
-                    "disk_percent": disk_percent,
-                    "disk_free": disk.free
+                    "disk_percent": sample.disk_percent,
+                    "disk_free": sample.disk_free
                 }
             })
         
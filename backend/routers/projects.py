@@ -2,8 +2,11 @@
 Project management API endpoints
 """
 from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks
+from fastapi.responses import StreamingResponse
 from typing import List, Dict, Any, Optional
+from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
+import json
 import structlog
 from datetime import datetime
 
@@ -15,6 +18,7 @@ from backend.integrations.github_client import GitHubClient
 from backend.integrations.codegen_client import CodegenClient
 from backend.database import get_db
 from backend.config import get_settings
+from backend.services.setup_playground import setup_playground
 
 logger = structlog.get_logger(__name__)
 router = APIRouter(prefix="/api/projects", tags=["projects"])
@@ -57,12 +61,12 @@ class AgentRunContinueRequest(BaseModel):
 async def list_github_repos(db: AsyncSession = Depends(get_db)):
     """List available GitHub repositories"""
     try:
-        github_client = GitHubClient()
-        repos = await github_client.list_repositories()
+        async with GitHubClient() as github_client:
+            repos = await github_client.list_all_repositories()
         
         # Get currently pinned projects
-        pinned_projects = db.query(Project).filter(Project.is_active == True).all()
-        pinned_github_ids = {p.github_id for p in pinned_projects}
+        result = await db.execute(select(Project.github_id).where(Project.is_active == True))
+        pinned_github_ids = {github_id for (github_id,) in result.all()}
         
         # Mark repos as pinned
         for repo in repos:
@@ -74,6 +78,27 @@ async def list_github_repos(db: AsyncSession = Depends(get_db)):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.get("/github-repos/stream")
+async def stream_github_repos(org: Optional[str] = None, db: AsyncSession = Depends(get_db)):
+    """Stream available GitHub repositories as NDJSON, one repository per line"""
+    result = await db.execute(select(Project.github_id).where(Project.is_active == True))
+    pinned_github_ids = {github_id for (github_id,) in result.all()}
+    github_client = GitHubClient()
+    
+    async def generate():
+        try:
+            async for repo in github_client.stream_repositories(org):
+                repo["is_pinned"] = repo["id"] in pinned_github_ids
+                yield json.dumps(repo) + "\n"
+        except Exception as e:
+            logger.error("Failed to stream GitHub repositories", error=str(e))
+            yield json.dumps({"error": str(e)}) + "\n"
+        finally:
+            await github_client.close()
+    
+    return StreamingResponse(generate(), media_type="application/x-ndjson")
+
+
 @router.post("/")
 async def create_project(
     request: ProjectCreateRequest,
@@ -245,6 +270,7 @@ async def create_project_secret(
             existing.value = request.value
             db.commit()
             db.refresh(existing)
+            await setup_playground.release_project(project_id)
             return {"secret": existing.to_dict()}
         else:
             # Create new secret
@@ -256,6 +282,7 @@ async def create_project_secret(
             db.add(secret)
             db.commit()
             db.refresh(secret)
+            await setup_playground.release_project(project_id)
             return {"secret": secret.to_dict()}
         
     except Exception as e:
@@ -281,6 +308,7 @@ async def delete_project_secret(
         
         db.delete(secret)
         db.commit()
+        await setup_playground.release_project(project_id)
         
         return {"message": "Secret deleted successfully"}
         
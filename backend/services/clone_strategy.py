@@ -0,0 +1,201 @@
+"""
+Clone strategies for sandbox checkouts
+
+Every validation used to clone the repository from scratch. Sandboxes that
+share the host filesystem get a ``git worktree`` checked out from a host-local
+bare mirror, which is kept current with incremental fetches so only new
+objects cross the network. Remote sandboxes get a partial
+(``--filter=blob:none``) or shallow clone of the branch being validated.
+"""
+import asyncio
+import base64
+import hashlib
+import os
+import re
+import shutil
+import time
+from enum import Enum
+from typing import Any, Dict, Optional, Sequence
+from urllib.parse import urlsplit
+import structlog
+
+from backend.config import get_settings
+
+logger = structlog.get_logger(__name__)
+settings = get_settings()
+
+_LOOPBACK_HOSTS = {"localhost", "127.0.0.1", "::1"}
+# Bare clones have no fetch refspec; branches are mirrored onto the same names
+HEADS_REFSPEC = "+refs/heads/*:refs/heads/*"
+
+
+class CloneStrategy(Enum):
+    """How a repository is materialized in a sandbox"""
+    WORKTREE = "worktree"  # Worktree of a host-local bare mirror
+    PARTIAL = "partial"  # Full history and trees, file contents fetched on demand
+    SHALLOW = "shallow"  # Tip commit of one branch only
+    FULL = "full"
+
+
+def resolve_strategy(name: str, sandbox_url: Optional[str] = None, local_checkout: bool = True) -> CloneStrategy:
+    """Strategy for ``name``; "auto" uses worktrees when the sandbox service runs on this host.
+
+    Worktrees need the sandbox to see the host filesystem, so callers that
+    clone into a remote snapshot pass ``local_checkout=False`` and get a
+    partial clone instead.
+    """
+    if name == "auto":
+        host = urlsplit(sandbox_url or "").hostname
+        name = "worktree" if local_checkout and host in _LOOPBACK_HOSTS else "partial"
+    try:
+        strategy = CloneStrategy(name)
+    except ValueError:
+        logger.warning("Unknown clone strategy, using partial clones", strategy=name)
+        return CloneStrategy.PARTIAL
+    if strategy is CloneStrategy.WORKTREE and not local_checkout:
+        return CloneStrategy.PARTIAL
+    return strategy
+
+
+def clone_options(strategy: CloneStrategy) -> Dict[str, Any]:
+    """Options added to sandbox clone requests for ``strategy``"""
+    if strategy is CloneStrategy.SHALLOW:
+        return {"depth": 1, "single_branch": True, "no_tags": True}
+    if strategy is CloneStrategy.PARTIAL:
+        # History stays available for diffs against the base branch
+        return {"filter": "blob:none", "no_tags": True}
+    return {}
+
+
+class RepositoryMirrors:
+    """Host-local bare mirrors, one per repository, checked out as worktrees"""
+
+    def __init__(self, root: str, fetch_interval: float = 60.0, token: Optional[str] = None):
+        self.root = root
+        self.fetch_interval = fetch_interval
+        self.token = token
+        self._locks: Dict[str, asyncio.Lock] = {}
+        self._fetched_at: Dict[str, float] = {}
+        self.worktrees: Dict[str, str] = {}  # Checkout directory -> mirror path
+        self.stats = {"mirrors_created": 0, "fetches": 0, "fetches_skipped": 0,
+                      "checkouts": 0, "worktrees_removed": 0}
+        self.logger = logger.bind(component="repository_mirrors")
+
+    def mirror_path(self, repo_url: str) -> str:
+        """Mirror directory for ``repo_url``; named after owner/repo, never credentials"""
+        owner_repo = "/".join(re.split(r"[/:]", repo_url.rstrip("/"))[-2:])
+        name = re.sub(r"[^\w.-]+", "_", owner_repo).strip("_")
+        if name.endswith(".git"):
+            name = name[:-4]
+        digest = hashlib.sha256(repo_url.encode()).hexdigest()[:8]
+        return os.path.join(self.root, f"{name}-{digest}.git")
+
+    def _lock(self, path: str) -> asyncio.Lock:
+        return self._locks.setdefault(path, asyncio.Lock())
+
+    def _auth_env(self, repo_url: str) -> Dict[str, str]:
+        # Config from the environment (git 2.31+) keeps the token out of the mirror's
+        # config and out of the command line, which ps and /proc expose
+        if self.token and repo_url.startswith("https://github.com/"):
+            basic = base64.b64encode(f"x-access-token:{self.token}".encode()).decode()
+            return {"GIT_CONFIG_COUNT": "1",
+                    "GIT_CONFIG_KEY_0": "http.https://github.com/.extraheader",
+                    "GIT_CONFIG_VALUE_0": f"AUTHORIZATION: basic {basic}"}
+        return {}
+
+    async def _git(self, *args: str, env: Optional[Dict[str, str]] = None) -> str:
+        process = await asyncio.create_subprocess_exec(
+            "git", *args,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+            env={**os.environ, "GIT_TERMINAL_PROMPT": "0", **(env or {})}
+        )
+        stdout, stderr = await process.communicate()
+        if process.returncode != 0:
+            raise RuntimeError(f"git exited with {process.returncode}: "
+                               f"{stderr.decode(errors='replace').strip()}")
+        return stdout.decode(errors="replace")
+
+    async def has_commit(self, path: str, commit: str) -> bool:
+        try:
+            await self._git("-C", path, "cat-file", "-e", f"{commit}^{{commit}}")
+            return True
+        except RuntimeError:
+            return False
+
+    async def update(self, repo_url: str, refspecs: Sequence[str] = (), force: bool = False) -> str:
+        """Create the mirror or fetch new objects into it; returns the mirror path.
+
+        Fetches of branches alone are skipped within ``fetch_interval`` of the
+        last one unless ``force`` is set; extra ``refspecs`` (such as pull
+        request refs) are always fetched.
+        """
+        path = self.mirror_path(repo_url)
+        async with self._lock(path):
+            auth = self._auth_env(repo_url)
+            if not os.path.isdir(path):
+                os.makedirs(self.root, exist_ok=True)
+                await self._git("clone", "--bare", "--no-tags", repo_url, path, env=auth)
+                await self._git("-C", path, "config", "remote.origin.fetch", HEADS_REFSPEC)
+                self.stats["mirrors_created"] += 1
+                self.logger.info("Created repository mirror", path=path)
+                if not refspecs:
+                    self._fetched_at[path] = time.monotonic()
+                    return path
+            elif (not force and not refspecs
+                  and time.monotonic() - self._fetched_at.get(path, float("-inf")) < self.fetch_interval):
+                self.stats["fetches_skipped"] += 1
+                return path
+
+            await self._git("-C", path, "fetch", "--prune", "--no-tags", "origin",
+                            HEADS_REFSPEC, *refspecs, env=auth)
+            self._fetched_at[path] = time.monotonic()
+            self.stats["fetches"] += 1
+            return path
+
+    async def checkout(self,
+                       repo_url: str,
+                       target_dir: str,
+                       ref: str,
+                       commit: Optional[str] = None,
+                       refspecs: Sequence[str] = ()) -> str:
+        """Check out ``commit`` (or ``ref``) from the mirror as a detached worktree at ``target_dir``"""
+        path = self.mirror_path(repo_url)
+        # Commits are immutable, so a mirror that already has the commit needs no fetch
+        if commit and os.path.isdir(path) and await self.has_commit(path, commit):
+            self.stats["fetches_skipped"] += 1
+        else:
+            await self.update(repo_url, refspecs=refspecs, force=commit is not None)
+
+        await self.remove_worktree(target_dir)  # Left over from an earlier run
+        async with self._lock(path):
+            await self._git("-C", path, "worktree", "prune")
+            await self._git("-C", path, "worktree", "add", "--detach", "--force", target_dir, commit or ref)
+        self.worktrees[target_dir] = path
+        self.stats["checkouts"] += 1
+        self.logger.info("Checked out worktree from mirror", target_dir=target_dir, ref=ref, commit=commit)
+        return target_dir
+
+    async def remove_worktree(self, target_dir: str) -> bool:
+        """Remove a checkout made by ``checkout``; False if there is none"""
+        path = self.worktrees.pop(target_dir, None)
+        if path is None:
+            return False
+        async with self._lock(path):
+            try:
+                await self._git("-C", path, "worktree", "remove", "--force", target_dir)
+            except RuntimeError as e:
+                self.logger.warning("Failed to remove worktree", target_dir=target_dir, error=str(e))
+                shutil.rmtree(target_dir, ignore_errors=True)
+                await self._git("-C", path, "worktree", "prune")
+        self.stats["worktrees_removed"] += 1
+        return True
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {"root": self.root, "active_worktrees": len(self.worktrees), **self.stats}
+
+
+# Global repository mirrors instance
+repository_mirrors = RepositoryMirrors(settings.git_mirror_dir,
+                                       fetch_interval=settings.git_mirror_fetch_interval,
+                                       token=settings.github_token)
@@ -1,10 +1,14 @@
 """
 GitHub API service for repository management and webhook setup
 """
+import asyncio
 import os
 import httpx
 import logging
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, Tuple
+
+from backend.integrations.base_client import APIError
+from backend.integrations.github_client import GitHubClient
 
 logger = logging.getLogger(__name__)
 
@@ -40,53 +44,28 @@ class GitHubService:
     async def get_user_repositories(self) -> List[Dict[str, Any]]:
         """Get repositories accessible to the authenticated user"""
         try:
-            async with httpx.AsyncClient() as client:
-                headers = {
-                    "Authorization": f"token {self.token}",
-                    "Accept": "application/vnd.github.v3+json"
-                }
-                
-                # Get user repos
-                response = await client.get(
-                    f"{self.base_url}/user/repos",
-                    headers=headers,
-                    params={
-                        "sort": "updated",
-                        "per_page": 100,
-                        "type": "all"
-                    },
-                    timeout=30.0
-                )
+            async with GitHubClient(token=self.token) as client:
+                # User repos and every organization's repos are paginated concurrently
+                user_repos_task = asyncio.create_task(client.list_all_repositories())
                 
-                response.raise_for_status()
-                repos = response.json()
-                
-                # Also get organization repos
                 org_repos = []
                 try:
-                    orgs_response = await client.get(
-                        f"{self.base_url}/user/orgs",
-                        headers=headers,
-                        timeout=30.0
+                    orgs = await client.get_user_organizations()
+                    results = await asyncio.gather(
+                        *(client.list_all_repositories(org=org['login']) for org in orgs),
+                        return_exceptions=True
                     )
-                    
-                    if orgs_response.status_code == 200:
-                        orgs = orgs_response.json()
-                        
-                        for org in orgs:
-                            org_repos_response = await client.get(
-                                f"{self.base_url}/orgs/{org['login']}/repos",
-                                headers=headers,
-                                params={"per_page": 100},
-                                timeout=30.0
-                            )
+                    for org, result in zip(orgs, results):
+                        if isinstance(result, Exception):
+                            logger.warning(f"Failed to get repos for organization {org['login']}: {result}")
+                        else:
+                            org_repos.extend(result)
                             
-                            if org_repos_response.status_code == 200:
-                                org_repos.extend(org_repos_response.json())
-                                
                 except Exception as e:
                     logger.warning(f"Failed to get organization repos: {e}")
                 
+                repos = await user_repos_task
+                
                 # Combine and deduplicate
                 all_repos = repos + org_repos
                 seen = set()
@@ -111,7 +90,7 @@ class GitHubService:
                 logger.info(f"Retrieved {len(unique_repos)} repositories")
                 return unique_repos
                 
-        except httpx.HTTPError as e:
+        except APIError as e:
             logger.error(f"HTTP error getting repositories: {e}")
             raise Exception(f"Failed to get repositories: {e}")
         except Exception as e:
@@ -222,6 +201,84 @@ class GitHubService:
             logger.error(f"Error getting pull request: {e}")
             return None
     
+    async def get_pull_request_files(self, owner: str, repo: str, pr_number: int) -> Optional[List[Dict[str, Any]]]:
+        """List the files changed by a pull request
+        
+        Returns None if the list cannot be fetched or exceeds the 3000 files
+        GitHub will return.
+        """
+        try:
+            async with httpx.AsyncClient() as client:
+                headers = {
+                    "Authorization": f"token {self.token}",
+                    "Accept": "application/vnd.github.v3+json"
+                }
+                
+                files: List[Dict[str, Any]] = []
+                page = 1
+                while True:
+                    response = await client.get(
+                        f"{self.base_url}/repos/{owner}/{repo}/pulls/{pr_number}/files",
+                        headers=headers,
+                        params={"per_page": 100, "page": page},
+                        timeout=30.0
+                    )
+                    response.raise_for_status()
+                    batch = response.json()
+                    files.extend(batch)
+                    if len(batch) < 100:
+                        return files
+                    if len(files) >= 3000:
+                        logger.warning(f"Pull request #{pr_number} in {owner}/{repo} changes too many files to list")
+                        return None
+                    page += 1
+                
+        except httpx.HTTPError as e:
+            logger.error(f"HTTP error getting pull request files: {e}")
+            return None
+        except Exception as e:
+            logger.error(f"Error getting pull request files: {e}")
+            return None
+    
+    async def get_tree(self, owner: str, repo: str, sha: str) -> Optional[List[Tuple[str, str, Optional[int]]]]:
+        """List ``(path, blob_sha, size)`` for every file at a commit.
+
+        Returns None if the tree cannot be fetched or GitHub truncated it.
+        """
+        try:
+            async with httpx.AsyncClient() as client:
+                headers = {
+                    "Authorization": f"token {self.token}",
+                    "Accept": "application/vnd.github.v3+json"
+                }
+                
+                response = await client.get(
+                    f"{self.base_url}/repos/{owner}/{repo}/git/trees/{sha}",
+                    headers=headers,
+                    params={"recursive": "1"},
+                    timeout=60.0
+                )
+                
+                response.raise_for_status()
+                tree = response.json()
+                
+                if tree.get("truncated"):
+                    logger.warning(f"Tree for {owner}/{repo}@{sha} is truncated")
+                    return None
+                
+                return [
+                    (entry["path"], entry["sha"], entry.get("size"))
+                    for entry in tree.get("tree", [])
+                    if entry.get("type") == "blob"
+                ]
+                
+        except httpx.HTTPError as e:
+            logger.error(f"HTTP error getting tree: {e}")
+            return None
+        except Exception as e:
+            logger.error(f"Error getting tree: {e}")
+            return None
+    
     async def merge_pull_request(self, owner: str, repo: str, pr_number: int, 
                                 commit_title: str = "", commit_message: str = "") -> Dict[str, Any]:
         """Merge a pull request"""
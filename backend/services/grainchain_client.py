@@ -9,6 +9,7 @@ import httpx
 from datetime import datetime
 
 from backend.config import get_settings
+from backend.services.clone_strategy import CloneStrategy, clone_options, repository_mirrors, resolve_strategy
 
 logger = structlog.get_logger(__name__)
 settings = get_settings()
@@ -71,16 +72,32 @@ class GrainchainClient:
             logger.error("Snapshot creation failed", name=name, error=str(e))
             return None
     
-    async def clone_repository(self, repo_url: str, branch: str, target_dir: str) -> bool:
-        """Clone a repository in the sandbox"""
+    async def clone_repository(self,
+                               repo_url: str,
+                               branch: str,
+                               target_dir: str,
+                               commit: Optional[str] = None,
+                               refspecs: Optional[List[str]] = None) -> bool:
+        """Check out a repository in the sandbox, from the local mirror when the sandbox shares this host"""
+        strategy = resolve_strategy(settings.git_clone_strategy, self.base_url)
+        if strategy is CloneStrategy.WORKTREE:
+            try:
+                await repository_mirrors.checkout(repo_url, target_dir, branch,
+                                                  commit=commit, refspecs=refspecs or ())
+                return True
+            except Exception as e:
+                logger.warning("Mirror checkout failed, cloning in the sandbox",
+                               repo_url=repo_url, error=str(e))
+                strategy = CloneStrategy.PARTIAL
+
         try:
-            logger.info("Cloning repository", repo_url=repo_url, branch=branch)
+            logger.info("Cloning repository", repo_url=repo_url, branch=branch, strategy=strategy.value)
             
             clone_config = {
                 "repo_url": repo_url,
                 "branch": branch,
                 "target_directory": target_dir,
-                "depth": 1  # Shallow clone for faster operation
+                **clone_options(strategy)
             }
             
             async with httpx.AsyncClient(timeout=self.timeout) as client:
@@ -104,6 +121,14 @@ class GrainchainClient:
             logger.error("Repository cloning failed", repo_url=repo_url, error=str(e))
             return False
     
+    async def release_checkout(self, target_dir: str) -> bool:
+        """Remove a mirror worktree created by ``clone_repository``"""
+        try:
+            return await repository_mirrors.remove_worktree(target_dir)
+        except Exception as e:
+            logger.error("Failed to release checkout", target_dir=target_dir, error=str(e))
+            return False
+    
     async def execute_commands(self, commands: List[str], working_dir: str, timeout: int = 300) -> Dict[str, Any]:
         """Execute a list of commands in the sandbox"""
         try:
@@ -3,23 +3,98 @@ Graph-Sitter client for static analysis and code quality metrics
 """
 import asyncio
 import json
-from typing import Dict, Any, List, Optional
+import os
+import tempfile
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional
 import structlog
 import httpx
 from datetime import datetime
 
 from backend.config import get_settings
+from backend.utils.analysis_cache import (
+    DEFAULT_EXCLUDE_PATTERNS,
+    SourceFile,
+    aggregate_file_results,
+    analysis_cache,
+    analyze_uncached,
+    analyze_with_cache,
+    list_worktree_entries,
+    manifest_fingerprint,
+    select_source_files
+)
+from backend.utils.diff_analysis import (
+    base_versions,
+    build_diff_report,
+    changes_from_paths,
+    dependents_from_imports,
+    extract_imports,
+    git_changed_files,
+    list_tree,
+    read_blob,
+    scope_files
+)
 
 logger = structlog.get_logger(__name__)
 settings = get_settings()
 
 
+class ReportScore:
+    """Overall quality score kept current as report sections arrive
+    
+    Sections only adjust running counts, so the score can be read after
+    every streamed section without revisiting earlier ones.
+    """
+    
+    def __init__(self):
+        self.issues = 0
+        self.security_issues = 0
+        self.vulnerabilities = 0
+        self.complexity = 0.0
+        self._complexity_weight = 0
+    
+    def add_file(self, result: Dict[str, Any]):
+        self.issues += len(result.get("issues", []))
+        self.security_issues += len(result.get("security_issues", []))
+        metrics = result.get("metrics", {})
+        if "complexity" in metrics or "maintainability" in metrics:
+            # Line-weighted mean, matching the aggregated complexity_score
+            weight = max(metrics.get("lines_of_code") or metrics.get("total_lines") or 0, 1)
+            total = self.complexity * self._complexity_weight + metrics.get("complexity", 0) * weight
+            self._complexity_weight += weight
+            self.complexity = total / self._complexity_weight
+    
+    def set_dependencies(self, result: Dict[str, Any]):
+        self.vulnerabilities = len(result.get("vulnerabilities", []))
+    
+    @property
+    def value(self) -> float:
+        score = 100.0
+        score -= min(self.issues * 2, 30)  # Max 30 points deduction
+        score -= min(self.security_issues * 5, 40)  # Max 40 points deduction
+        score -= min(self.vulnerabilities * 3, 20)  # Max 20 points deduction
+        if self.complexity > 10:
+            score -= min((self.complexity - 10) * 2, 10)  # Max 10 points deduction
+        return max(score, 0.0)
+
+
 class GraphSitterClient:
     """Client for interacting with Graph-Sitter service"""
     
     def __init__(self):
         self.base_url = settings.graph_sitter_url or "http://localhost:8002"
         self.timeout = 120  # 2 minutes timeout for analysis
+        self._client: Optional[httpx.AsyncClient] = None
+    
+    async def _get_client(self) -> httpx.AsyncClient:
+        """Long-lived client reused for combined analysis requests"""
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(timeout=self.timeout)
+        return self._client
+    
+    async def close(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
     
     async def analyze_codebase(self, codebase_path: str, language: str = "auto") -> Dict[str, Any]:
         """Analyze a codebase for quality metrics and issues"""
@@ -79,7 +154,8 @@ class GraphSitterClient:
                 "metrics": {}
             }
     
-    async def analyze_file(self, file_path: str, language: str = "auto") -> Dict[str, Any]:
+    async def analyze_file(self, file_path: str, language: str = "auto",
+                           include_security: bool = False) -> Dict[str, Any]:
         """Analyze a single file"""
         try:
             logger.info("Analyzing file", file_path=file_path, language=language)
@@ -89,7 +165,8 @@ class GraphSitterClient:
                 "language": language,
                 "include_ast": True,
                 "include_metrics": True,
-                "include_issues": True
+                "include_issues": True,
+                "include_security": include_security
             }
             
             async with httpx.AsyncClient(timeout=60) as client:
@@ -125,6 +202,119 @@ class GraphSitterClient:
                 "metrics": {}
             }
     
+    def _import_index(self, codebase_path: str, files: List[SourceFile]) -> Dict[str, List[str]]:
+        """Import specifiers of each source file, cached by content. Blocking."""
+        imports = {}
+        for source in files:
+            cached = analysis_cache.get("imports", source.blob_sha, source.language)
+            if cached is None:
+                try:
+                    with open(os.path.join(codebase_path, source.path), encoding="utf-8", errors="replace") as f:
+                        cached = {"imports": extract_imports(source.path, f.read())}
+                except OSError:
+                    continue
+                analysis_cache.put(cached, "imports", source.blob_sha, source.language)
+            imports[source.path] = cached["imports"]
+        return imports
+    
+    async def analyze_diff(self,
+                           codebase_path: str,
+                           base_sha: str,
+                           head_sha: Optional[str] = None,
+                           changed_files: Optional[List[str]] = None,
+                           include_dependents: bool = True) -> Dict[str, Any]:
+        """Analyze only what a change touches and report the issues it introduced or resolved
+        
+        The checkout at ``codebase_path`` is the head side; changed files come
+        from ``git diff`` between ``base_sha`` and ``head_sha`` (or the
+        worktree) unless ``changed_files`` is given. Changed files and the
+        files that directly import them are analyzed at head, and changed
+        files again at base from git objects, reusing cached results for
+        content analyzed before.
+        """
+        try:
+            logger.info("Starting diff analysis", path=codebase_path, base=base_sha, head=head_sha)
+            languages = settings.graph_sitter_languages.split(",")
+            max_size = settings.graph_sitter_max_file_size
+            concurrency = settings.graph_sitter_file_concurrency
+            
+            head_entries, base_entries = await asyncio.gather(
+                asyncio.to_thread(list_worktree_entries, codebase_path),
+                asyncio.to_thread(list_tree, codebase_path, base_sha)
+            )
+            if changed_files is None:
+                changes = await asyncio.to_thread(git_changed_files, codebase_path, base_sha, head_sha)
+            else:
+                changes = changes_from_paths(changed_files, head_entries, base_entries)
+            head_files, base_files = scope_files(changes, head_entries, base_entries, languages, max_size)
+            
+            dependent_files: List[SourceFile] = []
+            if include_dependents:
+                all_files = select_source_files(head_entries, languages, max_size)
+                imports = await asyncio.to_thread(self._import_index, codebase_path, all_files)
+                targets = {path for change in changes for path in (change.head_path, change.base_path) if path}
+                dependents = dependents_from_imports(imports, targets)
+                dependent_files = [source for source in all_files if source.path in dependents]
+            dependent_base_files = base_versions(dependent_files, base_entries)
+            
+            def analyze_head(source: SourceFile):
+                return self.analyze_file(
+                    os.path.join(codebase_path, source.path), source.language, include_security=True
+                )
+            
+            with tempfile.TemporaryDirectory(prefix="graph-sitter-base-") as base_dir:
+                async def materialize(source: SourceFile) -> str:
+                    data = await asyncio.to_thread(read_blob, codebase_path, source.blob_sha)
+                    target = os.path.join(base_dir, source.path)
+                    os.makedirs(os.path.dirname(target), exist_ok=True)
+                    with open(target, "wb") as f:
+                        f.write(data)
+                    return target
+                
+                async def analyze_base(source: SourceFile):
+                    return await self.analyze_file(await materialize(source), source.language,
+                                                   include_security=True)
+                
+                if dependent_base_files:
+                    # Dependents are analyzed at base next to the base versions of what they import
+                    await asyncio.gather(*(materialize(source) for source in base_files))
+                
+                # Base versions of changed files are otherwise materialized only on a cache miss
+                (head_results, head_analyzed), (base_results, base_analyzed), dependent_results, \
+                    dependent_base_results = await asyncio.gather(
+                        analyze_with_cache(analysis_cache, self.base_url, head_files, analyze_head, concurrency),
+                        analyze_with_cache(analysis_cache, self.base_url, base_files, analyze_base, concurrency),
+                        analyze_uncached(dependent_files, analyze_head, concurrency),
+                        analyze_uncached(dependent_base_files, analyze_base, concurrency)
+                    )
+            
+            report = build_diff_report(
+                changes, head_files, base_files, dependent_files, dependent_base_files,
+                head_results, base_results, dependent_results, dependent_base_results
+            )
+            report["base_sha"] = base_sha
+            report["head_sha"] = head_sha
+            report["cache"] = {"files_reanalyzed": len(head_analyzed) + len(base_analyzed)
+                               + len(dependent_files) + len(dependent_base_files)}
+            
+            logger.info("Diff analysis completed",
+                        changed_files=len(changes),
+                        dependents=len(dependent_files),
+                        introduced_issues=report["summary"]["introduced_issues"],
+                        resolved_issues=report["summary"]["resolved_issues"])
+            return report
+            
+        except Exception as e:
+            logger.error("Diff analysis failed", path=codebase_path, error=str(e))
+            return {
+                "success": False,
+                "error": str(e),
+                "mode": "diff",
+                "issues": [],
+                "introduced_issues": [],
+                "resolved_issues": []
+            }
+    
     async def get_code_metrics(self, codebase_path: str) -> Dict[str, Any]:
         """Get code quality metrics for a codebase"""
         try:
@@ -206,8 +396,17 @@ class GraphSitterClient:
                 "security_issues": []
             }
     
-    async def get_dependency_analysis(self, codebase_path: str) -> Dict[str, Any]:
-        """Analyze dependencies and their security status"""
+    async def get_dependency_analysis(self, codebase_path: str,
+                                      fingerprint: Optional[str] = None) -> Dict[str, Any]:
+        """Analyze dependencies and their security status.
+
+        With a ``fingerprint`` of the dependency manifests the result is reused
+        until one of them changes.
+        """
+        if fingerprint:
+            cached = analysis_cache.get(self.base_url, "dependencies", fingerprint)
+            if cached is not None:
+                return cached
         try:
             logger.info("Analyzing dependencies", path=codebase_path)
             
@@ -222,6 +421,8 @@ class GraphSitterClient:
                     logger.info("Dependency analysis completed", 
                                total_dependencies=len(result.get("dependencies", [])),
                                vulnerable_dependencies=len(result.get("vulnerabilities", [])))
+                    if fingerprint:
+                        analysis_cache.put(result, self.base_url, "dependencies", fingerprint)
                     return result
                 else:
                     logger.error("Dependency analysis failed", 
@@ -242,39 +443,169 @@ class GraphSitterClient:
                 "vulnerabilities": []
             }
     
-    async def generate_code_report(self, codebase_path: str) -> Dict[str, Any]:
-        """Generate a comprehensive code quality report"""
+    async def _stream_combined(self,
+                               codebase_path: str,
+                               files: List[SourceFile],
+                               include_dependencies: bool) -> AsyncIterator[Dict[str, Any]]:
+        """Request every section in one traversal, yielding sections as they are streamed back
+        
+        Falls back to per-file requests when the service has no combined endpoint.
+        """
+        payload = {
+            "path": codebase_path,
+            "files": [{"path": source.path, "language": source.language} for source in files],
+            "sections": ["metrics", "issues", "security"] + (["dependencies"] if include_dependencies else []),
+            "exclude_patterns": DEFAULT_EXCLUDE_PATTERNS,
+            "stream": True
+        }
+        
+        client = await self._get_client()
+        async with client.stream(
+            "POST",
+            f"{self.base_url}/api/analyze/combined",
+            json=payload,
+            headers={"Accept": "application/x-ndjson"}
+        ) as response:
+            supported = response.status_code not in (404, 405)
+            if supported:
+                response.raise_for_status()
+                async for line in response.aiter_lines():
+                    if line.strip():
+                        yield json.loads(line)
+        
+        if not supported:
+            logger.info("Combined analysis unavailable, analyzing files individually",
+                        files=len(files))
+            async for section in self._stream_per_file(codebase_path, files, include_dependencies):
+                yield section
+    
+    async def _stream_per_file(self,
+                               codebase_path: str,
+                               files: List[SourceFile],
+                               include_dependencies: bool) -> AsyncIterator[Dict[str, Any]]:
+        semaphore = asyncio.Semaphore(settings.graph_sitter_file_concurrency)
+        
+        async def file_section(source: SourceFile) -> Dict[str, Any]:
+            async with semaphore:
+                result = await self.analyze_file(
+                    os.path.join(codebase_path, source.path), source.language, include_security=True
+                )
+            return {"section": "file", "path": source.path, "result": result}
+        
+        async def dependency_section() -> Dict[str, Any]:
+            return {"section": "dependencies", "result": await self.get_dependency_analysis(codebase_path)}
+        
+        pending = [file_section(source) for source in files]
+        if include_dependencies:
+            pending.append(dependency_section())
+        for next_section in asyncio.as_completed(pending):
+            yield await next_section
+    
+    async def stream_code_report(self,
+                                 codebase_path: str,
+                                 languages: Optional[List[str]] = None) -> AsyncIterator[Dict[str, Any]]:
+        """Build a code report, yielding each section with the running score as it arrives
+        
+        Unchanged files and dependency manifests are served from the analysis
+        cache; everything else is requested in a single combined round-trip.
+        The final section is ``{"section": "report", "report": ...}``.
+        """
+        entries = await asyncio.to_thread(list_worktree_entries, codebase_path)
+        files = select_source_files(
+            entries,
+            languages or settings.graph_sitter_languages.split(","),
+            settings.graph_sitter_max_file_size
+        )
+        fingerprint = manifest_fingerprint(entries)
+        score = ReportScore()
+        results: Dict[str, Dict[str, Any]] = {}
+        
+        misses: Dict[str, SourceFile] = {}
+        for source in files:
+            cached = analysis_cache.get(self.base_url, source.blob_sha, source.language)
+            if cached is None:
+                misses[source.path] = source
+            else:
+                results[source.path] = cached
+                score.add_file(cached)
+        yield {"section": "cached", "files": len(results), "score": score.value}
+        
+        dependencies = analysis_cache.get(self.base_url, "dependencies", fingerprint) if fingerprint else None
+        if dependencies is not None:
+            score.set_dependencies(dependencies)
+            yield {"section": "dependencies", "result": dependencies, "cached": True, "score": score.value}
+        
+        if misses or dependencies is None:
+            try:
+                async for section in self._stream_combined(codebase_path, list(misses.values()),
+                                                           include_dependencies=dependencies is None):
+                    kind, result = section.get("section"), section.get("result", {})
+                    if kind == "file" and section.get("path") in misses:
+                        source = misses[section["path"]]
+                        if not result.get("error") and result.get("success", True):
+                            analysis_cache.put(result, self.base_url, source.blob_sha, source.language)
+                        results[source.path] = result
+                        score.add_file(result)
+                    elif kind == "dependencies":
+                        if fingerprint and not result.get("error") and result.get("success", True):
+                            analysis_cache.put(result, self.base_url, "dependencies", fingerprint)
+                        dependencies = result
+                        score.set_dependencies(result)
+                    yield {**section, "score": score.value}
+            except Exception as e:
+                logger.error("Combined analysis failed", path=codebase_path, error=str(e))
+                yield {"section": "error", "error": str(e), "score": score.value}
+        
+        for path in misses:
+            results.setdefault(path, {"error": "No analysis result received", "issues": [], "metrics": {}})
+        dependencies = dependencies or {"dependencies": [], "vulnerabilities": []}
+        
+        analysis = aggregate_file_results(files, results)
+        security_issues = analysis.pop("security_issues")
+        analysis["manifest_fingerprint"] = fingerprint
+        analysis["cache"] = {"files_reanalyzed": len(misses), "files_reused": len(files) - len(misses)}
+        
+        report = {
+            "timestamp": datetime.utcnow().isoformat(),
+            "codebase_path": codebase_path,
+            "analysis": analysis,
+            "metrics": analysis["metrics"],
+            "security_issues": security_issues,
+            "dependencies": dependencies.get("dependencies", []),
+            "vulnerabilities": dependencies.get("vulnerabilities", []),
+            "summary": {
+                "total_files": analysis["files_analyzed"],
+                "total_issues": len(analysis["issues"]),
+                "security_issues": len(security_issues),
+                "vulnerable_dependencies": len(dependencies.get("vulnerabilities", [])),
+                "overall_score": score.value
+            }
+        }
+        yield {"section": "report", "report": report, "score": score.value}
+    
+    async def generate_code_report(
+        self,
+        codebase_path: str,
+        on_section: Optional[Callable[[Dict[str, Any]], Awaitable[None]]] = None
+    ) -> Dict[str, Any]:
+        """Generate a comprehensive code quality report
+        
+        ``on_section`` is awaited with each partial section (and the running
+        score) as it arrives, for callers that want to publish progress.
+        """
         try:
             logger.info("Generating code report", path=codebase_path)
             
-            # Run all analyses
-            analysis_result = await self.analyze_codebase(codebase_path)
-            metrics_result = await self.get_code_metrics(codebase_path)
-            security_result = await self.find_security_issues(codebase_path)
-            dependency_result = await self.get_dependency_analysis(codebase_path)
-            
-            # Combine results
-            report = {
-                "timestamp": datetime.utcnow().isoformat(),
-                "codebase_path": codebase_path,
-                "analysis": analysis_result,
-                "metrics": metrics_result.get("metrics", {}),
-                "security_issues": security_result.get("security_issues", []),
-                "dependencies": dependency_result.get("dependencies", []),
-                "vulnerabilities": dependency_result.get("vulnerabilities", []),
-                "summary": {
-                    "total_files": analysis_result.get("files_analyzed", 0),
-                    "total_issues": len(analysis_result.get("issues", [])),
-                    "security_issues": len(security_result.get("security_issues", [])),
-                    "vulnerable_dependencies": len(dependency_result.get("vulnerabilities", [])),
-                    "overall_score": self._calculate_overall_score(
-                        analysis_result, metrics_result, security_result, dependency_result
-                    )
-                }
-            }
+            report: Dict[str, Any] = {}
+            async for section in self.stream_code_report(codebase_path):
+                if on_section is not None:
+                    await on_section(section)
+                if section["section"] == "report":
+                    report = section["report"]
             
             logger.info("Code report generated", 
-                       overall_score=report["summary"]["overall_score"])
+                       overall_score=report["summary"]["overall_score"],
+                       files_reanalyzed=report["analysis"]["cache"]["files_reanalyzed"])
             
             return report
             
@@ -286,33 +617,6 @@ class GraphSitterClient:
                 "timestamp": datetime.utcnow().isoformat()
             }
     
-    def _calculate_overall_score(self, analysis: Dict, metrics: Dict, security: Dict, dependencies: Dict) -> float:
-        """Calculate an overall code quality score (0-100)"""
-        try:
-            score = 100.0
-            
-            # Deduct points for issues
-            total_issues = len(analysis.get("issues", []))
-            score -= min(total_issues * 2, 30)  # Max 30 points deduction
-            
-            # Deduct points for security issues
-            security_issues = len(security.get("security_issues", []))
-            score -= min(security_issues * 5, 40)  # Max 40 points deduction
-            
-            # Deduct points for vulnerable dependencies
-            vulnerabilities = len(dependencies.get("vulnerabilities", []))
-            score -= min(vulnerabilities * 3, 20)  # Max 20 points deduction
-            
-            # Consider complexity (if available)
-            complexity = metrics.get("metrics", {}).get("complexity_score", 0)
-            if complexity > 10:
-                score -= min((complexity - 10) * 2, 10)  # Max 10 points deduction
-            
-            return max(score, 0.0)
-            
-        except Exception:
-            return 50.0  # Default score if calculation fails
-    
     async def health_check(self) -> Dict[str, Any]:
         """Check if Graph-Sitter service is healthy"""
         try:
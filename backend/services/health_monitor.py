@@ -0,0 +1,194 @@
+"""
+Background health monitoring of backend dependencies
+
+Each registered probe is refreshed on its own jittered interval and its last
+result kept in memory with a timestamp, so health and readiness endpoints
+answer without issuing outbound checks. Results older than the probe's
+staleness threshold are reported as degraded.
+"""
+import asyncio
+import random
+import time
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, Iterable, Optional
+import structlog
+
+from backend.config import get_settings
+
+logger = structlog.get_logger(__name__)
+settings = get_settings()
+
+HealthCheck = Callable[[], Awaitable[Any]]
+
+HEALTHY = "healthy"
+DEGRADED = "degraded"
+UNHEALTHY = "unhealthy"
+UNKNOWN = "unknown"
+
+
+@dataclass
+class HealthProbe:
+    """A dependency check and how often it runs"""
+    name: str
+    check: HealthCheck
+    interval: float
+    stale_after: float
+    critical: bool = False
+    result: Optional[Dict[str, Any]] = None
+    checked_at: Optional[float] = None  # wall clock, for reporting
+    checked_monotonic: Optional[float] = None
+    consecutive_failures: int = 0
+    task: Optional[asyncio.Task] = field(default=None, repr=False)
+    refreshing: Optional[asyncio.Task] = field(default=None, repr=False)
+
+
+def _as_dict(result: Any) -> Dict[str, Any]:
+    if isinstance(result, dict):
+        return result
+    if hasattr(result, "dict"):
+        return result.dict()
+    return {"status": HEALTHY if result else UNHEALTHY}
+
+
+class HealthMonitor:
+    """Refreshes registered health probes in the background and serves cached results"""
+
+    def __init__(self,
+                 interval: float = 30.0,
+                 stale_after: float = 90.0,
+                 timeout: float = 10.0,
+                 jitter: float = 0.1):
+        self.interval = interval
+        self.stale_after = stale_after
+        self.timeout = timeout
+        self.jitter = jitter
+        self.probes: Dict[str, HealthProbe] = {}
+        self.running = False
+        self.logger = logger.bind(component="health_monitor")
+
+    def register(self,
+                 name: str,
+                 check: HealthCheck,
+                 interval: Optional[float] = None,
+                 stale_after: Optional[float] = None,
+                 critical: bool = False) -> HealthProbe:
+        """Register (or replace) a probe; it starts immediately if the monitor is running"""
+        interval = interval or self.interval
+        probe = HealthProbe(
+            name=name,
+            check=check,
+            interval=interval,
+            stale_after=stale_after or max(self.stale_after, interval * 2),
+            critical=critical
+        )
+        previous = self.probes.get(name)
+        if previous and previous.task:
+            previous.task.cancel()
+        self.probes[name] = probe
+        if self.running:
+            probe.task = asyncio.create_task(self._probe_loop(probe))
+        return probe
+
+    async def start(self):
+        if self.running:
+            return
+        self.running = True
+        for probe in self.probes.values():
+            probe.task = asyncio.create_task(self._probe_loop(probe))
+        self.logger.info("Started health monitor", probes=list(self.probes))
+
+    async def stop(self):
+        self.running = False
+        tasks = [probe.task for probe in self.probes.values() if probe.task and not probe.task.done()]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        for probe in self.probes.values():
+            probe.task = None
+        self.logger.info("Stopped health monitor")
+
+    def _jittered(self, interval: float) -> float:
+        return interval * random.uniform(1 - self.jitter, 1 + self.jitter)
+
+    async def _probe_loop(self, probe: HealthProbe):
+        # Spread first runs so probes (and workers) do not fire in lockstep
+        await asyncio.sleep(random.uniform(0, probe.interval * self.jitter))
+        while True:
+            await self.refresh(probe.name)
+            await asyncio.sleep(self._jittered(probe.interval))
+
+    async def refresh(self, name: str) -> Dict[str, Any]:
+        """Run a probe now; concurrent callers share the same in-flight check"""
+        probe = self.probes[name]
+        if probe.refreshing is None or probe.refreshing.done():
+            probe.refreshing = asyncio.ensure_future(self._run_check(probe))
+        await asyncio.shield(probe.refreshing)
+        return self.get(name)
+
+    async def _run_check(self, probe: HealthProbe):
+        started = time.perf_counter()
+        try:
+            result = _as_dict(await asyncio.wait_for(probe.check(), timeout=self.timeout))
+        except asyncio.TimeoutError:
+            result = {"status": UNHEALTHY, "error": f"Timeout after {self.timeout}s"}
+        except Exception as e:
+            result = {"status": UNHEALTHY, "error": str(e)}
+
+        if result.get("status") == UNHEALTHY:
+            probe.consecutive_failures += 1
+            if probe.consecutive_failures == 1:
+                self.logger.warning("Health probe failing", probe=probe.name, error=result.get("error"))
+        else:
+            if probe.consecutive_failures:
+                self.logger.info("Health probe recovered", probe=probe.name,
+                                 failures=probe.consecutive_failures)
+            probe.consecutive_failures = 0
+
+        result.setdefault("response_time_ms", (time.perf_counter() - started) * 1000)
+        probe.result = result
+        probe.checked_at = time.time()
+        probe.checked_monotonic = time.monotonic()
+
+    def get(self, name: str) -> Dict[str, Any]:
+        """Last result of a probe with its age; stale results are downgraded to degraded"""
+        probe = self.probes[name]
+        if probe.result is None:
+            return {"status": UNKNOWN, "error": "Not checked yet", "checked_at": None, "age_seconds": None}
+
+        age = time.monotonic() - probe.checked_monotonic
+        result = dict(probe.result)
+        result["checked_at"] = probe.checked_at
+        result["age_seconds"] = age
+        result["stale"] = age > probe.stale_after
+        if result["stale"] and result.get("status") == HEALTHY:
+            result["status"] = DEGRADED
+            result["error"] = f"Last checked {age:.0f}s ago"
+        return result
+
+    async def results(self, names: Optional[Iterable[str]] = None) -> Dict[str, Dict[str, Any]]:
+        """Cached results, checking on demand any probe that has never run"""
+        names = list(self.probes) if names is None else [name for name in names if name in self.probes]
+        missing = [name for name in names if self.probes[name].result is None]
+        if missing:
+            await asyncio.gather(*(self.refresh(name) for name in missing))
+        return {name: self.get(name) for name in names}
+
+    def overall_status(self, results: Dict[str, Dict[str, Any]]) -> str:
+        """Unhealthy if a critical probe is down, degraded if anything else is not healthy"""
+        overall = HEALTHY
+        for name, result in results.items():
+            probe_status = result.get("status")
+            if probe_status in (UNHEALTHY, UNKNOWN) and self.probes[name].critical:
+                return UNHEALTHY
+            if probe_status in (UNHEALTHY, DEGRADED, UNKNOWN):
+                overall = DEGRADED
+        return overall
+
+
+# Global health monitor instance
+health_monitor = HealthMonitor(
+    interval=settings.health_check_interval,
+    stale_after=settings.health_check_stale_after,
+    timeout=settings.health_check_timeout,
+    jitter=settings.health_check_jitter
+)
@@ -8,6 +8,7 @@ import structlog
 
 from .base_service import BaseService
 from backend.config import get_settings
+from backend.utils.metrics import register_queue
 
 logger = structlog.get_logger(__name__)
 settings = get_settings()
@@ -65,6 +66,7 @@ class NotificationService(BaseService):
     def __init__(self):
         super().__init__("notification_service")
         self._notification_queue: asyncio.Queue = asyncio.Queue()
+        register_queue("notifications", self._notification_queue.qsize)
         self._worker_task: Optional[asyncio.Task] = None
         self._email_enabled = False
         self._webhook_enabled = False
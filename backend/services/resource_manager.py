@@ -2,10 +2,14 @@
 Resource monitoring and lifecycle management for Grainchain operations
 """
 import asyncio
+import heapq
+import inspect
+import itertools
 import time
-from typing import Dict, List, Optional, Any
+from collections import deque
+from typing import Deque, Dict, List, Optional, Any, Set, Tuple
 from dataclasses import dataclass, field
-from datetime import datetime, timedelta
+from datetime import datetime
 from enum import Enum
 import structlog
 
@@ -52,6 +56,7 @@ class ResourceQuota:
     max_file_handles: int = 1000
     max_uptime_hours: float = 24.0
     max_idle_minutes: float = 30.0
+    violation_samples: int = 3  # Consecutive over-quota samples before a resource is reclaimed
 
 
 @dataclass
@@ -99,16 +104,49 @@ class ManagedResource:
 
 
 class ResourceManager:
-    """Comprehensive resource monitoring and lifecycle management"""
+    """Comprehensive resource monitoring and lifecycle management
     
-    def __init__(self, default_quota: Optional[ResourceQuota] = None):
+    Expiry and idle deadlines live in a min-heap with lazy deletion, so the
+    cleanup loop sleeps until the next deadline instead of scanning every
+    resource. Per-type counts and aggregate metrics are maintained as
+    resources change state, keeping ``get_resource_stats`` independent of
+    the number of resources.
+    """
+
+    EXPIRY = "expiry"
+    IDLE = "idle"
+    DESTROYED_RETENTION_SECONDS = 3600
+
+    def __init__(self, default_quota: Optional[ResourceQuota] = None, cleanup_concurrency: int = 16):
         self.resources: Dict[str, ManagedResource] = {}
         self.default_quota = default_quota or ResourceQuota()
         self.cleanup_task: Optional[asyncio.Task] = None
         self.monitoring_task: Optional[asyncio.Task] = None
-        self.cleanup_interval = 60  # seconds
+        self.cleanup_interval = 60  # seconds; upper bound on sleep between deadline checks
         self.monitoring_interval = 30  # seconds
+        self.cleanup_concurrency = cleanup_concurrency
         self.logger = logger.bind(component="resource_manager")
+
+        # Deadline index: (deadline, sequence, resource_id, kind) with lazy deletion
+        self._deadlines: List[Tuple[float, int, str, str]] = []
+        self._scheduled: Dict[Tuple[str, str], float] = {}
+        self._sequence = itertools.count()
+        self._last_access: Dict[str, float] = {}
+
+        # Resources whose deadline has passed or which exceed their quota
+        self._expired_ids: Set[str] = set()
+        self._idle_ids: Set[str] = set()
+        self._quota_violators: Set[str] = set()
+        self._violation_streaks: Dict[str, int] = {}
+        self._destroyed: Deque[Tuple[float, str]] = deque()
+
+        # Incrementally maintained aggregates
+        self._type_counts: Dict[str, Dict[str, int]] = {}
+        self._active_count = 0
+        self._metric_totals = {"cpu_percent": 0.0, "memory_mb": 0.0, "disk_mb": 0.0}
+
+        self._wakeup: Optional[asyncio.Event] = None
+        self._callback_semaphore: Optional[asyncio.Semaphore] = None
         
         # Statistics
         self.stats = {
@@ -147,12 +185,102 @@ class ResourceManager:
                 pass
             self.logger.info("Stopped resource monitoring task")
     
+    # Deadline index
+
+    def _schedule(self, resource_id: str, kind: str, deadline: float) -> None:
+        self._scheduled[(resource_id, kind)] = deadline
+        heapq.heappush(self._deadlines, (deadline, next(self._sequence), resource_id, kind))
+        # Superseded entries are skipped lazily; rebuild once they dominate
+        if len(self._deadlines) > 2 * len(self._scheduled) + 64:
+            self._deadlines = [(deadline, next(self._sequence), rid, kind)
+                               for (rid, kind), deadline in self._scheduled.items()]
+            heapq.heapify(self._deadlines)
+        if self._deadlines[0][2] == resource_id:
+            self._wake()
+
+    def _unschedule(self, resource_id: str) -> None:
+        self._scheduled.pop((resource_id, self.EXPIRY), None)
+        self._scheduled.pop((resource_id, self.IDLE), None)
+
+    def _idle_deadline(self, resource_id: str) -> float:
+        return self._last_access[resource_id] + self.default_quota.max_idle_minutes * 60
+
+    def _collect_due(self, now: Optional[float] = None) -> None:
+        """Move resources whose deadline has passed into the expired/idle sets"""
+        now = time.monotonic() if now is None else now
+        while self._deadlines and self._deadlines[0][0] <= now:
+            deadline, _, resource_id, kind = heapq.heappop(self._deadlines)
+            if self._scheduled.get((resource_id, kind)) != deadline:
+                continue
+            del self._scheduled[(resource_id, kind)]
+            if kind == self.IDLE:
+                # Accesses only record a timestamp; re-arm if the resource was used since
+                idle_deadline = self._idle_deadline(resource_id)
+                if idle_deadline > now:
+                    self._schedule(resource_id, self.IDLE, idle_deadline)
+                    continue
+                self._idle_ids.add(resource_id)
+            else:
+                self._expired_ids.add(resource_id)
+
+    def _next_deadline(self) -> Optional[float]:
+        while self._deadlines:
+            deadline, _, resource_id, kind = self._deadlines[0]
+            if self._scheduled.get((resource_id, kind)) == deadline:
+                return deadline
+            heapq.heappop(self._deadlines)
+        return None
+
+    def _due_ids(self) -> Set[str]:
+        return self._expired_ids | self._idle_ids | self._quota_violators
+
+    def _wake(self) -> None:
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    # Incremental aggregates
+
+    def _add_metrics(self, metrics: ResourceMetrics, sign: int) -> None:
+        self._metric_totals["cpu_percent"] += sign * metrics.cpu_percent
+        self._metric_totals["memory_mb"] += sign * metrics.memory_mb
+        self._metric_totals["disk_mb"] += sign * metrics.disk_mb
+
+    def _set_status(self, resource: ManagedResource, status: ResourceStatus) -> None:
+        was_active = resource.status == ResourceStatus.ACTIVE
+        is_active = status == ResourceStatus.ACTIVE
+        resource.status = status
+        if was_active == is_active:
+            return
+        delta = 1 if is_active else -1
+        self._type_counts[resource.resource_type.value]["active"] += delta
+        self._active_count += delta
+        self._add_metrics(resource.metrics, delta)
+
+    def _forget(self, resource_id: str) -> None:
+        """Drop a resource and everything indexed about it"""
+        resource = self.resources.pop(resource_id, None)
+        if resource is None:
+            return
+        if resource.status == ResourceStatus.ACTIVE:
+            self._set_status(resource, ResourceStatus.DESTROYED)
+        counts = self._type_counts[resource.resource_type.value]
+        counts["total"] -= 1
+        if counts["total"] == 0:
+            del self._type_counts[resource.resource_type.value]
+        self._unschedule(resource_id)
+        self._last_access.pop(resource_id, None)
+        self._expired_ids.discard(resource_id)
+        self._idle_ids.discard(resource_id)
+        self._quota_violators.discard(resource_id)
+        self._violation_streaks.pop(resource_id, None)
+
     def register_resource(self,
                          resource_id: str,
                          resource_type: ResourceType,
                          metadata: Optional[Dict[str, Any]] = None,
                          cleanup_callbacks: Optional[List[callable]] = None) -> ManagedResource:
         """Register a new resource for management"""
+        self._forget(resource_id)
         resource = ManagedResource(
             resource_id=resource_id,
             resource_type=resource_type,
@@ -165,6 +293,15 @@ class ResourceManager:
         )
         
         self.resources[resource_id] = resource
+        counts = self._type_counts.setdefault(resource_type.value, {"active": 0, "total": 0})
+        counts["active"] += 1
+        counts["total"] += 1
+        self._active_count += 1
+
+        now = time.monotonic()
+        self._last_access[resource_id] = now
+        self._schedule(resource_id, self.EXPIRY, now + self.default_quota.max_uptime_hours * 3600)
+        self._schedule(resource_id, self.IDLE, self._idle_deadline(resource_id))
         self.stats["total_created"] += 1
         
         self.logger.info("Registered new resource",
@@ -174,25 +311,54 @@ class ResourceManager:
         
         return resource
     
-    def update_resource_metrics(self, resource_id: str, metrics: ResourceMetrics):
-        """Update resource metrics"""
+    def update_resource_metrics(self, resource_id: str, metrics: ResourceMetrics, touch: bool = True):
+        """Update resource metrics; background samplers pass ``touch=False`` so sampling is not activity"""
         if resource_id in self.resources:
             resource = self.resources[resource_id]
+            if resource.status == ResourceStatus.ACTIVE:
+                self._add_metrics(resource.metrics, -1)
+                self._add_metrics(metrics, 1)
             resource.metrics = metrics
-            resource.last_accessed = datetime.utcnow()
+            if touch:
+                self.access_resource(resource_id)
             
-            # Check for quota violations
+            # Check for quota violations; short spikes (e.g. a parallel install) are tolerated
             violations = resource.exceeds_quota(self.default_quota)
             if violations:
-                self.stats["quota_violations"] += 1
-                self.logger.warning("Resource quota violations detected",
-                                  resource_id=resource_id,
-                                  violations=violations)
+                streak = self._violation_streaks.get(resource_id, 0) + 1
+                self._violation_streaks[resource_id] = streak
+                if streak >= self.default_quota.violation_samples and resource_id not in self._quota_violators:
+                    self.stats["quota_violations"] += 1
+                    self._quota_violators.add(resource_id)
+                    self._wake()
+                    self.logger.warning("Resource quota violations detected",
+                                      resource_id=resource_id,
+                                      violations=violations,
+                                      samples=streak)
+            else:
+                self._violation_streaks.pop(resource_id, None)
+                self._quota_violators.discard(resource_id)
     
     def access_resource(self, resource_id: str):
         """Mark resource as accessed (updates last_accessed timestamp)"""
         if resource_id in self.resources:
             self.resources[resource_id].last_accessed = datetime.utcnow()
+            self._last_access[resource_id] = time.monotonic()
+            if resource_id in self._idle_ids:
+                self._idle_ids.discard(resource_id)
+                self._schedule(resource_id, self.IDLE, self._idle_deadline(resource_id))
+
+    async def _run_callback(self, resource_id: str, callback: callable) -> None:
+        async with self._callback_semaphore:
+            try:
+                outcome = callback(resource_id)
+                if inspect.isawaitable(outcome):
+                    await outcome
+            except Exception as e:
+                self.logger.error("Cleanup callback failed",
+                                resource_id=resource_id,
+                                callback=str(callback),
+                                error=str(e))
     
     async def cleanup_resource(self, resource_id: str, force: bool = False) -> bool:
         """Clean up a specific resource"""
@@ -207,30 +373,31 @@ class ResourceManager:
             self.logger.debug("Resource already destroyed", resource_id=resource_id)
             return True
         
+        if resource.status == ResourceStatus.CLEANUP_PENDING:
+            return False
+
         if not force and resource.status == ResourceStatus.ACTIVE:
             # Check if resource should be cleaned up
-            if not (resource.is_expired(self.default_quota) or 
-                   resource.is_idle(self.default_quota) or
-                   resource.exceeds_quota(self.default_quota)):
+            self._collect_due()
+            if resource_id not in self._due_ids():
                 return False
         
-        resource.status = ResourceStatus.CLEANUP_PENDING
+        self._set_status(resource, ResourceStatus.CLEANUP_PENDING)
+        if self._callback_semaphore is None:
+            self._callback_semaphore = asyncio.Semaphore(max(1, self.cleanup_concurrency))
         
         try:
-            # Execute cleanup callbacks
-            for callback in resource.cleanup_callbacks:
-                try:
-                    if asyncio.iscoroutinefunction(callback):
-                        await callback(resource_id)
-                    else:
-                        callback(resource_id)
-                except Exception as e:
-                    self.logger.error("Cleanup callback failed",
-                                    resource_id=resource_id,
-                                    callback=str(callback),
-                                    error=str(e))
+            # Execute cleanup callbacks concurrently, bounded across all resources
+            await asyncio.gather(*(self._run_callback(resource_id, callback)
+                                   for callback in resource.cleanup_callbacks))
             
-            resource.status = ResourceStatus.DESTROYED
+            self._set_status(resource, ResourceStatus.DESTROYED)
+            self._unschedule(resource_id)
+            self._expired_ids.discard(resource_id)
+            self._idle_ids.discard(resource_id)
+            self._quota_violators.discard(resource_id)
+            self._violation_streaks.pop(resource_id, None)
+            self._destroyed.append((time.monotonic(), resource_id))
             self.stats["cleanup_successes"] += 1
             self.stats["total_destroyed"] += 1
             
@@ -241,7 +408,7 @@ class ResourceManager:
             return True
             
         except Exception as e:
-            resource.status = ResourceStatus.CLEANUP_FAILED
+            self._set_status(resource, ResourceStatus.CLEANUP_FAILED)
             self.stats["cleanup_failures"] += 1
             
             self.logger.error("Resource cleanup failed",
@@ -251,74 +418,58 @@ class ResourceManager:
             return False
     
     async def cleanup_expired_resources(self) -> int:
-        """Clean up all expired and idle resources"""
-        cleanup_count = 0
+        """Clean up all expired, idle and over-quota resources"""
+        self._collect_due()
+        due = [resource_id for resource_id in self._due_ids()
+               if resource_id in self.resources and
+               self.resources[resource_id].status not in (ResourceStatus.DESTROYED,
+                                                          ResourceStatus.CLEANUP_PENDING)]
+        if not due:
+            return 0
         
-        for resource_id, resource in list(self.resources.items()):
-            if resource.status in [ResourceStatus.DESTROYED, ResourceStatus.CLEANUP_PENDING]:
-                continue
-            
-            should_cleanup = (
-                resource.is_expired(self.default_quota) or
-                resource.is_idle(self.default_quota) or
-                bool(resource.exceeds_quota(self.default_quota))
-            )
-            
-            if should_cleanup:
-                success = await self.cleanup_resource(resource_id)
-                if success:
-                    cleanup_count += 1
+        results = await asyncio.gather(*(self.cleanup_resource(resource_id) for resource_id in due))
+        cleanup_count = sum(1 for success in results if success)
         
         if cleanup_count > 0:
             self.logger.info("Cleaned up expired resources", count=cleanup_count)
         
         return cleanup_count
     
+    def _remove_destroyed(self) -> int:
+        """Remove resources destroyed more than an hour ago from memory"""
+        cutoff = time.monotonic() - self.DESTROYED_RETENTION_SECONDS
+        removed = 0
+        while self._destroyed and self._destroyed[0][0] < cutoff:
+            _, resource_id = self._destroyed.popleft()
+            resource = self.resources.get(resource_id)
+            if resource is not None and resource.status == ResourceStatus.DESTROYED:
+                self._forget(resource_id)
+                removed += 1
+        return removed
+
     def get_resource_stats(self) -> Dict[str, Any]:
         """Get comprehensive resource statistics"""
-        active_resources = sum(1 for r in self.resources.values() 
-                             if r.status == ResourceStatus.ACTIVE)
+        self._collect_due()
         
-        idle_resources = sum(1 for r in self.resources.values() 
-                           if r.status == ResourceStatus.ACTIVE and r.is_idle(self.default_quota))
-        
-        expired_resources = sum(1 for r in self.resources.values() 
-                              if r.status == ResourceStatus.ACTIVE and r.is_expired(self.default_quota))
-        
-        quota_violations = sum(1 for r in self.resources.values() 
-                             if r.status == ResourceStatus.ACTIVE and r.exceeds_quota(self.default_quota))
-        
-        # Resource type breakdown
-        type_breakdown = {}
-        for resource in self.resources.values():
-            resource_type = resource.resource_type.value
-            if resource_type not in type_breakdown:
-                type_breakdown[resource_type] = {"active": 0, "total": 0}
-            
-            type_breakdown[resource_type]["total"] += 1
-            if resource.status == ResourceStatus.ACTIVE:
-                type_breakdown[resource_type]["active"] += 1
-        
-        # Aggregate metrics
-        total_cpu = sum(r.metrics.cpu_percent for r in self.resources.values() 
-                       if r.status == ResourceStatus.ACTIVE)
-        total_memory = sum(r.metrics.memory_mb for r in self.resources.values() 
-                          if r.status == ResourceStatus.ACTIVE)
-        total_disk = sum(r.metrics.disk_mb for r in self.resources.values() 
-                        if r.status == ResourceStatus.ACTIVE)
+        def active_count(ids: Set[str]) -> int:
+            return sum(1 for resource_id in ids
+                       if resource_id in self.resources and
+                       self.resources[resource_id].status == ResourceStatus.ACTIVE)
         
         return {
             "total_resources": len(self.resources),
-            "active_resources": active_resources,
-            "idle_resources": idle_resources,
-            "expired_resources": expired_resources,
-            "quota_violations": quota_violations,
-            "type_breakdown": type_breakdown,
+            "active_resources": self._active_count,
+            "idle_resources": active_count(self._idle_ids),
+            "expired_resources": active_count(self._expired_ids),
+            "quota_violations": active_count(self._quota_violators),
+            "type_breakdown": {resource_type: dict(counts)
+                               for resource_type, counts in self._type_counts.items()},
             "aggregate_metrics": {
-                "total_cpu_percent": total_cpu,
-                "total_memory_mb": total_memory,
-                "total_disk_mb": total_disk
+                "total_cpu_percent": self._metric_totals["cpu_percent"],
+                "total_memory_mb": self._metric_totals["memory_mb"],
+                "total_disk_mb": self._metric_totals["disk_mb"]
             },
+            "pending_deadlines": len(self._scheduled),
             "lifecycle_stats": self.stats.copy()
         }
     
@@ -352,30 +503,28 @@ class ResourceManager:
         }
     
     async def _cleanup_loop(self):
-        """Background task for periodic resource cleanup"""
+        """Background task that wakes at the next deadline or when a quota is exceeded"""
+        self._wakeup = asyncio.Event()
         while True:
             try:
                 await self.cleanup_expired_resources()
                 
-                # Remove destroyed resources from memory after some time
-                cutoff_time = datetime.utcnow() - timedelta(hours=1)
-                destroyed_resources = [
-                    resource_id for resource_id, resource in self.resources.items()
-                    if (resource.status == ResourceStatus.DESTROYED and 
-                        resource.last_accessed < cutoff_time)
-                ]
-                
-                for resource_id in destroyed_resources:
-                    del self.resources[resource_id]
-                
-                if destroyed_resources:
-                    self.logger.debug("Removed destroyed resources from memory",
-                                    count=len(destroyed_resources))
+                removed = self._remove_destroyed()
+                if removed:
+                    self.logger.debug("Removed destroyed resources from memory", count=removed)
                 
             except Exception as e:
                 self.logger.error("Error in cleanup loop", error=str(e))
             
-            await asyncio.sleep(self.cleanup_interval)
+            timeout = self.cleanup_interval
+            next_deadline = self._next_deadline()
+            if next_deadline is not None:
+                timeout = min(timeout, max(0.0, next_deadline - time.monotonic()))
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=timeout)
+            except asyncio.TimeoutError:
+                pass
     
     async def _monitoring_loop(self):
         """Background task for resource monitoring"""
@@ -0,0 +1,288 @@
+"""
+Live metrics sampling for managed resources
+
+Local processes (resources with a ``pid`` in their metadata) are sampled with
+psutil in one batched pass per interval; remote Grainchain snapshots are
+polled through ``get_snapshot_status``. Samples are fed back into the
+resource manager, which enforces quotas, and kept as bounded time series.
+"""
+import asyncio
+import re
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional
+import psutil
+import structlog
+
+from backend.config import get_settings
+from backend.services.resource_manager import (
+    ResourceManager,
+    ResourceMetrics,
+    ResourceStatus,
+    ResourceType,
+    resource_manager
+)
+
+logger = structlog.get_logger(__name__)
+settings = get_settings()
+
+_QUANTITY_RE = re.compile(r"^\s*([0-9]*\.?[0-9]+)\s*([A-Za-z%]*)\s*$")
+_UNIT_TO_MB = {
+    "": 1 / (1024 * 1024),  # bare numbers are bytes
+    "b": 1 / (1024 * 1024),
+    "k": 1000 / (1024 * 1024), "kb": 1000 / (1024 * 1024), "ki": 1 / 1024, "kib": 1 / 1024,
+    "m": 1000 ** 2 / (1024 * 1024), "mb": 1.0, "mi": 1.0, "mib": 1.0,
+    "g": 1000 ** 3 / (1024 * 1024), "gb": 1024.0, "gi": 1024.0, "gib": 1024.0,
+    "t": 1000 ** 4 / (1024 * 1024), "tb": 1024.0 ** 2, "ti": 1024.0 ** 2, "tib": 1024.0 ** 2,
+}
+
+
+def parse_quantity_mb(value: Any) -> float:
+    """Parse sizes such as ``"2Gi"``, ``"512MB"`` or a byte count into megabytes"""
+    if isinstance(value, (int, float)):
+        return float(value) / (1024 * 1024)
+    match = _QUANTITY_RE.match(str(value or ""))
+    if not match:
+        return 0.0
+    factor = _UNIT_TO_MB.get(match.group(2).lower())
+    return float(match.group(1)) * factor if factor is not None else 0.0
+
+
+def parse_percent(value: Any) -> float:
+    if isinstance(value, (int, float)):
+        return float(value)
+    match = _QUANTITY_RE.match(str(value or ""))
+    return float(match.group(1)) if match else 0.0
+
+
+def snapshot_metrics(status: Dict[str, Any]) -> Optional[ResourceMetrics]:
+    """Map a ``get_snapshot_status`` payload onto resource metrics"""
+    resources = status.get("resources")
+    if not isinstance(resources, dict):
+        return None
+    memory_mb = resources.get("memory_mb")
+    disk_mb = resources.get("disk_mb")
+    return ResourceMetrics(
+        cpu_percent=parse_percent(resources.get("cpu_percent", resources.get("cpu_usage"))),
+        memory_mb=float(memory_mb) if memory_mb is not None else parse_quantity_mb(resources.get("memory_usage")),
+        disk_mb=float(disk_mb) if disk_mb is not None else parse_quantity_mb(resources.get("disk_usage")),
+        network_connections=int(resources.get("network_connections", 0) or 0),
+        file_handles=int(resources.get("file_handles", 0) or 0),
+        uptime_seconds=float(resources.get("uptime_seconds", 0) or 0)
+    )
+
+
+class ResourceSampler:
+    """Periodically samples managed resources and records their time series"""
+
+    def __init__(self,
+                 manager: ResourceManager,
+                 snapshot_status: Optional[Callable[[str], Awaitable[Dict[str, Any]]]] = None,
+                 interval: float = 15.0,
+                 history_size: int = 240,
+                 remote_concurrency: int = 8):
+        self.manager = manager
+        self.interval = interval
+        self.history_size = history_size
+        self.remote_concurrency = remote_concurrency
+        self._snapshot_status = snapshot_status
+        self._processes: Dict[int, psutil.Process] = {}
+        # psutil reports per-core percentages; quotas are a share of the whole host
+        self._cpu_count = psutil.cpu_count() or 1
+        self._series: Dict[str, Deque[Dict[str, float]]] = {}
+        self.sample_task: Optional[asyncio.Task] = None
+        self.logger = logger.bind(component="resource_sampler")
+        self.stats = {"passes": 0, "local_samples": 0, "remote_samples": 0,
+                      "remote_failures": 0, "exited_processes": 0}
+
+    def _get_snapshot_status(self) -> Callable[[str], Awaitable[Dict[str, Any]]]:
+        if self._snapshot_status is None:
+            from backend.integrations.grainchain_client import GrainchainClient
+            self._snapshot_status = GrainchainClient().get_snapshot_status
+        return self._snapshot_status
+
+    async def start(self):
+        if self.sample_task is None or self.sample_task.done():
+            self.sample_task = asyncio.create_task(self._sample_loop())
+            self.logger.info("Started resource sampler", interval=self.interval)
+
+    async def stop(self):
+        if self.sample_task and not self.sample_task.done():
+            self.sample_task.cancel()
+            try:
+                await self.sample_task
+            except asyncio.CancelledError:
+                pass
+            self.logger.info("Stopped resource sampler")
+
+    # Local processes
+
+    def _process(self, pid: int) -> psutil.Process:
+        process = self._processes.get(pid)
+        if process is None:
+            process = psutil.Process(pid)
+            process.cpu_percent(None)  # Prime the counter; the first reading is 0.0
+            self._processes[pid] = process
+        return process
+
+    def _read_process(self, process: psutil.Process) -> Dict[str, float]:
+        with process.oneshot():
+            reading = {"cpu_percent": process.cpu_percent(None),
+                       "memory_mb": process.memory_info().rss / (1024 * 1024),
+                       "file_handles": 0, "network_connections": 0}
+            try:
+                num_fds = getattr(process, "num_fds", None) or getattr(process, "num_handles")
+                reading["file_handles"] = num_fds()
+                connections = getattr(process, "net_connections", None) or process.connections
+                reading["network_connections"] = len(connections(kind="inet"))
+            except (psutil.AccessDenied, psutil.ZombieProcess):
+                pass
+        return reading
+
+    def sample_processes(self, pids: Dict[str, int]) -> Dict[str, Optional[ResourceMetrics]]:
+        """Sample process trees in one pass; ``None`` marks a process that has exited"""
+        results: Dict[str, Optional[ResourceMetrics]] = {}
+        seen = set()
+        now = time.time()
+        for resource_id, pid in pids.items():
+            try:
+                root = self._process(pid)
+                tree = [root]
+                try:
+                    tree.extend(self._process(child.pid) for child in root.children(recursive=True))
+                except (psutil.NoSuchProcess, psutil.AccessDenied):
+                    pass
+                metrics = ResourceMetrics(uptime_seconds=now - root.create_time())
+            except psutil.NoSuchProcess:
+                self._processes.pop(pid, None)
+                results[resource_id] = None
+                continue
+            except psutil.AccessDenied:
+                continue
+
+            for process in tree:
+                seen.add(process.pid)
+                try:
+                    reading = self._read_process(process)
+                except (psutil.NoSuchProcess, psutil.AccessDenied):
+                    continue
+                metrics.cpu_percent += reading["cpu_percent"]
+                metrics.memory_mb += reading["memory_mb"]
+                metrics.file_handles += reading["file_handles"]
+                metrics.network_connections += reading["network_connections"]
+            metrics.cpu_percent /= self._cpu_count
+            results[resource_id] = metrics
+
+        # Forget processes that are no longer part of any managed tree
+        for pid in list(self._processes):
+            if pid not in seen:
+                del self._processes[pid]
+        return results
+
+    # Remote snapshots
+
+    async def sample_snapshots(self, snapshots: Dict[str, str]) -> Dict[str, ResourceMetrics]:
+        semaphore = asyncio.Semaphore(max(1, self.remote_concurrency))
+        get_status = self._get_snapshot_status()
+        results: Dict[str, ResourceMetrics] = {}
+
+        async def sample(resource_id: str, snapshot_id: str) -> None:
+            async with semaphore:
+                try:
+                    metrics = snapshot_metrics(await get_status(snapshot_id))
+                except Exception as e:
+                    self.logger.warning("Snapshot sampling failed", snapshot_id=snapshot_id, error=str(e))
+                    metrics = None
+            if metrics is None:
+                self.stats["remote_failures"] += 1
+            else:
+                results[resource_id] = metrics
+
+        await asyncio.gather(*(sample(rid, sid) for rid, sid in snapshots.items()))
+        return results
+
+    # Sampling pass
+
+    async def sample_once(self) -> Dict[str, ResourceMetrics]:
+        """Sample every active resource once and feed the results to the manager"""
+        local: Dict[str, int] = {}
+        remote: Dict[str, str] = {}
+        for resource_id, resource in list(self.manager.resources.items()):
+            if resource.status != ResourceStatus.ACTIVE:
+                continue
+            pid = resource.metadata.get("pid")
+            if pid is not None:
+                local[resource_id] = int(pid)
+            elif resource.resource_type == ResourceType.SNAPSHOT:
+                remote[resource_id] = resource.metadata.get("snapshot_id", resource_id)
+
+        local_results, remote_results = await asyncio.gather(
+            asyncio.to_thread(self.sample_processes, local) if local else asyncio.sleep(0, {}),
+            self.sample_snapshots(remote) if remote else asyncio.sleep(0, {})
+        )
+
+        sampled: Dict[str, ResourceMetrics] = {}
+        for resource_id, metrics in local_results.items():
+            if metrics is None:
+                self.stats["exited_processes"] += 1
+                await self.manager.cleanup_resource(resource_id, force=True)
+                continue
+            sampled[resource_id] = metrics
+        sampled.update(remote_results)
+
+        timestamp = time.time()
+        for resource_id, metrics in sampled.items():
+            self.manager.update_resource_metrics(resource_id, metrics, touch=False)
+            self._record(resource_id, timestamp, metrics)
+
+        for resource_id in list(self._series):
+            if resource_id not in self.manager.resources:
+                del self._series[resource_id]
+
+        self.stats["passes"] += 1
+        self.stats["local_samples"] += len(sampled) - len(remote_results)
+        self.stats["remote_samples"] += len(remote_results)
+        return sampled
+
+    async def _sample_loop(self):
+        while True:
+            started = time.monotonic()
+            try:
+                await self.sample_once()
+            except Exception as e:
+                self.logger.error("Error in resource sampling loop", error=str(e))
+            await asyncio.sleep(max(0.0, self.interval - (time.monotonic() - started)))
+
+    # Time series
+
+    def _record(self, resource_id: str, timestamp: float, metrics: ResourceMetrics) -> None:
+        series = self._series.get(resource_id)
+        if series is None:
+            series = self._series[resource_id] = deque(maxlen=self.history_size)
+        series.append({
+            "timestamp": timestamp,
+            "cpu_percent": metrics.cpu_percent,
+            "memory_mb": metrics.memory_mb,
+            "disk_mb": metrics.disk_mb,
+            "network_connections": metrics.network_connections,
+            "file_handles": metrics.file_handles
+        })
+
+    def get_series(self, resource_id: str, since: Optional[float] = None) -> List[Dict[str, float]]:
+        series = self._series.get(resource_id, ())
+        return [point for point in series if since is None or point["timestamp"] > since]
+
+    def export_series(self, since: Optional[float] = None) -> Dict[str, List[Dict[str, float]]]:
+        return {resource_id: self.get_series(resource_id, since) for resource_id in list(self._series)}
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {"tracked_series": len(self._series), "tracked_processes": len(self._processes),
+                "interval": self.interval, **self.stats}
+
+
+# Global resource sampler instance
+resource_sampler = ResourceSampler(
+    resource_manager,
+    interval=settings.resource_sample_interval,
+    history_size=settings.resource_sample_history
+)
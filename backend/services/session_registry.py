@@ -0,0 +1,183 @@
+"""
+Bounded registry of remote test sessions with TTL expiry and secondary indexes
+"""
+import asyncio
+import heapq
+import inspect
+import itertools
+import time
+from collections.abc import MutableMapping
+from typing import Any, Awaitable, Callable, Dict, Iterator, List, Optional, Set, Tuple, Union
+import structlog
+
+logger = structlog.get_logger(__name__)
+
+
+class SessionRegistry(MutableMapping):
+    """Session id to session info, bounded in size and ordered by expiry.
+
+    Expiry uses a min-heap with lazy deletion, so registering, touching and
+    expiring a session are all O(log n). Sessions pushed out by the size bound
+    or their TTL are handed back through ``pop_expired`` for remote cleanup.
+    """
+
+    def __init__(self, name: str, ttl_seconds: float = 3600.0, max_sessions: int = 500):
+        self.name = name
+        self.ttl_seconds = ttl_seconds
+        self.max_sessions = max_sessions
+        self._sessions: Dict[str, Dict[str, Any]] = {}
+        self._expires_at: Dict[str, float] = {}
+        self._heap: List[Tuple[float, int, str]] = []
+        self._sequence = itertools.count()
+        self._evicted: List[Tuple[str, Dict[str, Any]]] = []
+        self._by_pr: Dict[Any, Set[str]] = {}
+        self._by_project: Dict[str, Set[str]] = {}
+        self.stats = {"registered": 0, "expired": 0, "evicted": 0}
+
+    @classmethod
+    def from_mapping(cls, sessions: Dict[str, Dict[str, Any]], **kwargs) -> "SessionRegistry":
+        registry = cls(kwargs.pop("name", "sessions"), **kwargs)
+        for session_id, info in sessions.items():
+            registry[session_id] = info
+        return registry
+
+    # Mapping interface
+
+    def __getitem__(self, session_id: str) -> Dict[str, Any]:
+        return self._sessions[session_id]
+
+    def __setitem__(self, session_id: str, info: Dict[str, Any]) -> None:
+        if session_id in self._sessions:
+            self._unindex(session_id)
+        else:
+            self.stats["registered"] += 1
+        self._sessions[session_id] = info
+        self._index(session_id, info)
+        self._schedule(session_id, time.monotonic() + self.ttl_seconds)
+
+        while len(self._sessions) > self.max_sessions:
+            evicted = self._pop_earliest()
+            if evicted is None:
+                break
+            self._evicted.append(evicted)
+            self.stats["evicted"] += 1
+
+    def __delitem__(self, session_id: str) -> None:
+        self._unindex(session_id)
+        del self._sessions[session_id]
+        self._expires_at.pop(session_id, None)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(list(self._sessions))
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    # Expiry
+
+    def _schedule(self, session_id: str, expires_at: float) -> None:
+        self._expires_at[session_id] = expires_at
+        heapq.heappush(self._heap, (expires_at, next(self._sequence), session_id))
+        # Superseded heap entries are skipped lazily; rebuild once they dominate
+        if len(self._heap) > 2 * len(self._sessions) + 64:
+            self._heap = [(expires, next(self._sequence), sid) for sid, expires in self._expires_at.items()]
+            heapq.heapify(self._heap)
+
+    def _pop_earliest(self, before: Optional[float] = None) -> Optional[Tuple[str, Dict[str, Any]]]:
+        while self._heap:
+            expires_at, _, session_id = self._heap[0]
+            if self._expires_at.get(session_id) != expires_at:
+                heapq.heappop(self._heap)
+                continue
+            if before is not None and expires_at > before:
+                return None
+            heapq.heappop(self._heap)
+            info = self._sessions[session_id]
+            del self[session_id]
+            return session_id, info
+        return None
+
+    def touch(self, session_id: str, ttl_seconds: Optional[float] = None) -> None:
+        """Push a session's expiry back after activity"""
+        if session_id in self._sessions:
+            self._schedule(session_id, time.monotonic() + (ttl_seconds or self.ttl_seconds))
+
+    def pop_expired(self, now: Optional[float] = None) -> List[Tuple[str, Dict[str, Any]]]:
+        """Remove and return sessions past their TTL, plus any evicted by the size bound"""
+        now = time.monotonic() if now is None else now
+        expired, self._evicted = self._evicted, []
+        while True:
+            entry = self._pop_earliest(before=now)
+            if entry is None:
+                break
+            expired.append(entry)
+            self.stats["expired"] += 1
+        return expired
+
+    # Secondary indexes
+
+    def _index(self, session_id: str, info: Dict[str, Any]) -> None:
+        pr_number = info.get("pr_number")
+        if pr_number is not None:
+            self._by_pr.setdefault(pr_number, set()).add(session_id)
+        project = info.get("project_name")
+        if project:
+            self._by_project.setdefault(project, set()).add(session_id)
+
+    def _unindex(self, session_id: str) -> None:
+        info = self._sessions.get(session_id, {})
+        for index, key in ((self._by_pr, info.get("pr_number")), (self._by_project, info.get("project_name"))):
+            members = index.get(key)
+            if members is not None:
+                members.discard(session_id)
+                if not members:
+                    del index[key]
+
+    def by_pr(self, pr_number: int) -> Dict[str, Dict[str, Any]]:
+        return {sid: self._sessions[sid] for sid in self._by_pr.get(pr_number, ())}
+
+    def by_project(self, project_name: str) -> Dict[str, Dict[str, Any]]:
+        return {sid: self._sessions[sid] for sid in self._by_project.get(project_name, ())}
+
+    # Cleanup
+
+    async def cleanup(self,
+                      cleanup: Callable[[str], Union[Awaitable[Any], Any]],
+                      session_ids: Optional[List[str]] = None,
+                      max_concurrency: int = 8) -> Dict[str, Any]:
+        """Clean up sessions with bounded parallelism.
+
+        Sessions whose cleanup succeeds are dropped from the registry unless the
+        cleanup returns ``False``, meaning it declined to tear the session down.
+        """
+        session_ids = list(self._sessions) if session_ids is None else session_ids
+        semaphore = asyncio.Semaphore(max(1, max_concurrency))
+        results = {"total_sessions": len(session_ids), "cleaned_up": 0, "failed": 0, "errors": []}
+
+        async def clean(session_id: str) -> None:
+            async with semaphore:
+                try:
+                    outcome = cleanup(session_id)
+                    if inspect.isawaitable(outcome):
+                        outcome = await outcome
+                except Exception as e:
+                    results["failed"] += 1
+                    results["errors"].append({"session_id": session_id, "error": str(e)})
+                    return
+                results["cleaned_up"] += 1
+                if outcome is not False and session_id in self._sessions:
+                    del self[session_id]
+
+        await asyncio.gather(*(clean(session_id) for session_id in session_ids))
+        return results
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "sessions": len(self._sessions),
+            "max_sessions": self.max_sessions,
+            "heap_size": len(self._heap),
+            "pull_requests": len(self._by_pr),
+            "projects": len(self._by_project),
+            **self.stats
+        }
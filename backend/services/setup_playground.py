@@ -0,0 +1,341 @@
+"""
+Leased sandboxes for iterating on project setup commands
+
+Testing setup commands used to create a snapshot, clone the repository, run
+the commands and delete the snapshot on every attempt. A playground keeps the
+snapshot with the repository cloned for a short idle TTL, and a rerun skips
+the commands that already succeeded, resuming from the first new one.
+
+Commands are sent to the sandbox in one request so shell state (``cd``,
+``export``, ``source``) carries over between them; marker lines echoed after
+each command tell which ones succeeded.
+"""
+import asyncio
+import re
+import shlex
+import time
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple
+import structlog
+
+from backend.config import get_settings
+from backend.integrations.grainchain_client import GrainchainClient
+from backend.services.resource_manager import ResourceStatus, ResourceType, resource_manager
+from backend.services.session_registry import SessionRegistry
+
+logger = structlog.get_logger(__name__)
+settings = get_settings()
+
+SNAPSHOT_TOOLS = ["git", "node", "python"]
+# Commands that only change shell state; replayed ahead of new commands when earlier ones are skipped
+STATE_COMMAND = re.compile(r"^\s*(?:cd|pushd|export|unset|set|alias|source|\.|nvm use|conda activate)(?:\s|$)")
+STEP_MARKER = "__setup_step__"
+_MARKER_LINE = re.compile(rf"^{STEP_MARKER} (-?\d+) (\d+)[ \t]*\n?", re.MULTILINE)
+_COMMIT = re.compile(r"\b[0-9a-f]{40}\b")
+
+
+def head_commands(branch: str) -> List[str]:
+    """The branch's latest commit on the remote"""
+    return [f"git fetch -q origin {shlex.quote(branch)}", "git rev-parse FETCH_HEAD"]
+
+
+def reset_commands(branch: str) -> List[str]:
+    """Back to the branch's latest commit; ignored files (dependency directories, build caches) survive"""
+    return [f"git fetch -q origin {shlex.quote(branch)}", "git reset --hard -q FETCH_HEAD",
+            "git clean -fdq", "git rev-parse HEAD"]
+
+
+def step_batch(replay: List[str], commands: List[str]) -> List[str]:
+    """One request running ``commands`` after ``replay``, echoing each command's exit status"""
+    batch = list(replay)
+    if replay:
+        batch.append(f"echo {STEP_MARKER} -1 $?")
+    for index, command in enumerate(commands):
+        batch += [command, f"echo {STEP_MARKER} {index} $?"]
+    return batch
+
+
+def split_step_output(output: str) -> Tuple[Dict[int, Tuple[int, str]], str]:
+    """Exit status and output of each marked command, plus any output after the last marker"""
+    steps: Dict[int, Tuple[int, str]] = {}
+    start = 0
+    for match in _MARKER_LINE.finditer(output):
+        steps[int(match.group(1))] = (int(match.group(2)), output[start:match.start()].strip("\n"))
+        start = match.end()
+    return steps, output[start:].strip("\n")
+
+
+def _commit_in(result: Dict[str, Any]) -> Optional[str]:
+    commits = _COMMIT.findall(result.get("output", ""))
+    return commits[-1] if commits else None
+
+EnvironmentLoader = Callable[[], Awaitable[Dict[str, str]]]
+
+
+@dataclass
+class Playground:
+    """A leased snapshot with the repository cloned"""
+    key: str
+    project_id: int
+    branch: str
+    snapshot_id: str
+    commit: Optional[str] = None  # Checked-out commit, if the sandbox reported it
+    completed: List[str] = field(default_factory=list)  # Commands that succeeded since the last reset
+    dirty: bool = False  # Anything ran since the clone or the last reset
+    lock: asyncio.Lock = field(default_factory=asyncio.Lock)
+    created_at: float = field(default_factory=time.time)
+    runs: int = 0
+
+
+class SetupPlayground:
+    """Setup command sessions keyed by project and branch, reaped after ``idle_ttl`` seconds"""
+
+    def __init__(self,
+                 idle_ttl: float = 600.0,
+                 max_sessions: int = 20,
+                 grainchain: Optional[GrainchainClient] = None):
+        self.idle_ttl = idle_ttl
+        self.sessions = SessionRegistry("setup_playgrounds", ttl_seconds=idle_ttl, max_sessions=max_sessions)
+        self.grainchain = grainchain or GrainchainClient()
+        self._creating: Dict[str, asyncio.Lock] = {}
+        self.reap_task: Optional[asyncio.Task] = None
+        self.stats = {"created": 0, "reused": 0, "resets": 0, "reaped": 0,
+                      "commands_run": 0, "commands_skipped": 0}
+        self.logger = logger.bind(component="setup_playground")
+
+    @staticmethod
+    def session_key(project_id: int, branch: str) -> str:
+        return f"{project_id}:{branch}"
+
+    def get(self, project_id: int, branch: str) -> Optional[Playground]:
+        entry = self.sessions.get(self.session_key(project_id, branch))
+        return entry["playground"] if entry else None
+
+    def _touch(self, playground: Playground) -> None:
+        self.sessions.touch(playground.key)
+        resource_manager.access_resource(playground.snapshot_id)
+
+    async def _acquire(self,
+                       project_id: int,
+                       branch: str,
+                       repo_url: str,
+                       load_environment: EnvironmentLoader) -> Tuple[Playground, bool]:
+        """The project's playground for ``branch``, creating and cloning it if needed"""
+        key = self.session_key(project_id, branch)
+        async with self._creating.setdefault(key, asyncio.Lock()):
+            playground = self.get(project_id, branch)
+            if playground is not None and not self._is_live(playground):
+                # The resource manager already tore the snapshot down (lifetime or quota)
+                self.sessions.pop(key, None)
+                playground = None
+            if playground is not None:
+                self._touch(playground)
+                self.stats["reused"] += 1
+                return playground, True
+
+            # Secrets are only decrypted when a new sandbox needs them
+            environment = await load_environment()
+            snapshot_id = await self.grainchain.create_snapshot({
+                "tools": SNAPSHOT_TOOLS,
+                "environment_variables": environment
+            })
+            try:
+                await self.grainchain.clone_repository(snapshot_id, repo_url, branch)
+            except Exception:
+                await self.grainchain.delete_snapshot(snapshot_id)
+                raise
+
+            head = await self.grainchain.execute_commands(snapshot_id, ["git rev-parse HEAD"])
+            playground = Playground(key=key, project_id=project_id, branch=branch, snapshot_id=snapshot_id,
+                                    commit=_commit_in(head))
+            self.sessions[key] = {"playground": playground}
+            resource_manager.register_resource(
+                snapshot_id,
+                ResourceType.SNAPSHOT,
+                metadata={"purpose": "setup_playground", "project_id": project_id, "branch": branch},
+                cleanup_callbacks=[self.grainchain.delete_snapshot]
+            )
+            self.stats["created"] += 1
+            self.logger.info("Created setup playground", project_id=project_id, branch=branch,
+                             snapshot_id=snapshot_id)
+            return playground, False
+
+    @staticmethod
+    def _is_live(playground: Playground) -> bool:
+        resource = resource_manager.resources.get(playground.snapshot_id)
+        return resource is not None and resource.status in (ResourceStatus.ACTIVE, ResourceStatus.IDLE)
+
+    async def _discard(self, playground: Playground) -> None:
+        if playground.snapshot_id in resource_manager.resources:
+            await resource_manager.cleanup_resource(playground.snapshot_id, force=True)
+        else:
+            await self.grainchain.delete_snapshot(playground.snapshot_id)
+
+    async def _branch_moved(self, playground: Playground) -> bool:
+        """Whether commits were pushed to the branch since the playground's checkout"""
+        if playground.commit is None:
+            return False
+        head = await self.grainchain.execute_commands(playground.snapshot_id, head_commands(playground.branch))
+        latest = _commit_in(head)
+        return latest is not None and latest != playground.commit
+
+    async def run(self,
+                  project_id: int,
+                  branch: str,
+                  repo_url: str,
+                  commands: List[str],
+                  load_environment: EnvironmentLoader,
+                  fresh: bool = False) -> AsyncIterator[Dict[str, Any]]:
+        """Run setup commands in the playground, yielding one event per step.
+
+        If the last run's successful commands are a prefix of ``commands``
+        and the branch has not moved, they are skipped; otherwise (or with
+        ``fresh``) the worktree is reset to the branch's latest commit first.
+        The remaining commands run in one shell and stop counting at the
+        first failure, so the next attempt resumes from the failing command.
+        """
+        started = time.perf_counter()
+        playground, reused = await self._acquire(project_id, branch, repo_url, load_environment)
+        yield {"event": "session", "snapshot_id": playground.snapshot_id, "reused": reused,
+               "idle_ttl": self.idle_ttl}
+
+        async with playground.lock:
+            playground.runs += 1
+            done = playground.completed
+            stale = fresh or done != commands[:len(done)]
+            if not stale and reused and await self._branch_moved(playground):
+                stale = True
+            if stale:
+                if playground.dirty or reused:
+                    reset = await self.grainchain.execute_commands(playground.snapshot_id,
+                                                                   reset_commands(branch))
+                    self.stats["resets"] += 1
+                    if reset.get("exit_code", 1) != 0:
+                        self.sessions.pop(playground.key, None)
+                        await self._discard(playground)
+                        raise Exception(f"Failed to reset setup playground: {reset.get('error', '')}")
+                    playground.commit = _commit_in(reset) or playground.commit
+                    yield {"event": "reset", "commands": reset_commands(branch), "commit": playground.commit}
+                playground.completed, playground.dirty = [], False
+
+            skipped = len(playground.completed)
+            for command in commands[:skipped]:
+                yield {"event": "command", "command": command, "skipped": True}
+            self.stats["commands_skipped"] += skipped
+
+            success = True
+            ran = 0
+            pending = commands[skipped:]
+            if pending:
+                self._touch(playground)
+                playground.dirty = True
+                # Shell state set by the skipped commands is lost with their shell; replay it
+                replay = [command for command in commands[:skipped] if STATE_COMMAND.match(command)]
+                result = await self.grainchain.execute_commands(playground.snapshot_id,
+                                                                step_batch(replay, pending))
+                steps, trailing = split_step_output(result.get("output", ""))
+                for index, command in enumerate(pending):
+                    if index in steps:
+                        exit_code, output = steps[index]
+                    else:
+                        # The sandbox stopped at this command before echoing its status
+                        exit_code, output = result.get("exit_code", 1) or 1, trailing
+                    ran += 1
+                    last = exit_code != 0 or index == len(pending) - 1
+                    yield {
+                        "event": "command",
+                        "command": command,
+                        "skipped": False,
+                        "exit_code": exit_code,
+                        "output": output,
+                        "error": result.get("error", "") if last else "",
+                        "duration": result.get("duration", 0) if last else 0
+                    }
+                    if exit_code != 0:
+                        success = False
+                        break
+                    playground.completed.append(command)
+            self.stats["commands_run"] += ran
+            self._touch(playground)
+
+        yield {
+            "event": "result",
+            "success": success,
+            "commands_run": ran,
+            "commands_skipped": skipped,
+            "reused_snapshot": reused,
+            "duration": round(time.perf_counter() - started, 3)
+        }
+
+    async def release(self, project_id: int, branch: str) -> bool:
+        """Tear down a playground now instead of waiting for its idle TTL"""
+        entry = self.sessions.pop(self.session_key(project_id, branch), None)
+        if entry is None:
+            return False
+        playground = entry["playground"]
+        async with playground.lock:
+            await self._discard(playground)
+        return True
+
+    async def release_project(self, project_id: int) -> int:
+        """Tear down all of a project's playgrounds, e.g. after its secrets change"""
+        prefix = f"{project_id}:"
+        released = 0
+        for key in [key for key in self.sessions if key.startswith(prefix)]:
+            entry = self.sessions.pop(key, None)
+            if entry is None:
+                continue
+            playground = entry["playground"]
+            async with playground.lock:
+                await self._discard(playground)
+            released += 1
+        if released:
+            self.logger.info("Released setup playgrounds", project_id=project_id, playgrounds=released)
+        return released
+
+    async def reap(self) -> int:
+        """Delete the snapshots of playgrounds idle past their TTL"""
+        reaped = 0
+        for key, entry in self.sessions.pop_expired():
+            playground = entry["playground"]
+            if playground.lock.locked():
+                self.sessions[key] = entry  # Still running commands; the lease is renewed
+                continue
+            await self._discard(playground)
+            reaped += 1
+        if reaped:
+            self.stats["reaped"] += reaped
+            self.logger.info("Reaped idle setup playgrounds", playgrounds=reaped)
+        return reaped
+
+    async def start(self):
+        if self.reap_task is None or self.reap_task.done():
+            self.reap_task = asyncio.create_task(self._reap_loop())
+
+    async def stop(self):
+        if self.reap_task and not self.reap_task.done():
+            self.reap_task.cancel()
+            try:
+                await self.reap_task
+            except asyncio.CancelledError:
+                pass
+        for key in list(self.sessions):
+            entry = self.sessions.pop(key)
+            await self._discard(entry["playground"])
+
+    async def _reap_loop(self):
+        interval = max(1.0, min(self.idle_ttl / 4, 30.0))
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await self.reap()
+            except Exception as e:
+                self.logger.error("Error reaping setup playgrounds", error=str(e))
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {"idle_ttl": self.idle_ttl, **self.sessions.get_stats(), **self.stats}
+
+
+# Global setup playground instance
+setup_playground = SetupPlayground(idle_ttl=settings.setup_playground_idle_ttl,
+                                   max_sessions=settings.setup_playground_max_sessions)
@@ -0,0 +1,161 @@
+"""
+Background sampling of host CPU, memory and disk usage
+
+Requests read the latest sample and windowed aggregates from a ring buffer
+instead of blocking on ``psutil.cpu_percent(interval=...)`` themselves.
+"""
+import asyncio
+import time
+from collections import deque
+from dataclasses import asdict, dataclass
+from typing import Any, Deque, Dict, List, Optional, Tuple
+import psutil
+import structlog
+
+from backend.config import get_settings
+
+logger = structlog.get_logger(__name__)
+settings = get_settings()
+
+
+@dataclass
+class SystemSample:
+    """One reading of host resource usage"""
+    timestamp: float
+    cpu_percent: float
+    memory_total: int
+    memory_available: int
+    memory_used: int
+    memory_free: int
+    memory_percent: float
+    disk_total: int
+    disk_used: int
+    disk_free: int
+    disk_percent: float
+
+
+def read_system_sample(disk_path: str = "/") -> SystemSample:
+    """Take a non-blocking reading; CPU is averaged since the previous call"""
+    memory = psutil.virtual_memory()
+    disk = psutil.disk_usage(disk_path)
+    return SystemSample(
+        timestamp=time.time(),
+        cpu_percent=psutil.cpu_percent(interval=None),
+        memory_total=memory.total,
+        memory_available=memory.available,
+        memory_used=memory.used,
+        memory_free=memory.free,
+        memory_percent=memory.percent,
+        disk_total=disk.total,
+        disk_used=disk.used,
+        disk_free=disk.free,
+        disk_percent=(disk.used / disk.total) * 100 if disk.total else 0.0
+    )
+
+
+class _WindowMax:
+    """Sliding-window maximum over a ring buffer via a monotonic deque"""
+
+    def __init__(self):
+        self._candidates: Deque[Tuple[int, float]] = deque()
+
+    def push(self, index: int, value: float, oldest_index: int) -> None:
+        while self._candidates and self._candidates[-1][1] <= value:
+            self._candidates.pop()
+        self._candidates.append((index, value))
+        while self._candidates[0][0] < oldest_index:
+            self._candidates.popleft()
+
+    @property
+    def value(self) -> float:
+        return self._candidates[0][1] if self._candidates else 0.0
+
+
+class SystemMetricsSampler:
+    """Samples host metrics at a fixed interval into a bounded ring buffer.
+
+    Running sums and monotonic deques keep the window average and maximum
+    of each tracked percentage up to date as samples arrive and fall out,
+    so reads are O(1) regardless of the window length.
+    """
+
+    TRACKED = ("cpu_percent", "memory_percent", "disk_percent")
+
+    def __init__(self, interval: float = 5.0, window: int = 120, disk_path: str = "/"):
+        self.interval = interval
+        self.window = window
+        self.disk_path = disk_path
+        self.samples: Deque[SystemSample] = deque(maxlen=window)
+        self._count = 0
+        self._sums = {name: 0.0 for name in self.TRACKED}
+        self._maxima = {name: _WindowMax() for name in self.TRACKED}
+        self.sample_task: Optional[asyncio.Task] = None
+        self.logger = logger.bind(component="system_metrics")
+
+    async def start(self):
+        if self.sample_task is None or self.sample_task.done():
+            psutil.cpu_percent(interval=None)  # Prime so the first sample covers one interval
+            self.sample_task = asyncio.create_task(self._sample_loop())
+            self.logger.info("Started system metrics sampler", interval=self.interval)
+
+    async def stop(self):
+        if self.sample_task and not self.sample_task.done():
+            self.sample_task.cancel()
+            try:
+                await self.sample_task
+            except asyncio.CancelledError:
+                pass
+            self.logger.info("Stopped system metrics sampler")
+
+    def record(self, sample: SystemSample) -> None:
+        if len(self.samples) == self.samples.maxlen:
+            evicted = self.samples[0]
+            for name in self.TRACKED:
+                self._sums[name] -= getattr(evicted, name)
+        self.samples.append(sample)
+        oldest_index = self._count - len(self.samples) + 1
+        for name in self.TRACKED:
+            value = getattr(sample, name)
+            self._sums[name] += value
+            self._maxima[name].push(self._count, value, oldest_index)
+        self._count += 1
+
+    async def sample(self) -> SystemSample:
+        sample = await asyncio.to_thread(read_system_sample, self.disk_path)
+        self.record(sample)
+        return sample
+
+    async def _sample_loop(self):
+        while True:
+            try:
+                await self.sample()
+            except Exception as e:
+                self.logger.error("Error sampling system metrics", error=str(e))
+            await asyncio.sleep(self.interval)
+
+    async def latest(self) -> SystemSample:
+        """Most recent sample, taking one on demand if the sampler has not run yet"""
+        if not self.samples:
+            return await self.sample()
+        return self.samples[-1]
+
+    def aggregates(self) -> Dict[str, Any]:
+        count = len(self.samples)
+        result: Dict[str, Any] = {
+            "samples": count,
+            "window_seconds": (self.samples[-1].timestamp - self.samples[0].timestamp) if count else 0.0
+        }
+        for name in self.TRACKED:
+            result[name] = {"avg": self._sums[name] / count if count else 0.0,
+                            "max": self._maxima[name].value}
+        return result
+
+    def history(self, since: Optional[float] = None) -> List[Dict[str, Any]]:
+        return [asdict(sample) for sample in self.samples if since is None or sample.timestamp > since]
+
+
+# Global system metrics sampler instance
+system_metrics = SystemMetricsSampler(
+    interval=settings.system_metrics_interval,
+    window=settings.system_metrics_window
+)
@@ -0,0 +1,487 @@
+"""
+Change-impact analysis for frontend code: maps changed files to affected routes
+"""
+import hashlib
+import json
+import os
+import posixpath
+import re
+import subprocess
+import threading
+from collections import OrderedDict, deque
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+import structlog
+
+logger = structlog.get_logger(__name__)
+
+SOURCE_EXTENSIONS = (".tsx", ".ts", ".jsx", ".js", ".mjs", ".vue", ".svelte")
+STYLE_EXTENSIONS = (".css", ".scss", ".sass", ".less")
+TEMPLATE_EXTENSIONS = (".html", ".htm")
+INDEXED_EXTENSIONS = SOURCE_EXTENSIONS + STYLE_EXTENSIONS + TEMPLATE_EXTENSIONS
+
+ENTRY_MODULE_NAMES = {"index", "main", "app", "_app"}
+SKIPPED_DIRECTORIES = {"node_modules", ".git", "dist", "build", "coverage", ".next", "venv", "__pycache__"}
+
+# Files whose change can alter every page regardless of the import graph
+GLOBAL_FILE_PATTERN = re.compile(
+    r'(^|/)(package\.json|package-lock\.json|yarn\.lock|pnpm-lock\.yaml|tsconfig(\.\w+)?\.json'
+    r'|(vite|webpack|rollup|next|tailwind|postcss|babel)\.config\.\w+|\.babelrc|\.browserslistrc)$'
+)
+LOCKFILE_PATTERN = re.compile(r'(^|/)(package-lock\.json|yarn\.lock|pnpm-lock\.yaml)$')
+TEST_FILE_PATTERN = re.compile(r'(\.(test|spec|stories)\.\w+$|(^|/)__tests__/)')
+# Routes checked when a change can reach every page (config, lockfiles, the app shell)
+SAMPLED_ROUTE_LIMIT = 10
+
+_IMPORT_PATTERNS = [
+    re.compile(r'''\bimport\s+(?:[\w*{}\s,$]+\s+from\s+)?['"]([^'"]+)['"]'''),
+    re.compile(r'''\bexport\s+[\w*{}\s,$]+\s+from\s+['"]([^'"]+)['"]'''),
+    re.compile(r'''\b(?:require|import)\(\s*['"]([^'"]+)['"]\s*\)'''),
+    re.compile(r'''@(?:import|use|forward)\s+(?:url\()?['"]([^'"]+)['"]'''),
+    re.compile(r'''<(?:script|link)\b[^>]*\b(?:src|href)=['"]([^'"]+)['"]'''),
+]
+_IMPORT_BINDING_PATTERN = re.compile(
+    r'''\bimport\s+(\w+)?\s*,?\s*(?:\{([^}]*)\})?\s*from\s+['"]([^'"]+)['"]'''
+)
+_LAZY_IMPORT_PATTERN = re.compile(
+    r'''\b(?:const|let|var)\s+(\w+)\s*=\s*(?:React\.)?lazy\(\s*\(\)\s*=>\s*import\(\s*['"]([^'"]+)['"]'''
+)
+# <Route path="/x" element={<Page />} /> and <Route path="/x" component={Page} />
+_JSX_ROUTE_PATTERN = re.compile(
+    r'''<Route\b[^>]*?\bpath=["'{]+([^"'}]+)["'}]+[^>]*?\b(?:element=\{\s*<\s*|component=\{\s*)(\w+)''',
+    re.DOTALL
+)
+# { path: '/x', element: <Page /> } and { path: '/x', component: Page }
+_OBJECT_ROUTE_PATTERN = re.compile(
+    r'''\bpath\s*:\s*['"]([^'"]+)['"]\s*,\s*(?:element\s*:\s*<\s*|component\s*:\s*)(\w+)'''
+)
+
+
+def content_hash(content: str) -> str:
+    return hashlib.sha1(content.encode("utf-8", errors="replace")).hexdigest()
+
+
+@dataclass
+class ParsedFile:
+    """Imports and route declarations found in one file"""
+    digest: str
+    imports: Set[str] = field(default_factory=set)
+    routes: List[Tuple[str, str]] = field(default_factory=list)  # (route path, component file)
+
+
+@dataclass
+class ImpactReport:
+    """Routes and components affected by a set of changed files"""
+    changed_files: List[str]
+    affected_files: List[str]
+    affected_routes: List[str]
+    affected_components: List[str]
+    global_changes: List[str]
+    lockfile_only: bool
+    unindexed_files: List[str]
+    broad_change: bool = False  # Every route is reachable; affected_routes is a sample
+    total_routes: int = 0
+
+    def to_dict(self) -> Dict[str, object]:
+        return {
+            "affected_routes": self.affected_routes,
+            "broad_change": self.broad_change,
+            "total_routes": self.total_routes,
+            "affected_components": self.affected_components,
+            "affected_files": len(self.affected_files),
+            "global_changes": self.global_changes,
+            "lockfile_only": self.lockfile_only,
+            "unindexed_files": self.unindexed_files,
+        }
+
+
+class FrontendDependencyIndex:
+    """Import graph and route table for the frontend sources of one commit.
+
+    Paths are repository-relative with forward slashes, matching the changed
+    file lists reported by GitHub.
+    """
+
+    def __init__(self, root: str, commit: Optional[str] = None):
+        self.root = root
+        self.commit = commit
+        self.files: Dict[str, ParsedFile] = {}
+        self.dependents: Dict[str, Set[str]] = {}
+        self._base_urls: Dict[str, Tuple[str, Dict[str, List[str]]]] = {}
+        self._route_closures: Optional[Dict[str, Set[str]]] = None
+        self._shell: Optional[Set[str]] = None
+
+    # Building
+
+    def build(self) -> "FrontendDependencyIndex":
+        """Parse every frontend source under the root"""
+        self._load_tsconfigs()
+        for path in self._walk():
+            self._index_file(path)
+        self._rebuild_dependents()
+        logger.info("Built frontend dependency index",
+                   root=self.root,
+                   commit=self.commit,
+                   files=len(self.files))
+        return self
+
+    def update(self, changed_paths: Iterable[str], commit: Optional[str] = None) -> int:
+        """Re-parse only the given paths; returns how many files actually changed"""
+        if commit is not None:
+            self.commit = commit
+        changed_paths = list(changed_paths)
+        if any(posixpath.basename(path).startswith("tsconfig") for path in changed_paths):
+            self._load_tsconfigs()
+
+        updated = 0
+        for path in changed_paths:
+            if not path.endswith(INDEXED_EXTENSIONS):
+                continue
+            previous = self.files.get(path)
+            if not os.path.isfile(self._absolute(path)):
+                if previous is not None:
+                    self._remove_file(path)
+                    updated += 1
+                continue
+            if self._index_file(path, previous):
+                updated += 1
+        if updated:
+            self._invalidate()
+        return updated
+
+    def copy(self) -> "FrontendDependencyIndex":
+        """Shallow copy suitable for updating to a different commit"""
+        clone = FrontendDependencyIndex(self.root, self.commit)
+        clone.files = dict(self.files)
+        clone.dependents = {path: set(users) for path, users in self.dependents.items()}
+        clone._base_urls = dict(self._base_urls)
+        return clone
+
+    def _walk(self) -> Iterable[str]:
+        for directory, subdirectories, filenames in os.walk(self.root):
+            subdirectories[:] = [d for d in subdirectories if d not in SKIPPED_DIRECTORIES]
+            for filename in filenames:
+                if filename.endswith(INDEXED_EXTENSIONS):
+                    absolute = os.path.join(directory, filename)
+                    yield os.path.relpath(absolute, self.root).replace(os.sep, "/")
+
+    def _absolute(self, path: str) -> str:
+        return os.path.join(self.root, *path.split("/"))
+
+    def _index_file(self, path: str, previous: Optional[ParsedFile] = None) -> bool:
+        try:
+            with open(self._absolute(path), "r", encoding="utf-8", errors="replace") as handle:
+                content = handle.read()
+        except OSError:
+            return False
+
+        digest = content_hash(content)
+        if previous is not None and previous.digest == digest:
+            return False
+
+        parsed = self._parse(path, content, digest)
+        if previous is not None:
+            for target in previous.imports - parsed.imports:
+                self.dependents.get(target, set()).discard(path)
+        for target in parsed.imports:
+            self.dependents.setdefault(target, set()).add(path)
+        self.files[path] = parsed
+        return True
+
+    def _remove_file(self, path: str) -> None:
+        parsed = self.files.pop(path)
+        for target in parsed.imports:
+            self.dependents.get(target, set()).discard(path)
+
+    def _rebuild_dependents(self) -> None:
+        self.dependents = {}
+        for path, parsed in self.files.items():
+            for target in parsed.imports:
+                self.dependents.setdefault(target, set()).add(path)
+        self._invalidate()
+
+    def _invalidate(self) -> None:
+        self._route_closures = None
+        self._shell = None
+
+    # Parsing
+
+    def _parse(self, path: str, content: str, digest: str) -> ParsedFile:
+        parsed = ParsedFile(digest=digest)
+        for pattern in _IMPORT_PATTERNS:
+            for specifier in pattern.findall(content):
+                resolved = self._resolve(path, specifier)
+                if resolved:
+                    parsed.imports.add(resolved)
+
+        if path.endswith(SOURCE_EXTENSIONS) and ("path" in content):
+            bindings = self._import_bindings(path, content)
+            for pattern in (_JSX_ROUTE_PATTERN, _OBJECT_ROUTE_PATTERN):
+                for route, component in pattern.findall(content):
+                    # Components defined in the routing file itself render from that file
+                    parsed.routes.append((route.strip(), bindings.get(component, path)))
+        return parsed
+
+    def _import_bindings(self, path: str, content: str) -> Dict[str, str]:
+        bindings: Dict[str, str] = {}
+        for default_name, named, specifier in _IMPORT_BINDING_PATTERN.findall(content):
+            resolved = self._resolve(path, specifier)
+            if not resolved:
+                continue
+            if default_name:
+                bindings[default_name] = resolved
+            for name in named.split(","):
+                name = name.split(" as ")[-1].strip()
+                if name:
+                    bindings[name] = resolved
+        for name, specifier in _LAZY_IMPORT_PATTERN.findall(content):
+            resolved = self._resolve(path, specifier)
+            if resolved:
+                bindings[name] = resolved
+        return bindings
+
+    def _resolve(self, importer: str, specifier: str) -> Optional[str]:
+        specifier = specifier.split("?")[0]
+        if specifier.startswith("."):
+            return self._resolve_candidate(posixpath.join(posixpath.dirname(importer), specifier))
+        if specifier.startswith("/"):
+            return self._resolve_candidate(specifier.lstrip("/"))
+        if specifier.startswith(("http:", "https:", "data:")):
+            return None
+
+        # Bare specifiers resolve through the nearest tsconfig baseUrl/paths, else are packages
+        config_dir = self._nearest_config(importer)
+        if config_dir is None:
+            return None
+        base_url, paths = self._base_urls[config_dir]
+        for alias, targets in paths.items():
+            prefix = alias.rstrip("*")
+            if alias.endswith("*") and specifier.startswith(prefix) or specifier == alias:
+                remainder = specifier[len(prefix):] if alias.endswith("*") else ""
+                for target in targets:
+                    resolved = self._resolve_candidate(
+                        posixpath.join(base_url, target.replace("*", remainder)))
+                    if resolved:
+                        return resolved
+        return self._resolve_candidate(posixpath.join(base_url, specifier))
+
+    def _resolve_candidate(self, candidate: str) -> Optional[str]:
+        candidate = posixpath.normpath(candidate)
+        if candidate.startswith(".."):
+            return None
+        options = [candidate] + [candidate + ext for ext in INDEXED_EXTENSIONS]
+        options += [posixpath.join(candidate, "index" + ext) for ext in SOURCE_EXTENSIONS]
+        for option in options:
+            if option in self.files or os.path.isfile(self._absolute(option)):
+                return option
+        return None
+
+    def _load_tsconfigs(self) -> None:
+        self._base_urls = {}
+        for directory, subdirectories, filenames in os.walk(self.root):
+            subdirectories[:] = [d for d in subdirectories if d not in SKIPPED_DIRECTORIES]
+            for filename in ("tsconfig.json", "jsconfig.json"):
+                if filename not in filenames:
+                    continue
+                try:
+                    with open(os.path.join(directory, filename), "r", encoding="utf-8") as handle:
+                        options = json.load(handle).get("compilerOptions", {})
+                except (OSError, ValueError):
+                    options = {}
+                relative = os.path.relpath(directory, self.root).replace(os.sep, "/")
+                relative = "" if relative == "." else relative
+                base_url = posixpath.normpath(posixpath.join(relative, options.get("baseUrl", ".")))
+                self._base_urls[relative] = (base_url if base_url != "." else "",
+                                             options.get("paths", {}) or {})
+                break
+
+    def _nearest_config(self, path: str) -> Optional[str]:
+        directory = posixpath.dirname(path)
+        while True:
+            if directory in self._base_urls:
+                return directory
+            if not directory:
+                return None
+            directory = posixpath.dirname(directory)
+
+    # Queries
+
+    def _closure(self, start: Iterable[str], stop: Set[str] = frozenset()) -> Set[str]:
+        """Files reachable through imports from ``start`` without entering ``stop``"""
+        seen: Set[str] = set()
+        queue = deque(start)
+        while queue:
+            path = queue.popleft()
+            if path in seen:
+                continue
+            seen.add(path)
+            parsed = self.files.get(path)
+            if parsed is not None:
+                queue.extend(target for target in parsed.imports if target not in stop)
+        return seen
+
+    def routes(self) -> Dict[str, str]:
+        """Route path to the file of the component that renders it"""
+        table: Dict[str, str] = {}
+        for parsed in self.files.values():
+            for route, component in parsed.routes:
+                table.setdefault(route, component)
+        return table
+
+    def entry_points(self) -> List[str]:
+        """Bundle entries: HTML pages and index/main modules that nothing imports"""
+        roots = [path for path in self.files
+                 if not self.dependents.get(path) and not TEST_FILE_PATTERN.search(path)]
+        entries = [path for path in roots
+                   if path.endswith(TEMPLATE_EXTENSIONS)
+                   or posixpath.splitext(posixpath.basename(path))[0] in ENTRY_MODULE_NAMES]
+        # Without a conventional entry, fall back to every unimported source file
+        return sorted(entries or [path for path in roots if path.endswith(SOURCE_EXTENSIONS)])
+
+    def _ensure_route_closures(self) -> None:
+        if self._route_closures is not None:
+            return
+        routes = self.routes()
+        route_components = set(routes.values())
+        self._route_closures = {route: self._closure([component]) for route, component in routes.items()}
+        # The shell is everything entry points load outside route components; it renders on every page
+        self._shell = self._closure(self.entry_points(), stop=route_components)
+        self._shell -= route_components
+
+    def impact(self, changed_files: Iterable[str], route_sample: int = SAMPLED_ROUTE_LIMIT) -> ImpactReport:
+        """Work out which routes and components the changed files can affect.
+
+        Changes that reach every page select at most ``route_sample`` routes,
+        preferring the shallowest paths, rather than the whole route table.
+        """
+        self._ensure_route_closures()
+        changed = sorted(set(changed_files))
+        global_changes = [path for path in changed if GLOBAL_FILE_PATTERN.search(path)]
+        lockfile_only = bool(global_changes) and all(LOCKFILE_PATTERN.search(p) for p in global_changes)
+        indexed = [path for path in changed if path in self.files]
+        unindexed = [path for path in changed
+                     if path.endswith(INDEXED_EXTENSIONS) and path not in self.files]
+
+        # Everything that transitively imports a changed file is affected too
+        affected: Set[str] = set()
+        queue = deque(indexed)
+        while queue:
+            path = queue.popleft()
+            if path in affected:
+                continue
+            affected.add(path)
+            queue.extend(self.dependents.get(path, ()))
+
+        routes = self._route_closures or {}
+        broad_change = bool(global_changes or (set(indexed) & (self._shell or set())))
+        if broad_change:
+            sample = sorted(routes, key=lambda route: (route.count("/"), route))[:route_sample]
+            affected_routes = sorted(sample) or ["/"]
+        else:
+            affected_routes = sorted(route for route, closure in routes.items()
+                                     if closure & set(indexed))
+            if not routes and indexed:
+                affected_routes = ["/"]
+
+        components = sorted(path for path in affected
+                            if path.endswith((".tsx", ".jsx", ".vue", ".svelte"))
+                            and not TEST_FILE_PATTERN.search(path))
+        return ImpactReport(
+            changed_files=changed,
+            affected_files=sorted(affected),
+            affected_routes=affected_routes,
+            affected_components=components,
+            global_changes=global_changes,
+            lockfile_only=lockfile_only,
+            unindexed_files=unindexed,
+            broad_change=broad_change,
+            total_routes=len(routes),
+        )
+
+
+def git_changed_files(root: str, from_commit: str, to_commit: str) -> Optional[List[str]]:
+    """Files changed between two commits in a checkout, or None if git cannot tell"""
+    try:
+        result = subprocess.run(
+            ["git", "-C", root, "diff", "--name-only", from_commit, to_commit],
+            capture_output=True, text=True, timeout=30, check=True
+        )
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return [line.strip() for line in result.stdout.splitlines() if line.strip()]
+
+
+class DependencyIndexCache:
+    """Dependency indexes per (repository, commit), derived incrementally when possible"""
+
+    def __init__(self, max_entries: int = 32):
+        self.max_entries = max_entries
+        self.entries: "OrderedDict[Tuple[str, str], FrontendDependencyIndex]" = OrderedDict()
+        self.stats = {"hits": 0, "incremental_builds": 0, "full_builds": 0}
+        self._lock = threading.Lock()
+
+    def get_index(self,
+                  repository: str,
+                  commit: str,
+                  root: str,
+                  parent_commit: Optional[str] = None,
+                  changed_since_parent: Optional[List[str]] = None) -> FrontendDependencyIndex:
+        """Get the index for a commit, updating a cached ancestor instead of rebuilding.
+
+        Blocking and thread-safe; call it from a worker thread in async code.
+        Builds run outside the lock, and cached indexes are never mutated.
+        """
+        key = (repository, commit)
+        with self._lock:
+            index = self.entries.get(key)
+            if index is not None:
+                self.entries.move_to_end(key)
+                self.stats["hits"] += 1
+                return index
+            base = self._find_base(repository, root, parent_commit)
+
+        build = "full_builds"
+        if base is not None:
+            changed = changed_since_parent
+            if changed is None or base.commit != parent_commit:
+                changed = git_changed_files(root, base.commit, commit)
+            if changed is not None:
+                index = base.copy()
+                index.root = root
+                index.update(changed, commit=commit)
+                build = "incremental_builds"
+
+        if index is None:
+            index = FrontendDependencyIndex(root, commit).build()
+
+        with self._lock:
+            self.stats[build] += 1
+            existing = self.entries.get(key)
+            if existing is not None:
+                # Another request built the same commit meanwhile; keep the cached one
+                self.entries.move_to_end(key)
+                return existing
+            self.entries[key] = index
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+        return index
+
+    def _find_base(self,
+                   repository: str,
+                   root: str,
+                   parent_commit: Optional[str]) -> Optional[FrontendDependencyIndex]:
+        if parent_commit and (repository, parent_commit) in self.entries:
+            return self.entries[(repository, parent_commit)]
+        # Otherwise the most recently used index of the same checkout, diffed with git
+        for (cached_repository, _), index in reversed(self.entries.items()):
+            if cached_repository == repository and index.root == root:
+                return index
+        return None
+
+    def get_stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"entries": len(self.entries), **self.stats}
+
+
+# Global dependency index cache instance
+dependency_index_cache = DependencyIndexCache()
@@ -5,6 +5,7 @@ import asyncio
 import json
 import tempfile
 import shutil
+import time
 from pathlib import Path
 from typing import Dict, Any, Optional, List
 import structlog
@@ -19,6 +20,7 @@ from backend.services.web_eval_client import WebEvalClient
 from backend.services.graph_sitter_client import GraphSitterClient
 from backend.integrations.gemini_client import GeminiClient
 from backend.config import get_settings
+from backend.utils.metrics import observe_duration, validation_step_duration, validations_in_progress
 
 logger = structlog.get_logger(__name__)
 settings = get_settings()
@@ -59,7 +61,9 @@ class ValidationPipeline:
                            pr_number=pr_number)
                 
                 # Start validation in background
-                asyncio.create_task(self._execute_validation(validation_run.id))
+                validations_in_progress.labels("pipeline").inc()
+                task = asyncio.create_task(self._execute_validation(validation_run.id))
+                task.add_done_callback(lambda _: validations_in_progress.labels("pipeline").dec())
                 
                 return validation_run.id
                 
@@ -125,37 +129,41 @@ class ValidationPipeline:
                     validation_run.error_logs = {"error": str(e)}
                     validation_run.completed_at = datetime.utcnow()
                     db.commit()
+        finally:
+            await self.grainchain_client.release_checkout(f"/tmp/validation-{validation_run_id}")
     
     async def _run_validation_steps(self, validation_run: ValidationRun, project: Project, agent_run: ProjectAgentRun) -> bool:
         """Run all validation steps"""
         try:
             # Step 1: Create snapshot with Grainchain
             logger.info("Step 1: Creating snapshot", validation_run_id=validation_run.id)
-            snapshot_success = await self._create_snapshot(validation_run, project)
+            snapshot_success = await self._timed_step("snapshot_creation", self._create_snapshot(validation_run, project))
             if not snapshot_success:
                 return False
             
             # Step 2: Clone PR codebase
             logger.info("Step 2: Cloning PR codebase", validation_run_id=validation_run.id)
-            clone_success = await self._clone_pr_codebase(validation_run, project)
+            clone_success = await self._timed_step("code_clone", self._clone_pr_codebase(validation_run, project))
             if not clone_success:
                 return False
             
             # Step 3: Run deployment commands
             logger.info("Step 3: Running deployment commands", validation_run_id=validation_run.id)
-            deployment_success = await self._run_deployment_commands(validation_run, project)
+            deployment_success = await self._timed_step("deployment", self._run_deployment_commands(validation_run, project))
             if not deployment_success:
                 # Try to fix deployment issues
-                fix_success = await self._attempt_deployment_fix(validation_run, project, agent_run)
+                fix_success = await self._timed_step("deployment_fix",
+                                                     self._attempt_deployment_fix(validation_run, project, agent_run))
                 if not fix_success:
                     return False
             
             # Step 4: Run Web-Eval-Agent tests
             logger.info("Step 4: Running Web-Eval-Agent tests", validation_run_id=validation_run.id)
-            web_eval_success = await self._run_web_eval_tests(validation_run, project)
+            web_eval_success = await self._timed_step("ui_testing", self._run_web_eval_tests(validation_run, project))
             if not web_eval_success:
                 # Try to fix web evaluation issues
-                fix_success = await self._attempt_web_eval_fix(validation_run, project, agent_run)
+                fix_success = await self._timed_step("ui_testing_fix",
+                                                     self._attempt_web_eval_fix(validation_run, project, agent_run))
                 if not fix_success:
                     return False
             
@@ -167,6 +175,17 @@ class ValidationPipeline:
                         error=str(e))
             return False
     
+    async def _timed_step(self, step: str, step_coro) -> bool:
+        """Await a step and record its duration and outcome"""
+        started = time.perf_counter()
+        success = False
+        try:
+            success = await step_coro
+            return success
+        finally:
+            observe_duration(validation_step_duration, started,
+                             "pipeline", step, "completed" if success else "failed")
+    
     async def _create_snapshot(self, validation_run: ValidationRun, project: Project) -> bool:
         """Create snapshot using Grainchain"""
         try:
@@ -226,11 +245,14 @@ class ValidationPipeline:
                 logger.error("Failed to get PR data", validation_run_id=validation_run.id)
                 return False
             
-            # Clone the PR branch using Grainchain
+            # Check out the PR head using Grainchain; the pull ref also covers fork branches
+            pr_number = validation_run.pr_number
             clone_success = await self.grainchain_client.clone_repository(
                 repo_url=project.github_url,
                 branch=pr_data.get("head", {}).get("ref"),
-                target_dir=f"/tmp/validation-{validation_run.id}"
+                target_dir=f"/tmp/validation-{validation_run.id}",
+                commit=pr_data.get("head", {}).get("sha"),
+                refspecs=[f"+refs/pull/{pr_number}/head:refs/pull/{pr_number}/head"]
             )
             
             if clone_success:
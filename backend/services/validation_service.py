@@ -4,6 +4,7 @@ Validation pipeline service for managing the 7-step validation process
 import os
 import asyncio
 import logging
+import time
 from typing import Dict, Any, List, Optional
 from enum import Enum
 from datetime import datetime
@@ -13,10 +14,16 @@ from backend.integrations.graph_sitter_client import GraphSitterClient
 from backend.integrations.web_eval_agent_client import WebEvalAgentClient
 from backend.integrations.gemini_client import GeminiClient
 from backend.services.github_service import GitHubService
+from backend.utils.analysis_cache import select_source_files
+from backend.utils.log_reducer import bound_prompt_text, log_lines
+from backend.utils.diff_analysis import changed_files_from_pull_request
 from backend.websocket.connection_manager import ConnectionManager
+from backend.utils.metrics import observe_duration, validation_step_duration, validations_in_progress
 
 logger = logging.getLogger(__name__)
 
+ANALYSIS_LANGUAGES = ["typescript", "javascript", "python", "rust", "go"]
+
 class ValidationStep(Enum):
     SNAPSHOT_CREATION = "snapshot_creation"
     CODE_CLONE = "code_clone"
@@ -62,7 +69,9 @@ class ValidationService:
                 await db.commit()
                 
                 # Start validation in background
-                asyncio.create_task(self._run_validation_pipeline(agent_run_id))
+                validations_in_progress.labels("service").inc()
+                task = asyncio.create_task(self._run_validation_pipeline(agent_run_id))
+                task.add_done_callback(lambda _: validations_in_progress.labels("service").dec())
                 
                 return {"status": "started", "agent_run_id": agent_run_id}
                 
@@ -136,9 +145,12 @@ class ValidationService:
                         step_status="running"
                     )
                     
+                    step_started = time.perf_counter()
                     try:
                         # Execute step
                         step_result = await step_func(context)
+                        observe_duration(validation_step_duration, step_started,
+                                         "service", step_name, "completed")
                         
                         # Log success
                         validation_logs.append({
@@ -161,6 +173,8 @@ class ValidationService:
                         )
                         
                     except Exception as step_error:
+                        observe_duration(validation_step_duration, step_started,
+                                         "service", step_name, "failed")
                         logger.error(f"Validation step {step_name} failed: {step_error}")
                         
                         # Log failure
@@ -268,6 +282,9 @@ class ValidationService:
         if not pr_info:
             raise Exception("Could not retrieve PR information")
         
+        context["head_sha"] = pr_info["head"].get("sha")
+        context["base_sha"] = pr_info.get("base", {}).get("sha")
+        
         # Clone the PR branch
         clone_result = await self.grainchain.clone_repository(
             context["snapshot_id"],
@@ -286,12 +303,44 @@ class ValidationService:
     async def _step_code_analysis(self, context: Dict[str, Any]) -> Dict[str, Any]:
         """Step 3: Run graph-sitter code analysis"""
         start_time = datetime.utcnow()
+        project = context["project"]
         
-        # Run code quality analysis
-        analysis_result = await self.graph_sitter.analyze_codebase(
-            context["snapshot_id"],
-            languages=["typescript", "javascript", "python", "rust", "go"]
-        )
+        # List the PR head's files with their blob SHAs so unchanged files reuse cached results
+        tree = None
+        if context.get("head_sha"):
+            tree = await self.github.get_tree(project.github_owner, project.github_repo, context["head_sha"])
+        
+        # Scope the analysis to the PR's changes when both sides are available
+        diff_inputs = None
+        if tree is not None and context.get("base_sha"):
+            pr_files, base_tree = await asyncio.gather(
+                self.github.get_pull_request_files(project.github_owner, project.github_repo,
+                                                   context["agent_run"].pr_number),
+                self.github.get_tree(project.github_owner, project.github_repo, context["base_sha"])
+            )
+            if pr_files is not None and base_tree is not None:
+                diff_inputs = (changed_files_from_pull_request(pr_files), base_tree)
+        
+        if diff_inputs is not None:
+            changes, base_tree = diff_inputs
+            analysis_result = await self.graph_sitter.analyze_diff(
+                context["snapshot_id"],
+                context["base_sha"],
+                context["head_sha"],
+                changes,
+                tree,
+                base_tree,
+                languages=ANALYSIS_LANGUAGES
+            )
+        elif tree is not None:
+            files = select_source_files(tree, ANALYSIS_LANGUAGES)
+            analysis_result = await self.graph_sitter.analyze_files_incremental(context["snapshot_id"], files)
+        else:
+            # Run code quality analysis over the whole snapshot
+            analysis_result = await self.graph_sitter.analyze_codebase(
+                context["snapshot_id"],
+                languages=ANALYSIS_LANGUAGES
+            )
         
         duration = (datetime.utcnow() - start_time).total_seconds()
         return {
@@ -336,6 +385,9 @@ class ValidationService:
         
         deployment_logs = context.get("validation_logs", [])
         deployment_url = context.get("deployment_url")
+        # Only the log is reduced; the instructions below go to the model verbatim
+        log_text = bound_prompt_text("\n".join(log_lines(deployment_logs[-3:])),
+                                     self.gemini.prompt_token_budget)
         
         # Use Gemini to analyze deployment success
         validation_prompt = f"""
@@ -344,7 +396,7 @@ class ValidationService:
         Deployment URL: {deployment_url or 'Not available'}
         
         Recent logs:
-        {deployment_logs[-3:] if deployment_logs else 'No logs available'}
+        {log_text or 'No logs available'}
         
         Please provide:
         1. Success/failure assessment
@@ -453,12 +505,15 @@ class ValidationService:
     async def _handle_step_failure(self, context: Dict[str, Any], step_name: str, error: str) -> bool:
         """Handle validation step failure with automatic recovery"""
         try:
+            # Only the error output is reduced; the instructions go to the model verbatim
+            error_text = bound_prompt_text(error, self.gemini.prompt_token_budget)
+            
             # Use Gemini to analyze the error and suggest fixes
             recovery_prompt = f"""
             A validation step failed in our CI/CD pipeline:
             
             Step: {step_name}
-            Error: {error}
+            Error: {error_text}
             
             Please analyze this error and provide:
             1. Root cause analysis
@@ -468,7 +523,10 @@ class ValidationService:
             Context: This is part of an automated validation pipeline for a GitHub PR.
             """
             
-            recovery_analysis = await self.gemini.analyze_error(recovery_prompt)
+            # Fingerprint the failure itself so recurring errors reuse an earlier diagnosis
+            recovery_analysis = await self.gemini.analyze_error(
+                recovery_prompt, signature=f"step-recovery:{step_name}\n{error}"
+            )
             
             # If Gemini suggests code fixes, attempt to apply them via Codegen API
             if recovery_analysis.get("code_fixes"):
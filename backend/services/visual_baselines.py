@@ -0,0 +1,258 @@
+"""
+Content-addressed store of visual regression baselines with perceptual hashes
+"""
+import base64
+import fcntl
+import hashlib
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+import structlog
+
+from backend.config import get_settings
+
+logger = structlog.get_logger(__name__)
+settings = get_settings()
+
+
+@dataclass(frozen=True)
+class BaselineKey:
+    """Identifies one baseline screenshot"""
+    route: str
+    viewport: str  # e.g. "1920x1080"
+    browser: str
+    commit: str
+
+    def as_string(self) -> str:
+        return "|".join((self.commit, self.browser, self.viewport, self.route))
+
+
+@dataclass
+class BaselineEntry:
+    """Index record pointing at a stored image"""
+    phash: str  # Hex perceptual hash computed by the agent at capture time
+    digest: Optional[str] = None  # sha256 of the image blob, if one was transferred
+    stored_at: float = 0.0
+
+
+def hamming_distance(first: str, second: str) -> int:
+    """Number of differing bits between two hex-encoded hashes; malformed hashes never match"""
+    mismatch = max(len(first), len(second), 1) * 4
+    if len(first) != len(second):
+        return mismatch
+    try:
+        return bin(int(first, 16) ^ int(second, 16)).count("1")
+    except ValueError:
+        return mismatch
+
+
+def capture_key(capture: Dict[str, Any], commit: str, browser: str) -> BaselineKey:
+    """Build a key from a capture record as returned by the agent"""
+    return BaselineKey(route=capture.get("page") or capture.get("route") or "/",
+                       viewport=str(capture.get("viewport") or "default"),
+                       browser=capture.get("browser") or browser,
+                       commit=commit)
+
+
+class VisualBaselineStore:
+    """Baseline index keyed by (route, viewport, browser, commit) over deduplicated blobs.
+
+    Identical screenshots across commits share one blob; blobs no index entry
+    references are removed by ``gc``. Several worker processes may share the
+    directory, so mutations hold an exclusive ``flock`` on ``index.lock`` and
+    start from the index as it is on disk.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self.objects_dir = os.path.join(directory, "objects")
+        self.index_path = os.path.join(directory, "index.json")
+        self.lock_path = os.path.join(directory, "index.lock")
+        self._lock = threading.Lock()
+        self._index: Optional[Dict[str, Dict[str, Any]]] = None
+        self._index_version: Optional[Tuple[int, int]] = None  # (inode, mtime) the cache was read at
+        self.stats = {"hash_matches": 0, "hash_mismatches": 0, "blobs_written": 0, "blobs_deduplicated": 0}
+
+    # Persistence
+
+    def _load(self) -> Dict[str, Dict[str, Any]]:
+        """Cached index, re-read whenever another process has replaced the file"""
+        try:
+            stat = os.stat(self.index_path)
+            version: Optional[Tuple[int, int]] = (stat.st_ino, stat.st_mtime_ns)
+        except OSError:
+            version = None
+        if self._index is None or version != self._index_version:
+            try:
+                with open(self.index_path, "r") as f:
+                    self._index = json.load(f)
+            except (OSError, ValueError):
+                self._index = {}
+            self._index_version = version
+        return self._index
+
+    @contextmanager
+    def _exclusive(self) -> Iterator[Dict[str, Dict[str, Any]]]:
+        """Hold the thread and cross-process locks and yield the current on-disk index"""
+        with self._lock:
+            os.makedirs(self.directory, exist_ok=True)
+            with open(self.lock_path, "a") as lock_file:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+                try:
+                    yield self._load()
+                finally:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _save(self) -> None:
+        os.makedirs(self.directory, exist_ok=True)
+        tmp_path = f"{self.index_path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, "w") as f:
+                json.dump(self._index, f)
+            os.replace(tmp_path, self.index_path)
+            stat = os.stat(self.index_path)
+            self._index_version = (stat.st_ino, stat.st_mtime_ns)
+        except OSError as e:
+            logger.warning("Failed to persist visual baseline index", error=str(e))
+
+    def _blob_path(self, digest: str) -> str:
+        return os.path.join(self.objects_dir, digest[:2], digest[2:])
+
+    # Baselines
+
+    def get(self, key: BaselineKey) -> Optional[BaselineEntry]:
+        with self._lock:
+            record = self._load().get(key.as_string())
+        return BaselineEntry(**record) if record else None
+
+    def _write_blob(self, image: bytes) -> str:
+        """Store an image blob unless an identical one exists; returns its digest"""
+        digest = hashlib.sha256(image).hexdigest()
+        path = self._blob_path(digest)
+        if os.path.exists(path):
+            self.stats["blobs_deduplicated"] += 1
+        else:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(image)
+            os.replace(tmp_path, path)
+            self.stats["blobs_written"] += 1
+        return digest
+
+    def put_many(self, records: Iterable[Tuple[BaselineKey, str, Optional[bytes]]]) -> List[BaselineEntry]:
+        """Record ``(key, phash, image)`` baselines, saving the index once.
+
+        Blobs are written and indexed under the same lock ``gc`` holds, so a
+        blob is never collected between being written and being referenced.
+        """
+        entries = []
+        with self._exclusive() as index:
+            for key, phash, image in records:
+                digest = self._write_blob(image) if image is not None else None
+                entry = BaselineEntry(phash=phash, digest=digest, stored_at=time.time())
+                index[key.as_string()] = asdict(entry)
+                entries.append(entry)
+            if entries:
+                self._save()
+        return entries
+
+    def put(self, key: BaselineKey, phash: str, image: Optional[bytes] = None) -> BaselineEntry:
+        """Record a baseline; the image blob is written only if no identical one exists"""
+        return self.put_many([(key, phash, image)])[0]
+
+    def read_image(self, entry: BaselineEntry) -> Optional[bytes]:
+        if not entry.digest:
+            return None
+        try:
+            with open(self._blob_path(entry.digest), "rb") as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def has_commit(self, commit: str) -> bool:
+        prefix = f"{commit}|"
+        with self._lock:
+            return any(name.startswith(prefix) for name in self._load())
+
+    def partition(self,
+                  captures: List[Dict[str, Any]],
+                  commit: str,
+                  browser: str,
+                  max_distance: int = 0) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+        """Split captures into (unchanged, changed) by perceptual hash against the baselines"""
+        unchanged, changed = [], []
+        for capture in captures:
+            baseline = self.get(capture_key(capture, commit, browser))
+            phash = capture.get("phash")
+            if baseline and phash and hamming_distance(baseline.phash, phash) <= max_distance:
+                unchanged.append(capture)
+                self.stats["hash_matches"] += 1
+            else:
+                changed.append(capture)
+                self.stats["hash_mismatches"] += 1
+        return unchanged, changed
+
+    def store_captures(self, captures: Iterable[Dict[str, Any]], commit: str, browser: str) -> int:
+        """Store agent capture records (``phash`` plus optional base64 ``image``)"""
+        records = []
+        for capture in captures:
+            if not capture.get("phash"):
+                continue
+            image = capture.get("image")
+            records.append((capture_key(capture, commit, browser),
+                            capture["phash"],
+                            base64.b64decode(image) if image else None))
+        return len(self.put_many(records))
+
+    # Garbage collection
+
+    def prune(self, max_commits: int) -> int:
+        """Keep baselines for the most recently stored commits only; returns entries dropped"""
+        with self._exclusive() as index:
+            latest: Dict[str, float] = {}
+            for name, record in index.items():
+                commit = name.split("|", 1)[0]
+                latest[commit] = max(latest.get(commit, 0.0), record.get("stored_at", 0.0))
+            keep = set(sorted(latest, key=latest.get, reverse=True)[:max_commits])
+            dropped = [name for name in index if name.split("|", 1)[0] not in keep]
+            for name in dropped:
+                del index[name]
+            if dropped:
+                self._save()
+        return len(dropped)
+
+    def gc(self) -> int:
+        """Delete blobs no baseline references; returns blobs removed"""
+        removed = 0
+        with self._exclusive() as index:
+            referenced = {record.get("digest") for record in index.values()}
+            if not os.path.isdir(self.objects_dir):
+                return removed
+            for shard in os.listdir(self.objects_dir):
+                shard_dir = os.path.join(self.objects_dir, shard)
+                for name in os.listdir(shard_dir):
+                    if name.endswith(".tmp") or shard + name in referenced:
+                        continue
+                    try:
+                        os.remove(os.path.join(shard_dir, name))
+                        removed += 1
+                    except OSError:
+                        pass
+        if removed:
+            logger.info("Removed unreferenced visual baselines", removed=removed)
+        return removed
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            index = self._load()
+            digests = {record.get("digest") for record in index.values() if record.get("digest")}
+        return {"baselines": len(index), "unique_images": len(digests), **self.stats}
+
+
+# Global visual baseline store instance
+visual_baseline_store = VisualBaselineStore(settings.visual_baseline_dir)
@@ -9,6 +9,7 @@ import structlog
 
 from .base_service import BaseService
 from backend.config import get_settings
+from backend.utils.metrics import websocket_active_connections, websocket_connections, websocket_messages
 
 logger = structlog.get_logger(__name__)
 settings = get_settings()
@@ -28,6 +29,7 @@ class WebSocketConnection:
         """Send message to client, return success status"""
         try:
             await self.websocket.send_text(json.dumps(message))
+            websocket_messages.labels("sent").inc()
             return True
         except Exception as e:
             logger.warning("Failed to send WebSocket message", 
@@ -84,7 +86,10 @@ class WebSocketService(BaseService):
         await websocket.accept()
         
         connection = WebSocketConnection(websocket, client_id)
+        if client_id not in self.active_connections:
+            websocket_active_connections.inc()
         self.active_connections[client_id] = connection
+        websocket_connections.inc()
         
         self.logger.info("WebSocket client connected", 
                         client_id=client_id, 
@@ -106,6 +111,7 @@ class WebSocketService(BaseService):
             connection = self.active_connections[client_id]
             connection.is_active = False
             del self.active_connections[client_id]
+            websocket_active_connections.dec()
             
             self.logger.info("WebSocket client disconnected", 
                            client_id=client_id,
@@ -117,6 +123,7 @@ class WebSocketService(BaseService):
         if not connection:
             return
         
+        websocket_messages.labels("received").inc()
         message_type = message.get("type")
         
         if message_type == "subscribe_project":
@@ -1,17 +1,42 @@
 """
 Utility modules for CodegenCICD Dashboard
 """
-from .circuit_breaker import CircuitBreaker, CircuitState
-from .retry_strategies import RetryStrategy, RetryConfig, RetryHandler, RetryExhaustedError
+from .circuit_breaker import (
+    CircuitBreaker,
+    CircuitState,
+    CircuitBreakerManager,
+    FileBreakerStateStore,
+    InMemoryBreakerStateStore,
+    endpoint_template,
+)
+from .retry_strategies import (
+    RetryStrategy,
+    RetryConfig,
+    RetryHandler,
+    RetryExhaustedError,
+    RetryBudget,
+    RetryBudgetRegistry,
+)
+from .rate_limiter import RequestPriority, TokenBucket, TokenBucketConfig, RateLimiterRegistry
 from .connection_pool import EnhancedConnectionPool, ConnectionPoolManager, ConnectionPoolConfig
 
 __all__ = [
     "CircuitBreaker",
     "CircuitState", 
+    "CircuitBreakerManager",
+    "FileBreakerStateStore",
+    "InMemoryBreakerStateStore",
+    "endpoint_template",
     "RetryStrategy",
     "RetryConfig",
     "RetryHandler",
     "RetryExhaustedError",
+    "RetryBudget",
+    "RetryBudgetRegistry",
+    "RequestPriority",
+    "TokenBucket",
+    "TokenBucketConfig",
+    "RateLimiterRegistry",
     "EnhancedConnectionPool",
     "ConnectionPoolManager",
     "ConnectionPoolConfig",
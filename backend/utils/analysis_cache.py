@@ -0,0 +1,288 @@
+"""
+Content-addressed cache of per-file code analysis results
+
+Files are identified by their git blob SHA and language, so an unchanged file
+is never re-analyzed no matter which branch, snapshot or checkout it appears
+in. Codebase-level figures are recomputed from the per-file results.
+"""
+import asyncio
+import copy
+import fnmatch
+import hashlib
+import os
+import subprocess
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+import structlog
+
+logger = structlog.get_logger(__name__)
+
+EXTENSION_LANGUAGES = {
+    ".py": "python",
+    ".js": "javascript",
+    ".jsx": "javascript",
+    ".mjs": "javascript",
+    ".cjs": "javascript",
+    ".ts": "typescript",
+    ".tsx": "typescript",
+    ".rs": "rust",
+    ".go": "go",
+    ".java": "java",
+    ".rb": "ruby",
+}
+
+DEFAULT_EXCLUDE_PATTERNS = [
+    "node_modules",
+    ".git",
+    "__pycache__",
+    "*.pyc",
+    ".env",
+    "dist",
+    "build"
+]
+
+# Files whose contents determine the dependency analysis
+DEPENDENCY_MANIFESTS = {
+    "package.json", "package-lock.json", "yarn.lock", "pnpm-lock.yaml",
+    "requirements.txt", "pyproject.toml", "poetry.lock", "Pipfile.lock",
+    "Cargo.toml", "Cargo.lock", "go.mod", "go.sum"
+}
+
+
+@dataclass(frozen=True)
+class SourceFile:
+    """A file to analyze, identified by its content hash"""
+    path: str
+    blob_sha: str
+    language: str
+    size: Optional[int] = None
+
+
+def git_blob_sha(data: bytes) -> str:
+    """SHA-1 of a blob as git computes it, so local hashes match tree entries"""
+    digest = hashlib.sha1()
+    digest.update(b"blob %d\0" % len(data))
+    digest.update(data)
+    return digest.hexdigest()
+
+
+def _hash_file(path: str) -> Tuple[str, int]:
+    with open(path, "rb") as f:
+        data = f.read()
+    return git_blob_sha(data), len(data)
+
+
+def list_worktree_entries(root: str) -> List[Tuple[str, str, Optional[int]]]:
+    """``(path, blob_sha, size)`` for files under ``root``.
+
+    In a git checkout the SHAs of unmodified tracked files come from the index,
+    so only modified and untracked files are read and hashed. Outside git every
+    file is hashed. Blocking; call from a worker thread.
+    """
+    def git(*args: str) -> List[str]:
+        output = subprocess.run(["git", "-C", root, *args], capture_output=True, check=True).stdout
+        return [entry for entry in output.decode("utf-8", "surrogateescape").split("\0") if entry]
+
+    entries: Dict[str, Tuple[str, Optional[int]]] = {}
+    try:
+        for line in git("ls-files", "-s", "-z"):
+            meta, path = line.split("\t", 1)
+            mode, blob_sha = meta.split()[:2]
+            if mode != "160000":  # Submodules have no blob
+                entries[path] = (blob_sha, None)
+        dirty = git("ls-files", "-m", "-o", "--exclude-standard", "-z")
+    except (OSError, subprocess.CalledProcessError):
+        dirty = []
+        for directory, subdirs, filenames in os.walk(root):
+            subdirs[:] = [d for d in subdirs if not is_excluded(d)]
+            for filename in filenames:
+                dirty.append(os.path.relpath(os.path.join(directory, filename), root).replace(os.sep, "/"))
+
+    for path in dirty:
+        full_path = os.path.join(root, path)
+        if os.path.isfile(full_path):
+            entries[path] = _hash_file(full_path)
+        else:
+            entries.pop(path, None)  # Deleted in the worktree
+
+    result = []
+    for path, (blob_sha, size) in entries.items():
+        if size is None:
+            try:
+                size = os.path.getsize(os.path.join(root, path))
+            except OSError:
+                continue
+        result.append((path, blob_sha, size))
+    return result
+
+
+def detect_language(path: str) -> Optional[str]:
+    return EXTENSION_LANGUAGES.get(os.path.splitext(path)[1].lower())
+
+
+def is_excluded(path: str, patterns: Iterable[str] = DEFAULT_EXCLUDE_PATTERNS) -> bool:
+    parts = path.split("/")
+    return any(fnmatch.fnmatch(part, pattern) for part in parts for pattern in patterns)
+
+
+def select_source_files(entries: Iterable[Tuple[str, str, Optional[int]]],
+                        languages: Optional[Iterable[str]] = None,
+                        max_file_size: Optional[int] = None) -> List[SourceFile]:
+    """Filter ``(path, blob_sha, size)`` entries down to analyzable source files"""
+    wanted = set(languages) if languages else None
+    files = []
+    for path, blob_sha, size in entries:
+        language = detect_language(path)
+        if language is None or (wanted and language not in wanted) or is_excluded(path):
+            continue
+        if max_file_size and size and size > max_file_size:
+            continue
+        files.append(SourceFile(path=path, blob_sha=blob_sha, language=language, size=size))
+    return files
+
+
+def manifest_fingerprint(entries: Iterable[Tuple[str, str, Optional[int]]]) -> Optional[str]:
+    """Hash of every dependency manifest's blob SHA; None if the tree has none"""
+    manifests = sorted((path, blob_sha) for path, blob_sha, _ in entries
+                       if os.path.basename(path) in DEPENDENCY_MANIFESTS and not is_excluded(path))
+    if not manifests:
+        return None
+    return hashlib.sha256(repr(manifests).encode()).hexdigest()
+
+
+class AnalysisCache:
+    """LRU cache of analysis results keyed by content hash and language"""
+
+    def __init__(self, max_entries: int = 50000):
+        self.max_entries = max_entries
+        self.entries: "OrderedDict[Tuple[str, ...], Dict[str, Any]]" = OrderedDict()
+        self.stats = {"hits": 0, "misses": 0, "stored": 0, "evictions": 0}
+
+    def get(self, *key: str) -> Optional[Dict[str, Any]]:
+        entry = self.entries.get(key)
+        if entry is None:
+            self.stats["misses"] += 1
+            return None
+        self.stats["hits"] += 1
+        self.entries.move_to_end(key)
+        return copy.deepcopy(entry)
+
+    def put(self, result: Dict[str, Any], *key: str) -> None:
+        self.entries[key] = copy.deepcopy(result)
+        self.entries.move_to_end(key)
+        self.stats["stored"] += 1
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+            self.stats["evictions"] += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        lookups = self.stats["hits"] + self.stats["misses"]
+        return {
+            **self.stats,
+            "entries": len(self.entries),
+            "hit_rate": self.stats["hits"] / lookups if lookups else 0.0
+        }
+
+
+async def analyze_with_cache(cache: AnalysisCache,
+                             namespace: str,
+                             files: List[SourceFile],
+                             analyze: Callable[[SourceFile], Awaitable[Dict[str, Any]]],
+                             concurrency: int = 8) -> Tuple[Dict[str, Dict[str, Any]], List[str]]:
+    """Per-file results for ``files``, calling ``analyze`` only for cache misses.
+
+    ``namespace`` separates analyzers whose results are not interchangeable.
+    Returns the results keyed by path and the paths that were analyzed.
+    Results carrying an ``error`` are returned but not cached.
+    """
+    results: Dict[str, Dict[str, Any]] = {}
+    misses: List[SourceFile] = []
+    for source in files:
+        cached = cache.get(namespace, source.blob_sha, source.language)
+        if cached is None:
+            misses.append(source)
+        else:
+            results[source.path] = cached
+
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def run(source: SourceFile):
+        async with semaphore:
+            try:
+                result = await analyze(source)
+            except Exception as e:
+                result = {"error": str(e), "issues": [], "metrics": {}}
+        if not result.get("error") and result.get("success", True):
+            cache.put(result, namespace, source.blob_sha, source.language)
+        results[source.path] = result
+
+    await asyncio.gather(*(run(source) for source in misses))
+    return results, [source.path for source in misses]
+
+
+async def analyze_uncached(files: List[SourceFile],
+                           analyze: Callable[[SourceFile], Awaitable[Dict[str, Any]]],
+                           concurrency: int = 8) -> Dict[str, Dict[str, Any]]:
+    """Fresh per-file results, for files whose analysis depends on changed neighbours"""
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def run(source: SourceFile) -> Tuple[str, Dict[str, Any]]:
+        async with semaphore:
+            try:
+                return source.path, await analyze(source)
+            except Exception as e:
+                return source.path, {"error": str(e), "issues": [], "metrics": {}}
+
+    return dict(await asyncio.gather(*(run(source) for source in files)))
+
+
+def aggregate_file_results(files: List[SourceFile], results: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+    """Codebase-level analysis assembled from per-file results"""
+    issues: List[Dict[str, Any]] = []
+    security_issues: List[Dict[str, Any]] = []
+    languages = set()
+    total_lines = 0
+    weighted_complexity = 0.0
+    weighted_maintainability = 0.0
+    measured_lines = 0
+    failed = []
+
+    for source in files:
+        result = results.get(source.path)
+        if result is None:
+            continue
+        if result.get("error"):
+            failed.append(source.path)
+        languages.add(source.language)
+        # Cached results are content-addressed, so the path is stamped per lookup
+        issues.extend({**issue, "file": source.path} for issue in result.get("issues", []))
+        security_issues.extend({**issue, "file": source.path} for issue in result.get("security_issues", []))
+
+        metrics = result.get("metrics", {})
+        lines = metrics.get("lines_of_code") or metrics.get("total_lines") or 0
+        total_lines += lines
+        if "complexity" in metrics or "maintainability" in metrics:
+            weight = max(lines, 1)
+            measured_lines += weight
+            weighted_complexity += metrics.get("complexity", 0) * weight
+            weighted_maintainability += metrics.get("maintainability", 0) * weight
+
+    return {
+        "status": "completed",
+        "files_analyzed": len(files) - len(failed),
+        "failed_files": failed,
+        "languages_detected": sorted(languages),
+        "metrics": {
+            "total_files": len(files),
+            "total_lines": total_lines,
+            "complexity_score": weighted_complexity / measured_lines if measured_lines else 0.0,
+            "maintainability_index": weighted_maintainability / measured_lines if measured_lines else 0.0
+        },
+        "issues": issues,
+        "security_issues": security_issues
+    }
+
+
+# Global analysis cache instance
+analysis_cache = AnalysisCache()
@@ -2,9 +2,14 @@
 Circuit Breaker implementation for enhanced error handling
 """
 import asyncio
+import json
+import os
+import re
 import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
 from enum import Enum
-from typing import Callable, Any, Optional, Dict
+from typing import Callable, Any, Optional, Dict, List
 from dataclasses import dataclass
 import structlog
 
@@ -21,10 +26,13 @@ class CircuitState(Enum):
 @dataclass
 class CircuitBreakerConfig:
     """Configuration for circuit breaker"""
-    failure_threshold: int = 5  # Number of failures before opening
+    failure_threshold: int = 5  # Failures within the window before opening
     recovery_timeout: int = 60  # Seconds before trying half-open
     success_threshold: int = 3  # Successes needed to close from half-open
     timeout: int = 30  # Request timeout in seconds
+    window_seconds: int = 60  # Sliding window for failure-rate accounting
+    failure_rate_threshold: float = 0.5  # Failure ratio within the window that opens the circuit
+    state_sync_interval: float = 1.0  # Seconds between reads of the shared state store
 
 
 class CircuitBreakerError(Exception):
@@ -32,30 +40,157 @@ class CircuitBreakerError(Exception):
     pass
 
 
+class SlidingWindow:
+    """Per-second bucketed success/failure counters over a fixed time window"""
+    
+    def __init__(self, window_seconds: int):
+        self.size = max(1, int(window_seconds))
+        self._epochs: List[int] = [-1] * self.size
+        self._successes: List[int] = [0] * self.size
+        self._failures: List[int] = [0] * self.size
+    
+    def record(self, success: bool, now: Optional[float] = None) -> None:
+        """Record an outcome in O(1)"""
+        second = int(now if now is not None else time.monotonic())
+        index = second % self.size
+        if self._epochs[index] != second:
+            self._epochs[index] = second
+            self._successes[index] = 0
+            self._failures[index] = 0
+        if success:
+            self._successes[index] += 1
+        else:
+            self._failures[index] += 1
+    
+    def totals(self, now: Optional[float] = None) -> Dict[str, int]:
+        """Get success and failure totals for buckets still inside the window"""
+        oldest = int(now if now is not None else time.monotonic()) - self.size
+        successes = failures = 0
+        for index, epoch in enumerate(self._epochs):
+            if epoch > oldest:
+                successes += self._successes[index]
+                failures += self._failures[index]
+        return {"successes": successes, "failures": failures}
+    
+    def reset(self) -> None:
+        """Drop all recorded outcomes"""
+        self._epochs = [-1] * self.size
+        self._successes = [0] * self.size
+        self._failures = [0] * self.size
+
+
+class BreakerStateStore(ABC):
+    """Store for sharing circuit breaker state between workers"""
+    
+    @abstractmethod
+    def load(self, name: str) -> Optional[Dict[str, Any]]:
+        """Load the last saved snapshot for a breaker"""
+        pass
+    
+    @abstractmethod
+    def save(self, name: str, snapshot: Dict[str, Any]) -> None:
+        """Persist a breaker's snapshot"""
+        pass
+
+
+class InMemoryBreakerStateStore(BreakerStateStore):
+    """Process-local state store"""
+    
+    def __init__(self):
+        self._states: Dict[str, Dict[str, Any]] = {}
+    
+    def load(self, name: str) -> Optional[Dict[str, Any]]:
+        return self._states.get(name)
+    
+    def save(self, name: str, snapshot: Dict[str, Any]) -> None:
+        self._states[name] = dict(snapshot)
+
+
+class FileBreakerStateStore(BreakerStateStore):
+    """Host-local state store shared by all workers through small JSON files"""
+    
+    def __init__(self, directory: str):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+    
+    def _path(self, name: str) -> str:
+        safe_name = re.sub(r"[^A-Za-z0-9_.-]", "_", name)
+        return os.path.join(self.directory, f"{safe_name}.json")
+    
+    def load(self, name: str) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self._path(name), "r") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+    
+    def save(self, name: str, snapshot: Dict[str, Any]) -> None:
+        path = self._path(name)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, "w") as f:
+                json.dump(snapshot, f)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning("Failed to persist circuit breaker state", name=name, error=str(e))
+
+
+_ID_SEGMENT = re.compile(
+    r"^(?:\d+"
+    r"|[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}"
+    r"|[0-9a-fA-F]{7,40}"
+    r"|(?=[^/]*\d)[\w.-]{4,})$"
+)
+
+
+def endpoint_template(endpoint: str) -> str:
+    """Collapse identifier path segments so breakers are keyed per endpoint, not per resource"""
+    path = endpoint.split("?", 1)[0]
+    segments = ["{id}" if _ID_SEGMENT.match(segment) else segment
+                for segment in path.split("/")]
+    return "/".join(segments)
+
+
 class CircuitBreaker:
     """Circuit breaker implementation for fault tolerance"""
     
-    def __init__(self, name: str, config: CircuitBreakerConfig):
+    def __init__(self,
+                 name: str,
+                 config: CircuitBreakerConfig,
+                 state_store: Optional[BreakerStateStore] = None):
         self.name = name
         self.config = config
         self.state = CircuitState.CLOSED
-        self.failure_count = 0
         self.success_count = 0
         self.last_failure_time = 0
+        self.state_changed_at = time.time()
+        self.window = SlidingWindow(config.window_seconds)
+        self.state_store = state_store
+        self._next_state_sync = 0.0
+        # Only taken for state transitions; CLOSED-state calls never touch it
         self.lock = asyncio.Lock()
         
         self.logger = logger.bind(circuit_breaker=name)
     
+    @property
+    def failure_count(self) -> int:
+        """Failures recorded within the sliding window"""
+        return self.window.totals()["failures"]
+    
     async def call(self, func: Callable, *args, **kwargs) -> Any:
         """Execute function with circuit breaker protection"""
-        async with self.lock:
-            if self.state == CircuitState.OPEN:
-                if self._should_attempt_reset():
-                    self.state = CircuitState.HALF_OPEN
-                    self.logger.info("Circuit breaker transitioning to half-open")
-                else:
-                    self.logger.warning("Circuit breaker is open, failing fast")
-                    raise CircuitBreakerError(f"Circuit breaker {self.name} is open")
+        if self.state_store is not None:
+            self._sync_from_store()
+        
+        if self.state != CircuitState.CLOSED:
+            async with self.lock:
+                if self.state == CircuitState.OPEN:
+                    if self._should_attempt_reset():
+                        self._transition(CircuitState.HALF_OPEN)
+                        self.logger.info("Circuit breaker transitioning to half-open")
+                    else:
+                        self.logger.warning("Circuit breaker is open, failing fast")
+                        raise CircuitBreakerError(f"Circuit breaker {self.name} is open")
         
         try:
             # Execute the function with timeout
@@ -63,59 +198,113 @@ class CircuitBreaker:
                 func(*args, **kwargs),
                 timeout=self.config.timeout
             )
-            
-            await self._on_success()
-            return result
-            
         except Exception as e:
             await self._on_failure(e)
             raise
+        
+        await self._on_success()
+        return result
     
     async def _on_success(self):
         """Handle successful execution"""
+        self.window.record(True)
+        if self.state == CircuitState.CLOSED:
+            return
+        
         async with self.lock:
             if self.state == CircuitState.HALF_OPEN:
                 self.success_count += 1
                 if self.success_count >= self.config.success_threshold:
-                    self.state = CircuitState.CLOSED
-                    self.failure_count = 0
-                    self.success_count = 0
+                    self._transition(CircuitState.CLOSED)
+                    self.window.reset()
                     self.logger.info("Circuit breaker closed after successful recovery")
-            elif self.state == CircuitState.CLOSED:
-                self.failure_count = 0  # Reset failure count on success
     
     async def _on_failure(self, exception: Exception):
         """Handle failed execution"""
-        async with self.lock:
-            self.failure_count += 1
-            self.last_failure_time = time.time()
-            
-            if self.state == CircuitState.HALF_OPEN:
-                self.state = CircuitState.OPEN
-                self.success_count = 0
-                self.logger.warning("Circuit breaker opened after failure in half-open state",
-                                  exception=str(exception))
-            elif (self.state == CircuitState.CLOSED and 
-                  self.failure_count >= self.config.failure_threshold):
-                self.state = CircuitState.OPEN
-                self.logger.warning("Circuit breaker opened due to failure threshold",
-                                  failure_count=self.failure_count,
-                                  exception=str(exception))
+        self.window.record(False)
+        self.last_failure_time = time.time()
+        
+        if self.state == CircuitState.HALF_OPEN:
+            async with self.lock:
+                if self.state == CircuitState.HALF_OPEN:
+                    self._transition(CircuitState.OPEN)
+                    self.logger.warning("Circuit breaker opened after failure in half-open state",
+                                      exception=str(exception))
+        elif self.state == CircuitState.CLOSED and self._failure_rate_exceeded():
+            async with self.lock:
+                if self.state == CircuitState.CLOSED:
+                    self._transition(CircuitState.OPEN)
+                    self.logger.warning("Circuit breaker opened due to failure rate",
+                                      failure_count=self.failure_count,
+                                      exception=str(exception))
+    
+    def _failure_rate_exceeded(self) -> bool:
+        """Check the sliding window against the failure count and rate thresholds"""
+        totals = self.window.totals()
+        failures = totals["failures"]
+        if failures < self.config.failure_threshold:
+            return False
+        return failures / (failures + totals["successes"]) >= self.config.failure_rate_threshold
     
     def _should_attempt_reset(self) -> bool:
         """Check if enough time has passed to attempt reset"""
         return (time.time() - self.last_failure_time) >= self.config.recovery_timeout
     
+    def _transition(self, state: CircuitState) -> None:
+        """Move to a new state and publish it to the shared store"""
+        self.state = state
+        self.success_count = 0
+        self.state_changed_at = time.time()
+        if self.state_store is not None:
+            self.state_store.save(self.name, {
+                "state": state.value,
+                "last_failure_time": self.last_failure_time,
+                "state_changed_at": self.state_changed_at
+            })
+    
+    def _sync_from_store(self) -> None:
+        """Adopt a newer state published by another worker, at most once per sync interval"""
+        now = time.monotonic()
+        if now < self._next_state_sync:
+            return
+        self._next_state_sync = now + self.config.state_sync_interval
+        
+        snapshot = self.state_store.load(self.name)
+        if not snapshot or snapshot.get("state_changed_at", 0) <= self.state_changed_at:
+            return
+        
+        try:
+            state = CircuitState(snapshot["state"])
+        except (KeyError, ValueError):
+            return
+        
+        self.state = state
+        self.success_count = 0
+        self.state_changed_at = snapshot["state_changed_at"]
+        self.last_failure_time = snapshot.get("last_failure_time", self.last_failure_time)
+        if state == CircuitState.CLOSED:
+            self.window.reset()
+        self.logger.info("Circuit breaker state adopted from shared store", state=state.value)
+    
+    def reset(self) -> None:
+        """Force the breaker closed and clear its window"""
+        self.window.reset()
+        self._transition(CircuitState.CLOSED)
+    
     def get_state(self) -> Dict[str, Any]:
         """Get current circuit breaker state"""
+        totals = self.window.totals()
         return {
             "name": self.name,
             "state": self.state.value,
-            "failure_count": self.failure_count,
+            "failure_count": totals["failures"],
+            "window_successes": totals["successes"],
             "success_count": self.success_count,
             "last_failure_time": self.last_failure_time,
             "config": {
                 "failure_threshold": self.config.failure_threshold,
+                "failure_rate_threshold": self.config.failure_rate_threshold,
+                "window_seconds": self.config.window_seconds,
                 "recovery_timeout": self.config.recovery_timeout,
                 "success_threshold": self.config.success_threshold,
                 "timeout": self.config.timeout
@@ -124,21 +313,49 @@ class CircuitBreaker:
 
 
 class CircuitBreakerManager:
-    """Manager for multiple circuit breakers"""
+    """Manager for a bounded set of circuit breakers"""
     
-    def __init__(self):
-        self.breakers: Dict[str, CircuitBreaker] = {}
+    def __init__(self,
+                 max_breakers: int = 256,
+                 state_store: Optional[BreakerStateStore] = None):
+        self.max_breakers = max_breakers
+        self.state_store = state_store
+        self.breakers: "OrderedDict[str, CircuitBreaker]" = OrderedDict()
         self.logger = logger.bind(component="circuit_breaker_manager")
     
     def get_breaker(self, name: str, config: Optional[CircuitBreakerConfig] = None) -> CircuitBreaker:
         """Get or create a circuit breaker"""
-        if name not in self.breakers:
-            if config is None:
-                config = CircuitBreakerConfig()
-            self.breakers[name] = CircuitBreaker(name, config)
-            self.logger.info("Created new circuit breaker", name=name)
+        breaker = self.breakers.get(name)
+        if breaker is not None:
+            self.breakers.move_to_end(name)
+            return breaker
+        
+        if config is None:
+            config = CircuitBreakerConfig()
+        breaker = CircuitBreaker(name, config, state_store=self.state_store)
+        self.breakers[name] = breaker
+        self.logger.info("Created new circuit breaker", name=name)
         
-        return self.breakers[name]
+        if len(self.breakers) > self.max_breakers:
+            self._evict_one(keep=name)
+        
+        return breaker
+    
+    def _evict_one(self, keep: str) -> None:
+        """Evict the least recently used breaker other than ``keep``, preferring closed ones"""
+        candidates = [name for name in self.breakers if name != keep]
+        victim = next(
+            (name for name in candidates if self.breakers[name].state == CircuitState.CLOSED),
+            candidates[0]
+        )
+        del self.breakers[victim]
+        self.logger.debug("Evicted circuit breaker", name=victim)
+    
+    def set_state_store(self, state_store: Optional[BreakerStateStore]) -> None:
+        """Share breaker state through the given store"""
+        self.state_store = state_store
+        for breaker in self.breakers.values():
+            breaker.state_store = state_store
     
     def get_all_states(self) -> Dict[str, Dict[str, Any]]:
         """Get states of all circuit breakers"""
@@ -149,9 +366,7 @@ class CircuitBreakerManager:
         if name in self.breakers:
             breaker = self.breakers[name]
             async with breaker.lock:
-                breaker.state = CircuitState.CLOSED
-                breaker.failure_count = 0
-                breaker.success_count = 0
+                breaker.reset()
                 self.logger.info("Circuit breaker manually reset", name=name)
 
 
@@ -4,12 +4,17 @@ Advanced connection pooling and performance optimization for HTTP clients
 import asyncio
 import aiohttp
 import time
-from typing import Dict, Optional, Any, List
+from typing import Deque, Dict, Optional, Any, List
 from dataclasses import dataclass, field
+from collections import deque
 from datetime import datetime, timedelta
 from enum import Enum
+from urllib.parse import urlsplit
 import structlog
 
+from backend.utils.latency_stats import LatencyTracker
+from backend.utils.metrics import pool_request_duration
+
 logger = structlog.get_logger(__name__)
 
 
@@ -32,6 +37,7 @@ class ConnectionPoolConfig:
     enable_cleanup_closed: bool = True
     cleanup_interval: float = 60.0
     max_idle_time: float = 300.0  # 5 minutes
+    latency_window: float = 300.0  # Seconds of history behind latency percentiles and means
     health_check_interval: float = 120.0  # 2 minutes
     retry_attempts: int = 3
     retry_delay: float = 1.0
@@ -47,7 +53,6 @@ class ConnectionMetrics:
     total_requests: int = 0
     successful_requests: int = 0
     failed_requests: int = 0
-    average_response_time: float = 0.0
     last_activity: datetime = field(default_factory=datetime.utcnow)
 
 
@@ -69,23 +74,23 @@ class RequestMetrics:
 class EnhancedConnectionPool:
     """Enhanced connection pool with monitoring and optimization"""
     
-    def __init__(self, config: ConnectionPoolConfig):
+    def __init__(self, config: ConnectionPoolConfig, name: str = "default"):
         self.config = config
+        self.name = name
         self.session: Optional[aiohttp.ClientSession] = None
         self.status = PoolStatus.CLOSED
         self.metrics = ConnectionMetrics()
-        self.request_history: List[RequestMetrics] = []
         self.max_history = 1000
+        self.request_history: Deque[RequestMetrics] = deque(maxlen=self.max_history)
         
         # Background tasks
         self.cleanup_task: Optional[asyncio.Task] = None
         self.health_check_task: Optional[asyncio.Task] = None
         
-        self.logger = logger.bind(component="connection_pool")
+        self.logger = logger.bind(component="connection_pool", pool=name)
         
-        # Performance tracking
-        self.response_times: List[float] = []
-        self.max_response_times = 100
+        # Rolling p50/p95/p99 per host and method, updated in O(1) per request
+        self.latency = LatencyTracker(window_seconds=config.latency_window)
     
     async def start(self):
         """Initialize and start the connection pool"""
@@ -156,6 +161,8 @@ class EnhancedConnectionPool:
         
         # Create request metrics
         request_metrics = RequestMetrics(start_time=time.time())
+        started = time.perf_counter()
+        outcome = "error"
         
         # Set timeout for this request
         if timeout:
@@ -174,21 +181,13 @@ class EnhancedConnectionPool:
             
             self.metrics.successful_requests += 1
             self.metrics.last_activity = datetime.utcnow()
-            
-            # Track response time
-            response_time = request_metrics.duration
-            self.response_times.append(response_time)
-            if len(self.response_times) > self.max_response_times:
-                self.response_times.pop(0)
-            
-            # Update average response time
-            self.metrics.average_response_time = sum(self.response_times) / len(self.response_times)
+            outcome = "success"
             
             self.logger.debug("Request completed successfully",
                             method=method,
                             url=url,
                             status_code=response.status,
-                            response_time=response_time)
+                            response_time=request_metrics.duration)
             
             return response
             
@@ -208,10 +207,14 @@ class EnhancedConnectionPool:
             raise
         
         finally:
-            # Store request metrics
+            elapsed = time.perf_counter() - started
+            host = urlsplit(url).hostname or "unknown"
+            method = method.upper()
+            pool_request_duration.labels(self.name, host, method, outcome).observe(elapsed)
+            self.latency.record(host, method, elapsed, error=outcome != "success")
+            
+            # Store request metrics; the deque drops the oldest entry itself
             self.request_history.append(request_metrics)
-            if len(self.request_history) > self.max_history:
-                self.request_history.pop(0)
     
     async def get(self, url: str, **kwargs) -> aiohttp.ClientResponse:
         """Make a GET request"""
@@ -249,18 +252,8 @@ class EnhancedConnectionPool:
         if self.metrics.total_requests > 0:
             success_rate = self.metrics.successful_requests / self.metrics.total_requests
         
-        # Recent performance metrics
-        recent_requests = self.request_history[-50:] if len(self.request_history) >= 50 else self.request_history
-        recent_success_rate = 0.0
-        recent_avg_time = 0.0
-        
-        if recent_requests:
-            successful_recent = sum(1 for r in recent_requests if r.error is None)
-            recent_success_rate = successful_recent / len(recent_requests)
-            
-            completed_recent = [r for r in recent_requests if r.end_time is not None]
-            if completed_recent:
-                recent_avg_time = sum(r.duration for r in completed_recent) / len(completed_recent)
+        latency = self.latency.snapshot()
+        recent = self.latency.recent
         
         return {
             "status": self.status.value,
@@ -276,13 +269,15 @@ class EnhancedConnectionPool:
                 "successful_requests": self.metrics.successful_requests,
                 "failed_requests": self.metrics.failed_requests,
                 "success_rate": success_rate,
-                "average_response_time": self.metrics.average_response_time
+                # Successful requests only, over the latency window
+                "average_response_time": latency["overall"]["success_mean"]
             },
             "recent_performance": {
-                "recent_success_rate": recent_success_rate,
-                "recent_average_time": recent_avg_time,
-                "sample_size": len(recent_requests)
+                "recent_success_rate": recent.success_rate,
+                "recent_average_time": recent.average,
+                "sample_size": len(recent)
             },
+            "latency": latency,
             "last_activity": self.metrics.last_activity.isoformat()
         }
     
@@ -361,20 +356,13 @@ class EnhancedConnectionPool:
         """Background task for connection cleanup"""
         while self.status != PoolStatus.CLOSED:
             try:
-                # Clean up old request history
+                # Drop request history older than the idle window
                 cutoff_time = time.time() - self.config.max_idle_time
-                self.request_history = [
-                    r for r in self.request_history 
-                    if r.start_time > cutoff_time
-                ]
-                
-                # Clean up old response times
-                if len(self.response_times) > self.max_response_times:
-                    self.response_times = self.response_times[-self.max_response_times:]
+                while self.request_history and self.request_history[0].start_time <= cutoff_time:
+                    self.request_history.popleft()
                 
                 self.logger.debug("Connection pool cleanup completed",
-                                request_history_size=len(self.request_history),
-                                response_times_size=len(self.response_times))
+                                request_history_size=len(self.request_history))
                 
             except Exception as e:
                 self.logger.error("Error in cleanup loop", error=str(e))
@@ -424,7 +412,7 @@ class ConnectionPoolManager:
             if config is None:
                 config = ConnectionPoolConfig()
             
-            pool = EnhancedConnectionPool(config)
+            pool = EnhancedConnectionPool(config, name=name)
             await pool.start()
             
             self.pools[name] = pool
@@ -0,0 +1,289 @@
+"""
+Diff-scoped static analysis helpers
+
+A pull request is analyzed as the files it changes plus their direct
+dependents, on both the base and the head side, and the two issue sets are
+compared so the result lists the issues the change introduced or resolved.
+"""
+import posixpath
+import re
+import subprocess
+from collections import Counter
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from backend.utils.analysis_cache import (
+    SourceFile,
+    aggregate_file_results,
+    select_source_files
+)
+
+TreeEntry = Tuple[str, str, Optional[int]]
+
+GIT_STATUSES = {"A": "added", "M": "modified", "D": "removed", "R": "renamed", "C": "added", "T": "modified"}
+
+_PYTHON_IMPORT = re.compile(r"^\s*(?:from\s+(\.*[\w.]*)\s+import\b|import\s+([\w.]+(?:\s*,\s*[\w.]+)*))", re.M)
+_JS_IMPORT = re.compile(
+    r"""(?:\bfrom\s*|\bimport\s*\(?\s*|\brequire\(\s*|^\s*import\s+)['"]([^'"]+)['"]""", re.M
+)
+_JS_EXTENSIONS = ["", ".ts", ".tsx", ".js", ".jsx", ".mjs", ".cjs",
+                  "/index.ts", "/index.tsx", "/index.js", "/index.jsx"]
+
+
+@dataclass(frozen=True)
+class ChangedFile:
+    """A file touched by a change; ``previous_path`` is set for renames"""
+    path: str
+    status: str  # added, modified, removed, renamed
+    previous_path: Optional[str] = None
+
+    @property
+    def base_path(self) -> Optional[str]:
+        """Where the file lived on the base side, None if it is new"""
+        if self.status == "added":
+            return None
+        return self.previous_path or self.path
+
+    @property
+    def head_path(self) -> Optional[str]:
+        return None if self.status == "removed" else self.path
+
+
+def changed_files_from_pull_request(files: Iterable[Dict[str, Any]]) -> List[ChangedFile]:
+    """Changed files from GitHub's pull request files or compare payloads"""
+    changes = []
+    for entry in files:
+        status = entry.get("status", "modified")
+        if status not in ("added", "removed", "renamed"):
+            status = "modified"  # changed, copied, unchanged
+        changes.append(ChangedFile(entry["filename"], status, entry.get("previous_filename")))
+    return changes
+
+
+def _git(root: str, *args: str) -> str:
+    return subprocess.run(["git", "-C", root, *args], capture_output=True, check=True).stdout.decode(
+        "utf-8", "surrogateescape"
+    )
+
+
+def git_changed_files(root: str, base: str, head: Optional[str] = None) -> List[ChangedFile]:
+    """Files changed between ``base`` and ``head`` (or the worktree). Blocking."""
+    output = _git(root, "diff", "--name-status", "-M", "-z", base, *([head] if head else []))
+    fields = [field for field in output.split("\0") if field]
+    changes = []
+    i = 0
+    while i < len(fields):
+        code = fields[i][0]
+        if code in ("R", "C"):
+            old, new = fields[i + 1], fields[i + 2]
+            changes.append(ChangedFile(new, GIT_STATUSES[code], old if code == "R" else None))
+            i += 3
+        else:
+            changes.append(ChangedFile(fields[i + 1], GIT_STATUSES.get(code, "modified")))
+            i += 2
+    return changes
+
+
+def list_tree(root: str, ref: str) -> List[TreeEntry]:
+    """``(path, blob_sha, size)`` for every file in a commit. Blocking."""
+    entries = []
+    for line in _git(root, "ls-tree", "-r", "-l", "-z", ref).split("\0"):
+        if not line:
+            continue
+        meta, path = line.split("\t", 1)
+        _, kind, blob_sha, size = meta.split()
+        if kind == "blob":
+            entries.append((path, blob_sha, int(size)))
+    return entries
+
+
+def read_blob(root: str, blob_sha: str) -> bytes:
+    return subprocess.run(["git", "-C", root, "cat-file", "blob", blob_sha],
+                          capture_output=True, check=True).stdout
+
+
+def changes_from_paths(paths: Iterable[str],
+                       head_entries: Iterable[TreeEntry],
+                       base_entries: Iterable[TreeEntry]) -> List[ChangedFile]:
+    """Classify an explicit changed-file list by where each path exists"""
+    head_paths = {path for path, _, _ in head_entries}
+    base_paths = {path for path, _, _ in base_entries}
+    changes = []
+    for path in paths:
+        if path not in base_paths:
+            changes.append(ChangedFile(path, "added"))
+        elif path not in head_paths:
+            changes.append(ChangedFile(path, "removed"))
+        else:
+            changes.append(ChangedFile(path, "modified"))
+    return changes
+
+
+def scope_files(changes: List[ChangedFile],
+                head_entries: Iterable[TreeEntry],
+                base_entries: Iterable[TreeEntry],
+                languages: Optional[Iterable[str]] = None,
+                max_file_size: Optional[int] = None) -> Tuple[List[SourceFile], List[SourceFile]]:
+    """Source files to analyze on the head and base side of a change"""
+    head_index = {path: (sha, size) for path, sha, size in head_entries}
+    base_index = {path: (sha, size) for path, sha, size in base_entries}
+    head = [(c.head_path, *head_index[c.head_path]) for c in changes if c.head_path in head_index]
+    base = [(c.base_path, *base_index[c.base_path]) for c in changes if c.base_path in base_index]
+    return (select_source_files(head, languages, max_file_size),
+            select_source_files(base, languages, max_file_size))
+
+
+def extract_imports(path: str, text: str) -> List[str]:
+    """Raw import specifiers of a Python or JavaScript/TypeScript source file"""
+    if path.endswith(".py"):
+        specs = []
+        for relative, absolute in _PYTHON_IMPORT.findall(text):
+            if relative:
+                specs.append(relative)
+            else:
+                specs.extend(name.strip() for name in absolute.split(","))
+        return specs
+    return _JS_IMPORT.findall(text)
+
+
+def resolve_import(importer: str, spec: str, paths: Set[str]) -> Optional[str]:
+    """Repository path an import refers to, if it is a file in ``paths``"""
+    directory = posixpath.dirname(importer)
+    if importer.endswith(".py"):
+        dots = len(spec) - len(spec.lstrip("."))
+        module = spec[dots:].replace(".", "/")
+        if dots:
+            base = posixpath.normpath(posixpath.join(directory or ".", *[".."] * (dots - 1)))
+            bases = ["" if base == "." else base]
+        else:
+            # Absolute imports may be rooted at the repository or any ancestor package
+            parts = directory.split("/") if directory else []
+            bases = ["/".join(parts[:i]) for i in range(len(parts), -1, -1)]
+        for base in bases:
+            stem = posixpath.join(base, module) if base and module else (base or module)
+            for candidate in (f"{stem}.py", posixpath.join(stem, "__init__.py")):
+                if candidate in paths:
+                    return candidate
+        return None
+
+    if not spec.startswith("."):
+        return None  # Package import
+    stem = posixpath.normpath(posixpath.join(directory, spec))
+    for suffix in _JS_EXTENSIONS:
+        if stem + suffix in paths:
+            return stem + suffix
+    return None
+
+
+def dependents_from_imports(imports: Dict[str, List[str]], targets: Set[str]) -> Set[str]:
+    """Files whose imports resolve to one of ``targets``"""
+    paths = set(imports) | targets
+    return {
+        importer for importer, specs in imports.items()
+        if importer not in targets and any(resolve_import(importer, spec, paths) in targets for spec in specs)
+    }
+
+
+def dependents_from_graph(graph: Dict[str, Any], targets: Set[str]) -> Set[str]:
+    """Direct dependents of ``targets`` in a Graph-Sitter node/edge dependency graph"""
+    files = {node.get("id"): node.get("file") for node in graph.get("nodes", [])}
+    dependents = set()
+    for edge in graph.get("edges", []):
+        importer, imported = files.get(edge.get("from")), files.get(edge.get("to"))
+        if imported in targets and importer and importer not in targets:
+            dependents.add(importer)
+    return dependents
+
+
+def base_versions(files: List[SourceFile], base_entries: Iterable[TreeEntry]) -> List[SourceFile]:
+    """``files`` as they are on the base side; files that did not exist there are dropped"""
+    base_index = {path: (sha, size) for path, sha, size in base_entries}
+    return [SourceFile(source.path, base_index[source.path][0], source.language, base_index[source.path][1])
+            for source in files if source.path in base_index]
+
+
+def issue_key(issue: Dict[str, Any]) -> Tuple[Any, ...]:
+    """Identity of an issue that survives unrelated edits shifting its line number"""
+    return (issue.get("file"), issue.get("rule") or issue.get("type"), issue.get("message"))
+
+
+def diff_issues(base_issues: List[Dict[str, Any]],
+                head_issues: List[Dict[str, Any]],
+                renames: Optional[Dict[str, str]] = None) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """Issues introduced by and resolved by a change.
+
+    Issues are matched by file, rule and message (not line), counting
+    duplicates, with base paths mapped through ``renames``.
+    """
+    renames = renames or {}
+
+    def base_key(issue: Dict[str, Any]) -> Tuple[Any, ...]:
+        key = issue_key(issue)
+        return (renames.get(key[0], key[0]),) + key[1:]
+
+    remaining = Counter(base_key(issue) for issue in base_issues)
+    introduced = []
+    for issue in head_issues:
+        key = issue_key(issue)
+        if remaining[key]:
+            remaining[key] -= 1
+        else:
+            introduced.append(issue)
+
+    unmatched = Counter(issue_key(issue) for issue in head_issues)
+    resolved = []
+    for issue in base_issues:
+        key = base_key(issue)
+        if unmatched[key]:
+            unmatched[key] -= 1
+        else:
+            resolved.append(issue)
+    return introduced, resolved
+
+
+def build_diff_report(changes: List[ChangedFile],
+                      head_files: List[SourceFile],
+                      base_files: List[SourceFile],
+                      dependent_files: List[SourceFile],
+                      dependent_base_files: List[SourceFile],
+                      head_results: Dict[str, Dict[str, Any]],
+                      base_results: Dict[str, Dict[str, Any]],
+                      dependent_results: Dict[str, Dict[str, Any]],
+                      dependent_base_results: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+    """Diff-scoped analysis result from per-file results on both sides.
+
+    Dependents are analyzed next to the head and next to the base versions of
+    the changed files, so issues the change causes in files it did not touch
+    show up as introduced or resolved.
+    """
+    head = aggregate_file_results(head_files + dependent_files, {**head_results, **dependent_results})
+    base = aggregate_file_results(base_files + dependent_base_files, {**base_results, **dependent_base_results})
+    renames = {c.previous_path: c.path for c in changes if c.status == "renamed" and c.previous_path}
+
+    introduced, resolved = diff_issues(base["issues"], head["issues"], renames)
+    introduced_security, resolved_security = diff_issues(base["security_issues"], head["security_issues"], renames)
+
+    return {
+        "status": "completed",
+        "mode": "diff",
+        "changed_files": [asdict(change) for change in changes],
+        "dependents": sorted(source.path for source in dependent_files),
+        "files_analyzed": head["files_analyzed"],
+        "failed_files": head["failed_files"] + base["failed_files"],
+        "languages_detected": head["languages_detected"],
+        "metrics": head["metrics"],
+        "issues": head["issues"],
+        "security_issues": head["security_issues"],
+        "introduced_issues": introduced,
+        "resolved_issues": resolved,
+        "introduced_security_issues": introduced_security,
+        "resolved_security_issues": resolved_security,
+        "summary": {
+            "changed_files": len(changes),
+            "dependents": len(dependent_files),
+            "introduced_issues": len(introduced),
+            "resolved_issues": len(resolved),
+            "introduced_security_issues": len(introduced_security),
+            "resolved_security_issues": len(resolved_security)
+        }
+    }
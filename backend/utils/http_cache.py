@@ -0,0 +1,115 @@
+"""
+Bounded cache of validators and bodies for conditional HTTP GET requests
+"""
+import hashlib
+import json
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Dict, Optional
+import structlog
+
+logger = structlog.get_logger(__name__)
+
+
+@dataclass
+class CachedResponse:
+    """A response body together with the validators needed to revalidate it"""
+    body: str
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    link: Optional[str] = None  # Pagination header, not always repeated on 304
+    stored_at: float = field(default_factory=time.time)
+
+    def data(self) -> Any:
+        """Decode a fresh copy of the body so callers never share mutable state"""
+        return json.loads(self.body) if self.body else {}
+
+
+class ConditionalRequestCache:
+    """LRU cache keyed by URL, query and caller identity"""
+
+    def __init__(self, name: str, max_entries: int = 1024):
+        self.name = name
+        self.max_entries = max_entries
+        self.entries: "OrderedDict[str, CachedResponse]" = OrderedDict()
+        self.stats = {
+            "revalidated": 0,
+            "stored": 0,
+            "misses": 0,
+            "evictions": 0
+        }
+
+    @staticmethod
+    def make_key(url: str,
+                 params: Optional[Dict[str, Any]],
+                 identity: Optional[str]) -> str:
+        """Build a cache key; identity (e.g. the auth header) keeps tokens apart"""
+        query = json.dumps(params or {}, sort_keys=True, default=str)
+        owner = hashlib.sha256((identity or "").encode()).hexdigest()[:16]
+        return f"{owner}:{url}?{query}"
+
+    def get(self, key: str) -> Optional[CachedResponse]:
+        entry = self.entries.get(key)
+        if entry is None:
+            self.stats["misses"] += 1
+            return None
+        self.entries.move_to_end(key)
+        return entry
+
+    def conditional_headers(self, entry: CachedResponse) -> Dict[str, str]:
+        """Headers that ask the server to answer 304 if the entry is still current"""
+        headers = {}
+        if entry.etag:
+            headers["If-None-Match"] = entry.etag
+        if entry.last_modified:
+            headers["If-Modified-Since"] = entry.last_modified
+        return headers
+
+    def store(self, key: str, body: str, headers: Dict[str, str]) -> None:
+        """Store a 200 response if the server sent validators for it"""
+        etag = headers.get("ETag") or headers.get("etag")
+        last_modified = headers.get("Last-Modified") or headers.get("last-modified")
+        if not etag and not last_modified:
+            return
+
+        self.entries[key] = CachedResponse(body=body,
+                                           etag=etag,
+                                           last_modified=last_modified,
+                                           link=headers.get("Link") or headers.get("link"))
+        self.entries.move_to_end(key)
+        self.stats["stored"] += 1
+
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+            self.stats["evictions"] += 1
+
+    def record_revalidated(self, entry: CachedResponse) -> None:
+        """Note a 304 served from the cache"""
+        entry.stored_at = time.time()
+        self.stats["revalidated"] += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {"entries": len(self.entries), "max_entries": self.max_entries, **self.stats}
+
+
+class ConditionalCacheRegistry:
+    """Process-wide conditional request caches, one per upstream"""
+
+    def __init__(self, max_entries: int = 1024):
+        self.max_entries = max_entries
+        self.caches: Dict[str, ConditionalRequestCache] = {}
+
+    def get(self, upstream: str) -> ConditionalRequestCache:
+        cache = self.caches.get(upstream)
+        if cache is None:
+            cache = ConditionalRequestCache(upstream, max_entries=self.max_entries)
+            self.caches[upstream] = cache
+        return cache
+
+    def get_all_stats(self) -> Dict[str, Dict[str, Any]]:
+        return {name: cache.get_stats() for name, cache in self.caches.items()}
+
+
+# Global conditional cache registry instance
+conditional_caches = ConditionalCacheRegistry()
@@ -0,0 +1,202 @@
+"""
+Constant-time rolling latency statistics
+
+Latencies are counted into log-spaced buckets (HDR-histogram style), so
+recording a sample is O(1) and quantiles carry a bounded relative error.
+Buckets are kept per time slice and slices rotate out, giving a rolling window
+without storing individual samples.
+"""
+import math
+import time
+from typing import Dict, List, Optional
+
+
+class LatencyHistogram:
+    """Log-bucketed latency layout shared by every rolling window"""
+
+    def __init__(self, min_seconds: float = 0.0001, max_seconds: float = 600.0, growth: float = 1.05):
+        self.min_seconds = min_seconds
+        self.growth = growth
+        self._log_growth = math.log(growth)
+        # Bucket 0 holds everything at or below min_seconds, the last bucket everything above max
+        self.bucket_count = int(math.ceil(math.log(max_seconds / min_seconds) / self._log_growth)) + 2
+
+    def bucket(self, seconds: float) -> int:
+        if seconds <= self.min_seconds:
+            return 0
+        index = int(math.log(seconds / self.min_seconds) / self._log_growth) + 1
+        return index if index < self.bucket_count else self.bucket_count - 1
+
+    def value(self, bucket: int) -> float:
+        """Representative latency of a bucket (its geometric midpoint)"""
+        if bucket == 0:
+            return self.min_seconds
+        return self.min_seconds * self.growth ** (bucket - 0.5)
+
+
+DEFAULT_HISTOGRAM = LatencyHistogram()
+
+
+class RollingLatency:
+    """Latency distribution over a rolling window of time slices.
+
+    Each slice is reset the first time it is reused after rotating out,
+    mirroring the epoch-indexed sliding window used by the circuit breaker.
+    """
+
+    def __init__(self,
+                 window_seconds: float = 300.0,
+                 slices: int = 10,
+                 histogram: LatencyHistogram = DEFAULT_HISTOGRAM):
+        self.histogram = histogram
+        self.slices = max(1, slices)
+        self.slice_seconds = window_seconds / self.slices
+        self._epochs = [-1] * self.slices
+        self._buckets: List[Optional[List[int]]] = [None] * self.slices
+        self._counts = [0] * self.slices
+        self._errors = [0] * self.slices
+        self._sums = [0.0] * self.slices
+        self._error_sums = [0.0] * self.slices
+        self._maxima = [0.0] * self.slices
+
+    def record(self, seconds: float, error: bool = False, now: Optional[float] = None) -> None:
+        epoch = int((time.monotonic() if now is None else now) / self.slice_seconds)
+        index = epoch % self.slices
+        buckets = self._buckets[index]
+        if self._epochs[index] != epoch:
+            if buckets is None:
+                buckets = self._buckets[index] = [0] * self.histogram.bucket_count
+            else:
+                buckets[:] = [0] * self.histogram.bucket_count
+            self._epochs[index] = epoch
+            self._counts[index] = 0
+            self._errors[index] = 0
+            self._sums[index] = 0.0
+            self._error_sums[index] = 0.0
+            self._maxima[index] = 0.0
+        buckets[self.histogram.bucket(seconds)] += 1
+        self._counts[index] += 1
+        self._sums[index] += seconds
+        if error:
+            self._errors[index] += 1
+            self._error_sums[index] += seconds
+        if seconds > self._maxima[index]:
+            self._maxima[index] = seconds
+
+    def _live(self, now: Optional[float]) -> List[int]:
+        epoch = int((time.monotonic() if now is None else now) / self.slice_seconds)
+        return [i for i in range(self.slices) if max(epoch - self.slices, -1) < self._epochs[i] <= epoch]
+
+    def snapshot(self, now: Optional[float] = None) -> Dict[str, float]:
+        """Count, error rate, mean (overall and of successes), max and p50/p95/p99 over the window"""
+        live = self._live(now)
+        count = sum(self._counts[i] for i in live)
+        if count == 0:
+            return {"count": 0, "error_rate": 0.0, "mean": 0.0, "success_mean": 0.0, "max": 0.0,
+                    "p50": 0.0, "p95": 0.0, "p99": 0.0}
+
+        merged = [0] * self.histogram.bucket_count
+        for i in live:
+            for bucket, hits in enumerate(self._buckets[i]):
+                if hits:
+                    merged[bucket] += hits
+
+        targets = [("p50", 0.50), ("p95", 0.95), ("p99", 0.99)]
+        quantiles: Dict[str, float] = {}
+        cumulative = 0
+        for bucket, hits in enumerate(merged):
+            cumulative += hits
+            while targets and cumulative >= targets[0][1] * count:
+                quantiles[targets.pop(0)[0]] = self.histogram.value(bucket)
+            if not targets:
+                break
+
+        errors = sum(self._errors[i] for i in live)
+        total = sum(self._sums[i] for i in live)
+        successes = count - errors
+        return {
+            "count": count,
+            "error_rate": errors / count,
+            "mean": total / count,
+            "success_mean": (total - sum(self._error_sums[i] for i in live)) / successes if successes else 0.0,
+            "max": max(self._maxima[i] for i in live),
+            **quantiles
+        }
+
+
+class RecentWindow:
+    """Fixed-size ring of the most recent requests with running totals"""
+
+    def __init__(self, size: int = 50):
+        self.size = size
+        self._durations = [0.0] * size
+        self._errors = [False] * size
+        self._next = 0
+        self._filled = 0
+        self._duration_sum = 0.0
+        self._error_count = 0
+
+    def add(self, seconds: float, error: bool) -> None:
+        index = self._next
+        if self._filled == self.size:
+            self._duration_sum -= self._durations[index]
+            self._error_count -= self._errors[index]
+        else:
+            self._filled += 1
+        self._durations[index] = seconds
+        self._errors[index] = error
+        self._duration_sum += seconds
+        self._error_count += error
+        self._next = (index + 1) % self.size
+
+    def __len__(self) -> int:
+        return self._filled
+
+    @property
+    def success_rate(self) -> float:
+        return (self._filled - self._error_count) / self._filled if self._filled else 0.0
+
+    @property
+    def average(self) -> float:
+        return self._duration_sum / self._filled if self._filled else 0.0
+
+
+class LatencyTracker:
+    """Rolling latency per host and per method, plus overall and recent views"""
+
+    def __init__(self, window_seconds: float = 300.0, slices: int = 10,
+                 recent_size: int = 50, max_keys: int = 128):
+        self.window_seconds = window_seconds
+        self.slices = slices
+        self.max_keys = max_keys
+        self.overall = RollingLatency(window_seconds, slices)
+        self.by_host: Dict[str, RollingLatency] = {}
+        self.by_method: Dict[str, RollingLatency] = {}
+        self.recent = RecentWindow(recent_size)
+
+    def _series(self, table: Dict[str, RollingLatency], key: str) -> RollingLatency:
+        series = table.get(key)
+        if series is None:
+            # Fold unbounded key sets (e.g. many ad-hoc hosts) into one series
+            if len(table) >= self.max_keys:
+                key = "other"
+                series = table.get(key)
+            if series is None:
+                series = table[key] = RollingLatency(self.window_seconds, self.slices)
+        return series
+
+    def record(self, host: str, method: str, seconds: float, error: bool = False) -> None:
+        now = time.monotonic()
+        self.overall.record(seconds, error, now)
+        self._series(self.by_host, host).record(seconds, error, now)
+        self._series(self.by_method, method).record(seconds, error, now)
+        self.recent.add(seconds, error)
+
+    def snapshot(self) -> Dict[str, object]:
+        now = time.monotonic()
+        return {
+            "window_seconds": self.window_seconds,
+            "overall": self.overall.snapshot(now),
+            "by_host": {host: series.snapshot(now) for host, series in self.by_host.items()},
+            "by_method": {method: series.snapshot(now) for method, series in self.by_method.items()}
+        }
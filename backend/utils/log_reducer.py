@@ -0,0 +1,237 @@
+"""
+Streaming reduction of build and deployment logs for LLM prompts
+
+Logs are read line by line in bounded memory. Runs of repeated lines are
+collapsed, each command keeps only its first and last lines, and error lines
+and stack traces are extracted by a precompiled pattern set. The rendered
+summary is trimmed to a token budget, so prompt size does not grow with the
+log.
+"""
+import re
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Deque, Dict, Iterable, Iterator, List, Optional, Union
+
+# Characters per token for English and log text; errs towards overestimating tokens
+CHARS_PER_TOKEN = 3.5
+
+ERROR_PATTERN = re.compile(
+    r"(?:\berror\b|\berr!|\bfatal\b|\bexception\b|\bfailed\b|\bfailure\b|\bpanic(?:ked)?\b"
+    r"|\bcannot\b|\bcould not\b|\bunable to\b|\bnot found\b|\bpermission denied\b|\brefused\b"
+    r"|\btimed? ?out\b|\bsegmentation fault\b|\bkilled\b|\bout of memory\b|\bexit(?:ed)? (?:with )?code [1-9]"
+    # Exception class names, TypeScript codes and errno names are case-sensitive
+    r"|(?-i:\b[A-Z]\w*(?:Error|Exception)\b|\bTS\d{4}\b|\bE[A-Z]{3,}\b))",
+    re.IGNORECASE
+)
+TRACE_START_PATTERN = re.compile(r"^(?:Traceback \(most recent call last\):|goroutine \d+ \[|thread '.+' panicked)")
+TRACE_FRAME_PATTERN = re.compile(r"^(?:\s+at\s|\s+File \"|\s{2,}\S|\t\S|Caused by:)")
+COMMAND_PATTERN = re.compile(r"^\s*(?:\$|\+|>)\s+\S")
+# Volatile tokens stripped before comparing lines: timestamps, durations, hex ids, numbers
+_VOLATILE = re.compile(
+    r"\d{4}-\d\d-\d\d[T ][\d:.,]+Z?|\b0x[0-9a-f]+\b|\b(?=[a-f]*\d)[0-9a-f]{7,}\b|\d+(?:\.\d+)*",
+    re.IGNORECASE
+)
+_ANSI = re.compile(r"\x1b\[[0-9;?]*[A-Za-z]")
+
+MAX_LINE_CHARS = 500
+
+
+def estimate_tokens(text: str) -> int:
+    return int(len(text) / CHARS_PER_TOKEN) + 1
+
+
+def signature(line: str) -> str:
+    """Line with volatile tokens masked, so recurring messages compare equal"""
+    return _VOLATILE.sub("#", line.strip().lower())
+
+
+@dataclass
+class _Section:
+    """First and last lines of one command's output"""
+    command: str
+    head: List[str] = field(default_factory=list)
+    tail: Deque[str] = field(default_factory=deque)
+    lines: int = 0
+
+
+class LogReducer:
+    """Reduces a log fed line by line to a bounded summary"""
+
+    def __init__(self,
+                 head_lines: int = 20,
+                 tail_lines: int = 40,
+                 max_signatures: int = 50,
+                 max_traces: int = 5,
+                 max_trace_lines: int = 40):
+        self.head_lines = head_lines
+        self.tail_lines = tail_lines
+        self.max_signatures = max_signatures
+        self.max_traces = max_traces
+        self.max_trace_lines = max_trace_lines
+        self.sections: List[_Section] = [_Section(command="")]
+        self.errors: Dict[str, List] = {}  # signature -> [first line, count]
+        self.traces: List[List[str]] = []
+        self._trace_signatures = set()
+        self._trace: Optional[List[str]] = None
+        self._last_signature: Optional[str] = None
+        self._last_line: Optional[str] = None
+        self._repeats = 0
+        self.total_lines = 0
+        self.collapsed_lines = 0
+
+    def feed(self, line: str) -> None:
+        line = _ANSI.sub("", line.rstrip("\r\n"))
+        if len(line) > MAX_LINE_CHARS:
+            line = line[:MAX_LINE_CHARS] + " …"
+        self.total_lines += 1
+
+        self._track_trace(line)
+
+        line_signature = signature(line)
+        if line_signature == self._last_signature:
+            self._repeats += 1
+            self.collapsed_lines += 1
+            return
+        self._flush_repeats()
+        self._last_signature = line_signature
+        self._last_line = line
+
+        if COMMAND_PATTERN.match(line):
+            self.sections.append(_Section(command=line.strip()))
+            return
+
+        if line.strip() and ERROR_PATTERN.search(line):
+            entry = self.errors.get(line_signature)
+            if entry is not None:
+                entry[1] += 1
+            elif len(self.errors) < self.max_signatures:
+                self.errors[line_signature] = [line.strip(), 1]
+
+        self._append(line)
+
+    def feed_text(self, text: Union[str, Iterable[str]]) -> "LogReducer":
+        lines = text.splitlines() if isinstance(text, str) else text
+        for line in lines:
+            self.feed(line)
+        return self
+
+    def _append(self, line: str) -> None:
+        section = self.sections[-1]
+        section.lines += 1
+        if len(section.head) < self.head_lines:
+            section.head.append(line)
+        else:
+            section.tail.append(line)
+            if len(section.tail) > self.tail_lines:
+                section.tail.popleft()
+
+    def _flush_repeats(self) -> None:
+        if self._repeats:
+            self._append(f"    … previous line repeated {self._repeats} more times")
+            self._repeats = 0
+
+    def _track_trace(self, line: str) -> None:
+        if self._trace is not None:
+            if TRACE_FRAME_PATTERN.match(line) or not line.strip():
+                if len(self._trace) < self.max_trace_lines:
+                    self._trace.append(line)
+                return
+            # The first unindented line ends the trace (Python puts the exception there)
+            self._trace.append(line)
+            self._finish_trace()
+            return
+        if TRACE_START_PATTERN.match(line):
+            self._trace = [line]
+        elif TRACE_FRAME_PATTERN.match(line) and line.lstrip().startswith("at ") and self._last_line:
+            # JavaScript/Java traces start with the error line preceding the first frame
+            self._trace = [self._last_line, line]
+
+    def _finish_trace(self) -> None:
+        trace, self._trace = self._trace, None
+        key = signature("\n".join(trace))
+        if key not in self._trace_signatures and len(self.traces) < self.max_traces:
+            self._trace_signatures.add(key)
+            self.traces.append(trace)
+
+    def _finish(self) -> None:
+        self._flush_repeats()
+        if self._trace is not None:
+            self._finish_trace()
+
+    def _render(self, head_lines: int, tail_lines: int, max_errors: int, max_traces: int) -> str:
+        parts = [f"[Log reduced from {self.total_lines} lines; {self.collapsed_lines} repeated lines collapsed]"]
+
+        if self.errors and max_errors:
+            ranked = sorted(self.errors.values(), key=lambda entry: -entry[1])[:max_errors]
+            parts.append("Error signatures (count × first occurrence):")
+            parts.extend(f"  {count} × {line}" for line, count in ranked)
+
+        for trace in self.traces[:max_traces]:
+            parts.append("Stack trace:")
+            parts.extend(trace)
+
+        for section in self.sections:
+            if not section.lines and not section.command:
+                continue
+            parts.append(section.command or "(output)")
+            kept = list(section.head[:head_lines])
+            tail = list(section.tail)[-tail_lines:] if tail_lines else []
+            omitted = section.lines - len(kept) - len(tail)
+            parts.extend(kept)
+            if omitted > 0:
+                parts.append(f"    … {omitted} lines omitted …")
+            parts.extend(tail)
+
+        return "\n".join(parts)
+
+    def render(self, token_budget: int = 4000) -> str:
+        """Summary within ``token_budget``, shrinking the least useful parts first"""
+        self._finish()
+        head, tail = self.head_lines, self.tail_lines
+        errors, traces = self.max_signatures, self.max_traces
+        text = self._render(head, tail, errors, traces)
+        # Command context goes first, then traces, then the rarest error signatures
+        while estimate_tokens(text) > token_budget and (head or tail or traces > 1 or errors > 5):
+            if head or tail:
+                head, tail = head // 2, tail // 2
+            elif traces > 1:
+                traces -= 1
+            else:
+                errors = max(5, errors // 2)
+            text = self._render(head, tail, errors, traces)
+
+        limit = int(token_budget * CHARS_PER_TOKEN)
+        if len(text) > limit:
+            text = text[:limit] + "\n[… truncated to fit token budget]"
+        return text
+
+
+def summarize_log(text: Union[str, Iterable[str]], token_budget: int = 4000, **options) -> str:
+    """Reduce a log to at most ``token_budget`` tokens"""
+    return LogReducer(**options).feed_text(text).render(token_budget)
+
+
+def log_lines(entries: Iterable[Any], prefix: str = "") -> Iterator[str]:
+    """Structured log entries as text lines; multi-line strings (command output) are split"""
+    for entry in entries:
+        if isinstance(entry, dict):
+            for key, value in entry.items():
+                if isinstance(value, (dict, list)):
+                    yield f"{prefix}{key}:"
+                    yield from log_lines([value] if isinstance(value, dict) else value, prefix + "  ")
+                elif isinstance(value, str) and "\n" in value:
+                    yield f"{prefix}{key}:"
+                    yield from (prefix + "  " + line for line in value.splitlines())
+                else:
+                    yield f"{prefix}{key}: {value}"
+        elif isinstance(entry, list):
+            yield from log_lines(entry, prefix)
+        else:
+            yield from (prefix + line for line in str(entry).splitlines())
+
+
+def bound_prompt_text(text: str, token_budget: int, **options) -> str:
+    """``text`` unchanged if it fits the budget, otherwise its reduced summary"""
+    if estimate_tokens(text) <= token_budget:
+        return text
+    return summarize_log(text, token_budget, **options)
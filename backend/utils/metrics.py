@@ -0,0 +1,275 @@
+"""
+Prometheus metrics registry and exposition for the backend
+
+Request and pipeline instruments are defined here and updated where the work
+happens; gauges whose values live elsewhere (breaker states, pool sizes,
+queue depths) are read through callbacks at scrape time.
+
+With several worker processes, set ``PROMETHEUS_MULTIPROC_DIR`` to an empty
+directory shared by the workers (cleared on each deployment) before they
+start; scrapes then aggregate every worker's counters and histograms.
+Without it only the worker that binds the exposition port is exported, so
+run a single worker.
+"""
+import os
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+import structlog
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+    start_http_server
+)
+from prometheus_client.core import GaugeMetricFamily
+
+logger = structlog.get_logger(__name__)
+
+NAMESPACE = "codegencicd"
+
+# Upstream calls and HTTP handlers: 5ms to 2 minutes
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+# Validation steps run from seconds (clone) to tens of minutes (deployment, UI tests)
+STEP_BUCKETS = (1.0, 5.0, 15.0, 30.0, 60.0, 120.0, 300.0, 600.0, 1200.0, 1800.0, 3600.0)
+
+GaugeSource = Callable[[], Iterable[Tuple[Sequence[str], float]]]
+
+metrics_registry = CollectorRegistry(auto_describe=True)
+
+
+class CallbackGaugeCollector:
+    """Gauge families whose samples are produced by callbacks at scrape time"""
+
+    def __init__(self):
+        self._families: Dict[str, Tuple[str, List[str], Dict[str, GaugeSource]]] = {}
+
+    def add_source(self,
+                   name: str,
+                   documentation: str,
+                   labelnames: Sequence[str],
+                   key: str,
+                   source: GaugeSource) -> None:
+        """Register ``source`` under ``key``; registering the same key again replaces it"""
+        family = self._families.setdefault(name, (documentation, list(labelnames), {}))
+        family[2][key] = source
+
+    def remove_source(self, name: str, key: str) -> None:
+        family = self._families.get(name)
+        if family is not None:
+            family[2].pop(key, None)
+
+    def describe(self):
+        return []
+
+    def collect(self):
+        for name, (documentation, labelnames, sources) in list(self._families.items()):
+            family = GaugeMetricFamily(name, documentation, labels=labelnames)
+            for key, source in list(sources.items()):
+                try:
+                    for labels, value in source():
+                        family.add_metric([str(label) for label in labels], float(value))
+                except Exception as e:
+                    logger.warning("Metrics source failed", metric=name, source=key, error=str(e))
+            yield family
+
+
+callback_gauges = CallbackGaugeCollector()
+metrics_registry.register(callback_gauges)
+
+
+# HTTP server
+http_request_duration = Histogram(
+    f"{NAMESPACE}_http_request_duration_seconds",
+    "Latency of HTTP requests handled by the API, by route template",
+    ["method", "route", "status"],
+    buckets=LATENCY_BUCKETS,
+    registry=metrics_registry
+)
+
+# Upstream clients
+upstream_request_duration = Histogram(
+    f"{NAMESPACE}_upstream_request_duration_seconds",
+    "Latency of calls to external services including retries",
+    ["service", "method", "outcome"],
+    buckets=LATENCY_BUCKETS,
+    registry=metrics_registry
+)
+upstream_retries = Counter(
+    f"{NAMESPACE}_upstream_retries",
+    "Retries of failed calls to external services",
+    ["service"],
+    registry=metrics_registry
+)
+upstream_retries_abandoned = Counter(
+    f"{NAMESPACE}_upstream_retries_abandoned",
+    "Calls to external services given up by reason (budget_exhausted, deadline_exceeded)",
+    ["service", "reason"],
+    registry=metrics_registry
+)
+pool_request_duration = Histogram(
+    f"{NAMESPACE}_pool_request_duration_seconds",
+    "Latency of requests sent through shared connection pools",
+    ["pool", "host", "method", "outcome"],
+    buckets=LATENCY_BUCKETS,
+    registry=metrics_registry
+)
+
+# Model calls: time waiting for a slot and rate limit token is kept apart from model latency
+llm_queue_wait = Histogram(
+    f"{NAMESPACE}_llm_queue_wait_seconds",
+    "Time model requests waited for a concurrency slot and rate limiter token",
+    ["service", "operation"],
+    buckets=LATENCY_BUCKETS,
+    registry=metrics_registry
+)
+llm_request_duration = Histogram(
+    f"{NAMESPACE}_llm_request_duration_seconds",
+    "Latency of model calls, excluding queueing",
+    ["service", "operation", "outcome"],
+    buckets=LATENCY_BUCKETS,
+    registry=metrics_registry
+)
+
+# Model response caches
+llm_cache_requests = Counter(
+    f"{NAMESPACE}_llm_cache_requests",
+    "Model response cache lookups by result (hit, miss, expired)",
+    ["cache", "result"],
+    registry=metrics_registry
+)
+
+# Validation pipeline
+validation_step_duration = Histogram(
+    f"{NAMESPACE}_validation_step_duration_seconds",
+    "Duration of validation pipeline steps",
+    ["pipeline", "step", "status"],
+    buckets=STEP_BUCKETS,
+    registry=metrics_registry
+)
+validations_in_progress = Gauge(
+    f"{NAMESPACE}_validations_in_progress",
+    "Validation pipelines currently running",
+    ["pipeline"],
+    multiprocess_mode="livesum",
+    registry=metrics_registry
+)
+
+# WebSockets
+websocket_connections = Counter(
+    f"{NAMESPACE}_websocket_connections",
+    "WebSocket connections accepted",
+    registry=metrics_registry
+)
+websocket_active_connections = Gauge(
+    f"{NAMESPACE}_websocket_active_connections",
+    "Currently open WebSocket connections",
+    multiprocess_mode="livesum",
+    registry=metrics_registry
+)
+websocket_messages = Counter(
+    f"{NAMESPACE}_websocket_messages",
+    "WebSocket messages by direction",
+    ["direction"],
+    registry=metrics_registry
+)
+
+
+def register_queue(name: str, depth: Callable[[], int]) -> None:
+    """Expose the depth of a work queue as ``queue_depth{queue=name}``"""
+    callback_gauges.add_source(
+        f"{NAMESPACE}_queue_depth",
+        "Items waiting in internal work queues",
+        ["queue"],
+        name,
+        lambda: [((name,), depth())]
+    )
+
+
+def observe_duration(histogram: Histogram, started: float, *labels: str) -> None:
+    """Record the time since ``started`` (a ``time.perf_counter()`` value)"""
+    histogram.labels(*labels).observe(time.perf_counter() - started)
+
+
+def get_sample_value(name: str, labels: Optional[Dict[str, str]] = None) -> float:
+    return metrics_registry.get_sample_value(name, labels) or 0.0
+
+
+def multiprocess_enabled() -> bool:
+    return bool(os.environ.get("PROMETHEUS_MULTIPROC_DIR"))
+
+
+def exposition_registry() -> CollectorRegistry:
+    """Registry to expose: every worker's samples in multiprocess mode, else this process's.
+
+    Callback gauges are read in the serving process either way.
+    """
+    if not multiprocess_enabled():
+        return metrics_registry
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    registry.register(callback_gauges)
+    return registry
+
+
+def render_metrics() -> Tuple[bytes, str]:
+    """Render the registry in the Prometheus text exposition format"""
+    return generate_latest(exposition_registry()), CONTENT_TYPE_LATEST
+
+
+def start_metrics_server(port: int) -> bool:
+    """Serve the registry on a dedicated port for scrapers; False if the port is taken"""
+    try:
+        start_http_server(port, registry=exposition_registry())
+    except OSError as e:
+        if multiprocess_enabled():
+            # Another worker serves the aggregate of all workers
+            logger.info("Prometheus exposition port served by another worker", port=port)
+        else:
+            logger.warning("Prometheus exposition port unavailable; this worker's metrics will not be "
+                           "exported. Run a single worker or set PROMETHEUS_MULTIPROC_DIR",
+                           port=port, error=str(e))
+        return False
+    logger.info("Serving Prometheus metrics", port=port, multiprocess=multiprocess_enabled())
+    return True
+
+
+def mark_process_dead(pid: Optional[int] = None) -> None:
+    """Drop a stopped worker's live gauges from the multiprocess aggregate"""
+    if multiprocess_enabled():
+        multiprocess.mark_process_dead(pid or os.getpid())
+
+
+class RequestMetricsMiddleware:
+    """ASGI middleware recording per-route request latency.
+
+    Routes are labelled by their template (``/projects/{project_id}``) to keep
+    series bounded; the timer stops after the last body chunk so streamed
+    responses are measured in full.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            route = getattr(scope.get("route"), "path", None) or "unmatched"
+            observe_duration(http_request_duration, started, scope["method"], route, str(status))
@@ -0,0 +1,209 @@
+"""
+Proactive token-bucket rate limiting shared by all clients of an upstream
+"""
+import asyncio
+import hashlib
+import time
+from dataclasses import dataclass
+from enum import Enum
+from typing import Any, Dict, Optional
+import structlog
+
+logger = structlog.get_logger(__name__)
+
+
+class RequestPriority(Enum):
+    """Priority of an outbound request"""
+    INTERACTIVE = "interactive"  # A user is waiting on the result
+    BACKGROUND = "background"    # Polling and other deferrable work
+
+
+@dataclass
+class TokenBucketConfig:
+    """Configuration for a token bucket"""
+    rate: float  # Tokens added per second
+    capacity: int  # Maximum burst size
+    background_reserve: float = 0.2  # Fraction of capacity kept for interactive requests
+    min_wait: float = 0.05  # Shortest sleep while waiting for tokens
+    per_credential: bool = False  # The upstream meters each token separately
+
+
+class TokenBucket:
+    """Token bucket limiter seeded from upstream rate-limit headers"""
+
+    def __init__(self, name: str, config: TokenBucketConfig):
+        self.name = name
+        self.config = config
+        self.rate = config.rate
+        self.capacity = config.capacity
+        self.tokens = float(config.capacity)
+        self.updated_at = time.monotonic()
+        self.blocked_until = 0.0
+        self._interactive_waiters = 0
+        self.stats = {
+            "acquired": 0,
+            "throttled": 0,
+            "total_wait_seconds": 0.0,
+            "penalties": 0
+        }
+
+        self.logger = logger.bind(rate_limiter=name)
+
+    def _refill(self, now: float) -> None:
+        elapsed = now - self.updated_at
+        if elapsed > 0:
+            self.tokens = min(self.capacity, self.tokens + elapsed * self.rate)
+            self.updated_at = now
+
+    async def acquire(self,
+                      priority: RequestPriority = RequestPriority.INTERACTIVE,
+                      tokens: float = 1.0,
+                      timeout: Optional[float] = None) -> float:
+        """Wait until tokens are available and consume them; returns seconds waited.
+
+        Raises ``asyncio.TimeoutError`` as soon as the wait is known to run past
+        ``timeout`` seconds, without consuming anything.
+        """
+        interactive = priority == RequestPriority.INTERACTIVE
+        reserve = 0.0 if interactive else self.capacity * self.config.background_reserve
+        waited = 0.0
+
+        if interactive:
+            self._interactive_waiters += 1
+        try:
+            while True:
+                now = time.monotonic()
+                self._refill(now)
+
+                if now < self.blocked_until:
+                    delay = self.blocked_until - now
+                elif not interactive and self._interactive_waiters > 0:
+                    # Background requests yield to waiting interactive ones
+                    delay = self.config.min_wait
+                elif self.tokens - reserve >= tokens:
+                    self.tokens -= tokens
+                    self.stats["acquired"] += 1
+                    if waited:
+                        self.stats["throttled"] += 1
+                        self.stats["total_wait_seconds"] += waited
+                    return waited
+                else:
+                    deficit = tokens + reserve - self.tokens
+                    delay = max(deficit / max(self.rate, 1e-6), self.config.min_wait)
+
+                if timeout is not None and waited + delay > timeout:
+                    raise asyncio.TimeoutError(f"Rate limiter {self.name} cannot admit the request "
+                                               f"within {timeout:.2f}s")
+                await asyncio.sleep(delay)
+                waited += delay
+        finally:
+            if interactive:
+                self._interactive_waiters -= 1
+
+    def update_from_headers(self, remaining: int, reset_at: Optional[float] = None) -> None:
+        """Align the bucket with the quota the upstream reports.
+
+        ``reset_at`` is the epoch timestamp at which the upstream window resets.
+        """
+        now = time.monotonic()
+        self._refill(now)
+        self.tokens = min(self.tokens, float(max(remaining, 0)))
+
+        if reset_at is None:
+            return
+
+        window = reset_at - time.time()
+        if window <= 0:
+            return
+
+        # Spread what is left of the quota evenly over the rest of the window
+        self.rate = max(remaining, 1) / window
+        if remaining <= 0:
+            self.blocked_until = max(self.blocked_until, now + window)
+            self.logger.warning("Upstream quota exhausted, holding requests until reset",
+                              wait_time=round(window, 2))
+
+    def refund(self, tokens: float = 1.0) -> None:
+        """Return tokens for a request the upstream did not count, e.g. a 304"""
+        self._refill(time.monotonic())
+        self.tokens = min(self.capacity, self.tokens + tokens)
+
+    def penalize(self, retry_after: Optional[float]) -> None:
+        """Stop issuing requests after the upstream rejected one with 429"""
+        now = time.monotonic()
+        self.tokens = 0.0
+        self.updated_at = now
+        self.blocked_until = max(self.blocked_until, now + (retry_after or 1.0))
+        self.stats["penalties"] += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get current bucket state and counters"""
+        self._refill(time.monotonic())
+        return {
+            "name": self.name,
+            "tokens": round(self.tokens, 2),
+            "capacity": self.capacity,
+            "rate_per_second": round(self.rate, 4),
+            "blocked_for_seconds": round(max(0.0, self.blocked_until - time.monotonic()), 2),
+            **self.stats
+        }
+
+
+# Default budgets per upstream; GitHub allows 5000 requests per hour per token
+DEFAULT_UPSTREAM_LIMITS: Dict[str, TokenBucketConfig] = {
+    "github_api": TokenBucketConfig(rate=5000 / 3600, capacity=100, per_credential=True),
+    "codegen_api": TokenBucketConfig(rate=5.0, capacity=20),
+    "gemini": TokenBucketConfig(rate=1.0, capacity=10),
+    "cloudflare": TokenBucketConfig(rate=4.0, capacity=50),
+}
+
+
+class RateLimiterRegistry:
+    """Process-wide registry of token buckets, one per upstream.
+
+    Upstreams configured ``per_credential`` get one bucket per token, named
+    ``<upstream>:<sha256(token)[:12]>``; the upstream-wide bucket then only
+    covers unauthenticated calls.
+    """
+
+    def __init__(self, limits: Optional[Dict[str, TokenBucketConfig]] = None):
+        self.limits = dict(limits if limits is not None else DEFAULT_UPSTREAM_LIMITS)
+        self.buckets: Dict[str, TokenBucket] = {}
+
+    def get(self, upstream: str, credential: Optional[str] = None) -> Optional[TokenBucket]:
+        """Get the shared bucket for an upstream (and token), or None if it is not rate limited"""
+        config = self.limits.get(upstream)
+        if config is None:
+            return None
+        name = upstream
+        if credential and config.per_credential:
+            name = f"{upstream}:{hashlib.sha256(credential.encode()).hexdigest()[:12]}"
+        bucket = self.buckets.get(name)
+        if bucket is None:
+            bucket = TokenBucket(name, config)
+            self.buckets[name] = bucket
+        return bucket
+
+    def configure(self, upstream: str, config: TokenBucketConfig) -> TokenBucket:
+        """Set or replace the limits for an upstream"""
+        self.limits[upstream] = config
+        bucket = self.buckets.get(upstream)
+        if bucket is None:
+            bucket = TokenBucket(upstream, config)
+            self.buckets[upstream] = bucket
+        # Update in place so clients holding a bucket pick up the change
+        for name, existing in self.buckets.items():
+            if name == upstream or name.startswith(f"{upstream}:"):
+                existing.config = config
+                existing.rate = config.rate
+                existing.capacity = config.capacity
+                existing.tokens = min(existing.tokens, float(config.capacity))
+        return bucket
+
+    def get_all_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Get stats for every bucket in use"""
+        return {name: bucket.get_stats() for name, bucket in self.buckets.items()}
+
+
+# Global rate limiter registry instance
+rate_limiter_registry = RateLimiterRegistry()
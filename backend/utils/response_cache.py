@@ -0,0 +1,205 @@
+"""
+Persistent cache of model responses keyed by normalized error fingerprints
+
+The same build or dependency failure recurs across validations and projects
+with only paths, timestamps and hashes differing. Errors are normalized to a
+fingerprint and the model's diagnosis is reused while it is fresh.
+"""
+import asyncio
+import copy
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+import structlog
+
+from backend.utils.metrics import llm_cache_requests
+
+logger = structlog.get_logger(__name__)
+
+# Normalization rules, applied in order; each replaces a volatile token with a placeholder
+_NORMALIZERS = [
+    # Absolute and home-relative paths keep their file name, which identifies the failure
+    (re.compile(r"(?:[A-Za-z]:\\|~?/)(?:[\w.@+-]+[/\\])+([\w.@+-]+)"), r"<path>/\1"),
+    (re.compile(r"\d{4}-\d\d-\d\d[T ]\d\d:\d\d(?::\d\d(?:[.,]\d+)?)?(?:Z|[+-]\d\d:?\d\d)?"), "<time>"),
+    (re.compile(r"\b\d\d:\d\d:\d\d(?:[.,]\d+)?\b"), "<time>"),
+    (re.compile(r"\b[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}\b", re.I), "<uuid>"),
+    (re.compile(r"\b0x[0-9a-f]+\b", re.I), "<addr>"),
+    (re.compile(r"\b(?=[a-f]*\d)[0-9a-f]{7,64}\b", re.I), "<hash>"),
+    (re.compile(r"(:\d+)+\b|\bline \d+", re.I), ":<pos>"),
+    (re.compile(r"\b\d+(?:\.\d+)?\s?(?:ms|s|sec|seconds|m|min|minutes)\b"), "<duration>"),
+    (re.compile(r"\b(?:pid|port|process)\s*[=:]?\s*\d+\b", re.I), "<id>"),
+    (re.compile(r"[ \t]+"), " "),
+]
+
+_RESULT_STATS = {"hit": "hits", "miss": "misses", "expired": "expired"}
+
+
+def normalize_error(text: str) -> str:
+    """Error text with paths, timestamps, hashes and positions masked"""
+    lines = []
+    for line in text.strip().splitlines():
+        for pattern, replacement in _NORMALIZERS:
+            line = pattern.sub(replacement, line)
+        line = line.strip()
+        if line:
+            lines.append(line)
+    return "\n".join(lines)
+
+
+def error_fingerprint(text: str) -> str:
+    return hashlib.sha256(normalize_error(text).encode("utf-8", "surrogateescape")).hexdigest()
+
+
+class ResponseCache:
+    """LRU cache of JSON responses with a TTL, persisted to a local JSON file.
+
+    Keys are ``(kind, prompt_version, fingerprint)`` so bumping a prompt's
+    version retires everything produced by the old prompt. Inside an event
+    loop, writes are batched and the file is rewritten in a worker thread at
+    most once per ``save_delay`` seconds.
+    """
+
+    def __init__(self,
+                 name: str,
+                 path: Optional[str] = None,
+                 ttl: float = 7 * 24 * 3600,
+                 max_entries: int = 2000,
+                 save_delay: float = 5.0):
+        self.name = name
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.save_delay = save_delay
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._entries: Optional["OrderedDict[str, Dict[str, Any]]"] = None
+        self._dirty = False
+        self._save_handle: Optional[asyncio.TimerHandle] = None
+        self._save_task: Optional[asyncio.Task] = None
+        self.stats = {"hits": 0, "misses": 0, "expired": 0, "stored": 0, "evictions": 0, "saves": 0}
+
+    @staticmethod
+    def make_key(kind: str, prompt_version: str, text: str) -> str:
+        return f"{kind}:{prompt_version}:{error_fingerprint(text)}"
+
+    # Persistence
+
+    def _load(self) -> "OrderedDict[str, Dict[str, Any]]":
+        if self._entries is None:
+            self._entries = OrderedDict()
+            if self.path:
+                try:
+                    with open(self.path, "r") as f:
+                        stored = json.load(f)
+                    # Stored oldest first, so insertion order is the LRU order
+                    for key, entry in stored.items():
+                        self._entries[key] = entry
+                except (OSError, ValueError):
+                    pass
+        return self._entries
+
+    def flush(self) -> None:
+        """Write pending changes to the cache file"""
+        if not self.path:
+            return
+        with self._write_lock:
+            with self._lock:
+                if not self._dirty:
+                    return
+                # Entries are replaced, never mutated, so a shallow copy is a consistent snapshot
+                snapshot = dict(self._entries or {})
+                self._dirty = False
+            directory = os.path.dirname(self.path)
+            tmp_path = f"{self.path}.{os.getpid()}.tmp"
+            try:
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+                with open(tmp_path, "w") as f:
+                    json.dump(snapshot, f)
+                os.replace(tmp_path, self.path)
+                self.stats["saves"] += 1
+            except OSError as e:
+                logger.warning("Failed to persist response cache", cache=self.name, error=str(e))
+
+    async def aflush(self) -> None:
+        await asyncio.to_thread(self.flush)
+
+    def _schedule_save(self) -> None:
+        """Mark the cache dirty; inside an event loop the write is deferred and batched"""
+        self._dirty = True
+        if not self.path:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self.flush()
+            return
+        if self._save_handle is None:
+            self._save_handle = loop.call_later(self.save_delay, self._start_save)
+
+    def _start_save(self) -> None:
+        self._save_handle = None
+        self._save_task = asyncio.ensure_future(self.aflush())
+
+    async def close(self) -> None:
+        """Cancel the pending deferred write and flush now"""
+        if self._save_handle is not None:
+            self._save_handle.cancel()
+            self._save_handle = None
+        if self._save_task is not None and not self._save_task.done():
+            await self._save_task
+        await self.aflush()
+
+    # Lookups
+
+    def _record(self, result: str) -> None:
+        self.stats[_RESULT_STATS[result]] += 1
+        llm_cache_requests.labels(self.name, result).inc()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Cached response for ``key``, or None if missing or expired"""
+        with self._lock:
+            entries = self._load()
+            entry = entries.get(key)
+            if entry is None:
+                self._record("miss")
+                return None
+            if time.time() - entry["stored_at"] > self.ttl:
+                del entries[key]
+                self._record("expired")
+                return None
+            entries.move_to_end(key)
+            self._record("hit")
+            # Callers may mutate the response; the cached copy stays intact
+            return copy.deepcopy(entry["response"])
+
+    def put(self, key: str, response: Dict[str, Any]) -> None:
+        with self._lock:
+            entries = self._load()
+            entries[key] = {"response": copy.deepcopy(response), "stored_at": time.time()}
+            entries.move_to_end(key)
+            self.stats["stored"] += 1
+            while len(entries) > self.max_entries:
+                entries.popitem(last=False)
+                self.stats["evictions"] += 1
+        self._schedule_save()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries = OrderedDict()
+        self._schedule_save()
+
+    def get_stats(self) -> Dict[str, Any]:
+        lookups = self.stats["hits"] + self.stats["misses"] + self.stats["expired"]
+        return {
+            "entries": len(self._load()),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl,
+            "hit_rate": self.stats["hits"] / lookups if lookups else 0.0,
+            **self.stats
+        }
@@ -2,9 +2,10 @@
 Advanced retry strategies with exponential backoff and jitter
 """
 import asyncio
+import contextvars
 import random
 import time
-from typing import Callable, Any, Optional, List, Type
+from typing import Callable, Any, Optional, List, Type, Dict
 from dataclasses import dataclass
 from enum import Enum
 import structlog
@@ -18,6 +19,7 @@ class RetryStrategy(Enum):
     LINEAR_BACKOFF = "linear_backoff"
     FIXED_DELAY = "fixed_delay"
     FIBONACCI_BACKOFF = "fibonacci_backoff"
+    FULL_JITTER = "full_jitter"
 
 
 @dataclass
@@ -30,6 +32,7 @@ class RetryConfig:
     jitter: bool = True  # Add randomness to prevent thundering herd
     backoff_multiplier: float = 2.0
     retryable_exceptions: Optional[List[Type[Exception]]] = None
+    deadline: Optional[float] = None  # Total seconds allowed across all attempts
 
 
 class RetryExhaustedError(Exception):
@@ -40,16 +43,126 @@ class RetryExhaustedError(Exception):
         super().__init__(f"Retry exhausted after {attempts} attempts. Last error: {last_exception}")
 
 
+# Set while a RetryHandler owns retries, so nested layers make a single attempt
+_retry_scope: contextvars.ContextVar[bool] = contextvars.ContextVar("retry_scope", default=False)
+
+
+def in_retry_scope() -> bool:
+    """Check whether an outer layer is already retrying the current call"""
+    return _retry_scope.get()
+
+
+def full_jitter_delay(attempt: int, base_delay: float, max_delay: float, multiplier: float = 2.0) -> float:
+    """Full-jitter backoff: uniform between zero and the capped exponential delay"""
+    return random.uniform(0, min(max_delay, base_delay * (multiplier ** attempt)))
+
+
+class RetryBudget:
+    """Caps retries to a fraction of requests for one upstream.
+
+    Every request deposits ``ratio`` tokens and every retry spends one, with a
+    small time-based floor so an idle upstream can still be retried.
+    """
+    
+    def __init__(self,
+                 name: str,
+                 ratio: float = 0.2,
+                 min_retries_per_second: float = 0.5,
+                 max_balance: float = 10.0):
+        self.name = name
+        self.ratio = ratio
+        self.min_retries_per_second = min_retries_per_second
+        self.max_balance = max_balance
+        self.balance = max_balance
+        self.updated_at = time.monotonic()
+        self.stats = {
+            "requests": 0,
+            "retries": 0,
+            "budget_exhausted": 0,
+            "deadline_exceeded": 0
+        }
+    
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.balance = min(self.max_balance,
+                           self.balance + (now - self.updated_at) * self.min_retries_per_second)
+        self.updated_at = now
+    
+    def record_request(self) -> None:
+        """Deposit the retry allowance earned by a new request"""
+        self.stats["requests"] += 1
+        self._refill()
+        self.balance = min(self.max_balance, self.balance + self.ratio)
+    
+    def try_acquire_retry(self) -> bool:
+        """Spend one retry if the budget allows it"""
+        self._refill()
+        if self.balance >= 1.0:
+            self.balance -= 1.0
+            self.stats["retries"] += 1
+            return True
+        self.stats["budget_exhausted"] += 1
+        return False
+    
+    def record_deadline_exceeded(self) -> None:
+        self.stats["deadline_exceeded"] += 1
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get retry counters for this upstream"""
+        self._refill()
+        requests = self.stats["requests"]
+        return {
+            **self.stats,
+            "retry_ratio": self.stats["retries"] / requests if requests else 0.0,
+            "budget_balance": round(self.balance, 2)
+        }
+
+
+class RetryBudgetRegistry:
+    """Process-wide retry budgets, one per upstream"""
+    
+    def __init__(self, ratio: float = 0.2):
+        self.ratio = ratio
+        self.budgets: Dict[str, RetryBudget] = {}
+    
+    def get(self, upstream: str) -> RetryBudget:
+        """Get or create the budget for an upstream"""
+        budget = self.budgets.get(upstream)
+        if budget is None:
+            budget = RetryBudget(upstream, ratio=self.ratio)
+            self.budgets[upstream] = budget
+        return budget
+    
+    def get_all_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Get retry counters for every upstream"""
+        return {name: budget.get_stats() for name, budget in self.budgets.items()}
+
+
+# Global retry budget registry instance
+retry_budgets = RetryBudgetRegistry()
+
+
 class RetryHandler:
     """Advanced retry handler with multiple strategies"""
     
-    def __init__(self, config: RetryConfig):
+    def __init__(self, config: RetryConfig, budget: Optional[RetryBudget] = None):
         self.config = config
+        self.budget = budget
         self.logger = logger.bind(component="retry_handler")
     
     async def execute(self, func: Callable, *args, **kwargs) -> Any:
         """Execute function with retry logic"""
+        scope_token = _retry_scope.set(True)
+        try:
+            return await self._execute(func, *args, **kwargs)
+        finally:
+            _retry_scope.reset(scope_token)
+    
+    async def _execute(self, func: Callable, *args, **kwargs) -> Any:
         last_exception = None
+        deadline_at = (time.monotonic() + self.config.deadline) if self.config.deadline else None
+        if self.budget is not None:
+            self.budget.record_request()
         
         for attempt in range(1, self.config.max_attempts + 1):
             try:
@@ -80,6 +193,21 @@ class RetryHandler:
                 if attempt < self.config.max_attempts:
                     delay = self._calculate_delay(attempt)
                     
+                    if deadline_at is not None and time.monotonic() + delay >= deadline_at:
+                        if self.budget is not None:
+                            self.budget.record_deadline_exceeded()
+                        self.logger.error("Retry deadline exceeded",
+                                        attempts=attempt,
+                                        exception=str(e))
+                        raise RetryExhaustedError(attempt, e)
+                    
+                    if self.budget is not None and not self.budget.try_acquire_retry():
+                        self.logger.error("Retry budget exhausted",
+                                        upstream=self.budget.name,
+                                        attempts=attempt,
+                                        exception=str(e))
+                        raise RetryExhaustedError(attempt, e)
+                    
                     self.logger.warning("Function failed, retrying",
                                       attempt=attempt,
                                       max_attempts=self.config.max_attempts,
@@ -120,6 +248,12 @@ class RetryHandler:
             delay = self.config.base_delay
         elif self.config.strategy == RetryStrategy.FIBONACCI_BACKOFF:
             delay = self.config.base_delay * self._fibonacci(attempt)
+        elif self.config.strategy == RetryStrategy.FULL_JITTER:
+            # Full jitter already spreads retries; no extra jitter on top
+            return full_jitter_delay(attempt - 1,
+                                     self.config.base_delay,
+                                     self.config.max_delay,
+                                     self.config.backoff_multiplier)
         else:
             delay = self.config.base_delay
         
@@ -180,8 +314,9 @@ def retry(max_attempts: int = 3,
 class AdaptiveRetryHandler:
     """Adaptive retry handler that adjusts strategy based on success rates"""
     
-    def __init__(self, base_config: RetryConfig):
+    def __init__(self, base_config: RetryConfig, budget: Optional[RetryBudget] = None):
         self.base_config = base_config
+        self.budget = budget
         self.success_history: List[bool] = []
         self.max_history = 100
         self.logger = logger.bind(component="adaptive_retry_handler")
@@ -191,7 +326,7 @@ class AdaptiveRetryHandler:
         # Adjust config based on recent success rate
         config = self._adapt_config()
         
-        retry_handler = RetryHandler(config)
+        retry_handler = RetryHandler(config, budget=self.budget)
         
         try:
             result = await retry_handler.execute(func, *args, **kwargs)
@@ -232,7 +367,8 @@ class AdaptiveRetryHandler:
             strategy=self.base_config.strategy,
             jitter=self.base_config.jitter,
             backoff_multiplier=self.base_config.backoff_multiplier,
-            retryable_exceptions=self.base_config.retryable_exceptions
+            retryable_exceptions=self.base_config.retryable_exceptions,
+            deadline=self.base_config.deadline
         )
         
         self.logger.debug("Adapted retry configuration",
@@ -253,8 +389,11 @@ class AdaptiveRetryHandler:
         if not self.success_history:
             return {"success_rate": 0.0, "total_attempts": 0}
         
-        return {
+        stats = {
             "success_rate": sum(self.success_history) / len(self.success_history),
             "total_attempts": len(self.success_history),
             "recent_success_rate": sum(self.success_history[-20:]) / min(20, len(self.success_history))
         }
+        if self.budget is not None:
+            stats["retry_budget"] = self.budget.get_stats()
+        return stats
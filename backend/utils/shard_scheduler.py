@@ -0,0 +1,184 @@
+"""
+Client-side sharding of test matrices into concurrently executed requests
+"""
+import asyncio
+import re
+import time
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Sequence
+import structlog
+
+logger = structlog.get_logger(__name__)
+
+# Integer fields that add up across shards; other numbers (rates, scores, timings) are averaged
+_COUNT_KEY = re.compile(
+    r"^(?:total|passed|failed|skipped|errors?|warnings|tests?|count|tests_run"
+    r"|(?:total|num)_\w+|\w+_(?:count|total|passed|failed|skipped|errors))$"
+)
+# Rates recomputed from the summed counts: rate key -> (numerator keys, denominator keys)
+_RATES = {
+    "success_rate": ("passed", "tests_passed"),
+    "pass_rate": ("passed", "tests_passed"),
+    "failure_rate": ("failed", "tests_failed"),
+    "fail_rate": ("failed", "tests_failed"),
+}
+_TOTAL_KEYS = ("total", "total_tests", "tests_run")
+
+
+@dataclass
+class ShardConfig:
+    """Configuration for sharded execution"""
+    max_parallel_shards: int = 4
+    scenarios_per_shard: int = 5
+    shard_timeout: Optional[float] = None  # Seconds per shard, including its retries
+
+
+@dataclass
+class Shard:
+    """One slice of a test matrix: a single target and a chunk of scenarios"""
+    index: int
+    target: str  # Browser or device name
+    scenarios: List[Dict[str, Any]]
+    total: int = 0
+
+
+@dataclass
+class ShardResult:
+    """Outcome of one shard"""
+    shard: Shard
+    success: bool
+    response: Dict[str, Any] = field(default_factory=dict)
+    error: Optional[str] = None
+    duration: float = 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "shard": self.shard.index,
+            "total_shards": self.shard.total,
+            "target": self.shard.target,
+            "scenario_count": len(self.shard.scenarios),
+            "success": self.success,
+            "duration": round(self.duration, 3),
+            "error": self.error,
+            "response": self.response,
+        }
+
+
+def plan_shards(targets: Sequence[str],
+                scenarios: List[Dict[str, Any]],
+                scenarios_per_shard: int) -> List[Shard]:
+    """Split a target x scenario matrix into shards of at most ``scenarios_per_shard``"""
+    size = max(1, scenarios_per_shard)
+    chunks = [scenarios[i:i + size] for i in range(0, len(scenarios), size)] or [[]]
+    shards = [Shard(index=0, target=target, scenarios=chunk)
+              for target in targets for chunk in chunks]
+    for index, shard in enumerate(shards):
+        shard.index = index
+        shard.total = len(shards)
+    return shards
+
+
+def _is_number(value: Any) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def _recompute_rates(merged: Dict[str, Any], shard_values: Dict[str, List[Any]]) -> None:
+    """Replace averaged rates with ones derived from the summed counts"""
+    total = next((merged[key] for key in _TOTAL_KEYS if _is_number(merged.get(key))), None)
+    if total is None and _is_number(merged.get("passed")) and _is_number(merged.get("failed")):
+        total = merged["passed"] + merged["failed"]
+    if not total:
+        return
+    for rate_key, count_keys in _RATES.items():
+        count = next((merged[key] for key in count_keys if _is_number(merged.get(key))), None)
+        if rate_key in merged and count is not None and _is_number(merged[rate_key]):
+            # Percentages stay percentages
+            scale = 100 if any(value > 1 for value in shard_values[rate_key]) else 1
+            merged[rate_key] = count / total * scale
+
+
+def merge_shard_responses(responses: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Merge shard responses into one.
+
+    Dicts merge recursively and lists concatenate. Count fields (passed,
+    failed, total, ...) add up, rates are recomputed from those counts, and
+    other numbers such as scores and timings are averaged over the shards
+    that report them.
+    """
+    shard_values: Dict[str, List[Any]] = {}
+    for response in responses:
+        for key, value in response.items():
+            shard_values.setdefault(key, []).append(value)
+
+    merged: Dict[str, Any] = {}
+    for key, values in shard_values.items():
+        if all(isinstance(value, dict) for value in values):
+            merged[key] = merge_shard_responses(values)
+        elif all(isinstance(value, list) for value in values):
+            merged[key] = [item for value in values for item in value]
+        elif len(values) == 1:
+            merged[key] = values[0]
+        elif all(isinstance(value, bool) for value in values):
+            merged[key] = all(values)
+        elif all(_is_number(value) for value in values):
+            if _COUNT_KEY.match(key) and all(isinstance(value, int) for value in values):
+                merged[key] = sum(values)
+            else:
+                merged[key] = sum(values) / len(values)
+        else:
+            merged[key] = values[-1]
+    _recompute_rates(merged, shard_values)
+    return merged
+
+
+class ShardScheduler:
+    """Runs shards with bounded parallelism and yields results as each finishes.
+
+    A failing shard is reported on its own; the rest of the matrix keeps running.
+    """
+
+    def __init__(self, config: ShardConfig):
+        self.config = config
+        self.logger = logger.bind(component="shard_scheduler")
+
+    async def run(self,
+                  shards: List[Shard],
+                  runner: Callable[[Shard], Awaitable[Dict[str, Any]]]) -> AsyncIterator[ShardResult]:
+        semaphore = asyncio.Semaphore(max(1, self.config.max_parallel_shards))
+
+        async def execute(shard: Shard) -> ShardResult:
+            async with semaphore:
+                started = time.monotonic()
+                try:
+                    if self.config.shard_timeout:
+                        response = await asyncio.wait_for(runner(shard), self.config.shard_timeout)
+                    else:
+                        response = await runner(shard)
+                    return ShardResult(shard=shard,
+                                       success=True,
+                                       response=response or {},
+                                       duration=time.monotonic() - started)
+                except Exception as e:
+                    self.logger.warning("Shard failed",
+                                      shard=shard.index,
+                                      target=shard.target,
+                                      error=str(e))
+                    return ShardResult(shard=shard,
+                                       success=False,
+                                       error=str(e) or type(e).__name__,
+                                       duration=time.monotonic() - started)
+
+        tasks = [asyncio.create_task(execute(shard)) for shard in shards]
+        try:
+            for next_result in asyncio.as_completed(tasks):
+                yield await next_result
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def run_all(self,
+                      shards: List[Shard],
+                      runner: Callable[[Shard], Awaitable[Dict[str, Any]]]) -> List[ShardResult]:
+        results = [result async for result in self.run(shards, runner)]
+        results.sort(key=lambda result: result.shard.index)
+        return results
@@ -0,0 +1,95 @@
+"""
+Tests for content-hash caching of per-file code analysis
+"""
+import subprocess
+import pytest
+from unittest.mock import AsyncMock
+
+from backend.utils.analysis_cache import (
+    AnalysisCache,
+    SourceFile,
+    aggregate_file_results,
+    analyze_with_cache,
+    git_blob_sha,
+    list_worktree_entries,
+    select_source_files
+)
+
+
+def file_result(complexity: int, issues: int = 0):
+    return {
+        "metrics": {"lines_of_code": 10, "complexity": complexity, "maintainability": 80},
+        "issues": [{"message": f"issue {i}", "severity": "low"} for i in range(issues)]
+    }
+
+
+class TestContentHashing:
+    """Test blob hashing and worktree listing"""
+
+    def test_blob_sha_matches_git(self):
+        assert git_blob_sha(b"") == "e69de29bb2d1d6434b8b29ae775ad8c2e48c5391"
+
+    def test_worktree_listing_rehashes_only_dirty_files(self, tmp_path):
+        (tmp_path / "a.py").write_text("print('a')\n")
+        (tmp_path / "b.py").write_text("print('b')\n")
+        subprocess.run(["git", "init", "-q", str(tmp_path)], check=True)
+        subprocess.run(["git", "-C", str(tmp_path), "add", "."], check=True)
+        (tmp_path / "b.py").write_text("print('changed')\n")
+        (tmp_path / "new.ts").write_text("export {}\n")
+
+        entries = {path: sha for path, sha, _ in list_worktree_entries(str(tmp_path))}
+
+        assert entries["a.py"] == git_blob_sha(b"print('a')\n")
+        assert entries["b.py"] == git_blob_sha(b"print('changed')\n")
+        assert entries["new.ts"] == git_blob_sha(b"export {}\n")
+
+    def test_source_selection_filters_language_and_excludes(self):
+        entries = [("src/app.ts", "1", 10), ("node_modules/x/index.js", "2", 10),
+                   ("README.md", "3", 10), ("big.py", "4", 10_000), ("main.go", "5", 10)]
+
+        files = select_source_files(entries, ["typescript", "python"], max_file_size=1000)
+
+        assert [(f.path, f.language) for f in files] == [("src/app.ts", "typescript")]
+
+
+class TestCachedAnalysis:
+    """Test that only changed content is re-analyzed"""
+
+    @pytest.mark.asyncio
+    async def test_unchanged_files_are_reused(self):
+        cache = AnalysisCache()
+        analyze = AsyncMock(side_effect=lambda source: file_result(int(source.blob_sha)))
+        files = [SourceFile(f"f{i}.py", str(i), "python") for i in range(10)]
+
+        _, analyzed = await analyze_with_cache(cache, "svc", files, analyze)
+        files[3] = SourceFile("f3.py", "99", "python")
+        results, analyzed_again = await analyze_with_cache(cache, "svc", files, analyze)
+
+        assert len(analyzed) == 10
+        assert analyzed_again == ["f3.py"]
+        assert analyze.await_count == 11
+        assert results["f3.py"]["metrics"]["complexity"] == 99
+
+    @pytest.mark.asyncio
+    async def test_failures_are_not_cached(self):
+        cache = AnalysisCache()
+        analyze = AsyncMock(side_effect=[ConnectionError("down"), file_result(1)])
+        files = [SourceFile("a.py", "1", "python")]
+
+        first, _ = await analyze_with_cache(cache, "svc", files, analyze)
+        second, analyzed = await analyze_with_cache(cache, "svc", files, analyze)
+
+        assert first["a.py"]["error"] == "down"
+        assert analyzed == ["a.py"]
+        assert "error" not in second["a.py"]
+
+    def test_aggregates_stamp_paths_on_shared_content(self):
+        files = [SourceFile("a.py", "same", "python"), SourceFile("copy/a.py", "same", "python")]
+        shared = file_result(4, issues=1)
+
+        analysis = aggregate_file_results(files, {"a.py": shared, "copy/a.py": shared})
+
+        assert [issue["file"] for issue in analysis["issues"]] == ["a.py", "copy/a.py"]
+        assert analysis["metrics"]["total_lines"] == 20
+        assert analysis["metrics"]["complexity_score"] == 4
+
@@ -0,0 +1,125 @@
+"""
+Tests for iterative, budgeted retries in BaseClient
+"""
+import time
+import pytest
+from unittest.mock import AsyncMock, patch
+
+from backend.integrations.base_client import BaseClient, APIError, AuthenticationError
+from backend.utils.metrics import NAMESPACE, get_sample_value
+from backend.utils.rate_limiter import TokenBucket, TokenBucketConfig
+from backend.utils.retry_strategies import RetryBudget, RetryConfig, RetryHandler
+
+
+class DummyClient(BaseClient):
+    """Minimal concrete client for exercising the request loop"""
+
+    def __init__(self, **kwargs):
+        super().__init__(service_name="dummy_api", base_url="http://dummy", retry_delay=0.001, **kwargs)
+        self.retry_budget = RetryBudget("dummy_api", ratio=0.2, max_balance=10.0)
+
+    def _get_default_headers(self):
+        return {}
+
+    async def _health_check_request(self):
+        pass
+
+    async def _ensure_session(self):
+        pass
+
+
+class TestBaseClientRetries:
+    """Test the retry loop in _make_request"""
+
+    @pytest.mark.asyncio
+    async def test_retries_server_errors_then_succeeds(self):
+        client = DummyClient(max_retries=3)
+        send = AsyncMock(side_effect=[APIError("boom", status_code=503), {"ok": True}])
+
+        with patch.object(client, "_send_request", send):
+            result = await client.get("/thing")
+
+        assert result == {"ok": True}
+        assert send.call_count == 2
+        assert client.retry_budget.stats["retries"] == 1
+
+    @pytest.mark.asyncio
+    async def test_does_not_retry_client_errors(self):
+        client = DummyClient(max_retries=3)
+        send = AsyncMock(side_effect=AuthenticationError("denied"))
+
+        with patch.object(client, "_send_request", send):
+            with pytest.raises(AuthenticationError):
+                await client.get("/thing")
+
+        assert send.call_count == 1
+
+    @pytest.mark.asyncio
+    async def test_single_attempt_inside_outer_retry_handler(self):
+        client = DummyClient(max_retries=3)
+        send = AsyncMock(side_effect=APIError("boom", status_code=503))
+        handler = RetryHandler(RetryConfig(max_attempts=2, base_delay=0.001, retryable_exceptions=[APIError]))
+
+        with patch.object(client, "_send_request", send):
+            with pytest.raises(Exception):
+                await handler.execute(client.get, "/thing")
+
+        # Two outer attempts, no inner retries: 2 calls instead of 2 x 4
+        assert send.call_count == 2
+
+    @pytest.mark.asyncio
+    async def test_budget_exhaustion_stops_retries(self):
+        client = DummyClient(max_retries=5)
+        client.retry_budget.balance = 0.0
+        client.retry_budget.min_retries_per_second = 0.0
+        send = AsyncMock(side_effect=APIError("boom", status_code=500))
+
+        with patch.object(client, "_send_request", send):
+            with pytest.raises(APIError):
+                await client.get("/thing")
+
+        assert send.call_count == 1
+        assert client.retry_budget.stats["budget_exhausted"] == 1
+
+    @pytest.mark.asyncio
+    async def test_deadline_stops_retries(self):
+        client = DummyClient(max_retries=5, request_deadline=0.05)
+        client.retry_delay = 1.0
+        send = AsyncMock(side_effect=APIError("boom", status_code=500))
+
+        with patch.object(client, "_send_request", send):
+            with patch("backend.integrations.base_client.full_jitter_delay", return_value=1.0):
+                with pytest.raises(APIError):
+                    await client.get("/thing")
+
+        assert send.call_count == 1
+        assert client.retry_budget.stats["deadline_exceeded"] == 1
+
+    @pytest.mark.asyncio
+    async def test_rate_limit_wait_past_deadline_fails_fast(self):
+        client = DummyClient(max_retries=3, request_deadline=5.0)
+        client.rate_limiter = TokenBucket("dummy_api", TokenBucketConfig(rate=1.0, capacity=1))
+        client.rate_limiter.penalize(60.0)
+        labels = {"service": "dummy_api", "reason": "deadline_exceeded"}
+        before = get_sample_value(f"{NAMESPACE}_upstream_retries_abandoned_total", labels)
+        send = AsyncMock(return_value={"ok": True})
+
+        started = time.monotonic()
+        with patch.object(client, "_send_request", send):
+            with pytest.raises(APIError, match="deadline"):
+                await client.get("/thing")
+
+        assert time.monotonic() - started < 1.0
+        send.assert_not_called()
+        assert get_sample_value(f"{NAMESPACE}_upstream_retries_abandoned_total", labels) == before + 1
+
+    @pytest.mark.asyncio
+    async def test_retries_are_counted_per_upstream(self):
+        client = DummyClient(max_retries=3)
+        before = get_sample_value(f"{NAMESPACE}_upstream_retries_total", {"service": "dummy_api"})
+        send = AsyncMock(side_effect=[APIError("boom", status_code=503), {"ok": True}])
+
+        with patch.object(client, "_send_request", send):
+            await client.get("/thing")
+
+        assert get_sample_value(f"{NAMESPACE}_upstream_retries_total", {"service": "dummy_api"}) == before + 1
@@ -0,0 +1,108 @@
+"""
+Tests for circuit breaker window accounting, bounded manager and shared state
+"""
+import pytest
+from unittest.mock import AsyncMock
+
+from backend.utils.circuit_breaker import (
+    CircuitBreaker,
+    CircuitBreakerConfig,
+    CircuitBreakerError,
+    CircuitBreakerManager,
+    CircuitState,
+    FileBreakerStateStore,
+    SlidingWindow,
+    endpoint_template
+)
+
+
+class TestSlidingWindow:
+    """Test sliding window accounting"""
+
+    def test_totals_within_window(self):
+        window = SlidingWindow(10)
+        window.record(True, now=100)
+        window.record(False, now=105)
+        window.record(False, now=109)
+
+        assert window.totals(now=109) == {"successes": 1, "failures": 2}
+
+    def test_old_buckets_expire(self):
+        window = SlidingWindow(10)
+        window.record(False, now=100)
+        window.record(True, now=111)
+
+        assert window.totals(now=111) == {"successes": 1, "failures": 0}
+
+
+class TestCircuitBreaker:
+    """Test circuit breaker state transitions"""
+
+    @pytest.mark.asyncio
+    async def test_opens_on_failure_rate(self):
+        breaker = CircuitBreaker("test", CircuitBreakerConfig(failure_threshold=2, failure_rate_threshold=0.5))
+        failing = AsyncMock(side_effect=ConnectionError("down"))
+
+        for _ in range(2):
+            with pytest.raises(ConnectionError):
+                await breaker.call(failing)
+
+        assert breaker.state == CircuitState.OPEN
+        with pytest.raises(CircuitBreakerError):
+            await breaker.call(failing)
+
+    @pytest.mark.asyncio
+    async def test_stays_closed_below_failure_rate(self):
+        breaker = CircuitBreaker("test", CircuitBreakerConfig(failure_threshold=2, failure_rate_threshold=0.5))
+        succeeding = AsyncMock(return_value="ok")
+        failing = AsyncMock(side_effect=ConnectionError("down"))
+
+        for _ in range(5):
+            await breaker.call(succeeding)
+        for _ in range(2):
+            with pytest.raises(ConnectionError):
+                await breaker.call(failing)
+
+        assert breaker.state == CircuitState.CLOSED
+        assert breaker.failure_count == 2
+
+    @pytest.mark.asyncio
+    async def test_state_shared_through_file_store(self, tmp_path):
+        config = CircuitBreakerConfig(failure_threshold=1, state_sync_interval=0)
+        store = FileBreakerStateStore(str(tmp_path))
+        worker_a = CircuitBreaker("shared", config, state_store=store)
+        worker_b = CircuitBreaker("shared", config, state_store=store)
+
+        with pytest.raises(ConnectionError):
+            await worker_a.call(AsyncMock(side_effect=ConnectionError("down")))
+
+        with pytest.raises(CircuitBreakerError):
+            await worker_b.call(AsyncMock(return_value="ok"))
+
+
+class TestCircuitBreakerManager:
+    """Test bounded breaker management"""
+
+    def test_evicts_least_recently_used_closed_breaker(self):
+        manager = CircuitBreakerManager(max_breakers=2)
+        first = manager.get_breaker("first")
+        first.state = CircuitState.OPEN
+        manager.get_breaker("second")
+        manager.get_breaker("third")
+
+        assert list(manager.breakers) == ["first", "third"]
+
+    def test_new_breaker_survives_when_all_others_are_open(self):
+        manager = CircuitBreakerManager(max_breakers=2)
+        for name in ("first", "second"):
+            manager.get_breaker(name).state = CircuitState.OPEN
+
+        third = manager.get_breaker("third")
+
+        assert list(manager.breakers) == ["second", "third"]
+        assert manager.get_breaker("third") is third
+
+    def test_endpoint_template(self):
+        assert endpoint_template("/sessions/test-session-123/visual") == "/sessions/{id}/visual"
+        assert endpoint_template("/sessions/42/cross-browser") == "/sessions/{id}/cross-browser"
+        assert endpoint_template("/health") == "/health"
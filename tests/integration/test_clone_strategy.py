@@ -0,0 +1,131 @@
+"""
+Tests for mirror-backed and partial clones of sandbox checkouts
+"""
+import os
+import subprocess
+import httpx
+import pytest
+from unittest.mock import AsyncMock, patch
+
+from backend.services.clone_strategy import CloneStrategy, RepositoryMirrors, clone_options, resolve_strategy
+from backend.services.grainchain_client import GrainchainClient
+
+
+def git(cwd, *args) -> str:
+    return subprocess.run(["git", *args], cwd=cwd, check=True, capture_output=True, text=True).stdout.strip()
+
+
+def commit_file(repo, name: str, content: str) -> str:
+    with open(os.path.join(repo, name), "w") as f:
+        f.write(content)
+    git(repo, "add", name)
+    git(repo, "-c", "user.name=test", "-c", "user.email=test@example.com", "commit", "-q", "-m", name)
+    return git(repo, "rev-parse", "HEAD")
+
+
+@pytest.fixture
+def upstream(tmp_path):
+    repo = tmp_path / "upstream"
+    repo.mkdir()
+    git(repo, "init", "-q", "-b", "main")
+    commit_file(repo, "README.md", "hello\n")
+    return repo
+
+
+class TestCloneStrategy:
+    """Test strategy selection and clone options"""
+
+    def test_auto_uses_worktrees_only_for_local_sandboxes(self):
+        assert resolve_strategy("auto", "http://localhost:8001") is CloneStrategy.WORKTREE
+        assert resolve_strategy("auto", "https://grainchain.example.com") is CloneStrategy.PARTIAL
+        assert resolve_strategy("worktree", local_checkout=False) is CloneStrategy.PARTIAL
+        assert resolve_strategy("bogus") is CloneStrategy.PARTIAL
+
+    def test_clone_options(self):
+        assert clone_options(CloneStrategy.PARTIAL)["filter"] == "blob:none"
+        assert clone_options(CloneStrategy.SHALLOW)["depth"] == 1
+        assert clone_options(CloneStrategy.FULL) == {}
+
+
+class TestRepositoryMirrors:
+    """Test bare mirrors, incremental fetches and worktree checkouts"""
+
+    @pytest.mark.asyncio
+    async def test_checkout_reuses_mirror_and_fetches_only_new_commits(self, tmp_path, upstream):
+        mirrors = RepositoryMirrors(str(tmp_path / "mirrors"), fetch_interval=3600)
+        url = str(upstream)
+        first = git(upstream, "rev-parse", "HEAD")
+
+        await mirrors.checkout(url, str(tmp_path / "run-1"), "main", commit=first)
+        await mirrors.checkout(url, str(tmp_path / "run-2"), "main", commit=first)
+
+        assert (tmp_path / "run-2" / "README.md").read_text() == "hello\n"
+        assert mirrors.stats["mirrors_created"] == 1
+        assert mirrors.stats["fetches"] == 0
+
+        second = commit_file(upstream, "app.py", "print('hi')\n")
+        await mirrors.checkout(url, str(tmp_path / "run-3"), "main", commit=second)
+
+        assert git(tmp_path / "run-3", "rev-parse", "HEAD") == second
+        assert mirrors.stats["fetches"] == 1
+
+    @pytest.mark.asyncio
+    async def test_token_is_passed_in_the_environment_not_argv(self, tmp_path):
+        mirrors = RepositoryMirrors(str(tmp_path / "mirrors"), token="secret-token")
+        calls = []
+
+        async def fake_git(*args, env=None):
+            calls.append((args, env or {}))
+            return ""
+
+        with patch.object(mirrors, "_git", fake_git):
+            await mirrors.update("https://github.com/o/r")
+
+        clone_args, clone_env = calls[0]
+        assert "clone" in clone_args
+        assert not any("secret" in arg or "extraheader" in arg for args, _ in calls for arg in args)
+        assert clone_env["GIT_CONFIG_KEY_0"] == "http.https://github.com/.extraheader"
+        assert clone_env["GIT_CONFIG_VALUE_0"].startswith("AUTHORIZATION: basic ")
+        assert mirrors._auth_env("https://gitlab.com/o/r") == {}
+
+    @pytest.mark.asyncio
+    async def test_remove_worktree(self, tmp_path, upstream):
+        mirrors = RepositoryMirrors(str(tmp_path / "mirrors"))
+        target = str(tmp_path / "run")
+        await mirrors.checkout(str(upstream), target, "main")
+
+        assert await mirrors.remove_worktree(target) is True
+        assert not os.path.exists(target)
+        assert await mirrors.remove_worktree(target) is False
+        worktrees = git(mirrors.mirror_path(str(upstream)), "worktree", "list")
+        assert target not in worktrees
+
+
+class TestGrainchainClone:
+    """Test how the sandbox client picks a clone strategy"""
+
+    @pytest.mark.asyncio
+    async def test_local_sandbox_checks_out_from_mirror(self):
+        client = GrainchainClient()
+        client.base_url = "http://localhost:8001"
+        mirrors = AsyncMock()
+
+        with patch("backend.services.grainchain_client.repository_mirrors", mirrors), \
+                patch.object(httpx.AsyncClient, "post", AsyncMock()) as post:
+            assert await client.clone_repository("https://github.com/o/r", "feature", "/tmp/v-1", commit="abc")
+
+        mirrors.checkout.assert_awaited_once()
+        post.assert_not_awaited()
+
+    @pytest.mark.asyncio
+    async def test_remote_sandbox_gets_partial_clone(self):
+        client = GrainchainClient()
+        client.base_url = "https://grainchain.example.com"
+        post = AsyncMock(return_value=httpx.Response(200, json={}))
+
+        with patch.object(httpx.AsyncClient, "post", post):
+            assert await client.clone_repository("https://github.com/o/r", "feature", "/tmp/v-1")
+
+        payload = post.await_args.kwargs["json"]
+        assert payload["filter"] == "blob:none"
+        assert payload["branch"] == "feature"
@@ -0,0 +1,187 @@
+"""
+Tests for diff-scoped static analysis
+"""
+import os
+import re
+import subprocess
+import pytest
+from unittest.mock import AsyncMock, patch
+
+from backend.integrations.graph_sitter_client import GraphSitterClient as SnapshotGraphSitterClient
+from backend.services.graph_sitter_client import GraphSitterClient
+from backend.utils.diff_analysis import (
+    ChangedFile,
+    changed_files_from_pull_request,
+    dependents_from_graph,
+    dependents_from_imports,
+    diff_issues,
+    git_changed_files
+)
+
+
+def git(root, *args):
+    subprocess.run(["git", "-C", str(root), "-c", "user.name=t", "-c", "user.email=t@t", *args],
+                   check=True, capture_output=True)
+
+
+def issues_from_markers(file_path, language="auto", include_security=False):
+    """Fake analysis: one issue per line containing BAD"""
+    with open(file_path) as f:
+        lines = f.read().splitlines()
+    return {
+        "metrics": {"lines_of_code": len(lines)},
+        "issues": [{"type": "lint", "line": i, "message": line.strip()}
+                   for i, line in enumerate(lines) if "BAD" in line]
+    }
+
+
+def issues_with_imports(file_path, language="auto", include_security=False):
+    """Fake analysis that also flags names imported from a sibling module that lacks them"""
+    result = issues_from_markers(file_path, language, include_security)
+    with open(file_path) as f:
+        text = f.read()
+    for module, name in re.findall(r"^from (\w+) import (\w+)$", text, re.M):
+        sibling = os.path.join(os.path.dirname(file_path), f"{module}.py")
+        with open(sibling) as f:
+            if f"{name} =" not in f.read():
+                result["issues"].append({"type": "import", "message": f"{name} is not defined in {module}"})
+    return result
+
+
+class TestDiffHelpers:
+    """Test change lists, dependents and issue matching"""
+
+    def test_pull_request_files_map_statuses(self):
+        changes = changed_files_from_pull_request([
+            {"filename": "a.py", "status": "modified"},
+            {"filename": "new.py", "status": "renamed", "previous_filename": "old.py"},
+            {"filename": "gone.py", "status": "removed"}
+        ])
+
+        assert [(c.base_path, c.head_path) for c in changes] == [
+            ("a.py", "a.py"), ("old.py", "new.py"), ("gone.py", None)
+        ]
+
+    def test_direct_dependents_from_imports_and_graph(self):
+        imports = {
+            "pkg/core.py": [],
+            "pkg/api.py": [".core"],
+            "app.py": ["pkg.api"],
+            "web/view.ts": ["../lib/util", "react"],
+            "lib/util.ts": []
+        }
+
+        assert dependents_from_imports(imports, {"pkg/core.py", "lib/util.ts"}) == {"pkg/api.py", "web/view.ts"}
+
+        graph = {"nodes": [{"id": "A", "file": "a.ts"}, {"id": "B", "file": "b.ts"}],
+                 "edges": [{"from": "B", "to": "A"}]}
+        assert dependents_from_graph(graph, {"a.ts"}) == {"b.ts"}
+
+    def test_issues_match_across_line_shifts_and_renames(self):
+        base = [{"file": "old.py", "type": "lint", "line": 3, "message": "x"},
+                {"file": "old.py", "type": "lint", "line": 9, "message": "y"}]
+        head = [{"file": "new.py", "type": "lint", "line": 5, "message": "x"},
+                {"file": "new.py", "type": "lint", "line": 6, "message": "z"}]
+
+        introduced, resolved = diff_issues(base, head, {"old.py": "new.py"})
+
+        assert [i["message"] for i in introduced] == ["z"]
+        assert [i["message"] for i in resolved] == ["y"]
+
+
+class TestLocalDiffAnalysis:
+    """Test diff analysis of a local checkout"""
+
+    @pytest.mark.asyncio
+    async def test_only_changed_files_and_dependents_are_analyzed(self, tmp_path):
+        (tmp_path / "core.py").write_text("x = 1  # BAD old\n")
+        (tmp_path / "api.py").write_text("from core import x\n")
+        (tmp_path / "unrelated.py").write_text("y = 2  # BAD untouched\n")
+        git(tmp_path, "init", "-q")
+        git(tmp_path, "add", ".")
+        git(tmp_path, "commit", "-q", "-m", "base")
+        base_sha = subprocess.run(["git", "-C", str(tmp_path), "rev-parse", "HEAD"],
+                                  capture_output=True, text=True, check=True).stdout.strip()
+        (tmp_path / "core.py").write_text("x = 1  # BAD new\n")
+        git(tmp_path, "commit", "-qam", "head")
+
+        client = GraphSitterClient()
+        client.base_url = f"http://graph-sitter-test/{tmp_path.name}"
+        analyze_file = AsyncMock(side_effect=issues_from_markers)
+
+        with patch.object(client, "analyze_file", analyze_file):
+            report = await client.analyze_diff(str(tmp_path), base_sha, "HEAD")
+
+        analyzed = sorted(call.args[0].rsplit("/", 1)[-1] for call in analyze_file.await_args_list)
+        assert analyzed == ["api.py", "api.py", "core.py", "core.py"]
+        assert report["changed_files"] == [{"path": "core.py", "status": "modified", "previous_path": None}]
+        assert report["dependents"] == ["api.py"]
+        assert [i["message"] for i in report["introduced_issues"]] == ["x = 1  # BAD new"]
+        assert [i["message"] for i in report["resolved_issues"]] == ["x = 1  # BAD old"]
+
+    @pytest.mark.asyncio
+    async def test_changed_export_breaks_importer_with_cold_cache(self, tmp_path):
+        (tmp_path / "core.py").write_text("x = 1\n")
+        (tmp_path / "api.py").write_text("from core import x\n")
+        git(tmp_path, "init", "-q")
+        git(tmp_path, "add", ".")
+        git(tmp_path, "commit", "-q", "-m", "base")
+        base_sha = subprocess.run(["git", "-C", str(tmp_path), "rev-parse", "HEAD"],
+                                  capture_output=True, text=True, check=True).stdout.strip()
+        (tmp_path / "core.py").write_text("y = 1\n")
+        git(tmp_path, "commit", "-qam", "head")
+
+        client = GraphSitterClient()
+        client.base_url = f"http://graph-sitter-cold/{tmp_path.name}"
+
+        with patch.object(client, "analyze_file", AsyncMock(side_effect=issues_with_imports)):
+            report = await client.analyze_diff(str(tmp_path), base_sha, "HEAD")
+
+        assert [(i["file"], i["message"]) for i in report["introduced_issues"]] == [
+            ("api.py", "x is not defined in core")
+        ]
+        assert report["resolved_issues"] == []
+
+    def test_git_changes_detect_renames(self, tmp_path):
+        (tmp_path / "a.py").write_text("value = 'same content for rename detection'\n")
+        git(tmp_path, "init", "-q")
+        git(tmp_path, "add", ".")
+        git(tmp_path, "commit", "-q", "-m", "base")
+        git(tmp_path, "mv", "a.py", "b.py")
+
+        changes = git_changed_files(str(tmp_path), "HEAD")
+
+        assert changes == [ChangedFile("b.py", "renamed", "a.py")]
+
+
+class TestSnapshotDiffAnalysis:
+    """Test diff analysis against a Graph-Sitter snapshot"""
+
+    @pytest.mark.asyncio
+    async def test_base_side_is_analyzed_at_base_ref(self):
+        client = SnapshotGraphSitterClient()
+        client.base_url = "http://graph-sitter-snapshot-test"
+        client.enabled = True
+        results = {
+            (None, "src/a.ts"): {"issues": [{"type": "lint", "message": "new"}]},
+            ("base", "src/a.ts"): {"issues": [{"type": "lint", "message": "old"}]},
+            (None, "src/b.ts"): {"issues": [{"type": "import", "message": "missing export"}]},
+            ("base", "src/b.ts"): {"issues": []}
+        }
+        analyze_file = AsyncMock(side_effect=lambda snapshot, path, language, ref=None: results[(ref, path)])
+        graph = {"nodes": [{"id": "a", "file": "src/a.ts"}, {"id": "b", "file": "src/b.ts"}],
+                 "edges": [{"from": "b", "to": "a"}]}
+
+        with patch.object(client, "analyze_file", analyze_file), \
+                patch.object(client, "get_dependency_graph", AsyncMock(return_value=graph)):
+            report = await client.analyze_diff(
+                "snap-1", "base", "head",
+                [ChangedFile("src/a.ts", "modified")],
+                head_entries=[("src/a.ts", "h1", 10), ("src/b.ts", "b1", 10), ("src/c.ts", "c1", 10)],
+                base_entries=[("src/a.ts", "b0", 10), ("src/b.ts", "b1", 10), ("src/c.ts", "c1", 10)]
+            )
+
+        assert analyze_file.await_count == 4
+        assert report["dependents"] == ["src/b.ts"]
+        assert [i["file"] for i in report["introduced_issues"]] == ["src/a.ts", "src/b.ts"]
+        assert report["summary"]["resolved_issues"] == 1
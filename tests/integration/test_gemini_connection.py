@@ -0,0 +1,86 @@
+"""
+Tests for the shared Gemini connection and concurrency limit
+"""
+import asyncio
+import json
+import httpx
+import pytest
+
+from backend.integrations.gemini_client import GeminiClient, GeminiConnection
+from backend.utils.metrics import NAMESPACE, get_sample_value
+from backend.utils.rate_limiter import TokenBucket, TokenBucketConfig
+
+
+def make_client(handler, max_concurrency: int = 2) -> GeminiClient:
+    client = GeminiClient()
+    client.api_key = "test-key"
+    client.response_cache = None
+    client.rate_limiter = TokenBucket("gemini-test", TokenBucketConfig(rate=1000, capacity=1000))
+    client.connection = GeminiConnection(max_concurrency=max_concurrency)
+    client.connection.client()  # Bind to the test's event loop before swapping the transport
+    client.connection._client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    return client
+
+
+def slow_handler(state, delay: float = 0.05):
+    async def handler(request: httpx.Request) -> httpx.Response:
+        state["active"] += 1
+        state["peak"] = max(state["peak"], state["active"])
+        await asyncio.sleep(delay)
+        state["active"] -= 1
+        text = json.dumps({"root_cause": "boom"})
+        return httpx.Response(200, json={"candidates": [{"content": {"parts": [{"text": text}]}}]})
+    return handler
+
+
+class TestGeminiConnection:
+    """Test concurrency limits, deadlines and latency metrics"""
+
+    @pytest.mark.asyncio
+    async def test_concurrent_calls_share_client_and_respect_limit(self):
+        state = {"active": 0, "peak": 0}
+        client = make_client(slow_handler(state), max_concurrency=2)
+        shared = client.connection._client
+
+        results = await asyncio.gather(*[client.analyze_error(f"error {i}") for i in range(6)])
+
+        assert all(result == {"root_cause": "boom"} for result in results)
+        assert state["peak"] == 2
+        assert client.connection._client is shared
+        assert client.connection.get_stats()["granted"] == 6
+
+    @pytest.mark.asyncio
+    async def test_queue_wait_past_deadline_fails_fast(self):
+        client = make_client(slow_handler({"active": 0, "peak": 0}, delay=0.3), max_concurrency=1)
+        client.request_deadline = 0.1
+
+        first, second = await asyncio.gather(client.analyze_error("slow"), client.analyze_error("queued"))
+
+        assert first == {"root_cause": "boom"} or second == {"root_cause": "boom"}
+        assert client.connection.stats["queue_timeouts"] == 1
+        failed = second if first == {"root_cause": "boom"} else first
+        assert "API error" in failed["root_cause"]
+
+    @pytest.mark.asyncio
+    async def test_queue_wait_and_model_latency_are_recorded_separately(self):
+        labels = {"service": "gemini", "operation": "generate_test_suggestions"}
+        queued_before = get_sample_value(f"{NAMESPACE}_llm_queue_wait_seconds_count", labels)
+        calls_before = get_sample_value(f"{NAMESPACE}_llm_request_duration_seconds_count",
+                                        {**labels, "outcome": "200"})
+        client = make_client(slow_handler({"active": 0, "peak": 0}))
+
+        await client.generate_test_suggestions("def f(): pass")
+
+        assert get_sample_value(f"{NAMESPACE}_llm_queue_wait_seconds_count", labels) == queued_before + 1
+        assert get_sample_value(f"{NAMESPACE}_llm_request_duration_seconds_count",
+                                {**labels, "outcome": "200"}) == calls_before + 1
+
+    @pytest.mark.asyncio
+    async def test_health_check_uses_shared_client(self):
+        client = make_client(lambda request: httpx.Response(200, json={"name": "models/gemini-pro"}))
+
+        async with client:
+            health = await client.health_check()
+
+        assert health["status"] == "healthy"
+        assert health["connection"]["max_concurrency"] == 2
@@ -0,0 +1,77 @@
+"""
+Tests for parallel GitHub pagination and the repository list cache
+"""
+import pytest
+import pytest_asyncio
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from backend.integrations.github_client import (
+    GitHubClient,
+    RepositoryListCache,
+    parse_last_page
+)
+
+
+@pytest_asyncio.fixture
+async def server():
+    requested_pages = []
+
+    async def handler(request):
+        page = int(request.query.get("page", "1"))
+        requested_pages.append(page)
+        repos = [{"id": page * 10 + i, "updated_at": f"2024-01-0{page}T00:00:0{i}Z"} for i in range(2)]
+        headers = {}
+        if page == 1:
+            base = str(request.url.with_query({}))
+            headers["Link"] = f'<{base}?page=2>; rel="next", <{base}?page=3>; rel="last"'
+        return web.json_response(repos, headers=headers)
+
+    app = web.Application()
+    app.router.add_get("/user/repos", handler)
+    test_server = TestServer(app)
+    await test_server.start_server()
+    test_server.requested_pages = requested_pages
+    yield test_server
+    await test_server.close()
+
+
+def make_client(base_url: str) -> GitHubClient:
+    client = GitHubClient(token="test-token")
+    client.base_url = base_url.rstrip("/")
+    client.rate_limiter = None
+    client.http_cache = None
+    return client
+
+
+class TestPagination:
+    """Test Link-driven concurrent page fetching"""
+
+    def test_parse_last_page(self):
+        link = ('<https://api.github.com/user/repos?per_page=100&page=2>; rel="next", '
+                '<https://api.github.com/user/repos?per_page=100&page=7>; rel="last"')
+        assert parse_last_page(link) == 7
+        assert parse_last_page(None) == 1
+        assert parse_last_page('<https://api.github.com/user/repos?page=1>; rel="prev"') == 1
+
+    @pytest.mark.asyncio
+    async def test_fetches_every_page(self, server):
+        async with make_client(str(server.make_url(""))) as client:
+            repositories = [repo async for repo in client.iter_repositories()]
+
+        assert sorted(server.requested_pages) == [1, 2, 3]
+        assert len(repositories) == 6
+
+    @pytest.mark.asyncio
+    async def test_list_all_is_sorted_and_cached(self, server, monkeypatch):
+        cache = RepositoryListCache(ttl=60)
+        monkeypatch.setattr("backend.integrations.github_client.repository_list_cache", cache)
+
+        async with make_client(str(server.make_url(""))) as client:
+            first = await client.list_all_repositories()
+            first[0]["is_pinned"] = True
+            second = await client.list_all_repositories()
+
+        assert [repo["id"] for repo in first] == [31, 30, 21, 20, 11, 10]
+        assert len(server.requested_pages) == 3
+        assert "is_pinned" not in second[0]
@@ -0,0 +1,111 @@
+"""
+Tests for single-pass streamed code reports in the Graph-Sitter client
+"""
+import json
+import httpx
+import pytest
+from unittest.mock import AsyncMock, patch
+
+from backend.services.graph_sitter_client import GraphSitterClient, ReportScore
+
+
+def file_result(complexity: int = 2, issues: int = 0, security: int = 0):
+    return {
+        "metrics": {"lines_of_code": 10, "complexity": complexity, "maintainability": 80},
+        "issues": [{"message": "issue", "severity": "low"}] * issues,
+        "security_issues": [{"message": "secret", "severity": "high"}] * security
+    }
+
+
+def make_client(tmp_path, handler) -> GraphSitterClient:
+    client = GraphSitterClient()
+    # Unique per test so cached results never leak between tests
+    client.base_url = f"http://graph-sitter-test/{tmp_path.name}"
+    client._client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    return client
+
+
+def combined_handler(requests):
+    def handler(request: httpx.Request) -> httpx.Response:
+        payload = json.loads(request.content)
+        requests.append(payload)
+        lines = [{"section": "file", "path": f["path"], "result": file_result(issues=1)}
+                 for f in payload["files"]]
+        if "dependencies" in payload["sections"]:
+            lines.append({"section": "dependencies",
+                          "result": {"dependencies": ["httpx"], "vulnerabilities": [{"id": "CVE-1"}]}})
+        return httpx.Response(200, text="\n".join(json.dumps(line) for line in lines))
+    return handler
+
+
+class TestStreamedReport:
+    """Test combined requests, caching and running scores"""
+
+    @pytest.mark.asyncio
+    async def test_one_round_trip_then_only_changed_files(self, tmp_path):
+        for name in ("a.py", "b.py", "requirements.txt"):
+            (tmp_path / name).write_text(f"# {name}\n")
+        requests = []
+        client = make_client(tmp_path, combined_handler(requests))
+
+        first = await client.generate_code_report(str(tmp_path))
+        (tmp_path / "b.py").write_text("# changed\n")
+        second = await client.generate_code_report(str(tmp_path))
+        await client.close()
+
+        assert len(requests) == 2
+        assert sorted(f["path"] for f in requests[0]["files"]) == ["a.py", "b.py"]
+        assert "dependencies" in requests[0]["sections"]
+        assert [f["path"] for f in requests[1]["files"]] == ["b.py"]
+        assert "dependencies" not in requests[1]["sections"]
+        assert second["analysis"]["cache"] == {"files_reanalyzed": 1, "files_reused": 1}
+        assert second["vulnerabilities"] == first["vulnerabilities"] == [{"id": "CVE-1"}]
+
+    @pytest.mark.asyncio
+    async def test_sections_carry_running_score(self, tmp_path):
+        for name in ("a.py", "b.py"):
+            (tmp_path / name).write_text(f"# {name}\n")
+        client = make_client(tmp_path, combined_handler([]))
+        sections = []
+
+        async def collect(section):
+            sections.append(section)
+
+        report = await client.generate_code_report(str(tmp_path), on_section=collect)
+
+        scores = [section["score"] for section in sections if section["section"] == "file"]
+        assert scores == [98.0, 96.0]
+        assert sections[-1]["section"] == "report"
+        expected = ReportScore()
+        expected.issues = len(report["analysis"]["issues"])
+        expected.security_issues = len(report["security_issues"])
+        expected.set_dependencies({"vulnerabilities": report["vulnerabilities"]})
+        expected.complexity = report["metrics"].get("complexity_score", 0)
+        assert report["summary"]["overall_score"] == expected.value
+
+    @pytest.mark.asyncio
+    async def test_falls_back_to_per_file_requests(self, tmp_path):
+        (tmp_path / "a.py").write_text("# a\n")
+        client = make_client(tmp_path, lambda request: httpx.Response(404))
+        analyze_file = AsyncMock(return_value=file_result(security=1))
+        dependencies = AsyncMock(return_value={"dependencies": [], "vulnerabilities": []})
+
+        with patch.object(client, "analyze_file", analyze_file), \
+                patch.object(client, "get_dependency_analysis", dependencies):
+            report = await client.generate_code_report(str(tmp_path))
+
+        analyze_file.assert_awaited_once()
+        assert report["summary"]["security_issues"] == 1
+        assert report["security_issues"][0]["file"] == "a.py"
+
+
+class TestReportScore:
+    """Test incremental scoring"""
+
+    def test_complexity_is_line_weighted(self):
+        score = ReportScore()
+        score.add_file({"metrics": {"lines_of_code": 30, "complexity": 20}})
+        score.add_file({"metrics": {"lines_of_code": 10, "complexity": 0}})
+
+        assert score.complexity == 15.0
+        assert score.value == 90.0
@@ -0,0 +1,86 @@
+"""
+Tests for the cached background health monitor
+"""
+import asyncio
+import pytest
+
+from backend.services.health_monitor import HealthMonitor
+
+
+class TestHealthMonitor:
+    """Test cached results, staleness and overall status"""
+
+    @pytest.mark.asyncio
+    async def test_results_are_served_from_cache(self):
+        monitor = HealthMonitor(jitter=0.0)
+        calls = []
+
+        async def check():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            return {"status": "healthy"}
+
+        monitor.register("database", check, critical=True)
+
+        # Concurrent first reads share one in-flight check
+        first, second = await asyncio.gather(monitor.results(), monitor.results())
+        await monitor.results()
+
+        assert len(calls) == 1
+        assert first["database"]["status"] == second["database"]["status"] == "healthy"
+        assert first["database"]["stale"] is False
+
+    @pytest.mark.asyncio
+    async def test_stale_results_are_degraded(self):
+        monitor = HealthMonitor()
+
+        async def check():
+            return {"status": "healthy"}
+
+        probe = monitor.register("redis", check, interval=1, stale_after=5, critical=True)
+        await monitor.refresh("redis")
+        probe.checked_monotonic -= 10
+
+        result = monitor.get("redis")
+
+        assert result["stale"] is True
+        assert result["status"] == "degraded"
+        assert monitor.overall_status({"redis": result}) == "degraded"
+
+    @pytest.mark.asyncio
+    async def test_failures_and_timeouts_mark_probe_unhealthy(self):
+        monitor = HealthMonitor(timeout=0.01)
+
+        async def hangs():
+            await asyncio.sleep(1)
+
+        async def raises():
+            raise ConnectionError("refused")
+
+        monitor.register("database", hangs, critical=True)
+        monitor.register("grainchain", raises)
+
+        results = await monitor.results()
+
+        assert results["database"]["error"].startswith("Timeout")
+        assert results["grainchain"]["status"] == "unhealthy"
+        assert results["grainchain"]["error"] == "refused"
+        assert monitor.overall_status(results) == "unhealthy"
+        assert monitor.overall_status({"grainchain": results["grainchain"]}) == "degraded"
+
+    @pytest.mark.asyncio
+    async def test_background_loop_refreshes_probes(self):
+        monitor = HealthMonitor(jitter=0.0)
+        calls = []
+
+        async def check():
+            calls.append(1)
+            return {"status": "healthy"}
+
+        monitor.register("github_api", check, interval=0.01)
+        await monitor.start()
+        await asyncio.sleep(0.05)
+        await monitor.stop()
+
+        assert len(calls) >= 2
+        assert monitor.get("github_api")["status"] == "healthy"
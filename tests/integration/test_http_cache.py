@@ -0,0 +1,80 @@
+"""
+Tests for conditional GET caching in BaseClient
+"""
+import pytest
+import pytest_asyncio
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from backend.integrations.base_client import BaseClient
+from backend.utils.http_cache import ConditionalRequestCache
+
+
+class CachingClient(BaseClient):
+    """Client with conditional caching against a local test server"""
+
+    def __init__(self, base_url: str, token: str = "token-a"):
+        self.token = token
+        super().__init__(service_name="cache_test_api", base_url=base_url, conditional_cache=True)
+        self.http_cache = ConditionalRequestCache("cache_test_api", max_entries=2)
+
+    def _get_default_headers(self):
+        return {"Authorization": f"token {self.token}"}
+
+    async def _health_check_request(self):
+        pass
+
+
+@pytest_asyncio.fixture
+async def server():
+    calls = {"full": 0, "not_modified": 0}
+
+    async def handler(request):
+        if request.headers.get("If-None-Match") == '"v1"':
+            calls["not_modified"] += 1
+            return web.Response(status=304)
+        calls["full"] += 1
+        return web.json_response([{"name": "repo"}], headers={"ETag": '"v1"'})
+
+    app = web.Application()
+    app.router.add_get("/user/repos", handler)
+    test_server = TestServer(app)
+    await test_server.start_server()
+    test_server.calls = calls
+    yield test_server
+    await test_server.close()
+
+
+class TestConditionalCache:
+    """Test ETag revalidation"""
+
+    @pytest.mark.asyncio
+    async def test_second_read_is_served_from_304(self, server):
+        async with CachingClient(str(server.make_url(""))) as client:
+            first = await client.get("/user/repos")
+            second = await client.get("/user/repos")
+
+        assert first == second == [{"name": "repo"}]
+        assert server.calls == {"full": 1, "not_modified": 1}
+        assert client.http_cache.stats["revalidated"] == 1
+
+    @pytest.mark.asyncio
+    async def test_cache_is_keyed_per_token(self, server):
+        base_url = str(server.make_url(""))
+        cache = ConditionalRequestCache("shared", max_entries=10)
+        async with CachingClient(base_url, token="token-a") as client_a:
+            client_a.http_cache = cache
+            await client_a.get("/user/repos")
+        async with CachingClient(base_url, token="token-b") as client_b:
+            client_b.http_cache = cache
+            await client_b.get("/user/repos")
+
+        assert server.calls["full"] == 2
+
+    def test_lru_bound(self):
+        cache = ConditionalRequestCache("bounded", max_entries=2)
+        for index in range(3):
+            cache.store(f"key-{index}", "{}", {"ETag": f'"{index}"'})
+
+        assert list(cache.entries) == ["key-1", "key-2"]
+        assert cache.stats["evictions"] == 1
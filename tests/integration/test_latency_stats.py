@@ -0,0 +1,100 @@
+"""
+Tests for rolling latency statistics and their use in the connection pool
+"""
+import pytest
+import pytest_asyncio
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from backend.utils.connection_pool import ConnectionPoolConfig, ConnectionPoolManager
+from backend.utils.latency_stats import LatencyTracker, RecentWindow, RollingLatency
+
+
+class TestRollingLatency:
+    """Test bucketed quantiles and window rotation"""
+
+    def test_quantiles_within_bucket_precision(self):
+        rolling = RollingLatency(window_seconds=60, slices=6)
+        for ms in range(1, 1001):
+            rolling.record(ms / 1000, now=100.0)
+
+        snapshot = rolling.snapshot(now=100.0)
+
+        assert snapshot["count"] == 1000
+        assert snapshot["p50"] == pytest.approx(0.5, rel=0.05)
+        assert snapshot["p95"] == pytest.approx(0.95, rel=0.05)
+        assert snapshot["p99"] == pytest.approx(0.99, rel=0.05)
+        assert snapshot["max"] == 1.0
+
+    def test_old_slices_rotate_out(self):
+        rolling = RollingLatency(window_seconds=60, slices=6)
+        rolling.record(5.0, error=True, now=0.0)
+        rolling.record(0.1, now=55.0)
+
+        assert rolling.snapshot(now=55.0)["count"] == 2
+        later = rolling.snapshot(now=65.0)
+        assert later["count"] == 1
+        assert later["error_rate"] == 0.0
+
+    def test_success_mean_excludes_errors(self):
+        rolling = RollingLatency(window_seconds=60, slices=6)
+        rolling.record(30.0, error=True, now=1.0)
+        rolling.record(0.1, now=1.0)
+        rolling.record(0.3, now=1.0)
+
+        snapshot = rolling.snapshot(now=1.0)
+
+        assert snapshot["mean"] == pytest.approx(10.1333, rel=1e-3)
+        assert snapshot["success_mean"] == pytest.approx(0.2)
+
+    def test_recent_window_keeps_running_totals(self):
+        recent = RecentWindow(size=3)
+        for seconds, error in [(9.0, True), (1.0, False), (2.0, False), (3.0, False)]:
+            recent.add(seconds, error)
+
+        assert len(recent) == 3
+        assert recent.average == 2.0
+        assert recent.success_rate == 1.0
+
+    def test_key_sets_are_bounded(self):
+        tracker = LatencyTracker(max_keys=2)
+        for host in ("a", "b", "c", "d"):
+            tracker.record(host, "GET", 0.01)
+
+        assert set(tracker.by_host) == {"a", "b", "other"}
+        assert tracker.snapshot()["by_host"]["other"]["count"] == 2
+
+
+class TestPoolLatency:
+    """Test latency reporting through the pool manager"""
+
+    @pytest_asyncio.fixture
+    async def server(self):
+        app = web.Application()
+        app.router.add_route("*", "/{tail:.*}", lambda request: web.json_response({"ok": True}))
+        test_server = TestServer(app)
+        await test_server.start_server()
+        yield test_server
+        await test_server.close()
+
+    @pytest.mark.asyncio
+    async def test_metrics_report_percentiles_per_host_and_method(self, server):
+        manager = ConnectionPoolManager()
+        pool = await manager.get_pool("latency-test", ConnectionPoolConfig(latency_window=60))
+        try:
+            for _ in range(5):
+                async with await pool.get(str(server.make_url("/a"))):
+                    pass
+            async with await pool.post(str(server.make_url("/b")), json={}):
+                pass
+        finally:
+            metrics = manager.get_all_metrics()["latency-test"]
+            await manager.close_all_pools()
+
+        latency = metrics["latency"]
+        assert latency["window_seconds"] == 60
+        assert latency["overall"]["count"] == 6
+        assert metrics["request_metrics"]["average_response_time"] == latency["overall"]["success_mean"]
+        assert latency["by_method"]["GET"]["count"] == 5
+        assert latency["by_host"][server.host]["p99"] >= latency["by_host"][server.host]["p50"] > 0
+        assert metrics["recent_performance"]["sample_size"] == 6
@@ -0,0 +1,127 @@
+"""
+Tests for the local web-eval agent test suite
+"""
+import asyncio
+import time
+import pytest
+import pytest_asyncio
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from backend.local_web_eval_agent import PerformanceRequest, TestRequest, WebEvalAgent, percentile
+
+
+@pytest_asyncio.fixture
+async def server():
+    hits = {"page": 0}
+
+    async def page(request):
+        hits["page"] += 1
+        await asyncio.sleep(0.2)
+        return web.Response(
+            text='<html><title>CodegenCICD</title><meta name="viewport"><div id="root" class="flex"></div></html>',
+            content_type="text/html"
+        )
+
+    async def api(request):
+        await asyncio.sleep(0.2)
+        return web.json_response({"status": "ok"})
+
+    app = web.Application()
+    app.router.add_get("/", page)
+    app.router.add_get("/{tail:.*}", api)
+    test_server = TestServer(app)
+    await test_server.start_server()
+    test_server.hits = hits
+    yield test_server
+    await test_server.close()
+
+
+class TestComprehensiveSuite:
+    """Test concurrent execution of the local suite"""
+
+    @pytest.mark.asyncio
+    async def test_checks_share_one_fetch_and_run_concurrently(self, server):
+        agent = WebEvalAgent()
+        request = TestRequest(base_url=str(server.make_url("/")), gemini_api_key="x")
+
+        started = time.monotonic()
+        result = await agent.run_comprehensive_test_suite(request)
+        elapsed = time.monotonic() - started
+        await agent.close()
+
+        assert server.hits["page"] == 1
+        assert elapsed < 0.6
+        assert [r["name"] for r in result["results"]] == [
+            "Dashboard Connectivity",
+            "Backend API Connectivity",
+            "HTML Structure",
+            "Responsive Design",
+            "Basic Performance",
+        ]
+        assert result["summary"]["dashboard_accessible"] is True
+
+    @pytest.mark.asyncio
+    async def test_slow_check_times_out_alone(self, server):
+        agent = WebEvalAgent()
+        request = TestRequest(base_url=str(server.make_url("/")), gemini_api_key="x", check_timeout=0.05)
+
+        results = [result async for _, _, result in agent.iter_test_suite(request)]
+        await agent.close()
+
+        assert len(results) == 5
+        assert all(result["error"] == "timeout" for result in results)
+
+
+class TestPerformanceMeasurement:
+    """Test the measurement mode and baseline comparison"""
+
+    @pytest_asyncio.fixture
+    async def asset_server(self):
+        async def page(request):
+            return web.Response(
+                text='<html><link rel="stylesheet" href="/app.css"><link rel="canonical" href="/">'
+                     '<script src="/app.js"></script><img src="data:image/png;base64,AA"></html>',
+                content_type="text/html"
+            )
+
+        async def asset(request):
+            if request.headers.get("If-None-Match") == '"v1"':
+                return web.Response(status=304)
+            content_type = "text/css" if request.path.endswith(".css") else "application/javascript"
+            return web.Response(text="x" * 2048, content_type=content_type,
+                                headers={"ETag": '"v1"', "Cache-Control": "max-age=3600"})
+
+        app = web.Application()
+        app.router.add_get("/", page)
+        app.router.add_get("/app.css", asset)
+        app.router.add_get("/app.js", asset)
+        test_server = TestServer(app)
+        await test_server.start_server()
+        yield test_server
+        await test_server.close()
+
+    @pytest.mark.asyncio
+    async def test_reports_percentiles_assets_and_baseline_diff(self, asset_server, tmp_path, monkeypatch):
+        monkeypatch.setattr("backend.local_web_eval_agent.PERF_BASELINE_DIR", str(tmp_path))
+        agent = WebEvalAgent()
+        request = PerformanceRequest(base_url=str(asset_server.make_url("/")), project="web",
+                                     iterations=5, warmup=1, save_baseline=True)
+
+        first = await agent.measure_page_performance(request)
+        second = await agent.measure_page_performance(request)
+        await agent.close()
+
+        metrics = first["metrics"]
+        assert first["baseline"] is None
+        assert metrics["asset_count"] == 2
+        assert metrics["asset_counts"] == {"script": 1, "link": 1, "img": 0}
+        assert metrics["cacheable_share"] == 1.0
+        assert metrics["revalidation_share"] == 1.0
+        assert metrics["ttfb_p50"] <= metrics["ttfb_p99"]
+        assert set(second["baseline"]["metrics"]) >= {"ttfb_p50", "total_transfer_bytes"}
+
+    def test_percentile(self):
+        assert percentile([5, 1, 4, 2, 3], 50) == 3
+        assert percentile([5, 1, 4, 2, 3], 99) == 5
+        assert percentile([], 95) == 0.0
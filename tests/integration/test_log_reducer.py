@@ -0,0 +1,121 @@
+"""
+Tests for log reduction ahead of Gemini prompts
+"""
+import pytest
+from unittest.mock import AsyncMock, patch
+
+from backend.services.validation_service import ValidationService
+from backend.utils.log_reducer import LogReducer, bound_prompt_text, estimate_tokens, log_lines, summarize_log
+
+
+def npm_build_log(warnings: int = 20000) -> str:
+    lines = ["$ npm install"]
+    lines += [f"npm WARN deprecated pkg{i}@1.0.{i}: use something else" for i in range(warnings)]
+    lines += [
+        "$ npm run build",
+        "src/a.ts(3,5): error TS2322: Type 'string' is not assignable to type 'number'.",
+        "Traceback (most recent call last):",
+        '  File "build.py", line 1, in <module>',
+        "    import missing",
+        "ModuleNotFoundError: No module named 'missing'",
+        "npm ERR! code ELIFECYCLE"
+    ]
+    return "\n".join(lines)
+
+
+class TestLogReducer:
+    """Test collapsing, extraction and budgeting"""
+
+    def test_repeated_lines_collapse_despite_volatile_tokens(self):
+        reducer = LogReducer().feed_text([f"2024-01-01T00:00:{i:02d}Z polling job {i}" for i in range(50)])
+
+        summary = reducer.render()
+
+        assert reducer.collapsed_lines == 49
+        assert "previous line repeated 49 more times" in summary
+
+    def test_sections_keep_head_and_tail(self):
+        lines = ["$ make build"] + [f"step {i} compiled unit_{chr(97 + i % 26)}{i}" for i in range(100)]
+
+        summary = LogReducer(head_lines=2, tail_lines=3).feed_text(lines).render()
+
+        assert "$ make build" in summary
+        assert "95 lines omitted" in summary
+        assert "unit_a0" in summary and "unit_v99" in summary
+        assert "unit_y50" not in summary
+
+    def test_errors_and_traces_are_extracted(self):
+        reducer = LogReducer().feed_text(npm_build_log(warnings=10))
+        summary = reducer.render()
+
+        signatures = [line for line, _ in reducer.errors.values()]
+        assert signatures == [
+            "src/a.ts(3,5): error TS2322: Type 'string' is not assignable to type 'number'.",
+            "ModuleNotFoundError: No module named 'missing'",
+            "npm ERR! code ELIFECYCLE"
+        ]
+        assert reducer.traces[0][0].startswith("Traceback")
+        assert reducer.traces[0][-1].startswith("ModuleNotFoundError")
+        assert "Stack trace:" in summary
+
+    def test_huge_log_fits_budget(self):
+        log = npm_build_log()
+
+        summary = summarize_log(log, token_budget=600)
+
+        assert estimate_tokens(log) > 100_000
+        assert estimate_tokens(summary) <= 600
+        assert "TS2322" in summary and "ModuleNotFoundError" in summary
+
+    def test_structured_entries_split_into_lines(self):
+        entries = [{"step": "deployment", "result": {"deployment_result": {"output": "a\nb", "exit_code": 1}}}]
+
+        assert list(log_lines(entries)) == [
+            "step: deployment", "result:", "  deployment_result:", "    output:", "      a", "      b",
+            "    exit_code: 1"
+        ]
+
+    def test_small_text_is_unchanged(self):
+        text = "Deployment finished\nAll checks passed"
+
+        assert bound_prompt_text(text, 1000) is text
+
+
+class TestGeminiPromptBudget:
+    """Test that Gemini prompts embed reduced logs"""
+
+    @pytest.mark.asyncio
+    async def test_step_failure_reduces_only_the_error(self):
+        service = ValidationService()
+        service.gemini.prompt_token_budget = 1000
+        analyze = AsyncMock(return_value={"root_cause": "type error"})
+
+        with patch.object(service.gemini, "analyze_error", analyze):
+            await service._handle_step_failure({}, "build", npm_build_log())
+
+        prompt = analyze.await_args.args[0]
+        assert estimate_tokens(prompt) < 1500
+        assert "TS2322" in prompt
+        assert "1. Root cause analysis" in prompt
+        assert "Context: This is part of an automated validation pipeline" in prompt
+
+
+    @pytest.mark.asyncio
+    async def test_deployment_validation_reduces_only_the_log(self):
+        service = ValidationService()
+        service.gemini.prompt_token_budget = 1000
+        output = npm_build_log().replace("ModuleNotFoundError: No module named 'missing'",
+                                         "ValueError: bad config")
+        context = {"validation_logs": [
+            {"step": "deployment", "status": "completed", "result": {"deployment_result": {"output": output}}}
+        ]}
+        analyze = AsyncMock(return_value={"confidence_score": 90})
+
+        with patch.object(service.gemini, "analyze_deployment", analyze):
+            await service._step_deployment_validation(context)
+
+        prompt = analyze.await_args.args[0]
+        assert estimate_tokens(prompt) < 1500
+        assert "ValueError: bad config" in prompt and "TS2322" in prompt
+        assert "1. Success/failure assessment" in prompt
+        assert "× 1. Success" not in prompt
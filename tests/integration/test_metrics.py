@@ -0,0 +1,109 @@
+"""
+Tests for the Prometheus metrics registry and instrumentation
+"""
+import pytest
+from unittest.mock import AsyncMock, patch
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from backend.integrations.base_client import APIError, BaseClient
+from backend.utils.metrics import (
+    CallbackGaugeCollector,
+    RequestMetricsMiddleware,
+    exposition_registry,
+    get_sample_value,
+    metrics_registry,
+    register_queue,
+    render_metrics
+)
+
+
+class MetricsClient(BaseClient):
+    """Minimal concrete client for exercising the request loop"""
+
+    def __init__(self):
+        super().__init__(service_name="metrics_test_api", base_url="http://dummy", max_retries=0)
+
+    def _get_default_headers(self):
+        return {}
+
+    async def _health_check_request(self):
+        pass
+
+    async def _ensure_session(self):
+        pass
+
+
+def upstream_count(outcome: str) -> float:
+    return get_sample_value("codegencicd_upstream_request_duration_seconds_count",
+                            {"service": "metrics_test_api", "method": "GET", "outcome": outcome})
+
+
+class TestInstrumentation:
+    """Test that requests land in the right histogram series"""
+
+    def test_routes_are_labelled_by_template(self):
+        app = FastAPI()
+        app.add_middleware(RequestMetricsMiddleware)
+
+        @app.get("/metrics-test/items/{item_id}")
+        async def get_item(item_id: int):
+            return {"id": item_id}
+
+        client = TestClient(app)
+        client.get("/metrics-test/items/1")
+        client.get("/metrics-test/items/2")
+        client.get("/metrics-test/missing")
+
+        assert get_sample_value("codegencicd_http_request_duration_seconds_count",
+                                {"method": "GET", "route": "/metrics-test/items/{item_id}",
+                                 "status": "200"}) >= 2
+        assert get_sample_value("codegencicd_http_request_duration_seconds_count",
+                                {"method": "GET", "route": "unmatched", "status": "404"}) >= 1
+
+    @pytest.mark.asyncio
+    async def test_upstream_calls_record_outcome(self):
+        client = MetricsClient()
+        before_success, before_error = upstream_count("success"), upstream_count("error")
+        send = AsyncMock(side_effect=[{"ok": True}, APIError("denied", status_code=400)])
+
+        with patch.object(client, "_send_request", send):
+            await client.get("/thing")
+            with pytest.raises(APIError):
+                await client.get("/thing")
+
+        assert upstream_count("success") == before_success + 1
+        assert upstream_count("error") == before_error + 1
+
+
+class TestExposition:
+    """Test callback gauges and text rendering"""
+
+    def test_callback_sources_render_and_failures_are_isolated(self):
+        collector = CallbackGaugeCollector()
+        collector.add_source("test_depth", "Depth", ["queue"], "good", lambda: [(("a",), 3)])
+        collector.add_source("test_depth", "Depth", ["queue"], "bad", lambda: 1 / 0)
+
+        families = list(collector.collect())
+
+        assert [(s.labels, s.value) for s in families[0].samples] == [({"queue": "a"}, 3.0)]
+
+    def test_registered_queue_is_exposed(self):
+        items = [1, 2]
+        register_queue("metrics_test_queue", lambda: len(items))
+
+        body, content_type = render_metrics()
+
+        assert content_type.startswith("text/plain")
+        assert b'codegencicd_queue_depth{queue="metrics_test_queue"} 2.0' in body
+
+    def test_multiprocess_mode_aggregates_worker_files(self, tmp_path, monkeypatch):
+        monkeypatch.setenv("PROMETHEUS_MULTIPROC_DIR", str(tmp_path))
+        register_queue("metrics_test_queue", lambda: 1)
+
+        assert exposition_registry() is not metrics_registry
+        body, _ = render_metrics()
+
+        # In-process samples are not exposed; workers write theirs to the shared directory
+        assert b"codegencicd_upstream_request_duration_seconds_count" not in body
+        assert b'codegencicd_queue_depth{queue="metrics_test_queue"} 1.0' in body
@@ -0,0 +1,107 @@
+"""
+Tests for the shared token-bucket rate limiter
+"""
+import asyncio
+import time
+import pytest
+
+from backend.utils.rate_limiter import (
+    RateLimiterRegistry,
+    RequestPriority,
+    TokenBucket,
+    TokenBucketConfig
+)
+
+
+class TestTokenBucket:
+    """Test token bucket behaviour"""
+
+    @pytest.mark.asyncio
+    async def test_burst_within_capacity_does_not_wait(self):
+        bucket = TokenBucket("test", TokenBucketConfig(rate=1.0, capacity=5))
+
+        for _ in range(5):
+            assert await bucket.acquire() == 0.0
+
+        assert bucket.stats["acquired"] == 5
+
+    @pytest.mark.asyncio
+    async def test_waits_for_refill_when_empty(self):
+        bucket = TokenBucket("test", TokenBucketConfig(rate=50.0, capacity=1))
+        await bucket.acquire()
+
+        waited = await bucket.acquire()
+
+        assert waited > 0
+        assert bucket.stats["throttled"] == 1
+
+    @pytest.mark.asyncio
+    async def test_background_requests_leave_interactive_reserve(self):
+        bucket = TokenBucket("test", TokenBucketConfig(rate=1.0, capacity=10, background_reserve=0.5))
+        bucket.tokens = 5.0
+
+        # Interactive requests may use the reserve immediately
+        assert await bucket.acquire(RequestPriority.INTERACTIVE) == 0.0
+        assert bucket.tokens < 5.0
+
+    def test_update_from_headers_caps_tokens(self):
+        bucket = TokenBucket("test", TokenBucketConfig(rate=10.0, capacity=100))
+
+        bucket.update_from_headers(remaining=3, reset_at=time.time() + 60)
+
+        assert bucket.tokens <= 3
+        assert bucket.rate == pytest.approx(3 / 60, rel=0.05)
+
+    def test_exhausted_quota_blocks_until_reset(self):
+        bucket = TokenBucket("test", TokenBucketConfig(rate=10.0, capacity=100))
+
+        bucket.update_from_headers(remaining=0, reset_at=time.time() + 30)
+
+        assert bucket.get_stats()["blocked_for_seconds"] > 25
+
+    @pytest.mark.asyncio
+    async def test_acquire_fails_fast_when_wait_exceeds_timeout(self):
+        bucket = TokenBucket("test", TokenBucketConfig(rate=10.0, capacity=100))
+        bucket.update_from_headers(remaining=0, reset_at=time.time() + 30)
+
+        with pytest.raises(asyncio.TimeoutError):
+            await bucket.acquire(timeout=1.0)
+
+        assert bucket.stats["acquired"] == 0
+        assert bucket._interactive_waiters == 0
+
+
+class TestRateLimiterRegistry:
+    """Test per-upstream sharing"""
+
+    def test_same_bucket_for_same_upstream(self):
+        registry = RateLimiterRegistry()
+
+        assert registry.get("github_api") is registry.get("github_api")
+
+    def test_per_credential_upstreams_get_a_bucket_per_token(self):
+        registry = RateLimiterRegistry()
+
+        first = registry.get("github_api", "token-a")
+        second = registry.get("github_api", "token-b")
+        first.update_from_headers(remaining=0, reset_at=time.time() + 60)
+
+        assert first is registry.get("github_api", "token-a")
+        assert second is not first and second is not registry.get("github_api")
+        assert first.name.startswith("github_api:") and "token-a" not in first.name
+        assert second.get_stats()["blocked_for_seconds"] == 0
+        assert registry.get("gemini", "key") is registry.get("gemini")
+
+    def test_unconfigured_upstream_is_unlimited(self):
+        registry = RateLimiterRegistry()
+
+        assert registry.get("web_eval_agent") is None
+
+    def test_configure_updates_existing_bucket_in_place(self):
+        registry = RateLimiterRegistry()
+        bucket = registry.get("github_api")
+
+        registry.configure("github_api", TokenBucketConfig(rate=2.0, capacity=4))
+
+        assert registry.get("github_api") is bucket
+        assert bucket.capacity == 4
@@ -0,0 +1,127 @@
+"""
+Tests for deadline-driven resource lifecycle management
+"""
+import asyncio
+import time
+import pytest
+
+from backend.services.resource_manager import (
+    ResourceManager,
+    ResourceMetrics,
+    ResourceQuota,
+    ResourceStatus,
+    ResourceType
+)
+
+
+class TestDeadlineIndex:
+    """Test heap-based expiry and idle tracking"""
+
+    def test_idle_deadline_rearms_after_access(self):
+        manager = ResourceManager(ResourceQuota(max_idle_minutes=1))
+        manager.register_resource("a", ResourceType.PROCESS)
+        manager.register_resource("b", ResourceType.PROCESS)
+
+        manager._last_access["a"] += 30
+        manager._collect_due(now=time.monotonic() + 61)
+
+        assert manager._idle_ids == {"b"}
+        assert manager._scheduled[("a", ResourceManager.IDLE)] > time.monotonic() + 61
+
+    def test_expiry_and_heap_bound(self):
+        manager = ResourceManager(ResourceQuota(max_uptime_hours=1, max_idle_minutes=600))
+        manager.register_resource("a", ResourceType.SNAPSHOT)
+        for _ in range(500):
+            manager.register_resource("b", ResourceType.SNAPSHOT)
+
+        assert len(manager._deadlines) <= 2 * len(manager._scheduled) + 65
+        manager._collect_due(now=time.monotonic() + 3601)
+        assert manager._expired_ids == {"a", "b"}
+        assert manager.get_resource_stats()["expired_resources"] == 2
+
+
+class TestIncrementalStats:
+    """Test that counters track state changes without rescanning"""
+
+    @pytest.mark.asyncio
+    async def test_counters_follow_lifecycle(self):
+        manager = ResourceManager()
+        manager.register_resource("s1", ResourceType.SNAPSHOT)
+        manager.register_resource("p1", ResourceType.PROCESS)
+        manager.update_resource_metrics("s1", ResourceMetrics(cpu_percent=20, memory_mb=512))
+        manager.update_resource_metrics("s1", ResourceMetrics(cpu_percent=10, memory_mb=256))
+
+        stats = manager.get_resource_stats()
+        assert stats["active_resources"] == 2
+        assert stats["aggregate_metrics"]["total_cpu_percent"] == 10
+        assert stats["aggregate_metrics"]["total_memory_mb"] == 256
+
+        assert await manager.cleanup_resource("s1", force=True)
+        stats = manager.get_resource_stats()
+        assert stats["active_resources"] == 1
+        assert stats["type_breakdown"] == {"snapshot": {"active": 0, "total": 1},
+                                           "process": {"active": 1, "total": 1}}
+        assert stats["aggregate_metrics"]["total_cpu_percent"] == 0
+
+    @pytest.mark.asyncio
+    async def test_quota_violation_is_cleaned_up(self):
+        manager = ResourceManager(ResourceQuota(max_memory_mb=100))
+        manager.register_resource("p1", ResourceType.PROCESS)
+        for _ in range(3):
+            manager.update_resource_metrics("p1", ResourceMetrics(memory_mb=500))
+
+        assert manager.get_resource_stats()["quota_violations"] == 1
+        assert await manager.cleanup_expired_resources() == 1
+        assert manager.resources["p1"].status == ResourceStatus.DESTROYED
+
+    @pytest.mark.asyncio
+    async def test_single_spike_does_not_reclaim(self):
+        manager = ResourceManager()
+        manager.register_resource("p1", ResourceType.PROCESS)
+        manager.update_resource_metrics("p1", ResourceMetrics(cpu_percent=150))
+        manager.update_resource_metrics("p1", ResourceMetrics(cpu_percent=150))
+        manager.update_resource_metrics("p1", ResourceMetrics(cpu_percent=20))
+
+        assert await manager.cleanup_expired_resources() == 0
+        assert manager.resources["p1"].status == ResourceStatus.ACTIVE
+        assert manager.get_resource_stats()["quota_violations"] == 0
+
+
+class TestCleanupCallbacks:
+    """Test bounded concurrent cleanup callbacks"""
+
+    @pytest.mark.asyncio
+    async def test_callbacks_run_concurrently_with_bound(self):
+        manager = ResourceManager(ResourceQuota(max_idle_minutes=0), cleanup_concurrency=3)
+        running = 0
+        peak = 0
+        cleaned = []
+
+        async def close(resource_id):
+            nonlocal running, peak
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.01)
+            running -= 1
+            cleaned.append(resource_id)
+
+        for i in range(10):
+            # Lambdas returning coroutines are awaited too
+            manager.register_resource(f"r{i}", ResourceType.PROCESS,
+                                      cleanup_callbacks=[lambda rid: close(rid)])
+
+        assert await manager.cleanup_expired_resources() == 10
+        assert peak == 3
+        assert sorted(cleaned) == sorted(f"r{i}" for i in range(10))
+
+    @pytest.mark.asyncio
+    async def test_loop_wakes_at_next_deadline(self):
+        manager = ResourceManager(ResourceQuota(max_idle_minutes=0.001))
+        manager.cleanup_interval = 30
+        await manager.start()
+        manager.register_resource("r1", ResourceType.PROCESS)
+
+        await asyncio.sleep(0.3)
+        await manager.stop()
+
+        assert manager.resources["r1"].status == ResourceStatus.DESTROYED
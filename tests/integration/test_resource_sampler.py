@@ -0,0 +1,96 @@
+"""
+Tests for live resource sampling and quota enforcement
+"""
+import subprocess
+import sys
+import pytest
+
+from backend.services.resource_manager import (
+    ResourceManager,
+    ResourceQuota,
+    ResourceStatus,
+    ResourceType
+)
+from backend.services.resource_sampler import (
+    ResourceSampler,
+    parse_quantity_mb,
+    snapshot_metrics
+)
+
+
+@pytest.fixture
+def child_process():
+    process = subprocess.Popen([sys.executable, "-c", "import time; time.sleep(30)"])
+    yield process
+    process.kill()
+    process.wait()
+
+
+class TestSnapshotMetrics:
+    """Test parsing of remote snapshot status payloads"""
+
+    def test_parses_kubernetes_style_quantities(self):
+        metrics = snapshot_metrics({"status": "running", "resources": {
+            "cpu_usage": "50%", "memory_usage": "2Gi", "disk_usage": "512Mi"}})
+
+        assert metrics.cpu_percent == 50.0
+        assert metrics.memory_mb == 2048.0
+        assert metrics.disk_mb == 512.0
+        assert parse_quantity_mb(1048576) == 1.0
+        assert snapshot_metrics({"status": "unknown", "error": "timeout"}) is None
+
+
+class TestResourceSampler:
+    """Test sampling passes against the resource manager"""
+
+    @pytest.mark.asyncio
+    async def test_samples_local_process_without_touching(self, child_process):
+        manager = ResourceManager()
+        resource = manager.register_resource("proc-1", ResourceType.PROCESS,
+                                             metadata={"pid": child_process.pid})
+        last_accessed = resource.last_accessed
+        sampler = ResourceSampler(manager)
+
+        sampled = await sampler.sample_once()
+
+        assert sampled["proc-1"].memory_mb > 0
+        assert resource.metrics.memory_mb == sampled["proc-1"].memory_mb
+        assert resource.last_accessed == last_accessed
+        assert len(sampler.get_series("proc-1")) == 1
+
+    @pytest.mark.asyncio
+    async def test_exited_process_is_cleaned_up(self):
+        process = subprocess.Popen([sys.executable, "-c", "pass"])
+        process.wait()
+        manager = ResourceManager()
+        manager.register_resource("proc-1", ResourceType.PROCESS, metadata={"pid": process.pid})
+
+        await ResourceSampler(manager).sample_once()
+
+        assert manager.resources["proc-1"].status == ResourceStatus.DESTROYED
+
+    @pytest.mark.asyncio
+    async def test_remote_snapshot_over_quota_is_reclaimed(self):
+        manager = ResourceManager(ResourceQuota(max_memory_mb=1024))
+        deleted = []
+        manager.register_resource("snap-1", ResourceType.SNAPSHOT,
+                                  cleanup_callbacks=[lambda sid: deleted.append(sid)])
+        manager.register_resource("snap-2", ResourceType.SNAPSHOT, metadata={"snapshot_id": "remote-2"})
+        requested = []
+
+        async def status(snapshot_id):
+            requested.append(snapshot_id)
+            usage = "4Gi" if snapshot_id == "snap-1" else "256Mi"
+            return {"status": "running", "resources": {"cpu_usage": "10%", "memory_usage": usage}}
+
+        sampler = ResourceSampler(manager, snapshot_status=status)
+        await sampler.sample_once()
+        assert await manager.cleanup_expired_resources() == 0
+        for _ in range(2):
+            await sampler.sample_once()
+
+        assert sorted(set(requested)) == ["remote-2", "snap-1"]
+        assert await manager.cleanup_expired_resources() == 1
+        assert deleted == ["snap-1"]
+        assert manager.resources["snap-2"].status == ResourceStatus.ACTIVE
+        assert set(sampler.export_series()) == {"snap-1", "snap-2"}
@@ -0,0 +1,116 @@
+"""
+Tests for the fingerprint-keyed model response cache
+"""
+import httpx
+import pytest
+from unittest.mock import AsyncMock, patch
+
+from backend.integrations import gemini_client
+from backend.integrations.gemini_client import GeminiClient
+from backend.utils.response_cache import ResponseCache, error_fingerprint, normalize_error
+
+
+def gemini_response(text: str) -> httpx.Response:
+    return httpx.Response(
+        200,
+        json={"candidates": [{"content": {"parts": [{"text": text}]}}]},
+        request=httpx.Request("POST", "https://gemini.test")
+    )
+
+
+class TestErrorFingerprint:
+    """Test normalization of volatile error details"""
+
+    def test_volatile_details_do_not_change_fingerprint(self):
+        first = ("2024-05-01T10:00:00Z /tmp/build-1a2b3c4d/src/app.ts:12:5 - error TS2322: "
+                 "Type 'string' is not assignable (commit 9f8e7d6c5b4a, took 1.5s)")
+        second = ("2024-06-12T23:59:59Z /home/ci/work/repo/src/app.ts:40:1 - error TS2322: "
+                  "Type 'string' is not assignable (commit 0123456789ab, took 830ms)")
+
+        assert error_fingerprint(first) == error_fingerprint(second)
+        assert "<path>/app.ts" in normalize_error(first)
+
+    def test_different_errors_differ(self):
+        assert error_fingerprint("npm ERR! code ERESOLVE") != error_fingerprint("npm ERR! code ENOENT")
+        assert error_fingerprint("exit code 1") != error_fingerprint("exit code 137")
+
+
+class TestResponseCache:
+    """Test TTL, LRU bounds, persistence and stats"""
+
+    def test_entries_expire_after_ttl(self):
+        cache = ResponseCache("test", ttl=60)
+        cache.put("k", {"root_cause": "x"})
+
+        with patch("backend.utils.response_cache.time.time", return_value=cache._entries["k"]["stored_at"] + 61):
+            assert cache.get("k") is None
+
+        assert cache.get_stats()["expired"] == 1
+
+    def test_least_recently_used_entry_is_evicted(self):
+        cache = ResponseCache("test", max_entries=2)
+        cache.put("a", {"v": 1})
+        cache.put("b", {"v": 2})
+        cache.get("a")
+        cache.put("c", {"v": 3})
+
+        assert cache.get("b") is None
+        assert cache.get("a") == {"v": 1}
+        assert cache.get_stats()["evictions"] == 1
+
+    def test_entries_persist_across_instances(self, tmp_path):
+        path = str(tmp_path / "cache" / "responses.json")
+        ResponseCache("test", path=path).put("k", {"root_cause": "x"})
+
+        cache = ResponseCache("test", path=path)
+
+        assert cache.get("k") == {"root_cause": "x"}
+        assert cache.get_stats()["hit_rate"] == 1.0
+
+    @pytest.mark.asyncio
+    async def test_writes_in_event_loop_are_batched(self, tmp_path):
+        path = tmp_path / "responses.json"
+        cache = ResponseCache("test", path=str(path), save_delay=60)
+
+        for i in range(50):
+            cache.put(f"k{i}", {"v": i})
+        assert not path.exists()
+        await cache.close()
+
+        assert cache.stats["saves"] == 1
+        assert ResponseCache("test", path=str(path)).get("k49") == {"v": 49}
+
+
+class TestGeminiErrorCache:
+    """Test that recurring errors are diagnosed once"""
+
+    @pytest.mark.asyncio
+    async def test_recurring_error_reuses_diagnosis(self):
+        client = GeminiClient()
+        client.api_key = "test-key"
+        client.response_cache = ResponseCache("gemini-test")
+        post = AsyncMock(return_value=gemini_response('{"root_cause": "missing module"}'))
+
+        with patch.object(client, "_throttled_post", post):
+            first = await client.analyze_error("ModuleNotFoundError at /tmp/run-1/app.py:3")
+            second = await client.analyze_error("ModuleNotFoundError at /tmp/run-2/app.py:9")
+
+        assert first == second == {"root_cause": "missing module"}
+        assert post.await_count == 1
+        assert client.response_cache.get_stats()["hits"] == 1
+
+    @pytest.mark.asyncio
+    async def test_prompt_version_and_unparsed_responses_are_not_reused(self):
+        client = GeminiClient()
+        client.api_key = "test-key"
+        client.response_cache = ResponseCache("gemini-test")
+        post = AsyncMock(side_effect=[gemini_response("not json"), gemini_response('{"root_cause": "a"}'),
+                                      gemini_response('{"root_cause": "b"}')])
+
+        with patch.object(client, "_throttled_post", post):
+            await client.analyze_error("boom")
+            assert await client.analyze_error("boom") == {"root_cause": "a"}
+            with patch.dict(gemini_client.PROMPT_VERSIONS, {"analyze_error": "2"}):
+                assert await client.analyze_error("boom") == {"root_cause": "b"}
+
+        assert post.await_count == 3
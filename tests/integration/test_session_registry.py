@@ -0,0 +1,74 @@
+"""
+Tests for the bounded web-eval session registry
+"""
+import asyncio
+import time
+import pytest
+
+from backend.services.session_registry import SessionRegistry
+
+
+class TestSessionRegistry:
+    """Test TTL expiry, bounds and indexes"""
+
+    def test_expires_in_ttl_order(self):
+        registry = SessionRegistry("test", ttl_seconds=10)
+        registry["a"] = {"project_name": "alpha"}
+        registry["b"] = {"project_name": "beta"}
+        registry.touch("a")
+
+        now = time.monotonic()
+        assert registry.pop_expired(now=now) == []
+        expired = registry.pop_expired(now=now + 60)
+
+        assert [session_id for session_id, _ in expired] == ["b", "a"]
+        assert len(registry) == 0
+
+    def test_size_bound_evicts_soonest_expiring(self):
+        registry = SessionRegistry("test", ttl_seconds=10, max_sessions=2)
+        for session_id in ("a", "b", "c"):
+            registry[session_id] = {}
+
+        assert list(registry) == ["b", "c"]
+        assert [session_id for session_id, _ in registry.pop_expired()] == ["a"]
+
+    def test_lookups_by_pr_and_project(self):
+        registry = SessionRegistry("test")
+        registry["s1"] = {"pr_number": 42, "project_name": "web"}
+        registry["s2"] = {"pr_number": 42}
+        registry["s3"] = {"pr_number": 7, "project_name": "web"}
+        del registry["s2"]
+
+        assert set(registry.by_pr(42)) == {"s1"}
+        assert set(registry.by_project("web")) == {"s1", "s3"}
+
+    def test_heap_stays_bounded_under_touches(self):
+        registry = SessionRegistry("test")
+        registry["a"] = {}
+        for _ in range(1000):
+            registry.touch("a")
+
+        assert registry.get_stats()["heap_size"] <= 66
+
+    @pytest.mark.asyncio
+    async def test_cleanup_runs_in_parallel(self):
+        registry = SessionRegistry.from_mapping({f"s{i}": {} for i in range(20)}, name="test")
+        running = 0
+        peak = 0
+
+        async def cleanup(session_id):
+            nonlocal running, peak
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.01)
+            running -= 1
+            if session_id == "s3":
+                raise RuntimeError("agent unreachable")
+            return True
+
+        results = await registry.cleanup(cleanup, max_concurrency=5)
+
+        assert peak == 5
+        assert results["cleaned_up"] == 19
+        assert results["errors"] == [{"session_id": "s3", "error": "agent unreachable"}]
+        assert list(registry) == ["s3"]
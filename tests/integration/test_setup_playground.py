@@ -0,0 +1,150 @@
+"""
+Tests for leased setup command playgrounds
+"""
+import asyncio
+import uuid
+import pytest
+from unittest.mock import AsyncMock
+
+from backend.services.resource_manager import resource_manager
+from backend.services.setup_playground import STEP_MARKER, SetupPlayground, reset_commands
+
+
+def fake_grainchain(failing=(), state=None):
+    """Sandbox that runs a request's commands in one shell, like the real one"""
+    state = state if state is not None else {"head": "a" * 40}
+    grainchain = AsyncMock()
+    grainchain.create_snapshot.side_effect = lambda config: f"playground-{uuid.uuid4().hex}"
+    grainchain.clone_repository.return_value = {"status": "success"}
+
+    async def execute(snapshot_id, commands):
+        lines, status = [], 0
+        for command in commands:
+            if command.startswith(f"echo {STEP_MARKER}"):
+                lines.append(command[len("echo "):].replace("$?", str(status)))
+                status = 0
+            elif command.startswith("git rev-parse"):
+                lines.append(state["head"])
+                status = 0
+            else:
+                status = 1 if command in failing else 0
+                lines.append(f"ran {command}")
+        return {"exit_code": status, "output": "\n".join(lines), "error": "", "duration": 1.0}
+
+    grainchain.execute_commands.side_effect = execute
+    grainchain.delete_snapshot.return_value = True
+    return grainchain
+
+
+async def run(playground: SetupPlayground, commands, loader, fresh=False):
+    return [event async for event in playground.run(1, "main", "https://github.com/o/r.git", commands,
+                                                    loader, fresh=fresh)]
+
+
+def executed(grainchain):
+    """Requests sent to the sandbox, without git bookkeeping and status markers"""
+    requests = []
+    for call in grainchain.execute_commands.await_args_list:
+        commands = [command for command in call.args[1] if not command.startswith(f"echo {STEP_MARKER}")]
+        if commands == reset_commands("main"):
+            requests.append("reset")
+        elif not commands[-1].startswith("git rev-parse"):
+            requests.append(commands)
+    return requests
+
+
+class TestSetupPlayground:
+    """Test snapshot reuse, incremental reruns and idle reaping"""
+
+    @pytest.mark.asyncio
+    async def test_rerun_reuses_snapshot_and_skips_succeeded_commands(self):
+        grainchain = fake_grainchain()
+        playground = SetupPlayground(grainchain=grainchain)
+        loader = AsyncMock(return_value={"TOKEN": "secret"})
+
+        first = await run(playground, ["npm ci", "npm run build"], loader)
+        second = await run(playground, ["npm ci", "npm run build", "npm test"], loader)
+        await playground.stop()
+
+        assert grainchain.create_snapshot.await_count == 1
+        assert grainchain.clone_repository.await_count == 1
+        loader.assert_awaited_once()
+        assert first[0]["reused"] is False and second[0]["reused"] is True
+        assert executed(grainchain) == [["npm ci", "npm run build"], ["npm test"]]
+        assert [event["output"] for event in first[1:3]] == ["ran npm ci", "ran npm run build"]
+        assert second[-1] == {**second[-1], "success": True, "commands_run": 1, "commands_skipped": 2}
+
+    @pytest.mark.asyncio
+    async def test_failure_resumes_and_changed_prefix_resets(self):
+        grainchain = fake_grainchain(failing={"npm run biuld"})
+        playground = SetupPlayground(grainchain=grainchain)
+        loader = AsyncMock(return_value={})
+
+        failed = await run(playground, ["npm ci", "npm run biuld"], loader)
+        fixed = await run(playground, ["npm ci", "npm run build"], loader)
+        changed = await run(playground, ["pnpm install", "npm run build"], loader)
+        await playground.stop()
+
+        assert failed[-1]["success"] is False and failed[2]["exit_code"] == 1
+        assert fixed[-1]["commands_skipped"] == 1 and fixed[-1]["success"] is True
+        assert [event["event"] for event in changed][:2] == ["session", "reset"]
+        assert executed(grainchain) == [["npm ci", "npm run biuld"], ["npm run build"],
+                                        "reset", ["pnpm install", "npm run build"]]
+
+    @pytest.mark.asyncio
+    async def test_shell_state_is_replayed_for_skipped_commands(self):
+        grainchain = fake_grainchain()
+        playground = SetupPlayground(grainchain=grainchain)
+        loader = AsyncMock(return_value={})
+
+        await run(playground, ["cd web", "export NODE_ENV=test", "npm ci"], loader)
+        await run(playground, ["cd web", "export NODE_ENV=test", "npm ci", "npm test"], loader)
+        await playground.stop()
+
+        assert executed(grainchain)[-1] == ["cd web", "export NODE_ENV=test", "npm test"]
+
+    @pytest.mark.asyncio
+    async def test_pushed_commits_reset_the_playground(self):
+        state = {"head": "a" * 40}
+        grainchain = fake_grainchain(state=state)
+        playground = SetupPlayground(grainchain=grainchain)
+        loader = AsyncMock(return_value={})
+
+        await run(playground, ["npm ci"], loader)
+        state["head"] = "b" * 40
+        rerun = await run(playground, ["npm ci"], loader)
+        await playground.stop()
+
+        assert rerun[1] == {**rerun[1], "event": "reset", "commit": "b" * 40}
+        assert executed(grainchain) == [["npm ci"], "reset", ["npm ci"]]
+        assert rerun[-1]["commands_run"] == 1
+
+    @pytest.mark.asyncio
+    async def test_release_project_drops_its_playgrounds(self):
+        grainchain = fake_grainchain()
+        playground = SetupPlayground(grainchain=grainchain)
+        loader = AsyncMock(return_value={"TOKEN": "old"})
+
+        await run(playground, ["make"], loader)
+        released = await playground.release_project(1)
+        await run(playground, ["make"], loader)
+        await playground.stop()
+
+        assert released == 1
+        assert loader.await_count == 2
+
+    @pytest.mark.asyncio
+    async def test_idle_playground_is_reaped(self):
+        grainchain = fake_grainchain()
+        playground = SetupPlayground(idle_ttl=0.01, grainchain=grainchain)
+
+        events = await run(playground, ["make"], AsyncMock(return_value={}))
+        snapshot_id = events[0]["snapshot_id"]
+        await asyncio.sleep(0.02)
+        reaped = await playground.reap()
+
+        assert reaped == 1
+        grainchain.delete_snapshot.assert_awaited_once_with(snapshot_id)
+        assert playground.get(1, "main") is None
+        assert snapshot_id not in resource_manager.resources or \
+            resource_manager.resources[snapshot_id].status.value == "destroyed"
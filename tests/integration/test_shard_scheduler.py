@@ -0,0 +1,111 @@
+"""
+Tests for sharded web-eval matrix execution
+"""
+import asyncio
+import pytest
+from unittest.mock import patch
+
+from backend.integrations.base_client import APIError
+from backend.integrations.web_eval_client import EnhancedWebEvalClient
+from backend.utils.shard_scheduler import (
+    ShardConfig,
+    ShardScheduler,
+    merge_shard_responses,
+    plan_shards
+)
+
+
+class TestShardPlanning:
+    """Test matrix splitting and result merging"""
+
+    def test_plan_shards(self):
+        scenarios = [{"name": f"s{i}"} for i in range(5)]
+        shards = plan_shards(["chromium", "firefox"], scenarios, scenarios_per_shard=2)
+
+        assert len(shards) == 6
+        assert [shard.index for shard in shards] == list(range(6))
+        assert all(shard.total == 6 for shard in shards)
+        assert [len(shard.scenarios) for shard in shards[:3]] == [2, 2, 1]
+
+    def test_merge_shard_responses(self):
+        merged = merge_shard_responses([
+            {"passed": 2, "browser_results": {"chromium": {"passed": 2}}, "issues": ["a"]},
+            {"passed": 1, "browser_results": {"firefox": {"passed": 1}}, "issues": ["b"]},
+        ])
+
+        assert merged == {
+            "passed": 3,
+            "browser_results": {"chromium": {"passed": 2}, "firefox": {"passed": 1}},
+            "issues": ["a", "b"]
+        }
+
+    def test_merge_averages_scores_and_recomputes_rates(self):
+        merged = merge_shard_responses([
+            {"total": 10, "passed": 9, "success_rate": 0.9, "performance": {"score": 80}},
+            {"total": 5, "passed": 4, "success_rate": 0.8, "performance": {"score": 70}},
+        ])
+
+        assert merged["total"] == 15 and merged["passed"] == 13
+        assert merged["success_rate"] == pytest.approx(13 / 15)
+        assert merged["performance"]["score"] == 75
+
+
+class TestShardScheduler:
+    """Test bounded parallel execution"""
+
+    @pytest.mark.asyncio
+    async def test_respects_parallelism_and_isolates_failures(self):
+        running = 0
+        peak = 0
+
+        async def runner(shard):
+            nonlocal running, peak
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.01)
+            running -= 1
+            if shard.target == "webkit":
+                raise ConnectionError("agent down")
+            return {"passed": len(shard.scenarios)}
+
+        shards = plan_shards(["chromium", "firefox", "webkit"], [{}] * 4, scenarios_per_shard=1)
+        results = await ShardScheduler(ShardConfig(max_parallel_shards=3)).run_all(shards, runner)
+
+        assert peak == 3
+        assert sum(result.success for result in results) == 8
+        assert {result.shard.target for result in results if not result.success} == {"webkit"}
+
+
+class TestShardedWebEvalClient:
+    """Test sharded cross-browser and mobile runs"""
+
+    @pytest.mark.asyncio
+    async def test_cross_browser_runs_one_request_per_shard(self):
+        client = EnhancedWebEvalClient("http://test-webeval:8081")
+        payloads = []
+
+        async def execute(operation, endpoint, data=None):
+            payloads.append(data)
+            if data["browsers"] == ["firefox"]:
+                raise APIError("shard failed")
+            return {"browser_results": {data["browsers"][0]: {"passed": len(data["test_scenarios"])}}}
+
+        with patch("backend.integrations.web_eval_client.settings.web_eval_shard_parallelism", 2), \
+             patch("backend.integrations.web_eval_client.settings.web_eval_scenarios_per_shard", 5), \
+             patch.object(client, "_execute_with_enhancements", side_effect=execute):
+            result = await client.run_cross_browser_tests("session-1", ["chromium", "firefox"],
+                                                          [{"name": "login"}])
+
+        assert len(payloads) == 2
+        assert result["browser_results"] == {"chromium": {"passed": 1}}
+        assert result["shard_summary"]["failed"] == 1
+        assert result["shard_summary"]["failed_shards"][0]["target"] == "firefox"
+
+    @pytest.mark.asyncio
+    async def test_all_shards_failing_raises(self):
+        client = EnhancedWebEvalClient("http://test-webeval:8081")
+
+        with patch("backend.integrations.web_eval_client.settings.web_eval_shard_parallelism", 2), \
+             patch.object(client, "_execute_with_enhancements", side_effect=APIError("down")):
+            with pytest.raises(APIError):
+                await client.run_mobile_tests("session-1", ["iPhone 12"], [{"name": "login"}])
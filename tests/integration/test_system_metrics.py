@@ -0,0 +1,39 @@
+"""
+Tests for the background system metrics sampler
+"""
+import pytest
+
+from backend.services.system_metrics import SystemMetricsSampler, SystemSample
+
+
+def make_sample(timestamp: float, cpu: float, memory: float = 50.0) -> SystemSample:
+    return SystemSample(timestamp=timestamp, cpu_percent=cpu,
+                        memory_total=100, memory_available=50, memory_used=50, memory_free=50,
+                        memory_percent=memory, disk_total=100, disk_used=10, disk_free=90,
+                        disk_percent=10.0)
+
+
+class TestSystemMetricsSampler:
+    """Test ring buffer aggregates and on-demand reads"""
+
+    def test_window_aggregates_track_evictions(self):
+        sampler = SystemMetricsSampler(window=3)
+        for i, cpu in enumerate([95.0, 10.0, 20.0, 30.0, 5.0]):
+            sampler.record(make_sample(float(i), cpu))
+
+        window = sampler.aggregates()
+        assert window["samples"] == 3
+        assert window["window_seconds"] == 2.0
+        assert window["cpu_percent"]["avg"] == pytest.approx(55.0 / 3)
+        assert window["cpu_percent"]["max"] == 30.0
+        assert [s["cpu_percent"] for s in sampler.history(since=2.0)] == [30.0, 5.0]
+
+    @pytest.mark.asyncio
+    async def test_latest_samples_on_demand_without_blocking(self):
+        sampler = SystemMetricsSampler()
+
+        sample = await sampler.latest()
+
+        assert sample.memory_total > 0
+        assert await sampler.latest() is sample
+        assert sampler.aggregates()["samples"] == 1
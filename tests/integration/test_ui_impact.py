@@ -0,0 +1,154 @@
+"""
+Tests for frontend change-impact analysis and PR test selection
+"""
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+
+from backend.integrations.web_eval_pr_client import WebEvalPRClient
+from backend.services.ui_impact import DependencyIndexCache, FrontendDependencyIndex
+
+
+FRONTEND_FILES = {
+    "web/tsconfig.json": '{"compilerOptions": {"baseUrl": "src"}}',
+    "web/src/index.tsx": "import './index.css';\nimport App from './App';\n",
+    "web/src/index.css": "body { margin: 0; }\n",
+    "web/src/App.tsx": (
+        "import Home from './pages/Home';\n"
+        "import { Settings } from './pages/Settings';\n"
+        "import Header from 'components/Header';\n"
+        "export default () => (<Routes>\n"
+        "  <Route path=\"/\" element={<Home />} />\n"
+        "  <Route path=\"/settings\" element={<Settings />} />\n"
+        "</Routes>);\n"
+    ),
+    "web/src/components/Header.tsx": "export default () => null;\n",
+    "web/src/components/Card.tsx": "import './Card.scss';\nexport default () => null;\n",
+    "web/src/components/Card.scss": ".card { color: red; }\n",
+    "web/src/components/Unused.tsx": "export default () => null;\n",
+    "web/src/pages/Home.tsx": "import Card from '../components/Card';\nexport default () => null;\n",
+    "web/src/pages/Settings.tsx": "export const Settings = () => null;\n",
+    "web/package.json": "{}",
+}
+
+
+@pytest.fixture
+def frontend(tmp_path):
+    for path, content in FRONTEND_FILES.items():
+        target = tmp_path / path
+        target.parent.mkdir(parents=True, exist_ok=True)
+        target.write_text(content)
+    return tmp_path
+
+
+class TestFrontendDependencyIndex:
+    """Test import graph and route mapping"""
+
+    def test_routes_resolve_to_component_files(self, frontend):
+        index = FrontendDependencyIndex(str(frontend)).build()
+
+        assert index.routes() == {"/": "web/src/pages/Home.tsx",
+                                  "/settings": "web/src/pages/Settings.tsx"}
+        assert "web/src/components/Header.tsx" in index.files["web/src/App.tsx"].imports
+
+    def test_change_maps_to_single_route(self, frontend):
+        index = FrontendDependencyIndex(str(frontend)).build()
+        report = index.impact(["web/src/components/Card.scss"])
+
+        assert report.affected_routes == ["/"]
+        assert "web/src/components/Card.tsx" in report.affected_components
+
+    def test_shell_and_config_changes_affect_every_route(self, frontend):
+        index = FrontendDependencyIndex(str(frontend)).build()
+
+        assert index.impact(["web/src/components/Header.tsx"]).affected_routes == ["/", "/settings"]
+        assert index.impact(["web/package.json"]).affected_routes == ["/", "/settings"]
+
+    def test_unreachable_and_non_ui_changes_select_nothing(self, frontend):
+        index = FrontendDependencyIndex(str(frontend)).build()
+
+        assert index.impact(["web/src/components/Unused.tsx", "README.md"]).affected_routes == []
+
+    def test_incremental_update(self, frontend):
+        index = FrontendDependencyIndex(str(frontend)).build()
+        (frontend / "web/src/pages/Settings.tsx").write_text(
+            "import Card from '../components/Card';\nexport const Settings = () => null;\n")
+
+        assert index.update(["web/src/pages/Settings.tsx", "web/src/pages/Home.tsx"]) == 1
+        assert index.impact(["web/src/components/Card.tsx"]).affected_routes == ["/", "/settings"]
+
+
+class TestDependencyIndexCache:
+    """Test per-commit caching"""
+
+    def test_derives_child_commit_from_parent(self, frontend):
+        cache = DependencyIndexCache()
+        base = cache.get_index("repo", "base", str(frontend))
+        head = cache.get_index("repo", "head", str(frontend),
+                               parent_commit="base",
+                               changed_since_parent=["web/src/pages/Home.tsx"])
+
+        assert head is not base
+        assert cache.get_index("repo", "head", str(frontend)) is head
+        assert cache.stats == {"hits": 1, "incremental_builds": 1, "full_builds": 1}
+
+    def test_concurrent_lookups_share_one_entry_per_commit(self, frontend):
+        cache = DependencyIndexCache(max_entries=4)
+
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            indexes = list(pool.map(lambda i: cache.get_index("repo", f"c{i % 6}", str(frontend)), range(48)))
+
+        assert len(cache.entries) == 4
+        assert sum(cache.stats.values()) == 48
+        assert all(index.commit == f"c{i % 6}" for i, index in enumerate(indexes))
+
+
+class TestImpactBasedSelection:
+    """Test scenario selection in the PR client"""
+
+    def test_small_change_selects_minimal_scenarios(self, frontend):
+        client = WebEvalPRClient("http://test-webeval:8081")
+        index = FrontendDependencyIndex(str(frontend)).build()
+
+        ui_changes = client._analyze_ui_changes(["web/src/pages/Settings.tsx"], index)
+        test_scope = client._determine_test_scope(ui_changes)
+
+        assert ui_changes["risk_level"] == "low"
+        assert test_scope["routes"] == ["/settings"]
+        assert test_scope["scenarios"] == [{
+            "route": "/settings",
+            "checks": ["visual_regression", "accessibility"],
+            "browsers": ["chromium"],
+            "devices": []
+        }]
+
+    def test_package_json_no_longer_forces_comprehensive(self, frontend):
+        client = WebEvalPRClient("http://test-webeval:8081")
+        index = FrontendDependencyIndex(str(frontend)).build()
+
+        ui_changes = client._analyze_ui_changes(["web/package.json"], index)
+
+        assert ui_changes["risk_level"] == "medium"
+        assert client._determine_test_scope(ui_changes)["coverage"] == "focused"
+
+    def test_global_change_with_many_routes_runs_a_bounded_sample(self, frontend):
+        pages = "".join(f"import Page{i} from './pages/Page{i}';\n" for i in range(15))
+        routes = "".join(f"  <Route path=\"/section/page{i}\" element={{<Page{i} />}} />\n" for i in range(15))
+        (frontend / "web/src/App.tsx").write_text(
+            pages + "import Home from './pages/Home';\n"
+            "export default () => (<Routes>\n  <Route path=\"/\" element={<Home />} />\n"
+            + routes + "</Routes>);\n")
+        for i in range(15):
+            (frontend / f"web/src/pages/Page{i}.tsx").write_text("export default () => null;\n")
+        client = WebEvalPRClient("http://test-webeval:8081")
+        index = FrontendDependencyIndex(str(frontend)).build()
+        changed = ["web/package.json"] + [f"web/src/pages/Page{i}.tsx" for i in range(12)]
+
+        ui_changes = client._analyze_ui_changes(changed, index)
+        test_scope = client._determine_test_scope(ui_changes)
+
+        assert ui_changes["impact"]["total_routes"] == 16
+        assert ui_changes["impact"]["broad_change"] is True
+        assert len(test_scope["routes"]) == 10
+        assert "/" in test_scope["routes"]
+        assert ui_changes["risk_level"] == "medium"
+        assert test_scope["coverage"] == "focused"
@@ -0,0 +1,138 @@
+"""
+Tests for the visual regression baseline store
+"""
+import base64
+import pytest
+from unittest.mock import patch
+
+from backend.integrations.web_eval_client import EnhancedWebEvalClient
+from backend.services.visual_baselines import (
+    BaselineKey,
+    VisualBaselineStore,
+    hamming_distance
+)
+
+
+@pytest.fixture
+def store(tmp_path):
+    return VisualBaselineStore(str(tmp_path / "baselines"))
+
+
+class TestVisualBaselineStore:
+    """Test content-addressed storage and hash comparison"""
+
+    def test_identical_images_share_one_blob(self, store):
+        image = b"\x89PNG fake image"
+        store.put(BaselineKey("/", "1920x1080", "chromium", "aaa"), "ff00", image)
+        store.put(BaselineKey("/", "1920x1080", "chromium", "bbb"), "ff00", image)
+
+        stats = store.get_stats()
+        assert stats["baselines"] == 2
+        assert stats["unique_images"] == 1
+        assert stats["blobs_deduplicated"] == 1
+        assert store.read_image(store.get(BaselineKey("/", "1920x1080", "chromium", "bbb"))) == image
+
+    def test_index_persists(self, store):
+        store.put(BaselineKey("/login", "375x667", "webkit", "aaa"), "0f0f")
+
+        reopened = VisualBaselineStore(store.directory)
+        assert reopened.get(BaselineKey("/login", "375x667", "webkit", "aaa")).phash == "0f0f"
+
+    def test_partition_by_perceptual_hash(self, store):
+        store.put(BaselineKey("/", "1920x1080", "chromium", "aaa"), "ff00")
+        store.put(BaselineKey("/settings", "1920x1080", "chromium", "aaa"), "ff00")
+        captures = [
+            {"page": "/", "viewport": "1920x1080", "phash": "ff01"},
+            {"page": "/settings", "viewport": "1920x1080", "phash": "00ff"},
+            {"page": "/new", "viewport": "1920x1080", "phash": "ff00"},
+        ]
+
+        unchanged, changed = store.partition(captures, "aaa", "chromium", max_distance=1)
+
+        assert [c["page"] for c in unchanged] == ["/"]
+        assert [c["page"] for c in changed] == ["/settings", "/new"]
+        assert hamming_distance("ff00", "00ff") == 16
+
+    def test_prune_and_gc_remove_unreferenced_blobs(self, store):
+        store.put(BaselineKey("/", "1920x1080", "chromium", "old"), "aa", b"old image")
+        store.put(BaselineKey("/", "1920x1080", "chromium", "new"), "bb", b"new image")
+
+        assert store.prune(max_commits=1) == 1
+        assert store.gc() == 1
+        assert store.get_stats()["unique_images"] == 1
+
+    def test_store_captures_decodes_images(self, store):
+        captures = [{"page": "/", "viewport": "1920x1080", "phash": "ab",
+                     "image": base64.b64encode(b"png bytes").decode()}]
+
+        assert store.store_captures(captures, "aaa", "chromium") == 1
+        entry = store.get(BaselineKey("/", "1920x1080", "chromium", "aaa"))
+        assert store.read_image(entry) == b"png bytes"
+
+    def test_store_captures_saves_index_once_per_batch(self, store):
+        captures = [{"page": f"/p{i}", "viewport": "1920x1080", "phash": "ab"} for i in range(20)]
+
+        with patch.object(store, "_save", wraps=store._save) as save:
+            assert store.store_captures(captures, "aaa", "chromium") == 20
+
+        assert save.call_count == 1
+
+    def test_stores_sharing_a_directory_keep_each_others_entries(self, store):
+        other = VisualBaselineStore(store.directory)  # Another worker process
+        store.put(BaselineKey("/", "1920x1080", "chromium", "aaa"), "aa", b"first image")
+        other.put(BaselineKey("/", "1920x1080", "chromium", "bbb"), "bb", b"second image")
+
+        assert store.gc() == 0
+        assert store.get(BaselineKey("/", "1920x1080", "chromium", "bbb")).phash == "bb"
+        assert other.get_stats()["baselines"] == 2
+
+    def test_malformed_hash_is_a_mismatch(self, store):
+        store.put(BaselineKey("/", "1920x1080", "chromium", "aaa"), "ff00")
+        captures = [{"page": "/", "viewport": "1920x1080", "phash": "zz00"}]
+
+        unchanged, changed = store.partition(captures, "aaa", "chromium", max_distance=1)
+
+        assert not unchanged and len(changed) == 1
+        assert hamming_distance("", "") > 0
+
+
+class TestHashShortCircuit:
+    """Test that matching captures skip the full visual diff"""
+
+    @pytest.mark.asyncio
+    async def test_unchanged_pages_skip_advanced_diff(self, store):
+        store.put(BaselineKey("/", "1920x1080", "chromium", "base"), "ff00")
+        store.put(BaselineKey("/about", "1920x1080", "chromium", "base"), "ff00")
+        client = EnhancedWebEvalClient("http://test-webeval:8081")
+        calls = []
+
+        async def execute(operation, endpoint, data=None):
+            calls.append((endpoint, data))
+            if endpoint.endswith("/visual/capture"):
+                return {"captures": [
+                    {"page": "/", "viewport": "1920x1080", "phash": "ff00"},
+                    {"page": "/about", "viewport": "1920x1080", "phash": "0000"},
+                ]}
+            return {"differences_found": 1, "ai_insights": []}
+
+        with patch("backend.integrations.web_eval_client.visual_baseline_store", store), \
+             patch.object(client, "_execute_with_enhancements", side_effect=execute):
+            result = await client.run_advanced_visual_regression(
+                "session-1", ["/", "/about"], base_commit="base")
+
+        assert calls[1][1]["pages"] == ["/about"]
+        assert result["skipped_unchanged"] == 1
+
+    @pytest.mark.asyncio
+    async def test_all_matching_returns_without_diff(self, store):
+        store.put(BaselineKey("/", "1920x1080", "chromium", "base"), "ff00")
+        client = EnhancedWebEvalClient("http://test-webeval:8081")
+        captures = {"captures": [{"page": "/", "viewport": "1920x1080", "phash": "ff00"}]}
+
+        with patch("backend.integrations.web_eval_client.visual_baseline_store", store), \
+             patch.object(client, "_execute_with_enhancements", return_value=captures) as execute:
+            result = await client.run_advanced_visual_regression("session-1", ["/"], base_commit="base")
+
+        assert execute.call_count == 1
+        assert result["differences_found"] == 0
+        assert result["skipped_unchanged"] == 1